@@ -1,12 +1,34 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from remitai.backend.api.v1.schemas.nlp_schemas import NLPParseRequest, NLPParseResponse
-from remitai.backend.services.nlp_service import NLPIntentParser
+from fastapi import APIRouter, HTTPException, status, Depends, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from remitai.backend.api.v1.schemas.nlp_schemas import (
+    NLPParseRequest,
+    NLPParseResponse,
+    NLPBatchParseRequest,
+    NLPBatchParseResponse,
+    NLPStreamFragment,
+    TranslationCacheStatsResponse
+)
+from remitai.backend.services.nlp_service import NLPIntentParser, TRANSLATION_CACHE
+from remitai.backend.services.streaming_parser import StreamingIntentSession
 
 router = APIRouter()
 
+# The parser holds no per-request state, so one instance is shared by all requests.
+nlp_parser = NLPIntentParser()
+
 # Dependency for NLPIntentParser service
 def get_nlp_service():
-    return NLPIntentParser()
+    return nlp_parser
+
+def _to_parse_response(user_id: str, text: str, parsed_result: dict) -> NLPParseResponse:
+    return NLPParseResponse(
+        user_id=user_id,
+        original_text=parsed_result.get("original_text", text),
+        language_detected=parsed_result.get("detected_language"),
+        translated_text=parsed_result.get("parsed_text_language") if parsed_result.get("parsed_text_language") != parsed_result.get("detected_language") else None,
+        intent=parsed_result.get("intent", "payment"), # Filled by the intent classifier
+        parsed_data=parsed_result
+    )
 
 @router.post("/parse-intent", response_model=NLPParseResponse)
 async def parse_intent_endpoint(
@@ -19,16 +41,9 @@ async def parse_intent_endpoint(
         # For now, passing None or a mock value if not directly in request_data
         # The NLPParseRequest schema doesn't have sender_country_code, so it's not passed from client directly here.
         # This might need adjustment based on how sender_country_code is determined.
-        parsed_result = service.parse_intent(text=request_data.text, sender_country_code=None) # Or fetch from user profile based on user_id
-
-        return NLPParseResponse(
-            user_id=request_data.user_id,
-            original_text=parsed_result.get("original_text", request_data.text),
-            language_detected=parsed_result.get("detected_language"),
-            translated_text=parsed_result.get("parsed_text_language") if parsed_result.get("parsed_text_language") != parsed_result.get("detected_language") else None,
-            intent=parsed_result.get("intent", "payment"), # Defaulting intent for now
-            parsed_data=parsed_result
-        )
+        parsed_result = await service.parse_intent_async(text=request_data.text, sender_country_code=None) # Or fetch from user profile based on user_id
+
+        return _to_parse_response(request_data.user_id, request_data.text, parsed_result)
     except Exception as e:
         # Log the exception e
         print(f"[NLP ENDPOINT ERROR] {e}")
@@ -37,6 +52,76 @@ async def parse_intent_endpoint(
             detail=f"An error occurred during NLP processing: {str(e)}"
         )
 
+@router.post("/parse-intent/batch", response_model=NLPBatchParseResponse)
+async def parse_intent_batch_endpoint(
+    request_data: NLPBatchParseRequest,
+    service: NLPIntentParser = Depends(get_nlp_service)
+):
+    """Endpoint to parse many texts in one call; results keep the input order."""
+    try:
+        parsed_results = await service.parse_intents_async(request_data.texts, sender_country_code=None)
+    except Exception as e:
+        print(f"[NLP ENDPOINT ERROR] {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred during batch NLP processing: {str(e)}"
+        )
+
+    results = []
+    for text, parsed_result in zip(request_data.texts, parsed_results):
+        if "error" in parsed_result:
+            results.append(NLPParseResponse(user_id=request_data.user_id, original_text=text, error_message=parsed_result["error"]))
+        else:
+            results.append(_to_parse_response(request_data.user_id, text, parsed_result))
+    return NLPBatchParseResponse(user_id=request_data.user_id, results=results)
+
+@router.websocket("/parse-intent/stream")
+async def parse_intent_stream_endpoint(
+    websocket: WebSocket,
+    user_id: str,
+    service: NLPIntentParser = Depends(get_nlp_service)
+):
+    """WebSocket endpoint for live transcripts.
+
+    The client sends NLPStreamFragment messages; the server answers with
+    {"type": "partial", "field", "value", "revised"} as fields settle,
+    {"type": "truncated", "max_chars", "dropped_chars"} if the transcript hits its cap and, after a fragment
+    with final=true, {"type": "final", "result": NLPParseResponse}. The session then starts
+    over, so one connection can carry several commands.
+    """
+    await websocket.accept()
+    session = StreamingIntentSession(service)
+    try:
+        while True:
+            try:
+                fragment = NLPStreamFragment.parse_raw(await websocket.receive_text())
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "message": f"Invalid fragment: {e}"})
+                continue
+
+            for event in session.feed(fragment.text, replace=fragment.replace):
+                await websocket.send_json(event)
+
+            if fragment.final:
+                if not session.transcript:
+                    await websocket.send_json({"type": "error", "message": "Empty transcript"})
+                    continue
+                try:
+                    parsed_result = await service.parse_intent_async(text=session.transcript, sender_country_code=None)
+                    response = _to_parse_response(user_id, session.transcript, parsed_result)
+                    await websocket.send_json({"type": "final", "result": response.dict()})
+                except Exception as e:
+                    print(f"[NLP ENDPOINT ERROR] {e}")
+                    await websocket.send_json({"type": "error", "message": f"An error occurred during NLP processing: {str(e)}"})
+                session.reset()
+    except WebSocketDisconnect:
+        pass
+
+@router.get("/translation-cache/stats", response_model=TranslationCacheStatsResponse)
+async def translation_cache_stats_endpoint():
+    """Endpoint exposing hit/miss/eviction counters of the shared translation cache."""
+    return TranslationCacheStatsResponse(**TRANSLATION_CACHE.stats())
+
 @router.get("/nlp/test") # Original test route
 async def test_nlp():
     return {"message": "NLP endpoint test successful - new version"}
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Path, Body
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from remitai.backend.api.v1.schemas.transaction_schemas import (
     OnRampInitiateRequest,
@@ -11,12 +12,17 @@ from remitai.backend.api.v1.schemas.transaction_schemas import (
     PayoutWebhookRequest,
     PayoutWebhookResponse,
     AssessRiskRequest,
-    AssessRiskResponse
+    AssessRiskResponse,
+    FraudStateStatsResponse,
+    RiskVerdictResponse,
+    RiskPipelineStatsResponse
 )
 from remitai.backend.services.onramp_service import OnRampService
 from remitai.backend.services.offramp_service import OffRampService
 from remitai.backend.services.withdrawal_confirmation_service import WithdrawalConfirmationService
 from remitai.backend.services.fraud_detection_service import FraudDetectionService
+from remitai.backend.services.rate_provider import RATE_PROVIDER
+from remitai.backend.services.risk_pipeline import RISK_PIPELINE, RiskPipeline
 
 router = APIRouter()
 
@@ -37,12 +43,38 @@ def get_withdrawal_confirmation_service():
 def get_fraud_detection_service():
     return FraudDetectionService()
 
+def get_risk_pipeline():
+    return RISK_PIPELINE
+
+# HTTP status of each reason RiskPipeline.authorize refuses a transfer for
+RISK_REFUSAL_STATUS = {
+    "missing": status.HTTP_403_FORBIDDEN, # Never assessed, or the verdict expired: fail closed
+    "stale": status.HTTP_400_BAD_REQUEST,
+    "pending": status.HTTP_409_CONFLICT,
+    "suspicious": status.HTTP_403_FORBIDDEN,
+    "used": status.HTTP_409_CONFLICT,
+    "mismatch": status.HTTP_403_FORBIDDEN,
+}
+
+async def require_clean_risk_verdict(pipeline: RiskPipeline, user_id: str, assessment_id: Optional[str],
+                                     amount: float, currency: str, recipient_id: str):
+    """Raises unless the user's latest final fraud verdict is clean and covers this amount and recipient."""
+    try:
+        result = await run_in_threadpool(pipeline.authorize, user_id, assessment_id, amount, currency, recipient_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if "error" in result:
+        raise HTTPException(status_code=RISK_REFUSAL_STATUS[result["reason"]], detail=result["error"])
+
 @router.post("/onramp/initiate", response_model=OnRampInitiateResponse)
 async def initiate_onramp_endpoint(
     request_data: OnRampInitiateRequest,
-    service: OnRampService = Depends(get_onramp_service)
+    service: OnRampService = Depends(get_onramp_service),
+    pipeline: RiskPipeline = Depends(get_risk_pipeline)
 ):
     """Endpoint to initiate an on-ramp (buy USDC) transaction."""
+    await require_clean_risk_verdict(pipeline, request_data.user_id, request_data.risk_assessment_id,
+                                     request_data.fiat_amount, request_data.fiat_currency, request_data.recipient_id)
     # Mock recipient address for USDC, in a real app this would be the user's smart wallet
     mock_recipient_usdc_address = f"USER_SMART_WALLET_ADDRESS_FOR_{request_data.user_id}"
     # Mock payment method, could be part of request or selected by user
@@ -84,9 +116,12 @@ async def get_onramp_status_endpoint(
 @router.post("/offramp/initiate", response_model=OffRampInitiateResponse)
 async def initiate_offramp_endpoint(
     request_data: OffRampInitiateRequest,
-    service: OffRampService = Depends(get_offramp_service)
+    service: OffRampService = Depends(get_offramp_service),
+    pipeline: RiskPipeline = Depends(get_risk_pipeline)
 ):
     """Endpoint to initiate an off-ramp (sell USDC for fiat) transaction."""
+    await require_clean_risk_verdict(pipeline, request_data.user_id, request_data.risk_assessment_id,
+                                     request_data.usdc_amount, "USDC", request_data.recipient_id)
     # Mock sender wallet address (user's smart wallet)
     mock_sender_usdc_address = f"USER_SMART_WALLET_ADDRESS_FOR_{request_data.user_id}"
     # Mock payout method, should ideally come from user selection or request
@@ -161,19 +196,47 @@ async def payout_status_webhook_endpoint(
     return PayoutWebhookResponse(status="acknowledged")
 
 @router.post("/assess-risk", response_model=AssessRiskResponse)
-async def assess_transaction_risk_endpoint(
+def assess_transaction_risk_endpoint( # Sync: runs in the threadpool, the checks may block on the shared state backend
     request_data: AssessRiskRequest,
-    service: FraudDetectionService = Depends(get_fraud_detection_service)
+    pipeline: RiskPipeline = Depends(get_risk_pipeline)
 ):
-    """Endpoint to assess the fraud risk of a potential transaction."""
-    result = service.assess_transaction_risk(
+    """Endpoint to assess the fraud risk of a potential transaction.
+
+    Returns the provisional verdict of the fast checks; deeper checks finish in the background
+    and their final verdict is what the initiate endpoints consult.
+    """
+    if RATE_PROVIDER.rate(request_data.currency, "USD") is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported currency {request_data.currency}")
+    result = pipeline.assess(
         user_id=request_data.user_id,
         command_text=request_data.command_text,
         amount=request_data.amount,
-        recipient_id=request_data.recipient_id
+        recipient_id=request_data.recipient_id,
+        currency=request_data.currency
     )
     return AssessRiskResponse(**result)
 
+@router.get("/fraud/state-stats", response_model=FraudStateStatsResponse)
+async def fraud_state_stats_endpoint(service: FraudDetectionService = Depends(get_fraud_detection_service)):
+    """Endpoint exposing the fraud state backend, its tracked users and approximate size (plus evictions when in-process)."""
+    return FraudStateStatsResponse(**service.state_stats())
+
+@router.get("/fraud/verdict/{assessment_id}", response_model=RiskVerdictResponse)
+async def risk_verdict_endpoint(
+    assessment_id: str = Path(..., title="The assessment_id returned by /assess-risk"),
+    pipeline: RiskPipeline = Depends(get_risk_pipeline)
+):
+    """Endpoint returning the final verdict of an assessment, or its provisional one while deep checks run."""
+    verdict = pipeline.verdict(assessment_id)
+    if verdict is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired risk assessment")
+    return RiskVerdictResponse(**verdict)
+
+@router.get("/fraud/pipeline-stats", response_model=RiskPipelineStatsResponse)
+async def risk_pipeline_stats_endpoint(pipeline: RiskPipeline = Depends(get_risk_pipeline)):
+    """Endpoint exposing the deep-check queue depth, verdict counts and per-tier latency percentiles."""
+    return RiskPipelineStatsResponse(**pipeline.stats())
+
 
 @router.get("/transactions/test") # Original test route
 async def test_transactions():
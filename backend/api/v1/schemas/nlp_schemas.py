@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class NLPParseRequest(BaseModel):
     user_id: str = Field(..., example="user_nlp_test_001")
@@ -11,7 +11,32 @@ class NLPParseResponse(BaseModel):
     original_text: str
     language_detected: Optional[str] = None
     translated_text: Optional[str] = None
-    intent: Optional[str] = None # e.g., "payment", "balance_inquiry"
+    intent: Optional[str] = None # "payment", "balance_inquiry", "vault_creation", "withdrawal", "transaction_history" or "rate_check"
     parsed_data: Optional[Dict[str, Any]] = None # e.g., {"amount": 100, "currency": "KES", ...}
     error_message: Optional[str] = None
 
+class NLPBatchParseRequest(BaseModel):
+    user_id: str = Field(..., example="user_nlp_test_001")
+    texts: List[str] = Field(..., min_items=1, max_items=1000, example=["Send 100 KES to John Doe", "Fi 30000 Naira ranṣẹ si Amina ni Kenya"])
+
+class NLPBatchParseResponse(BaseModel):
+    user_id: str
+    results: List[NLPParseResponse] # Same order as the request texts; failed items carry error_message
+
+class NLPStreamFragment(BaseModel):
+    # One WebSocket message from the client while the user is speaking
+    text: str = Field("", example="send 30,000 naira")
+    replace: bool = False # True if text is the whole transcript so far rather than a new fragment
+    final: bool = False # True once the user has stopped speaking
+
+
+class TranslationCacheStatsResponse(BaseModel):
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    template_fallbacks: int
+    memory_entries: int
+    max_memory_entries: int
+    hit_rate: float
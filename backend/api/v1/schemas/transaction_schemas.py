@@ -5,7 +5,9 @@ class OnRampInitiateRequest(BaseModel):
     user_id: str = Field(..., example="user_tx_test_001")
     fiat_amount: float = Field(..., gt=0, example=100.0)
     fiat_currency: str = Field(..., example="KES")
+    recipient_id: str = Field(..., example="user_tx_test_001", description="The recipient_id given to /assess-risk")
     provider: Optional[str] = Field(None, example="mock_provider_A")
+    risk_assessment_id: Optional[str] = Field(None, description="From /assess-risk; must be the user's latest assessment")
 
 class OnRampInitiateResponse(BaseModel):
     success: bool
@@ -25,7 +27,9 @@ class OffRampInitiateRequest(BaseModel):
     usdc_amount: float = Field(..., gt=0, example=50.0)
     target_currency: str = Field(..., example="NGN")
     recipient_details: Dict[str, Any] = Field(..., example={"account_number": "0123456789", "bank_code": "058"})
+    recipient_id: str = Field(..., example="john_doe_0123456789", description="The recipient_id given to /assess-risk")
     provider: Optional[str] = Field(None, example="mock_provider_B")
+    risk_assessment_id: Optional[str] = Field(None, description="From /assess-risk; must be the user's latest assessment")
 
 class OffRampInitiateResponse(BaseModel):
     success: bool
@@ -54,6 +58,7 @@ class AssessRiskRequest(BaseModel):
     user_id: str = Field(..., example="user_risk_test_001")
     command_text: str = Field(..., example="Send 5000 KES to Bob")
     amount: float = Field(..., ge=0, example=5000.0)
+    currency: str = Field(..., example="KES", description="Currency of amount; the fraud rules compare its USD value")
     recipient_id: str = Field(..., example="bob_user_id")
 
 class AssessRiskResponse(BaseModel):
@@ -61,5 +66,57 @@ class AssessRiskResponse(BaseModel):
     is_suspicious: bool
     risk_score: int
     reasons: list[str]
+    matched_rules: list[str] = [] # Names of the matching rules in fraud_rules.json
     timestamp: float
+    assessment_id: Optional[str] = None # Look up the final verdict with /fraud/verdict/{assessment_id}
+    status: Literal["provisional", "pending", "final"] = "provisional"
+
+class RiskVerdictResponse(AssessRiskResponse):
+    provisional_risk_score: Optional[int] = None # Fast tier only; set once final
+    deep_checks_skipped: bool = False
+
+class RiskLatencyStats(BaseModel):
+    count: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+class RiskPipelineStatsResponse(BaseModel):
+    queue_depth: int
+    queue_capacity: int
+    workers: int
+    tracked_verdicts: int
+    pending_verdicts: int
+    submitted: int
+    finalized: int
+    fast_deadline_ms: float
+    fast_deadline_overruns: int
+    deep_skipped_queue_full: int
+    deep_check_errors: int
+    fast_tier_errors: int
+    fast_tier: RiskLatencyStats
+    deep_tier: RiskLatencyStats
+    end_to_end: RiskLatencyStats
+
+class FraudStateStoreStats(BaseModel):
+    created: int
+    evicted_idle: int
+    evicted_lru: int
+    evicted_budget: int
+    tracked_users: int
+    approx_bytes: int
+    max_users: int
+    max_bytes: int
+
+class FraudStateStatsResponse(BaseModel):
+    backend: Literal["in_process", "sqlite"]
+    command_history: Optional[FraudStateStoreStats] = None # In-process backend only
+    transaction_patterns: Optional[FraudStateStoreStats] = None # In-process backend only
+    amount_profiles: Optional[FraudStateStoreStats] = None # In-process backend only
+    recipient_amounts: Optional[FraudStateStoreStats] = None # In-process backend only; keyed by recipient
+    recipient_senders: Optional[FraudStateStoreStats] = None # In-process backend only; keyed by recipient
+    db_path: Optional[str] = None # SQLite backend only
+    tracked_users: int
+    approx_bytes: int
 
@@ -0,0 +1,64 @@
+"""Memory, update cost and accuracy of the streaming amount statistics.
+
+Feeds one user's amounts (log-normal, as remittance amounts roughly are) into an
+AmountProfile in steps up to a long history and reports at each step the profile's
+size in memory and packed for SQLite, the cost per observe(), the Welford mean/std
+against a two-pass computation and the sketch's p50/p95 against the exact quantiles.
+Passes when the size never changes, Welford matches to 1e-9 relative and the sketch
+quantiles stay within the bucket error (sqrt(AMOUNT_SKETCH_GAMMA) - 1).
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_amount_stats [--amounts N]
+"""
+
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+
+from remitai.backend.services.amount_stats import AMOUNT_SKETCH_GAMMA, AmountProfile
+
+
+def exact_quantile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--amounts", type=int, default=200000)
+    args = parser.parse_args()
+    total = args.amounts
+    rng = random.Random(11)
+    profile = AmountProfile()
+    amounts = []
+    sizes, passed = set(), True
+    clock = 1_700_000_000.0
+    step = 10
+    bound = math.sqrt(AMOUNT_SKETCH_GAMMA) - 1
+    print(f"{'amounts':>9}{'bytes':>7}{'packed':>8}{'us/obs':>8}{'mean err':>10}{'std err':>10}"
+          f"{'p50 err':>9}{'p95 err':>9}")
+    while len(amounts) < total:
+        batch = [round(rng.lognormvariate(4, 0.8), 2) for _ in range(min(step, total) - len(amounts))]
+        started = time.perf_counter()
+        for amount in batch:
+            clock += rng.expovariate(1 / 3600)
+            profile.observe(amount, clock)
+        per_observe = (time.perf_counter() - started) / len(batch) * 1e6
+        amounts += batch
+        mean_error = abs(profile.stats.mean - statistics.fmean(amounts)) / statistics.fmean(amounts)
+        std_error = abs(profile.stats.std - statistics.stdev(amounts)) / statistics.stdev(amounts)
+        # The sketch halves its counts as it fills, so compare with the amounts it still weighs most
+        recent = amounts[-60000:]
+        quantile_errors = [abs(profile.sketch.quantile(q) / exact_quantile(recent, q) - 1) for q in (0.5, 0.95)]
+        sizes.add((profile.approx_bytes(), len(profile.to_bytes())))
+        passed &= mean_error < 1e-9 and std_error < 1e-9 and max(quantile_errors) < bound
+        print(f"{len(amounts):>9}{profile.approx_bytes():>7}{len(profile.to_bytes()):>8}{per_observe:>8.2f}"
+              f"{mean_error:>10.1e}{std_error:>10.1e}{quantile_errors[0]:>9.1%}{quantile_errors[1]:>9.1%}")
+        step *= 10
+    passed &= len(sizes) == 1
+    print(f"{'PASS' if passed else 'FAIL'}: profile size {'constant' if len(sizes) == 1 else 'changed'} {sorted(sizes)}, "
+          f"sketch error bound {bound:.0%}")
+    sys.exit(0 if passed else 1)
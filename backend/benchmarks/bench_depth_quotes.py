@@ -0,0 +1,119 @@
+"""Accuracy and cost of amount-aware P2P quotes from cached order-book depth.
+
+A fake Binance serves --ads NGN/USDC ads (prices rising away from the best, quantities
+mostly small with a few large merchants, per-order fiat limits) in pages, and
+ExchangeRateUtil quotes through a RateCache on top of it:
+  1. Top-of-book rate vs the volume-weighted quote for orders from 10,000 to 10,000,000 NGN.
+  2. --amounts random amounts quoted one at a time by walking the ads in Python and with
+     one vectorized quote_p2p call; both must agree.
+  3. Upstream calls made while quoting: only the refresh's pages, none per quote.
+Passes when the quotes match the reference walk, the vectorized call is at least 50x
+faster than the walk and quoting made no upstream calls of its own.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_depth_quotes [--ads N] [--amounts N]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import threading
+import time
+
+import numpy as np
+
+from remitai.backend.utils.exchange_rates import BINANCE_P2P_ROWS_PER_PAGE, ExchangeRateUtil, RateCache
+from remitai.backend.utils.order_book import OrderBookSnapshot
+
+
+def fake_ads(count: int, rng) -> list:
+    """Binance-shaped BUY ads for USDC in NGN, best (cheapest) first."""
+    prices = 1530.0 * np.cumprod(1 + rng.uniform(0, 0.0015, count))
+    surplus = np.where(rng.random(count) < 0.1, rng.uniform(5000, 40000, count), rng.uniform(20, 800, count))
+    max_fiat = np.where(rng.random(count) < 0.5, rng.uniform(2e5, 5e7, count), 0.0)
+    return [{"adv": {"price": f"{p:.2f}", "surplusAmount": f"{q:.2f}", "maxSingleTransAmount": f"{m:.2f}"}}
+            for p, q, m in zip(prices, surplus, max_fiat)]
+
+
+class FakeBinance:
+    """Counts page requests and builds the depth snapshot from paged ads."""
+
+    def __init__(self, ads: list):
+        self.ads = ads
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, fiat_currency: str, asset: str, trade_type: str) -> OrderBookSnapshot:
+        pages = -(-len(self.ads) // BINANCE_P2P_ROWS_PER_PAGE)
+        with self._lock:
+            self.pages += pages
+        return OrderBookSnapshot.from_binance_ads(self.ads, trade_type)
+
+
+def walk(ads: list, fiat_amount: float):
+    """Reference: USDC received for fiat_amount, filling the ads in order (None if the book is too thin)."""
+    remaining, usdc = fiat_amount, 0.0
+    for ad in ads:
+        price = float(ad["adv"]["price"])
+        quantity = float(ad["adv"]["surplusAmount"])
+        max_fiat = float(ad["adv"]["maxSingleTransAmount"])
+        if max_fiat > 0:
+            quantity = min(quantity, max_fiat / price)
+        take = min(remaining, quantity * price)
+        usdc += take / price
+        remaining -= take
+        if remaining <= 0:
+            return usdc
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ads", type=int, default=100)
+    parser.add_argument("--amounts", type=int, default=100000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(25)
+    ads = fake_ads(args.ads, rng)
+    upstream = FakeBinance(ads)
+    util = ExchangeRateUtil(rate_cache=RateCache(fetch=upstream))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        top = util.get_live_fx_rate_binance_p2p("NGN", "USDC", "BUY")
+        refresh_pages = upstream.pages
+        orders = [1e4, 1e5, 1e6, 1e7]
+        quotes = util.quote_p2p("NGN", orders, "USDC", "BUY")
+    book = util.rate_cache.get(("NGN", "USDC", "BUY"))
+    print(f"--- {len(book)} ads, {book.depth_notional:,.0f} NGN / {book.depth_quantity:,.0f} USDC deep ---")
+    print(f"{'order NGN':>12}{'top of book':>13}{'VWAP':>10}{'worst ad':>10}{'ads':>5}{'USDC':>12}{'vs top':>9}")
+    for i, order in enumerate(orders):
+        print(f"{order:>12,.0f}{top:>13.2f}{quotes['average_price'][i]:>10.2f}{quotes['worst_price'][i]:>10.2f}"
+              f"{quotes['levels'][i]:>5}{quotes['quantity'][i]:>12,.2f}{quotes['average_price'][i] / top - 1:>9.2%}")
+
+    amounts = rng.uniform(1e3, book.depth_notional, args.amounts)
+    started = time.perf_counter()
+    reference = np.array([walk(ads, amount) for amount in amounts.tolist()])
+    walk_seconds = time.perf_counter() - started
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        vectorized = util.quote_p2p("NGN", amounts, "USDC", "BUY")
+        vector_seconds = time.perf_counter() - started
+        single_runs = 2000
+        started = time.perf_counter()
+        for amount in amounts[:single_runs].tolist():
+            util.quote_p2p("NGN", amount, "USDC", "BUY")
+        single_micros = (time.perf_counter() - started) / single_runs * 1e6
+    same = bool(np.allclose(vectorized["quantity"], reference, rtol=1e-9, atol=0) and vectorized["fully_filled"].all())
+    speedup = walk_seconds / vector_seconds
+    quote_pages = upstream.pages - refresh_pages
+    print(f"\n{args.amounts} amounts")
+    print(f"walk per amount    : {walk_seconds:.3f} s ({args.amounts / walk_seconds:,.0f}/s)")
+    print(f"quote_p2p array    : {vector_seconds * 1e3:.1f} ms ({args.amounts / vector_seconds:,.0f}/s), {speedup:.0f}x, "
+          f"results {'match' if same else 'differ'}")
+    print(f"quote_p2p single   : {single_micros:.1f} us")
+    print(f"upstream pages     : {refresh_pages} for the refresh, {quote_pages} while quoting")
+
+    passed = same and speedup >= 50 and quote_pages == 0
+    print(f"{'PASS' if passed else 'FAIL'}: quotes {'match' if same else 'differ'}, {speedup:.0f}x the per-amount walk, "
+          f"{quote_pages} upstream calls while quoting")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,151 @@
+"""Precision/recall and latency of near-duplicate command detection.
+
+Builds labelled command pairs: rephrasings of the same command (case, spacing,
+punctuation, filler words, word order of fillers, one-letter transcription slips) are
+duplicates; the same command with a different amount, recipient, currency or action is
+not. For the configured DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE and a sweep of other
+thresholds it reports precision and recall of the SimHash signatures, next to the
+previous exact-match check and a pairwise edit-distance ratio (difflib). Latency is per
+signature and per history check (10 stored commands).
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_duplicate_detection [--pairs N]
+"""
+
+import argparse
+import difflib
+import random
+import statistics
+import time
+
+from remitai.backend.services.command_signature import (
+    are_near_duplicates, command_signature, max_hamming_distance, signature_similarity,
+)
+from remitai.backend.services.fraud_detection_service import DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE
+
+VERBS = ["Send", "Transfer", "Pay"]
+NAMES = ["John", "Amina", "Kofi", "Maria", "Tunde", "Fatima", "Jean Paul", "Wanjiru", "Chidi", "Musa"]
+CURRENCIES = ["USD", "naira", "KES", "cedis", "rand", "euros"]
+COUNTRIES = ["", " in Kenya", " in Ghana", " in Nigeria"]
+FILLERS = ["pls", "please", "now", "asap", "kindly"]
+OTHER_ACTIONS = ["Check my balance", "Show my last transactions", "Withdraw {amount} {currency}"]
+
+
+def base_command(rng):
+    return {"verb": rng.choice(VERBS), "amount": rng.choice([5, 10, 20, 50, 100, 250, 500, 1000, 5000]),
+            "currency": rng.choice(CURRENCIES), "name": rng.choice(NAMES), "country": rng.choice(COUNTRIES)}
+
+
+def render(parts):
+    return f"{parts['verb']} {parts['amount']} {parts['currency']} to {parts['name']}{parts['country']}"
+
+
+def slip(rng, text):
+    """One transcription slip in a non-digit letter (swap with its neighbour or drop it)."""
+    positions = [i for i in range(1, len(text) - 1) if text[i].isalpha() and text[i + 1].isalpha()]
+    i = rng.choice(positions)
+    if rng.random() < 0.5:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text[:i] + text[i + 1:]
+
+
+def duplicate_variant(rng, parts):
+    text = render(parts)
+    kind = rng.choice(["case", "spacing", "punctuation", "filler_suffix", "filler_prefix", "slip"])
+    if kind == "case":
+        return kind, text.lower() if rng.random() < 0.5 else text.upper()
+    if kind == "spacing":
+        return kind, "  ".join(text.split()) + " "
+    if kind == "punctuation":
+        return kind, text + rng.choice([".", "!", "?", " ..."])
+    if kind == "filler_suffix":
+        return kind, f"{text} {rng.choice(FILLERS)}"
+    if kind == "filler_prefix":
+        return kind, f"{rng.choice(FILLERS).capitalize()} {text[0].lower()}{text[1:]}"
+    return kind, slip(rng, text)
+
+
+def distinct_variant(rng, parts):
+    changed = dict(parts)
+    kind = rng.choice(["amount", "recipient", "currency", "action"])
+    if kind == "amount":
+        changed["amount"] = parts["amount"] * rng.choice([2, 10]) + rng.choice([0, 5])
+    elif kind == "recipient":
+        changed["name"] = rng.choice([n for n in NAMES if n != parts["name"]])
+    elif kind == "currency":
+        changed["currency"] = rng.choice([c for c in CURRENCIES if c != parts["currency"]])
+    else:
+        return kind, rng.choice(OTHER_ACTIONS).format(**parts)
+    return kind, render(changed)
+
+
+def labelled_pairs(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        parts = base_command(rng)
+        kind, variant = duplicate_variant(rng, parts) if i % 2 == 0 else distinct_variant(rng, parts)
+        pairs.append((render(parts), variant, i % 2 == 0, kind))
+    return pairs
+
+
+def scores(predictions, labels):
+    tp = sum(p and l for p, l in zip(predictions, labels))
+    fp = sum(p and not l for p, l in zip(predictions, labels))
+    fn = sum(l and not p for p, l in zip(predictions, labels))
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    return precision, recall
+
+
+def per_us(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=4000)
+    args = parser.parse_args()
+    pair_count = args.pairs
+    pairs = labelled_pairs(pair_count)
+    labels = [is_duplicate for _, _, is_duplicate, _ in pairs]
+    signatures = [(command_signature(a), command_signature(b)) for a, b, _, _ in pairs]
+    similarities = [signature_similarity(a, b) for a, b in signatures]
+    ratios = [difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio() for a, b, _, _ in pairs]
+    exact = [a.strip().lower() == b.strip().lower() for a, b, _, _ in pairs]
+
+    print(f"--- {len(pairs)} labelled pairs ({sum(labels)} duplicates) ---")
+    print(f"{'method':<34}{'precision':>10}{'recall':>8}")
+    print(f"{'exact lower-case match (previous)':<34}{scores(exact, labels)[0]:>10.1%}{scores(exact, labels)[1]:>8.1%}")
+    for threshold in (0.80, 0.85, DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE, 0.95, 0.98):
+        distance = max_hamming_distance(threshold)
+        predictions = [are_near_duplicates(a, b, distance) for a, b in signatures]
+        precision, recall = scores(predictions, labels)
+        marker = "  <- configured" if threshold == DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE else ""
+        print(f"{f'simhash >= {threshold:.2f} (<= {distance} bits)':<34}{precision:>10.1%}{recall:>8.1%}{marker}")
+    for threshold in (0.85, 0.9):
+        precision, recall = scores([r >= threshold for r in ratios], labels)
+        print(f"{f'difflib ratio >= {threshold:.2f}':<34}{precision:>10.1%}{recall:>8.1%}")
+
+    distance = max_hamming_distance(DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE)
+    print(f"\nRecall / false-positive rate by variant at {DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE}:")
+    kinds = sorted({kind for _, _, _, kind in pairs})
+    for kind in kinds:
+        rows = [(are_near_duplicates(a, b, distance), label) for (a, b), (_, _, label, k) in zip(signatures, pairs) if k == kind]
+        rate = sum(predicted for predicted, _ in rows) / len(rows)
+        print(f"  {kind:<15}{'duplicate' if rows[0][1] else 'distinct':<11}{rate:>7.1%} flagged ({len(rows)} pairs)")
+
+    command, history_texts = pairs[0][0], [b for _, b, _, _ in pairs[1:11]]
+    history = [command_signature(text) for text in history_texts]
+    signature = command_signature(command)
+    uncached = [f"{text} #{i}" for i, text in enumerate(a for a, _, _, _ in pairs)]
+    print("\nLatency:")
+    print(f"  signature (cached trigrams)   : {per_us(lambda: command_signature(command), 2000):7.1f} us")
+    cold = statistics.fmean(per_us(lambda t=t: command_signature(t), 1) for t in uncached[:500])
+    print(f"  signature (new command)       : {cold:7.1f} us")
+    print(f"  history check, 10 signatures  : {per_us(lambda: [are_near_duplicates(signature, h, distance) for h in history], 5000):7.2f} us")
+    print(f"  history check, difflib x10    : "
+          f"{per_us(lambda: [difflib.SequenceMatcher(None, command, t).ratio() for t in history_texts], 500):7.1f} us")
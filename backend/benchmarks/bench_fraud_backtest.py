@@ -0,0 +1,94 @@
+"""Throughput, memory and online parity of the fraud backtesting engine.
+
+Writes a synthetic JSONL transaction log (a long tail of occasional users, some heavy
+users, bursts of low-value spam and repeated voice commands), backtests it with the
+default threshold grid, and reports events per second, peak RSS and the projected time
+for larger logs. The first rows are also replayed through FraudDetectionService to check
+that the backtest flags exactly the same transactions.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_fraud_backtest [--events N] [--chunk-events N]
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from remitai.backend.services.fraud_backtest import (
+    BACKTEST_CHUNK_EVENTS, DEFAULT_LOW_VALUE, DEFAULT_MAX_RECIPIENTS, DEFAULT_MAX_TRANSACTIONS, BacktestReport, backtest, read_events,
+    verify_against_service,
+)
+
+EVENTS_PER_SECOND = 400
+VERIFY_ROWS = 50000
+COMMANDS = ["Send {amount} USD to {name}", "send {amount} usd to {name} pls", "Transfer {amount} naira to {name} now",
+            "Pay {amount} cedis to {name}", "Send {amount} KES to {name} in Kenya"]
+NAMES = ["John", "Amina", "Kofi", "Maria", "Tunde", "Fatima", "Chidi", "Wanjiru"]
+
+
+def write_log(path: str, events: int, seed: int = 5):
+    rng = random.Random(seed)
+    clock = 1_700_000_000.0
+    burst = None # (user, remaining) for a spam burst in progress
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(events):
+            clock += rng.expovariate(EVENTS_PER_SECOND)
+            if burst is None and rng.random() < 0.002:
+                burst = (f"spammer_{rng.randrange(10**6)}", rng.randrange(5, 30))
+            if burst is not None:
+                user, remaining = burst
+                amount, recipient = rng.choice([0.1, 0.5, 0.99, 5.0]), f"victim_{rng.randrange(40)}"
+                burst = (user, remaining - 1) if remaining > 1 else None
+            else:
+                user = f"heavy_{rng.randrange(5000)}" if rng.random() < 0.2 else f"user_{rng.randrange(200000)}"
+                amount, recipient = round(rng.lognormvariate(3.5, 1.2), 2), f"{user}_r{rng.randrange(25)}"
+            text = rng.choice(COMMANDS).format(amount=rng.choice([10, 20, 50, 100]), name=rng.choice(NAMES))
+            f.write(json.dumps({"user_id": user, "timestamp": round(clock, 6), "amount": amount,
+                                "recipient_id": recipient, "command_text": text}) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000000)
+    parser.add_argument("--chunk-events", type=int, default=BACKTEST_CHUNK_EVENTS)
+    args = parser.parse_args()
+    event_count, chunk_events = args.events, args.chunk_events
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "transactions.jsonl")
+        started = time.perf_counter()
+        write_log(path, event_count)
+        print(f"generated {event_count} events ({os.path.getsize(path) / 2**20:.0f} MB) in {time.perf_counter() - started:.1f} s")
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        report = backtest(read_events(path), BacktestReport(DEFAULT_MAX_TRANSACTIONS, DEFAULT_MAX_RECIPIENTS, DEFAULT_LOW_VALUE),
+                          chunk_events)
+        elapsed = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        rows = []
+        for row in read_events(path):
+            rows.append(row)
+            if len(rows) == VERIFY_ROWS:
+                break
+        verification = verify_against_service(rows)
+
+    result = report.to_dict()
+    rate = report.events / elapsed
+    print(f"--- backtest, {len(result['sweep'])} threshold combinations, chunks of {chunk_events} ---")
+    print(f"throughput         : {rate:,.0f} events/s ({elapsed:.1f} s)")
+    print(f"projected          : 10M events in {10**7 / rate / 60:.1f} min, 50M in {5 * 10**7 / rate / 60:.1f} min")
+    print(f"peak RSS           : {rss_after / 1024:.0f} MB (before backtest {rss_before / 1024:.0f} MB)")
+    print(f"configured rates   : {result['configured']['flag_rates']}")
+    print(f"online parity      : {verification}")
+    print("sweep (lowest flag rates):")
+    for row in sorted(result["sweep"], key=lambda r: r["flag_rate"])[:5]:
+        print(f"  {row}")
+    ok = not any(verification[f"{group}_mismatches"] for group in ("spam", "duplicate", "amount", "mule"))
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
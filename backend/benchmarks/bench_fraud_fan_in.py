@@ -0,0 +1,130 @@
+"""Cost, accuracy and detection rate of the recipient fan-in (mule) index.
+
+1. Update + lookup cost of record_fan_in on the in-process backend while the index grows
+   to --edges sender->recipient edges: it must stay flat.
+2. Estimated distinct senders in the fan-in window against exact counts.
+3. Two simulated days of traffic through FraudDetectionService.check_recipient_fan_in:
+   users paying their own family recipients, shops with a steady stream of customers,
+   and on the second day --mules mule accounts that receive from 10-40 first-time
+   senders within an hour. The first day only warms the index up (right after a restart
+   every busy recipient's senders look new); the second day reports the mules caught and
+   the share of ordinary transactions flagged.
+Passes when the cost stays flat (last step under twice the first), every mule is caught
+and under 0.1% of ordinary transactions are flagged.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_fraud_fan_in [--edges N] [--mules N]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import sys
+import time
+
+from remitai.backend.services import fraud_detection_service
+from remitai.backend.services.fraud_detection_service import (
+    FAN_IN_BASELINE_WINDOW_SECONDS, FAN_IN_WINDOW_SECONDS, FraudDetectionService,
+)
+
+WINDOWS = (FAN_IN_WINDOW_SECONDS, FAN_IN_BASELINE_WINDOW_SECONDS)
+CLOCK_START = 1_700_000_000.0
+
+
+def cost_curve(edges: int, rng: random.Random):
+    """Microseconds per record_fan_in, measured at each tenfold size of the index."""
+    backend = fraud_detection_service.FRAUD_STATE_BACKEND
+    backend.clear()
+    rows, done, checkpoint = [], 0, 1000
+    clock = CLOCK_START
+    while checkpoint <= edges:
+        while done < checkpoint:
+            clock += 0.05
+            backend.record_fan_in(f"s{rng.randrange(10**6)}", f"r{rng.randrange(max(10, done // 4))}", clock, WINDOWS)
+            done += 1
+        started = time.perf_counter()
+        for _ in range(5000):
+            backend.record_fan_in(f"s{rng.randrange(10**6)}", f"r{rng.randrange(max(10, done // 4))}", clock, WINDOWS)
+        rows.append((done, len(backend.recipient_senders), (time.perf_counter() - started) / 5000 * 1e6))
+        checkpoint *= 10
+    return rows
+
+
+def accuracy(rng: random.Random):
+    """(exact, estimate) of distinct senders within the window for recipients of growing fan-in."""
+    backend = fraud_detection_service.FRAUD_STATE_BACKEND
+    backend.clear()
+    results = []
+    for fan_in in (1, 5, 10, 20, 50, 100, 200):
+        for trial in range(20):
+            recipient = f"acc_{fan_in}_{trial}"
+            for i in range(4 * fan_in): # Repeat senders: each sends about four times
+                estimate, _ = backend.record_fan_in(f"sender_{trial}_{rng.randrange(fan_in)}", recipient, CLOCK_START + i, WINDOWS)
+            results.append((fan_in, estimate))
+    return results
+
+
+def simulated_days(mules: int, rng: random.Random, days: int = 2):
+    """Transactions (time, user, recipient, is_mule_tx): ordinary traffic every day, mules on the last."""
+    events = []
+    span = days * 86400
+    for u in range(20000): # Families: each user pays one to three recipients of their own
+        for _ in range(rng.randint(1, 4) * days):
+            events.append((rng.uniform(0, span), f"user_{u}", f"user_{u}_family_{rng.randrange(3)}", False))
+    for s in range(50): # Shops: steady customers all day, some of them regulars
+        customers = rng.randint(50, 400)
+        for _ in range(customers * days):
+            events.append((rng.uniform(0, span), f"user_{rng.randrange(20000)}", f"shop_{s}", False))
+    for m in range(mules):
+        start = rng.uniform(span - 86400, span - 3600)
+        for v in range(rng.randint(10, 40)):
+            events.append((start + rng.uniform(0, 3600), f"victim_{m}_{v}", f"mule_{m}", True))
+    events.sort()
+    return events
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edges", type=int, default=1000000)
+    parser.add_argument("--mules", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(8)
+
+    print(f"{'edges':>9}{'recipients':>12}{'us/op':>8}")
+    curve = cost_curve(args.edges, rng)
+    for edges, recipients, micros in curve:
+        print(f"{edges:>9}{recipients:>12}{micros:>8.2f}")
+
+    print(f"\n{'fan-in':>7}{'mean est':>10}{'worst err':>11}")
+    estimates = accuracy(rng)
+    for fan_in in sorted({fan_in for fan_in, _ in estimates}):
+        values = [estimate for f, estimate in estimates if f == fan_in]
+        print(f"{fan_in:>7}{statistics.fmean(values):>10.1f}{max(abs(v / fan_in - 1) for v in values):>11.1%}")
+
+    fraud_detection_service.FRAUD_STATE_BACKEND.clear()
+    service = FraudDetectionService()
+    events = simulated_days(args.mules, rng)
+    caught, flagged_ordinary, ordinary = set(), 0, 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for offset, user, recipient, is_mule in events:
+            suspicious, _ = service.check_recipient_fan_in(user, recipient, CLOCK_START + offset)
+            if offset < events[-1][0] - 86400: # Warm-up day
+                continue
+            if is_mule:
+                if suspicious:
+                    caught.add(recipient)
+            else:
+                ordinary += 1
+                flagged_ordinary += suspicious
+    false_positive_rate = flagged_ordinary / ordinary
+    print(f"\n--- two simulated days: {len(events)} transactions, {args.mules} mule accounts on the second ---")
+    print(f"mules caught       : {len(caught)}/{args.mules}")
+    print(f"ordinary flagged   : {flagged_ordinary} of {ordinary} ({false_positive_rate:.3%})")
+
+    flat = curve[-1][2] < 2 * curve[0][2]
+    passed = flat and len(caught) == args.mules and false_positive_rate < 0.001
+    print(f"{'PASS' if passed else 'FAIL'}: cost {'flat' if flat else 'grows'} "
+          f"({curve[0][2]:.2f} -> {curve[-1][2]:.2f} us), {len(caught)}/{args.mules} mules, {false_positive_rate:.3%} false positives")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,148 @@
+"""Multi-worker load test for the shared fraud state backend.
+
+Builds a synthetic stream of commands and transactions (ordinary users, users repeating
+a command within the duplicate window, and spam bursts to many new recipients) with
+simulated timestamps, then runs it through FraudDetectionService three ways:
+  - single : one process with the in-process backend (the reference);
+  - split  : N worker processes, each with its own in-process backend, events handed out
+             round-robin like a load balancer would; every worker sees only part of each
+             user's activity;
+  - shared : the same N workers sharing one SQLiteFraudBackend file.
+Workers start together and are paced to the stream's order (--rate events per second
+over all workers). The run passes when the shared workers flag the same events as the
+single process (up to --tolerance disagreeing events) and the split workers show what
+is missed without a shared backend. The few disagreements left at high rates are real
+races: a worker that lags records a user's event after the next one, as it would in
+production.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_fraud_multiworker [--events N] [--workers N] [--rate R]
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from remitai.backend.services import fraud_detection_service
+from remitai.backend.services.fraud_detection_service import FraudDetectionService, sqlite_fraud_backend
+
+CLOCK_START = 1_700_000_000.0
+SIM_EVENTS_PER_SECOND = 40 # Simulated traffic; sets how many users overlap in one window
+
+
+def build_stream(events: int, seed: int = 21):
+    """(user, command, amount, recipient, timestamp) tuples in timestamp order."""
+    rng = random.Random(seed)
+    span = events / SIM_EVENTS_PER_SECOND
+    rows = []
+    while len(rows) < events:
+        user = f"user_{len(rows)}"
+        start = rng.uniform(0, span)
+        kind = rng.random()
+        if kind < 0.04: # Spam burst: many small transactions to new recipients
+            t = start
+            for j in range(rng.randint(8, 20)):
+                t += rng.uniform(1, 10)
+                rows.append((t, user, f"send {rng.randint(1, 9)} usd to {user}_r{j}", rng.choice([0.5, 5.0]), f"{user}_r{j}"))
+        elif kind < 0.12: # Repeats the same command within the duplicate window
+            command, t = f"Send {rng.randint(10, 900)} KES to Amina", start
+            for _ in range(rng.randint(2, 4)):
+                t += rng.uniform(2, 25)
+                rows.append((t, user, command, 50.0, f"{user}_amina"))
+        else:
+            t = start
+            for _ in range(rng.randint(1, 3)):
+                t += rng.uniform(20, 200)
+                recipient = f"{user}_fav{rng.randrange(3)}"
+                rows.append((t, user, f"send {rng.randint(10, 900)} usd to {recipient}", rng.uniform(10, 500), recipient))
+    rows.sort()
+    return [(user, command, amount, recipient, CLOCK_START + t) for t, user, command, amount, recipient in rows[:events]]
+
+
+def run_worker(worker: int, workers: int, stream, db_path, start_at: float, rate: float):
+    """Processes events worker, worker + workers, ...; returns [(index, duplicate, spam)] and latencies."""
+    if db_path:
+        service = FraudDetectionService(backend=sqlite_fraud_backend(db_path))
+    else:
+        fraud_detection_service.FRAUD_STATE_BACKEND.clear() # Forked copy of the parent's state
+        service = FraudDetectionService()
+    flags, latencies = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(worker, len(stream), workers):
+            user, command, amount, recipient, timestamp = stream[index]
+            wait = start_at + index / rate - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            started = time.perf_counter()
+            duplicate, _ = service.check_duplicate_command(user, command, timestamp)
+            spam, _ = service.check_spam_transaction_patterns(user, amount, recipient, timestamp)
+            latencies.append(time.perf_counter() - started)
+            flags.append((index, duplicate, spam))
+    return flags, latencies
+
+
+def run(stream, workers: int, db_path, rate: float):
+    """Flags per event in stream order, per-event latencies and wall time."""
+    start_at = time.time() + 0.5
+    if workers == 1:
+        results = [run_worker(0, 1, stream, db_path, start_at, rate)]
+    else:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            results = pool.starmap(run_worker, [(w, workers, stream, db_path, start_at, rate) for w in range(workers)])
+    elapsed = time.time() - start_at
+    flags = [None] * len(stream)
+    for worker_flags, _ in results:
+        for index, duplicate, spam in worker_flags:
+            flags[index] = (duplicate, spam)
+    return flags, [latency for _, latencies in results for latency in latencies], elapsed
+
+
+def describe(name, stream, flags, reference, latencies, elapsed):
+    duplicates = sum(d for d, _ in flags)
+    spam = sum(s for _, s in flags)
+    spam_users = {stream[i][0] for i, (_, s) in enumerate(flags) if s}
+    disagreements = sum(a != b for a, b in zip(flags, reference))
+    latencies = sorted(latencies)
+    p99 = latencies[int(0.99 * (len(latencies) - 1))] * 1e6
+    print(f"{name:<26}{duplicates:>8}{spam:>8}{len(spam_users):>11}{disagreements:>9}"
+          f"{statistics.fmean(latencies) * 1e6:>10.0f}{p99:>9.0f}{len(flags) / elapsed:>9.0f}")
+    return disagreements, duplicates + spam
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2000.0, help="Events per second over all workers")
+    parser.add_argument("--tolerance", type=float, default=0.001, help="Share of events allowed to disagree with single")
+    args = parser.parse_args()
+
+    stream = build_stream(args.events)
+    print(f"--- {len(stream)} events from {len({row[0] for row in stream})} users, {args.workers} workers, "
+          f"{args.rate:.0f} events/s ---")
+    print(f"{'run':<26}{'dup':>8}{'spam':>8}{'spam users':>11}{'differ':>9}{'mean us':>10}{'p99 us':>9}{'ev/s':>9}")
+    reference, latencies, elapsed = run(stream, 1, None, args.rate)
+    _, reference_flags = describe("single, in-process", stream, reference, reference, latencies, elapsed)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "fraud_state.sqlite3")
+        flags, latencies, elapsed = run(stream, 1, db_path, args.rate)
+        single_sqlite, _ = describe("single, sqlite", stream, flags, reference, latencies, elapsed)
+        os.remove(db_path)
+        flags, latencies, elapsed = run(stream, args.workers, None, args.rate)
+        _, split_flags = describe(f"{args.workers} workers, in-process", stream, flags, reference, latencies, elapsed)
+        flags, latencies, elapsed = run(stream, args.workers, db_path, args.rate)
+        shared, _ = describe(f"{args.workers} workers, sqlite", stream, flags, reference, latencies, elapsed)
+
+    allowed = int(args.tolerance * len(stream))
+    print(f"\nsplit workers miss {1 - split_flags / max(reference_flags, 1):.1%} of the single-process flags")
+    passed = single_sqlite == 0 and shared <= allowed
+    print(f"{'PASS' if passed else 'FAIL'}: shared workers differ on {shared} events (allowed {allowed}), "
+          f"single sqlite on {single_sqlite}")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,159 @@
+"""Latency of the compiled fraud rules and a hot-reload check under load.
+
+Builds rule sets of growing size (the shipped fraud_rules.json padded with synthetic
+groups of rules over the same features) and times CompiledRuleSet.evaluate on feature
+vectors that match nothing and that match the shipped rules, next to an interpreter that
+walks the parsed conditions per request. Then several threads evaluate the rules of a
+FraudRuleEngine (reload_interval 0) in a loop while the rule file is rewritten with
+os.replace; every evaluation must see one complete rule set (its matches agree with
+that set's threshold) and every rewrite must be picked up.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_fraud_rules [--rules N [N ...]]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from remitai.backend.services.fraud_detection_service import FRAUD_REASON_CONTEXT
+from remitai.backend.services.fraud_rules import (
+    _OPERATORS, DEFAULT_FRAUD_RULES_PATH, FRAUD_FEATURES, FraudRuleEngine, compile_rules, parse_rules,
+)
+
+CLEAN = {"similar_commands": 1, "transactions_in_window": 2, "recipients_in_window": 1, "amount": 120.0,
+         "amount_history": 30, "amount_zscore": 0.4, "amount_to_p95": 0.8, "user_amount_1h": 120.0,
+         "recipient_amount_1h": 300.0, "recipient_senders_1h": 1, "recipient_senders_24h": 4,
+         "recipient_senders_1h_share": 0.25}
+FLAGGED = {"similar_commands": 3, "transactions_in_window": 12, "recipients_in_window": 7, "amount": 0.5,
+           "amount_history": 30, "amount_zscore": 12.0, "amount_to_p95": 15.0, "user_amount_1h": 12000.0,
+           "recipient_amount_1h": 60000.0, "recipient_senders_1h": 9, "recipient_senders_24h": 10,
+           "recipient_senders_1h_share": 0.9}
+
+
+def padded_document(total_rules: int, seed: int = 9) -> dict:
+    """The shipped rules plus synthetic groups of four rules until total_rules."""
+    with open(DEFAULT_FRAUD_RULES_PATH, encoding="utf-8") as f:
+        document = json.load(f)
+    rng = random.Random(seed)
+    count = sum(len(group["rules"]) for group in document["groups"])
+    g = 0
+    while count < total_rules:
+        rules = []
+        for r in range(min(4, total_rules - count)):
+            when = [{"feature": rng.choice(FRAUD_FEATURES[:3]), "op": ">", "value": rng.randint(20, 60)}]
+            if rng.random() < 0.5:
+                when.append({"feature": "amount", "op": rng.choice(["<", ">="]), "value": float(rng.choice([0.5, 1000, 5000]))})
+            rules.append({"name": f"synthetic_{g}_{r}", "weight": rng.choice([5, 10, 20]), "when": when,
+                          "reason": "Synthetic rule {transactions_in_window}"})
+        document["groups"].append({"name": f"synthetic_{g}", "rules": rules})
+        count += len(rules)
+        g += 1
+    return document
+
+
+def interpret(rules, features):
+    """Per-request walk over the parsed rules (what the compiler saves)."""
+    score, reasons, group, matched_group = 0, [], None, False
+    for rule in rules:
+        if rule.group != group:
+            group, matched_group = rule.group, False
+        if matched_group:
+            continue
+        if all(_OPERATORS[c.op](features[c.feature], c.value) for c in rule.conditions):
+            matched_group = True
+            score += rule.weight
+            reasons.append(rule.reason.format_map(dict(FRAUD_REASON_CONTEXT, **features)))
+    return score, reasons
+
+
+def per_us(fn, repeat: int = 20000) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def hot_reload_check(threads: int = 8, rewrites: int = 20) -> dict:
+    """Rewrites the rule file while threads evaluate; returns counts of evaluations, reloads and torn reads."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rules.json")
+
+        def write(threshold: int):
+            document = padded_document(24)
+            document["version"] = str(threshold)
+            document["groups"][1]["rules"][0]["when"][0]["value"] = threshold # high_transaction_frequency
+            temporary = path + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(document, f)
+            os.replace(temporary, path) # Readers see the old or the new file, never half of one
+
+        write(10)
+        engine = FraudRuleEngine(path, reload_interval=0)
+        stop = threading.Event()
+        counts = {"evaluations": 0, "torn": 0}
+        seen_versions = set()
+
+        def evaluate():
+            evaluations = torn = 0
+            while not stop.is_set():
+                rules = engine.current()
+                threshold = int(rules.version)
+                features = dict(FLAGGED, transactions_in_window=threshold + 1)
+                _, _, matched = rules.evaluate(features, FRAUD_REASON_CONTEXT)
+                features["transactions_in_window"] = threshold
+                _, _, unmatched = rules.evaluate(features, FRAUD_REASON_CONTEXT)
+                torn += "high_transaction_frequency" not in matched or "high_transaction_frequency" in unmatched
+                seen_versions.add(rules.version)
+                evaluations += 2
+            counts["evaluations"] += evaluations
+            counts["torn"] += torn
+
+        workers = [threading.Thread(target=evaluate) for _ in range(threads)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            for worker in workers:
+                worker.start()
+            for i in range(rewrites):
+                time.sleep(0.05)
+                write(11 + i)
+                time.sleep(0.01) # Let the mtime move on filesystems with coarse timestamps
+            time.sleep(0.1)
+            stop.set()
+            for worker in workers:
+                worker.join()
+        return dict(counts, rewrites=rewrites, reloads=engine.counters["reloads"],
+                    failed_reloads=engine.counters["failed_reloads"], versions_seen=len(seen_versions),
+                    final_version=engine.current().version)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, nargs="+", default=[4, 12, 24, 48, 96], help="Rule counts to time")
+    args = parser.parse_args()
+    sizes = args.rules
+    print(f"{'rules':>6}{'compile ms':>12}{'clean us':>10}{'flagged us':>12}{'interp clean':>14}{'interp flagged':>16}")
+    for size in sizes:
+        document = padded_document(size)
+        started = time.perf_counter()
+        rules = compile_rules(document)
+        compile_ms = (time.perf_counter() - started) * 1e3
+        parsed, _ = parse_rules(document)
+        assert rules.evaluate(FLAGGED, FRAUD_REASON_CONTEXT)[:2] == interpret(parsed, FLAGGED)
+        print(f"{size:>6}{compile_ms:>12.2f}"
+              f"{per_us(lambda: rules.evaluate(CLEAN, FRAUD_REASON_CONTEXT)):>10.2f}"
+              f"{per_us(lambda: rules.evaluate(FLAGGED, FRAUD_REASON_CONTEXT)):>12.2f}"
+              f"{per_us(lambda: interpret(parsed, CLEAN), 5000):>14.2f}"
+              f"{per_us(lambda: interpret(parsed, FLAGGED), 5000):>16.2f}")
+
+    result = hot_reload_check()
+    print(f"\nhot reload under load: {result}")
+    passed = result["torn"] == 0 and result["final_version"] == str(10 + result["rewrites"]) and result["failed_reloads"] == 0
+    print("PASS" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,151 @@
+"""Micro-benchmark for check_spam_transaction_patterns against the legacy list/deque scan.
+
+The legacy check rebuilt the recent-timestamp list and scanned every recipient the user
+had ever paid on each call. This script replays a user with a long history (10k distinct
+recipients by default) through both implementations, reports the per-check latency and
+the memory held for that user, and checks that both flag the same transactions on a
+randomised event stream.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_fraud_spam_window [--recipients N]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+from remitai.backend.services import fraud_detection_service
+from remitai.backend.services.fraud_detection_service import (
+    FRAUD_RULES, SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS, FraudDetectionService,
+)
+
+# The thresholds the legacy check hard-coded, taken from the current rule set for a like-for-like comparison
+_RULES = FRAUD_RULES.current()
+SPAM_MAX_TRANSACTIONS_IN_WINDOW = _RULES.condition_value("high_transaction_frequency", "transactions_in_window")
+SPAM_MAX_NEW_RECIPIENTS_IN_WINDOW = _RULES.condition_value("many_recipients", "recipients_in_window")
+SPAM_LOW_VALUE_THRESHOLD = _RULES.condition_value("frequent_low_value", "amount")
+
+
+class LegacySpamCheck:
+    """check_spam_transaction_patterns as it was before the windowed counters."""
+
+    def __init__(self):
+        self.transaction_patterns = defaultdict(lambda: {
+            "timestamps": deque(maxlen=20),
+            "recipient_counts": defaultdict(lambda: deque(maxlen=5)),
+        })
+
+    def check(self, user_id, amount, recipient_id, timestamp):
+        user_patterns = self.transaction_patterns[user_id]
+        user_patterns["timestamps"].append(timestamp)
+        user_patterns["recipient_counts"][recipient_id].append(timestamp)
+        recent = [t for t in user_patterns["timestamps"] if (timestamp - t) <= SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS]
+        if len(recent) > SPAM_MAX_TRANSACTIONS_IN_WINDOW:
+            return True, "frequency"
+        active = 0
+        for r_timestamps in user_patterns["recipient_counts"].values():
+            if any((timestamp - rt) <= SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS for rt in r_timestamps):
+                active += 1
+        if active > SPAM_MAX_NEW_RECIPIENTS_IN_WINDOW:
+            return True, "recipients"
+        if amount < SPAM_LOW_VALUE_THRESHOLD and len(recent) > (SPAM_MAX_TRANSACTIONS_IN_WINDOW / 2):
+            return True, "low_value"
+        return False, ""
+
+    def seed(self, user_id, past):
+        """Loads a history directly; replaying it through check() would be quadratic."""
+        user_patterns = self.transaction_patterns[user_id]
+        for timestamp, recipient in past:
+            user_patterns["timestamps"].append(timestamp)
+            user_patterns["recipient_counts"][recipient].append(timestamp)
+
+
+def history(recipients: int, start: float):
+    """One transaction per recipient, spread out so the window never trips."""
+    spacing = SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS / 2
+    return [(start + i * spacing, f"recipient_{i}") for i in range(recipients)]
+
+
+def time_checks(check, user_id: str, start: float, checks: int = 2000):
+    samples = []
+    for i in range(checks):
+        timestamp = start + i * 60.0
+        began = time.perf_counter()
+        check(user_id, 25.0, f"recipient_{i % 3}", timestamp)
+        samples.append(time.perf_counter() - began)
+    samples.sort()
+    return statistics.fmean(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def held_bytes(fill) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    keep = fill()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del keep
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+def parity(events: int = 20000, seed: int = 7) -> float:
+    """Share of transactions both implementations classify the same way."""
+    rng = random.Random(seed)
+    fraud_detection_service.MOCK_TRANSACTION_PATTERNS.clear()
+    current, legacy = FraudDetectionService(), LegacySpamCheck()
+    clock = 0.0
+    agree = 0
+    for _ in range(events):
+        user = f"user_{rng.randrange(50)}"
+        clock += rng.expovariate(1 / 0.6) # ~30 s between a user's transactions, bursty
+        amount = rng.choice([0.5, 5.0, 50.0])
+        recipient = f"r{rng.randrange(12)}"
+        suspicious, _ = current.check_spam_transaction_patterns(user, amount, recipient, clock)
+        agree += suspicious == legacy.check(user, amount, recipient, clock)[0]
+    return agree / events
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=10000)
+    args = parser.parse_args()
+    recipient_count = args.recipients
+    start = 1_700_000_000.0
+    past = history(recipient_count, start)
+    now = past[-1][0] + SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        fraud_detection_service.MOCK_TRANSACTION_PATTERNS.clear()
+        service, legacy = FraudDetectionService(), LegacySpamCheck()
+        for timestamp, recipient in past:
+            service.check_spam_transaction_patterns("heavy_user", 25.0, recipient, timestamp)
+        legacy.seed("heavy_user", past)
+
+        new_mean, new_p99 = time_checks(service.check_spam_transaction_patterns, "heavy_user", now)
+        old_mean, old_p99 = time_checks(legacy.check, "heavy_user", now)
+
+        def fill_new():
+            checker = FraudDetectionService()
+            fraud_detection_service.MOCK_TRANSACTION_PATTERNS.clear()
+            for timestamp, recipient in past:
+                checker.check_spam_transaction_patterns("memory_user", 25.0, recipient, timestamp)
+            return fraud_detection_service.MOCK_TRANSACTION_PATTERNS
+
+        def fill_old():
+            checker = LegacySpamCheck()
+            checker.seed("memory_user", past)
+            return checker
+
+        new_bytes, old_bytes = held_bytes(fill_new), held_bytes(fill_old)
+        agreement = parity()
+
+    print(f"--- user with {recipient_count} recipients, {SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS} s window ---")
+    print(f"legacy check   : mean {old_mean:9.1f} us  p99 {old_p99:9.1f} us  state {old_bytes / 1024:9.1f} KB")
+    print(f"windowed check : mean {new_mean:9.1f} us  p99 {new_p99:9.1f} us  state {new_bytes / 1024:9.1f} KB")
+    print(f"speedup        : {old_mean / new_mean:.0f}x")
+    print(f"verdict agreement on a random stream: {agreement:.2%} "
+          f"(differences come from the bucket-aligned window edge)")
@@ -0,0 +1,80 @@
+"""Memory check for the per-user fraud state under a stream of mostly one-off users.
+
+Replays assess-risk traffic from many distinct users (most seen once, a few regulars)
+through FraudDetectionService with a simulated clock and reports, every few simulated
+minutes, how many users are tracked, how many were evicted and why, the store's own
+memory estimate and the memory tracemalloc actually measures. Before the bounded stores
+every user ever seen stayed in memory; now the tracked set is bounded by the idle
+window, max_users and the byte budget.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_fraud_state [--events N] [--max-users N]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+import tracemalloc
+
+from remitai.backend.services import fraud_detection_service
+from remitai.backend.services.fraud_detection_service import FraudDetectionService
+
+EVENTS_PER_SECOND = 200
+REGULAR_USERS = 500
+REGULAR_SHARE = 0.3
+
+
+if __name__ == "__main__":
+    stores = (fraud_detection_service.MOCK_COMMAND_HISTORY, fraud_detection_service.MOCK_TRANSACTION_PATTERNS)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=300000)
+    parser.add_argument("--max-users", type=int, default=stores[0].max_users)
+    args = parser.parse_args()
+    events, max_users = args.events, args.max_users
+    for store in stores:
+        store.clear()
+        store.max_users = max_users
+
+    rng = random.Random(3)
+    service = FraudDetectionService()
+    clock = 1_700_000_000.0
+    one_off = 0
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    rows = []
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        for i in range(1, events + 1):
+            clock += 1.0 / EVENTS_PER_SECOND
+            if rng.random() < REGULAR_SHARE:
+                user = f"regular_{rng.randrange(REGULAR_USERS)}"
+            else:
+                one_off += 1
+                user = f"visitor_{one_off}"
+            service.check_duplicate_command(user, f"send {rng.randrange(1, 500)} usd to r{rng.randrange(20)}", clock)
+            service.check_spam_transaction_patterns(user, rng.choice([0.5, 20.0, 300.0]), f"r{rng.randrange(20)}", clock)
+            if i % (EVENTS_PER_SECOND * 120) == 0:
+                stats = service.state_stats()
+                traced = tracemalloc.get_traced_memory()[0] - baseline
+                log.seek(0), log.truncate()
+                counts = [sum(store[key] for store in (stats["command_history"], stats["transaction_patterns"]))
+                          for key in ("evicted_idle", "evicted_lru", "evicted_budget")]
+                rows.append(f"{(i / EVENTS_PER_SECOND) / 60:>8.0f}{stats['tracked_users']:>9}{counts[0]:>9}{counts[1]:>8}"
+                            f"{counts[2]:>10}{stats['approx_bytes'] / 2**20:>11.1f}{traced / 2**20:>11.1f}")
+    elapsed = time.perf_counter() - started
+    traced = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    print(f"{'sim min':>8}{'tracked':>9}{'idle ev':>9}{'lru ev':>8}{'budget ev':>10}{'approx MB':>11}{'traced MB':>11}")
+    print("\n".join(rows))
+    stats = service.state_stats()
+    print(f"--- {events} events from {one_off + REGULAR_USERS} users, {events / EVENTS_PER_SECOND / 60:.0f} simulated minutes ---")
+    print(f"tracked users        : {stats['tracked_users']} (max_users {max_users})")
+    print(f"approx state memory  : {stats['approx_bytes'] / 2**20:.1f} MB "
+          f"({stats['approx_bytes'] / max(stats['tracked_users'], 1):.0f} bytes per user)")
+    print(f"traced memory        : {traced / 2**20:.1f} MB")
+    print(f"per event (2 checks) : {elapsed / events * 1e6:.1f} us (under tracemalloc)")
+    print(f"command history      : {stats['command_history']}")
+    print(f"transaction patterns : {stats['transaction_patterns']}")
@@ -0,0 +1,114 @@
+"""Micro-benchmark for the single-pass IntentExtractor against the legacy regex chain.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_intent_extractor [--calls N]
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+from remitai.backend.services.intent_extractor import IntentExtractor
+from remitai.backend.services.gazetteer import GAZETTEER
+from remitai.backend.services.nlp_service import AFRICAN_COUNTRIES, CURRENCIES
+
+# English forms of the phrases in nlp_service's __main__ block (as they look after translation),
+# plus the untranslated originals.
+PARITY_PHRASES = [
+    "Send 30,000 Naira to Amina in Kenya",
+    "I want to send 500 dollars to Jean in Ghana",
+    "I want to send ten thousand shillings to Maria in Nigeria",
+    "Send 20000 dinars to Fatima in Kenya",
+    "Send 30000 Naira to Amina in Kenya",
+    "Send thirty thousand Naira to Amina in Kenya",
+    "Pay 250 cedi to Kofi in Ghana",
+    "Je veux envoyer 500 dollars à Jean au Ghana",
+    "Nataka kutuma shilingi elfu kumi kwa Maria nchini Nigeria",
+    "إرسال 20000 دينار إلى فاطمة في كينيا",
+    "Fi 30000 Naira ranṣẹ si Amina ni Kenya",
+    "Ziga Naira dubu talatin zuwa Amina a Kenya",
+    "Zipu Naira puku iri atọ nye Amina na Kenya",
+    "Send USD 30000 to Kofi (ghana)",
+]
+
+# ~10 KB inputs that trigger backtracking in the legacy recipient patterns.
+ADVERSARIAL_INPUTS = {
+    "repeated_to": "to " * 3400,
+    "long_name_no_country": "send 5 usd to " + "amina " * 1700,
+    "digits_and_commas": "1," * 5000,
+    "long_digit_runs": ("9" * 200 + " ") * 50,
+    "to_words_then_in": ("to amina " * 1100) + "in",
+}
+
+
+def legacy_extract(text_lower: str) -> dict:
+    """The five sequential re.search calls NLPIntentParser.parse_intent used to make."""
+    amount = currency = recipient_name = recipient_country = None
+    amount_currency_match = re.search(r"(\d{1,3}(?:,\d{3})*|\d+)\s*([a-zA-Z]+)", text_lower)
+    currency_amount_match = re.search(r"([a-zA-Z]{3})\s*(\d{1,3}(?:,\d{3})*|\d+)", text_lower)
+    if amount_currency_match:
+        amount = int(amount_currency_match.group(1).replace(",", ""))
+        currency = CURRENCIES.get(amount_currency_match.group(2))
+    elif currency_amount_match:
+        amount = int(currency_amount_match.group(2).replace(",", ""))
+        currency = CURRENCIES.get(currency_amount_match.group(1))
+
+    match = re.search(r"to\s+([a-zA-Z]+(?:\s+[a-zA-Z]+)*)\s+in\s+([a-zA-Z]+)", text_lower)
+    if match and AFRICAN_COUNTRIES.get(match.group(2).strip()):
+        recipient_name = match.group(1).strip().title()
+        recipient_country = AFRICAN_COUNTRIES.get(match.group(2).strip())
+    if not recipient_name:
+        match = re.search(r"to\s+([a-zA-Z]+(?:\s+[a-zA-Z]+)*)\s+\(([a-zA-Z]+)\)", text_lower)
+        if match and AFRICAN_COUNTRIES.get(match.group(2).strip()):
+            recipient_name = match.group(1).strip().title()
+            recipient_country = AFRICAN_COUNTRIES.get(match.group(2).strip())
+    if not recipient_name and amount is not None:
+        match = re.search(r"to\s+([a-zA-Z]+(?:\s+[a-zA-Z]+)*)", text_lower)
+        if match and not AFRICAN_COUNTRIES.get(match.group(1).strip()):
+            recipient_name = match.group(1).strip().title()
+    return {"amount": amount, "currency": currency,
+            "recipient_name": recipient_name, "recipient_country": recipient_country}
+
+
+def time_calls(fn, text: str, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000, help="Calls per example phrase")
+    args = parser.parse_args()
+    extractor = IntentExtractor(GAZETTEER)
+
+    print("--- Parity on example phrases ---")
+    for phrase in PARITY_PHRASES:
+        text_lower = phrase.lower()
+        expected = legacy_extract(text_lower)
+        actual = extractor.extract(text_lower)
+        print(f"{'OK  ' if expected == actual else 'DIFF'} {phrase!r}: {actual}")
+
+    print(f"\n--- Per-call latency, example phrases ({args.calls} calls each) ---")
+    for phrase in PARITY_PHRASES[:7]:
+        text_lower = phrase.lower()
+        old = time_calls(legacy_extract, text_lower, args.calls)
+        new = time_calls(extractor.extract, text_lower, args.calls)
+        print(f"{phrase[:40]:<40} legacy {old['mean_us']:8.1f} us (p99 {old['p99_us']:8.1f})"
+              f" | extractor {new['mean_us']:8.1f} us (p99 {new['p99_us']:8.1f})  {new['mean_us'] / old['mean_us']:.2f}x")
+
+    print("\n--- Adversarial ~10 KB inputs (20 calls each) ---")
+    for name, text in ADVERSARIAL_INPUTS.items():
+        old = time_calls(legacy_extract, text, 20)
+        new = time_calls(extractor.extract, text, 20)
+        same = "same output" if legacy_extract(text) == extractor.extract(text) else "OUTPUT DIFFERS"
+        print(f"{name:<22} {len(text):6d} chars  legacy {old['mean_us'] / 1000:9.2f} ms (p99 {old['p99_us'] / 1000:9.2f})"
+              f" | extractor {new['mean_us'] / 1000:7.2f} ms (p99 {new['p99_us'] / 1000:7.2f})  [{same}]")
@@ -0,0 +1,145 @@
+"""Accuracy and detection latency of FastLanguageDetector versus langdetect alone.
+
+Accuracy is measured on held-out labelled commands the detector was not built from: the
+nlp_corpus commands, the native-grammar corpus and a few unsupported languages that must
+fall through to langdetect. Commands that appear verbatim in the detector's SEED_CORPUS
+are left out. Latency is measured on the TRAFFIC mix below, mostly English commands with
+a share of the other supported languages.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_language_detector [--size N] [--traffic N]
+"""
+
+import argparse
+import statistics
+import time
+from collections import defaultdict
+
+from langdetect import DetectorFactory, LangDetectException, detect
+
+from remitai.backend.benchmarks.bench_native_grammar import LABELLED_CORPUS
+from remitai.backend.benchmarks.nlp_corpus import build_corpus
+from remitai.backend.services.language_detector import SEED_CORPUS, FastLanguageDetector
+
+DetectorFactory.seed = 0
+
+# (language, template); {n} is an amount and {name} a recipient.
+TRAFFIC = [
+    ("en", "Send {n} Naira to {name} in Kenya"),
+    ("en", "Pay {n} cedi to {name} in Ghana"),
+    ("en", "Transfer {n} KES to {name}"),
+    ("en", "Please send {n} dollars to my brother {name}"),
+    ("en", "What is my balance"),
+    ("en", "Send USD {n} to {name} (ghana)"),
+    ("en", "I want to send {n} shillings to {name} in Nigeria"),
+    ("fr", "Je veux envoyer {n} dollars à {name} au Ghana"),
+    ("sw", "Nataka kutuma shilingi {n} kwa {name} nchini Nigeria"),
+    ("yo", "Fi {n} Naira ranṣẹ si {name} ni Kenya"),
+    ("ha", "Ziga Naira {n} zuwa {name} a Kenya"),
+    ("ig", "Zipu Naira {n} nye {name} na Kenya"),
+    ("ar", "إرسال {n} دينار إلى {name} في كينيا"),
+    ("es", "Quiero enviar {n} dólares a {name}"),
+]
+WEIGHTS = {"en": 10}  # English templates are ten times as common as the others
+NAMES = ["Amina", "Jean", "Kofi", "Maria", "Tunde", "Fatima", "Chidi", "Wanjiru"]
+
+# Held-out commands in languages the fast path does not cover; it should return None.
+UNSUPPORTED = [
+    ("es", "Quiero enviar 200 dólares a María en Ghana"),
+    ("es", "¿Cuál es mi saldo actual?"),
+    ("pt", "Quero enviar 500 reais para o João em Angola"),
+    ("pt", "Qual é o meu saldo agora"),
+    ("de", "Ich möchte 300 Euro an Anna in Kenia senden"),
+    ("it", "Voglio inviare 100 euro a Marco in Ghana"),
+    ("zu", "Ngifuna ukuthumela amarandi ayi-500 kuThabo"),
+    ("am", "ለአበበ 500 ብር ላክ"),
+]
+
+
+def langdetect_or_en(text: str) -> str:
+    try:
+        return detect(text)
+    except LangDetectException:
+        return "en"
+
+
+def build_traffic(size: int):
+    weighted = [entry for entry in TRAFFIC for _ in range(WEIGHTS.get(entry[0], 1))]
+    return [(lang, template.format(n=100 + i, name=NAMES[i % len(NAMES)]))
+            for i, (lang, template) in enumerate(weighted[i % len(weighted)] for i in range(size))]
+
+
+def held_out(size: int):
+    """(language or None for unsupported, text) pairs the detector was not built from."""
+    seeds = {text.lower() for texts in SEED_CORPUS.values() for text in texts}
+    labelled = [(item["language"], item["text"]) for item in build_corpus(size)]
+    labelled += [(language, text) for language, text, _ in LABELLED_CORPUS]
+    labelled += [(None, text) for _, text in UNSUPPORTED]
+    kept = [(language, text) for language, text in labelled if text.lower() not in seeds]
+    return kept, len(labelled) - len(kept)
+
+
+def timed(fn, texts):
+    samples, results = [], []
+    for text in texts:
+        start = time.perf_counter()
+        results.append(fn(text))
+        samples.append(time.perf_counter() - start)
+    return results, samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=3000, help="nlp_corpus commands in the held-out set")
+    parser.add_argument("--traffic", type=int, default=2000, help="TRAFFIC commands timed")
+    args = parser.parse_args()
+    detector = FastLanguageDetector()
+    langdetect_or_en("warm up the langdetect profiles")
+
+    def pipeline(text):
+        return detector.detect(text) or langdetect_or_en(text)
+
+    evaluation, skipped = held_out(args.size)
+    per_language = defaultdict(lambda: {"commands": 0, "hits": 0, "correct": 0, "pipeline": 0})
+    for language, text in evaluation:
+        row = per_language[language or "other"]
+        result = detector.detect(text)
+        row["commands"] += 1
+        row["hits"] += result is not None
+        row["correct"] += result is not None and result == language
+        row["pipeline"] += language is not None and pipeline(text) == language
+    print(f"--- held-out accuracy: {len(evaluation)} labelled commands ({skipped} in SEED_CORPUS left out) ---")
+    print(f"{'lang':<7}{'commands':>9}{'fast hits':>11}{'precision':>11}{'recall':>9}{'+ fallback':>12}")
+    totals = defaultdict(int)
+    for language in sorted(per_language):
+        row = per_language[language]
+        supported = language != "other"
+        for key, value in row.items():
+            totals[key] += value if supported or key in ("commands", "hits") else 0
+        precision = f"{row['correct'] / row['hits']:.1%}" if row["hits"] and supported else "-"
+        recall = f"{row['correct'] / row['commands']:.1%}" if supported else "-"
+        fallback = f"{row['pipeline'] / row['commands']:.1%}" if supported else "-"
+        print(f"{language:<7}{row['commands']:>9}{row['hits']:>11}{precision:>11}{recall:>9}{fallback:>12}")
+    supported_commands = totals["commands"] - per_language["other"]["commands"]
+    supported_hits = totals["hits"] - per_language["other"]["hits"]
+    print(f"{'all':<7}{supported_commands:>9}{supported_hits:>11}{totals['correct'] / supported_hits:>11.1%}"
+          f"{totals['correct'] / supported_commands:>9.1%}{totals['pipeline'] / supported_commands:>12.1%}")
+    print(f"unsupported commands the fast path claimed: {per_language['other']['hits']}/{per_language['other']['commands']}")
+
+    traffic = build_traffic(args.traffic)
+    texts = [text for _, text in traffic]
+    _, langdetect_samples = timed(langdetect_or_en, texts)
+    fast_results, fast_samples = timed(detector.detect, texts)
+    _, pipeline_samples = timed(pipeline, texts)
+
+    fast_hits = sum(1 for result in fast_results if result)
+    mean_us = lambda samples: statistics.fmean(samples) * 1e6
+    p99_us = lambda samples: sorted(samples)[int(len(samples) * 0.99)] * 1e6
+
+    print(f"\n--- latency: {len(texts)} TRAFFIC commands ---")
+    print(f"fast-path hit rate        : {fast_hits / len(texts):.1%}")
+    print(f"langdetect only           : mean {mean_us(langdetect_samples):8.1f} us  p99 {p99_us(langdetect_samples):8.1f} us")
+    print(f"fast path alone           : mean {mean_us(fast_samples):8.1f} us  p99 {p99_us(fast_samples):8.1f} us")
+    print(f"fast path + fallback      : mean {mean_us(pipeline_samples):8.1f} us  p99 {p99_us(pipeline_samples):8.1f} us")
+    print(f"per-request saving        : {mean_us(langdetect_samples) - mean_us(pipeline_samples):8.1f} us"
+          f" ({1 - statistics.fmean(pipeline_samples) / statistics.fmean(langdetect_samples):.0%})")
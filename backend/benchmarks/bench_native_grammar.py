@@ -0,0 +1,107 @@
+"""Coverage of the offline NativeGrammar on a labelled corpus of non-English commands.
+
+For every language it reports how many commands were resolved without translation and
+how many of those match the labels exactly (amount, currency, recipient and country).
+Commands labelled None are ones the grammar is expected to leave to the translator.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_native_grammar
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+from remitai.backend.services.native_grammar import NativeGrammar
+
+
+def label(amount, currency, name, country=None):
+    return {"amount": amount, "currency": currency, "recipient_name": name, "recipient_country": country}
+
+
+# (language, command, expected entities or None)
+LABELLED_CORPUS = [
+    ("sw", "Nataka kutuma shilingi elfu kumi kwa Maria nchini Nigeria", label(10000, "KES", "Maria", "NG")),
+    ("sw", "Tuma shilingi elfu kumi na mia tano kwa Juma", label(10500, "KES", "Juma")),
+    ("sw", "Lipa shilingi mia tano kwa John", label(500, "KES", "John")),
+    ("sw", "Tuma shilingi elfu ishirini na tano kwa Wanjiru nchini Kenya", label(25000, "KES", "Wanjiru", "KE")),
+    ("sw", "Nataka kutuma dola mia mbili kwa Amina nchini Tanzania", label(200, "USD", "Amina", "TZ")),
+    ("sw", "Tuma shilingi 3000 kwa Baraka", label(3000, "KES", "Baraka")),
+    ("sw", "Hamisha randi elfu moja kwa Thabo huko Afrika Kusini", label(1000, "ZAR", "Thabo", "ZA")),
+    ("sw", "Tuma dola 12.50 kwa Maria nchini Kenya", label(12.5, "USD", "Maria", "KE")),
+    ("sw", "Tuma shilingi 1.5 kwa Maria", label(1.5, "KES", "Maria")),
+    ("sw", "Tafadhali tuma pesa kwa mama yangu", None),
+    ("sw", "Salio langu ni kiasi gani", None),
+    ("ha", "Ziga Naira dubu talatin zuwa Amina a Kenya", label(30000, "NGN", "Amina", "KE")),
+    ("ha", "Aika Naira dubu goma sha biyu ga Musa a Najeriya", label(12000, "NGN", "Musa", "NG")),
+    ("ha", "Biya naira dari biyar ga Musa", label(500, "NGN", "Musa")),
+    ("ha", "Tura cedi dari uku zuwa Kofi a Gana", label(300, "GHS", "Kofi", "GH")),
+    ("ha", "Ina so in aika Naira 5000 zuwa Fatima", label(5000, "NGN", "Fatima")),
+    ("ha", "Aika dala hamsin zuwa Ibrahim a Nijar", label(50, "USD", "Ibrahim", "NE")),
+    ("ha", "Don Allah aika kudi yanzu", None),
+    ("yo", "Fi 30000 Naira ranṣẹ si Amina ni Kenya", label(30000, "NGN", "Amina", "KE")),
+    ("yo", "Fi ẹgbẹ̀rún ọgbọ̀n naira ranṣẹ́ si Amina ni Kenya", label(30000, "NGN", "Amina", "KE")),
+    ("yo", "San ẹẹdẹgbẹta naira fun Tunde", label(500, "NGN", "Tunde")),
+    ("yo", "Fi ẹgbẹrun marun naira ranṣẹ si Bola", label(5000, "NGN", "Bola")),
+    ("yo", "Fi owo 20,000 naira ranṣẹ si iya mi", label(20000, "NGN", "Iya Mi")),
+    ("yo", "Mo fẹ fi owo ranṣẹ si iya mi ni Kenya", None),
+    ("ig", "Zipu Naira puku iri atọ nye Amina na Kenya", label(30000, "NGN", "Amina", "KE")),
+    ("ig", "Kwụọ naira narị ise nye Chidi", label(500, "NGN", "Chidi")),
+    ("ig", "Zipu naira puku ise nye Ngozi na Naịjirịa", label(5000, "NGN", "Ngozi", "NG")),
+    ("ig", "Ziga 15000 naira nye Emeka", label(15000, "NGN", "Emeka")),
+    ("ig", "Biko zipu ego ahụ ugbu a", None),
+    ("fr", "Je veux envoyer 500 dollars à Jean au Ghana", label(500, "USD", "Jean", "GH")),
+    ("fr", "Envoyer deux cent cinquante mille francs CFA à Awa au Sénégal", label(250000, "XOF", "Awa", "SN")),
+    ("fr", "Payer quatre-vingt-dix euros à Marie", label(90, "EUR", "Marie")),
+    ("fr", "Envoie 5 000 francs CFA à Moussa au Mali", label(5000, "XOF", "Moussa", "ML")),
+    ("fr", "Envoyer dix-sept mille euros à Paul en Côte d’Ivoire", label(17000, "EUR", "Paul", "CI")),
+    ("fr", "Je voudrais envoyer 300 dirhams à Youssef au Maroc", label(300, "MAD", "Youssef", "MA")),
+    ("fr", "Envoyer 12,50 euros à Jean", label(12.5, "EUR", "Jean")),
+    ("fr", "Envoyer 2 3 euros à Jean", None),  # Two numbers, not one: left to the translator
+    ("fr", "Envoyer 1.2.3 euros à Jean", None),
+    ("fr", "Quel est mon solde", None),
+    ("fr", "Je veux envoyer de l'argent à ma mère", None),
+    ("ar", "إرسال عشرين ألف جنيه إلى فاطمة في مصر", label(20000, "EGP", "فاطمة", "EG")),
+    ("ar", "أرسل خمسة آلاف وخمسمائة درهم إلى يوسف في المغرب", label(5500, "MAD", "يوسف", "MA")),
+    ("ar", "حول 300 دولار إلى أحمد", label(300, "USD", "أحمد")),
+    ("ar", "إرسال 20000 دينار إلى فاطمة في كينيا", None),  # "dinar" alone names no single currency
+    ("ar", "ما هو رصيدي", None),
+]
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    grammar = NativeGrammar()
+    per_language = defaultdict(lambda: {"commands": 0, "resolvable": 0, "resolved": 0, "correct": 0, "false": 0})
+    failures = []
+    start = time.perf_counter()
+    for language, command, expected in LABELLED_CORPUS:
+        actual = grammar.parse(command, language)
+        row = per_language[language]
+        row["commands"] += 1
+        row["resolvable"] += expected is not None
+        if actual is not None:
+            row["resolved"] += 1
+            if actual == expected:
+                row["correct"] += 1
+            else:
+                row["false"] += 1
+                failures.append((language, command, expected, actual))
+        elif expected is not None:
+            failures.append((language, command, expected, actual))
+    elapsed = time.perf_counter() - start
+
+    print(f"{'lang':<5}{'commands':>9}{'labelled':>10}{'resolved':>10}{'correct':>9}{'wrong':>7}{'coverage':>10}")
+    totals = defaultdict(int)
+    for language, row in per_language.items():
+        for key, value in row.items():
+            totals[key] += value
+        coverage = row["correct"] / row["resolvable"] if row["resolvable"] else 0.0
+        print(f"{language:<5}{row['commands']:>9}{row['resolvable']:>10}{row['resolved']:>10}"
+              f"{row['correct']:>9}{row['false']:>7}{coverage:>10.0%}")
+    print(f"{'all':<5}{totals['commands']:>9}{totals['resolvable']:>10}{totals['resolved']:>10}"
+          f"{totals['correct']:>9}{totals['false']:>7}{totals['correct'] / totals['resolvable']:>10.0%}")
+    print(f"\nTranslation round trips avoided: {totals['resolved']}/{totals['commands']} commands "
+          f"({totals['resolved'] / totals['commands']:.0%}); grammar time {elapsed / len(LABELLED_CORPUS) * 1e6:.0f} us/command")
+    for language, command, expected, actual in failures:
+        print(f"MISS [{language}] {command!r}\n     expected {expected}\n     got      {actual}")
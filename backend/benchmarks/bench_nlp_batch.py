@@ -0,0 +1,76 @@
+"""Throughput of NLPIntentParser.parse_intents against looping parse_intent.
+
+Translation goes to a local stub that sleeps like a network round trip, so the numbers
+do not depend on Google Translate being reachable. Every text is distinct, so the
+translation cache does not help either path. The offline grammar is switched off so both
+paths translate every non-English text.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_nlp_batch [--batch-size N] [--latency-ms MS]
+"""
+
+import argparse
+import time
+
+from langdetect import DetectorFactory
+
+from remitai.backend.services.native_grammar import NativeGrammar
+from remitai.backend.services.nlp_service import NLPIntentParser
+from remitai.backend.services.translation_cache import TranslationCache
+
+DetectorFactory.seed = 0 # langdetect is non-deterministic unless seeded
+
+TEMPLATES = [
+    "Send {amount} Naira to {name} in Kenya",
+    "Je veux envoyer {amount} dollars à {name} au Ghana",
+    "Fi {amount} Naira ranṣẹ si {name} ni Kenya",
+    "Nataka kutuma shilingi {amount} kwa {name} nchini Nigeria",
+    "Pay {amount} cedi to {name} in Ghana",
+]
+NAMES = ["Amina", "Jean", "Kofi", "Maria", "Tunde", "Fatima", "Chidi", "Wanjiru"]
+
+
+class StubTranslator:
+    """Counts calls and sleeps latency seconds per call; returns the input unchanged."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, text: str, source_language: str) -> str:
+        self.calls += 1
+        time.sleep(self.latency)
+        return text
+
+
+def make_corpus(size: int):
+    return [TEMPLATES[i % len(TEMPLATES)].format(amount=1000 + i, name=NAMES[i % len(NAMES)]) for i in range(size)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub translation latency")
+    args = parser.parse_args()
+    batch_size, latency = args.batch_size, args.latency_ms / 1000
+    corpus = make_corpus(batch_size)
+
+    single_translator = StubTranslator(latency)
+    single_parser = NLPIntentParser(translation_cache=TranslationCache(db_path=None), translate_fn=single_translator,
+                                   native_grammar=NativeGrammar(grammars={}))
+    start = time.perf_counter()
+    single_results = [single_parser.parse_intent(text) for text in corpus]
+    single_elapsed = time.perf_counter() - start
+
+    batch_translator = StubTranslator(latency)
+    batch_parser = NLPIntentParser(translation_cache=TranslationCache(db_path=None), translate_fn=batch_translator,
+                                  native_grammar=NativeGrammar(grammars={}))
+    start = time.perf_counter()
+    batch_results = batch_parser.parse_intents(corpus)
+    batch_elapsed = time.perf_counter() - start
+
+    print(f"\n--- {batch_size} texts, stub translation latency {latency * 1000:.0f} ms ---")
+    print(f"parse_intent loop : {single_elapsed:8.3f} s  {batch_size / single_elapsed:8.1f} texts/s  {single_translator.calls} translate calls")
+    print(f"parse_intents     : {batch_elapsed:8.3f} s  {batch_size / batch_elapsed:8.1f} texts/s  {batch_translator.calls} translate calls")
+    print(f"speed-up          : {single_elapsed / batch_elapsed:8.1f}x")
+    print(f"identical results : {single_results == batch_results}")
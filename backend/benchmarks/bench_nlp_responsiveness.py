@@ -0,0 +1,108 @@
+"""Checks that the NLP endpoints stay responsive while translations hang.
+
+The shared parser's translator is replaced by one that blocks until released. A burst of
+non-English /parse-intent requests is sent while /nlp/test is polled on the same event
+loop. The script exits non-zero unless every poll stays fast and every parse request
+returns, untranslated, shortly after the translation deadline.
+
+Run from the repository root (needs httpx):
+    python -m remitai.backend.benchmarks.bench_nlp_responsiveness [--requests N] [--deadline SECONDS]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+from langdetect import DetectorFactory
+
+from remitai.backend.api.v1.endpoints import nlp
+from remitai.backend.services import nlp_service
+from remitai.backend.services.native_grammar import NativeGrammar
+from remitai.backend.services.translation_cache import TranslationCache
+
+DetectorFactory.seed = 0
+
+HANGING_REQUESTS = 40
+TRANSLATE_DEADLINE_SECONDS = 0.5
+MAX_POLL_LATENCY_SECONDS = 0.1
+
+
+class HangingTranslator:
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self, text: str, source_language: str) -> str:
+        self.calls += 1
+        self.release.wait()
+        return text
+
+
+async def poll(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/v1/nlp/nlp/test")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def parse(client: httpx.AsyncClient, index: int):
+    start = time.perf_counter()
+    response = await client.post("/api/v1/nlp/parse-intent", json={
+        "user_id": f"user_{index}",
+        "text": f"Je veux envoyer {500 + index} dollars à Jean au Ghana",
+    })
+    return time.perf_counter() - start, response.status_code, response.json()
+
+
+async def main(hanging_requests: int, translate_deadline: float) -> bool:
+    app = FastAPI()
+    app.include_router(nlp.router, prefix="/api/v1/nlp")
+    translator = HangingTranslator()
+    nlp.nlp_parser.translate_fn = translator
+    nlp.nlp_parser.translation_cache = TranslationCache(db_path=None)
+    nlp.nlp_parser.native_grammar = NativeGrammar(grammars={}) # Every command goes to the translator
+    nlp_service.NLP_TRANSLATE_DEADLINE_SECONDS = translate_deadline
+    logging.getLogger(nlp_service.__name__).setLevel(logging.ERROR) # Every request misses the deadline on purpose
+    nlp.nlp_parser._detect_language("Bonjour") # Load the langdetect profiles before timing
+
+    latencies = []
+    stop = asyncio.Event()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            poller = asyncio.create_task(poll(client, stop, latencies))
+            results = await asyncio.gather(*(parse(client, i) for i in range(hanging_requests)))
+            stop.set()
+            await poller
+    finally:
+        translator.release.set()
+
+    parse_times = sorted(elapsed for elapsed, _, _ in results)
+    untranslated = sum(1 for _, status, body in results
+                       if status == 200 and body["parsed_data"]["parsed_text_language"] == body["language_detected"])
+    latencies.sort()
+    print(f"translator calls started : {translator.calls}")
+    print(f"parse requests           : {len(results)} ({untranslated} fell back to untranslated text)")
+    print(f"parse latency            : min {parse_times[0]:.3f}s  max {parse_times[-1]:.3f}s  (deadline {translate_deadline}s)")
+    print(f"/nlp/test polls          : {len(latencies)}  p50 {latencies[len(latencies) // 2] * 1000:.1f} ms  max {latencies[-1] * 1000:.1f} ms")
+
+    # Requests beyond the translate pool size queue for a worker, so allow two deadlines.
+    ok = (untranslated == hanging_requests
+          and parse_times[-1] < 2 * translate_deadline + 1.0
+          and latencies and latencies[-1] < MAX_POLL_LATENCY_SECONDS)
+    print("PASS" if ok else "FAIL")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=HANGING_REQUESTS, help="Parse requests sent while translation hangs")
+    parser.add_argument("--deadline", type=float, default=TRANSLATE_DEADLINE_SECONDS, help="Translation deadline in seconds")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.requests, args.deadline)) else 1)
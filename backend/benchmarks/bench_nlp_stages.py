@@ -0,0 +1,262 @@
+"""Per-stage latency and accuracy of NLPIntentParser.parse_intent on the labelled corpus.
+
+Every command from nlp_corpus.build_corpus() goes through each stage on its own clock:
+
+    detect     language detection (fast path, then langdetect)
+    grammar    offline native-language grammar (non-English commands only)
+    translate  translation cache + stub translator (commands the grammar leaves)
+    extract    English entity extraction on the (translated) text
+    classify   intent classifier
+    response   NLPParseResponse built from the parse, serialised to JSON
+    end_to_end parse_intent() followed by the response model
+
+The stub translator returns the corpus' own English rendering of each command, so no
+network is involved. The JSON report holds throughput and p50/p95/p99 per stage and
+per-field accuracy of the end-to-end parse. Comparing against a baseline report
+exits non-zero if a stage's p95 or throughput, or a field's accuracy, regressed beyond
+the tolerances. Latencies are machine-specific: save a baseline on the machine that
+will be compared against it.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_nlp_stages [--size N] [--output report.json]
+        [--baseline path] [--save-baseline] [--latency-tolerance 0.25] [--accuracy-tolerance 0.01]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from collections import defaultdict
+
+from remitai.backend.api.v1.endpoints.nlp import _to_parse_response
+from remitai.backend.benchmarks.nlp_corpus import CORPUS_SEED, build_corpus
+from remitai.backend.services.language_detector import FastLanguageDetector
+from remitai.backend.services.nlp_service import NLPIntentParser
+from remitai.backend.services.translation_cache import TranslationCache
+
+STAGES = ("detect", "grammar", "translate", "extract", "classify", "response", "end_to_end")
+FIELDS = ("language", "intent", "amount", "currency", "recipient_name", "recipient_country_code")
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "nlp_stages.json")
+WARMUP_COMMANDS = 50
+
+
+class StubTranslator:
+    """translate_fn returning the corpus' English text for known commands."""
+
+    def __init__(self, corpus, latency: float = 0.0):
+        self.english = {item["text"]: item["english"] for item in corpus}
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, text: str, source_language: str) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.english.get(text, text)
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples) -> dict:
+    if not samples:
+        return {"calls": 0}
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "calls": len(ordered),
+        "throughput_per_s": round(len(ordered) / total, 1) if total else None,
+        "mean_us": round(total / len(ordered) * 1e6, 2),
+        "p50_us": round(percentile(ordered, 0.50) * 1e6, 2),
+        "p95_us": round(percentile(ordered, 0.95) * 1e6, 2),
+        "p99_us": round(percentile(ordered, 0.99) * 1e6, 2),
+    }
+
+
+def field_matches(field: str, expected, actual) -> bool:
+    if field == "amount":
+        return actual is not None and float(actual) == float(expected)
+    return actual == expected
+
+
+def time_stages(parser: NLPIntentParser, corpus) -> dict:
+    """Stage -> list of seconds, one entry per command that reached that stage."""
+    samples = defaultdict(list)
+    clock = time.perf_counter
+    for item in corpus:
+        text = item["text"]
+
+        start = clock()
+        language = parser._detect_language(text)
+        samples["detect"].append(clock() - start)
+
+        english = text
+        if parser._should_translate(language):
+            start = clock()
+            entities = parser._resolve_natively(text, language)
+            samples["grammar"].append(clock() - start)
+            if entities is None:
+                start = clock()
+                english = parser._translate_to_english(text, language)
+                samples["translate"].append(clock() - start)
+
+        start = clock()
+        parser.extractor.extract(english.lower())
+        samples["extract"].append(clock() - start)
+
+        start = clock()
+        parser._classify_many([text])
+        samples["classify"].append(clock() - start)
+
+        parsed = parser.parse_intent(text)
+        start = clock()
+        _to_parse_response("bench_user", text, parsed).json()
+        samples["response"].append(clock() - start)
+
+        start = clock()
+        parsed = parser.parse_intent(text)
+        _to_parse_response("bench_user", text, parsed).json()
+        samples["end_to_end"].append(clock() - start)
+    return samples
+
+
+def measure_accuracy(parser: NLPIntentParser, corpus) -> dict:
+    """Per-field accuracy of parse_intent against the labels, overall and per language."""
+    hits, totals = defaultdict(int), defaultdict(int)
+    per_language = defaultdict(lambda: [0, 0]) # language -> [exact, payments]
+    failures = []
+    for item in corpus:
+        parsed = parser.parse_intent(item["text"])
+        expected = dict(item["expected"], language=item["language"])
+        correct = True
+        for field in FIELDS:
+            if field not in expected:
+                continue
+            totals[field] += 1
+            if field_matches(field, expected[field], parsed.get(field if field != "language" else "detected_language")):
+                hits[field] += 1
+            else:
+                correct = False
+        if expected["intent"] == "payment":
+            totals["exact_payment"] += 1
+            hits["exact_payment"] += correct
+            per_language[item["language"]][0] += correct
+            per_language[item["language"]][1] += 1
+        if not correct and len(failures) < 20:
+            failures.append({"text": item["text"], "expected": expected, "parsed": parsed})
+    accuracy = {field: round(hits[field] / totals[field], 4) for field in totals}
+    accuracy["exact_payment_by_language"] = {lang: round(exact / count, 4) for lang, (exact, count) in sorted(per_language.items())}
+    return {"accuracy": accuracy, "sample_failures": failures}
+
+
+def run(size: int, translate_latency: float) -> dict:
+    corpus = build_corpus(size)
+    translator = StubTranslator(corpus, translate_latency)
+    cache = TranslationCache(db_path=None)
+    parser = NLPIntentParser(translation_cache=cache, translate_fn=translator, language_detector=FastLanguageDetector())
+
+    # The parser logs every step; keep that out of the timings' output (not their cost).
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        time_stages(parser, corpus[:WARMUP_COMMANDS]) # langdetect profiles, caches, pydantic
+        log.seek(0), log.truncate()
+        started = time.perf_counter()
+        samples = time_stages(parser, corpus)
+        elapsed = time.perf_counter() - started
+        log.seek(0), log.truncate()
+        quality = measure_accuracy(parser, corpus)
+
+    languages = defaultdict(int)
+    for item in corpus:
+        languages[item["language"]] += 1
+    return {
+        "meta": {
+            "commands": len(corpus),
+            "corpus_seed": CORPUS_SEED,
+            "languages": dict(sorted(languages.items())),
+            "translate_latency_ms": translate_latency * 1000,
+            "translator_calls": translator.calls,
+            "translation_cache_hit_rate": cache.stats()["hit_rate"],
+            "fast_detector": parser.language_detector.stats(),
+            "native_grammar": parser.native_grammar.stats(),
+            "intent_model": parser.intent_classifier.metadata.get("model_version") if parser.intent_classifier else None,
+            "wall_time_s": round(elapsed, 3),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "stages": {stage: summarize(samples[stage]) for stage in STAGES},
+        **quality,
+    }
+
+
+def compare(report: dict, baseline: dict, latency_tolerance: float, accuracy_tolerance: float) -> list:
+    """Regressions of report against baseline, as human-readable strings."""
+    regressions = []
+    for stage, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous or not current.get("calls") or not previous.get("calls"):
+            continue
+        if current["p95_us"] > previous["p95_us"] * (1 + latency_tolerance):
+            regressions.append(f"{stage}: p95 {previous['p95_us']:.1f} -> {current['p95_us']:.1f} us")
+        if current["throughput_per_s"] < previous["throughput_per_s"] / (1 + latency_tolerance):
+            regressions.append(f"{stage}: throughput {previous['throughput_per_s']:.0f} -> {current['throughput_per_s']:.0f}/s")
+    for field, value in report["accuracy"].items():
+        previous = baseline.get("accuracy", {}).get(field)
+        if isinstance(value, float) and isinstance(previous, float) and value < previous - accuracy_tolerance:
+            regressions.append(f"accuracy {field}: {previous:.2%} -> {value:.2%}")
+    return regressions
+
+
+def print_summary(report: dict):
+    meta = report["meta"]
+    print(f"--- {meta['commands']} commands, {len(meta['languages'])} languages, wall time {meta['wall_time_s']} s ---")
+    print(f"{'stage':<12}{'calls':>7}{'ops/s':>11}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+    for stage, row in report["stages"].items():
+        if row["calls"]:
+            print(f"{stage:<12}{row['calls']:>7}{row['throughput_per_s']:>11.0f}{row['p50_us']:>10.1f}"
+                  f"{row['p95_us']:>10.1f}{row['p99_us']:>10.1f}")
+    print("accuracy    : " + ", ".join(f"{field} {value:.1%}" for field, value in report["accuracy"].items()
+                                       if isinstance(value, float)))
+    print("exact/lang  : " + ", ".join(f"{lang} {value:.0%}" for lang, value
+                                       in report["accuracy"]["exact_payment_by_language"].items()))
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--size", type=int, default=3000, help="number of corpus commands")
+    arguments.add_argument("--translate-latency-ms", type=float, default=0.0, help="simulated translator latency")
+    arguments.add_argument("--output", help="write the JSON report here (default: stdout)")
+    arguments.add_argument("--baseline", default=BASELINE_PATH, help="baseline report to compare against")
+    arguments.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    arguments.add_argument("--latency-tolerance", type=float, default=0.25, help="allowed relative p95/throughput loss")
+    arguments.add_argument("--accuracy-tolerance", type=float, default=0.01, help="allowed absolute accuracy loss")
+    options = arguments.parse_args()
+
+    report = run(options.size, options.translate_latency_ms / 1000)
+    print_summary(report)
+
+    regressions = []
+    if options.save_baseline:
+        os.makedirs(os.path.dirname(options.baseline), exist_ok=True)
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Saved baseline to {options.baseline}")
+    elif os.path.exists(options.baseline):
+        with open(options.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, options.latency_tolerance, options.accuracy_tolerance)
+        report["comparison"] = {"baseline": options.baseline, "regressions": regressions}
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print("PASS" if not regressions else "FAIL", f"against {options.baseline}")
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, ensure_ascii=False))
+    sys.exit(1 if regressions else 0)
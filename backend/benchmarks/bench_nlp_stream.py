@@ -0,0 +1,149 @@
+"""Concurrency check for the /nlp/parse-intent/stream WebSocket endpoint.
+
+Opens many simultaneous sessions against the ASGI app in-process (no network, no
+uvicorn), each streaming a spoken command fragment by fragment, and reports how soon the
+amount and recipient arrive as partial parses compared with the final parse, the
+per-fragment server cost and the memory held per idle session. Translation is stubbed.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_nlp_stream [--sessions N] [--interval-ms MS]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from fastapi import FastAPI
+
+from remitai.backend.api.v1.endpoints import nlp
+from remitai.backend.services.streaming_parser import StreamingIntentSession
+
+COMMANDS = [
+    ["send", "30,000 naira", "to amina", "in kenya", "please"],
+    ["pay 250", "cedi to", "kofi in", "ghana", "now"],
+    ["nataka kutuma", "shilingi elfu kumi", "kwa maria", "nchini nigeria", "tafadhali"],
+    ["transfer 500 usd", "to jean", "in ghana", "today"],
+]
+
+
+class ASGIWebSocket:
+    """Minimal WebSocket client speaking ASGI directly to the app."""
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path, _, self.query = path.partition("?")
+        self.to_app: asyncio.Queue = asyncio.Queue()
+        self.from_app: asyncio.Queue = asyncio.Queue()
+        self.task = None
+
+    async def connect(self):
+        scope = {"type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws", "path": self.path,
+                 "raw_path": self.path.encode(), "query_string": self.query.encode(), "root_path": "",
+                 "headers": [], "client": ("bench", 0), "server": ("bench", 80), "subprotocols": []}
+        self.task = asyncio.create_task(self.app(scope, self.to_app.get, self.from_app.put))
+        await self.to_app.put({"type": "websocket.connect"})
+        accepted = await self.from_app.get()
+        assert accepted["type"] == "websocket.accept", accepted
+
+    async def send_json(self, data: dict):
+        await self.to_app.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive_json(self) -> dict:
+        message = await self.from_app.get()
+        return json.loads(message["text"])
+
+    async def close(self):
+        await self.to_app.put({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+
+async def run_session(app, index: int, interval: float) -> dict:
+    fragments = COMMANDS[index % len(COMMANDS)]
+    ws = ASGIWebSocket(app, f"/api/v1/nlp/parse-intent/stream?user_id=user_{index}")
+    await ws.connect()
+    first_seen = {}
+    start = time.perf_counter()
+
+    async def reader():
+        while True:
+            event = await ws.receive_json()
+            if event["type"] == "partial":
+                first_seen.setdefault(event["field"], time.perf_counter() - start)
+            elif event["type"] == "final":
+                first_seen["final"] = time.perf_counter() - start
+                return event["result"]
+            else:
+                raise RuntimeError(event)
+
+    reading = asyncio.create_task(reader())
+    for position, fragment in enumerate(fragments):
+        await ws.send_json({"text": fragment})
+        await asyncio.sleep(interval)
+    spoken = time.perf_counter() - start
+    await ws.send_json({"text": "", "final": True})
+    result = await reading
+    await ws.close()
+    return {"first_seen": first_seen, "spoken": spoken, "result": result}
+
+
+def session_memory(count: int) -> float:
+    """Bytes retained per session after one streamed command."""
+    sessions = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(count):
+        session = StreamingIntentSession(nlp.nlp_parser)
+        for fragment in COMMANDS[i % len(COMMANDS)]:
+            session.feed(fragment)
+        sessions.append(session)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename")) / count
+
+
+async def main(sessions: int, interval: float):
+    app = FastAPI()
+    app.include_router(nlp.router, prefix="/api/v1/nlp")
+    nlp.nlp_parser.translate_fn = lambda text, source_language: text
+
+    per_update = []
+    session = StreamingIntentSession(nlp.nlp_parser)
+    for _ in range(200):
+        session.reset()
+        for fragment in COMMANDS[0]:
+            started = time.perf_counter()
+            session.feed(fragment)
+            per_update.append(time.perf_counter() - started)
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(run_session(app, i, interval) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    def median_ms(field):
+        values = [o["first_seen"][field] for o in outcomes if field in o["first_seen"]]
+        return (statistics.median(values) * 1000, len(values)) if values else (float("nan"), 0)
+
+    print(f"--- {sessions} concurrent sessions, {interval * 1000:.0f} ms between fragments ---")
+    print(f"wall time                    : {elapsed:.2f} s")
+    print(f"server cost per fragment     : mean {statistics.fmean(per_update) * 1e6:.0f} us"
+          f"  p99 {sorted(per_update)[int(len(per_update) * 0.99)] * 1e6:.0f} us")
+    print(f"speech duration (median)     : {statistics.median(o['spoken'] for o in outcomes) * 1000:.0f} ms")
+    for field in ("intent", "amount", "currency", "recipient_name", "recipient_country", "final"):
+        median, seen = median_ms(field)
+        print(f"{field + ' first seen':<29}: {median:7.0f} ms after the first fragment ({seen}/{sessions} sessions)")
+    print(f"memory per session           : {session_memory(min(sessions, 5000)):.0f} bytes")
+    return all("final" in o["first_seen"] for o in outcomes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--interval-ms", type=float, default=150.0, help="Pause between fragments")
+    args = parser.parse_args()
+    ok = asyncio.run(main(args.sessions, args.interval_ms / 1000))
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,139 @@
+"""Connection reuse, retries, deadlines and circuit breaking of the shared outbound client.
+
+Runs a local keep-alive HTTP server and calls it from --threads threads:
+  1. --calls calls with a bare requests.get each (as exchange_rates.py did) and through
+     OutboundHTTPClient: latency and TCP connections the server accepted;
+  2. an endpoint answering 503 to --flaky-rate of requests: share of calls that succeed
+     after the client's jittered retries;
+  3. an endpoint that is down (always 503): calls that reach it before the breaker opens,
+     and the latency of the calls it then rejects;
+  4. an endpoint slower than the call deadline: time until the call gives up.
+Passes when the pooled client opens at most one connection per thread, at least 99% of
+flaky calls succeed, the breaker stops traffic to the down endpoint after
+OUTBOUND_BREAKER_FAILURE_THRESHOLD failures and the slow call ends within 50 ms of its deadline.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_outbound_http [--calls N] [--threads N]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from remitai.backend.utils.outbound_http import OUTBOUND_BREAKER_FAILURE_THRESHOLD, OutboundHTTPClient
+
+
+class Upstream(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, flaky_rate: float):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.flaky_rate = flaky_rate
+        self.connections = 0
+        self.hits = {}
+        self.lock = threading.Lock()
+        self.rng = random.Random(3)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive
+    disable_nagle_algorithm = True # Headers and body go out as separate writes
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            flaky = server.rng.random() < server.flaky_rate
+        if self.path == "/slow":
+            time.sleep(1.0)
+        status = 503 if self.path == "/down" or (self.path == "/flaky" and flaky) else 200
+        body = b'{"price": "1530.00"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed_calls(call, calls: int, threads: int):
+    """Per-call latencies (ms) and outcomes of calls spread over threads."""
+    def one(_):
+        started = time.perf_counter()
+        try:
+            ok = call().status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        return (time.perf_counter() - started) * 1e3, ok
+
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(one, range(calls)))
+
+
+def summary(results) -> str:
+    latencies = sorted(ms for ms, _ in results)
+    return (f"p50 {statistics.median(latencies):.2f} ms, p99 {latencies[int(0.99 * (len(latencies) - 1))]:.2f} ms, "
+            f"{sum(ok for _, ok in results)}/{len(results)} ok")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--flaky-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = Upstream(args.flaky_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    client = OutboundHTTPClient()
+
+    bare = timed_calls(lambda: requests.get(f"{base}/ok", timeout=10), args.calls, args.threads)
+    bare_connections, server.connections = server.connections, 0
+    pooled = timed_calls(lambda: client.request("bench_ok", "GET", f"{base}/ok"), args.calls, args.threads)
+    pooled_connections = server.connections
+
+    flaky = timed_calls(lambda: client.request("bench_flaky", "GET", f"{base}/flaky"), args.calls, args.threads)
+    flaky_ok = sum(ok for _, ok in flaky) / len(flaky)
+
+    down = timed_calls(lambda: client.request("bench_down", "GET", f"{base}/down", max_retries=0), 200, 1)
+    down_hits = server.hits.get("/down", 0)
+    rejected = down[down_hits:]
+
+    deadline = 0.3
+    started = time.perf_counter()
+    try:
+        client.request("bench_slow", "GET", f"{base}/slow", deadline_seconds=deadline)
+    except requests.exceptions.RequestException:
+        pass
+    slow_elapsed = time.perf_counter() - started
+
+    print(f"--- {args.calls} calls from {args.threads} threads against a local server ---")
+    print(f"bare requests.get  : {summary(bare)}, {bare_connections} connections")
+    print(f"pooled client      : {summary(pooled)}, {pooled_connections} connections")
+    print(f"{args.flaky_rate:.0%} answers 503    : {summary(flaky)} after retries")
+    print(f"endpoint down      : {down_hits} of {len(down)} calls reached it, rejected calls {summary(rejected)}")
+    print(f"{deadline:.1f} s deadline     : gave up after {slow_elapsed:.3f} s on a 1 s answer")
+    print(f"client stats       : {client.stats()}")
+
+    passed = (pooled_connections <= args.threads and flaky_ok >= 0.99 and down_hits == OUTBOUND_BREAKER_FAILURE_THRESHOLD
+              and slow_elapsed < deadline + 0.05)
+    print(f"{'PASS' if passed else 'FAIL'}: {pooled_connections} pooled vs {bare_connections} bare connections, "
+          f"{flaky_ok:.1%} flaky calls ok, breaker opened after {down_hits} failures, deadline overrun "
+          f"{(slow_elapsed - deadline) * 1e3:.0f} ms")
+    server.shutdown()
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,133 @@
+"""Upstream calls and lookup latency of the process-wide rate cache.
+
+Many threads convert amounts through ExchangeRateUtil for a handful of pairs while a fake
+Binance answers after --upstream-ms. The cache runs on a scaled-down clock (TTL of
+--ttl seconds) for --duration seconds, so it goes through several refresh cycles:
+  - the old per-instance cache: every request that finds its pair expired calls upstream;
+  - RateCache: one refresh per pair per cycle, lookups served from memory meanwhile.
+Then the upstream turns slow (several TTLs per answer) to show bounded stale serving.
+Passes when RateCache makes at most one upstream call per pair per refresh cycle, the
+warm lookup p99 stays under a millisecond and no lookup waits for the slow upstream.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_rate_cache [--threads N] [--upstream-ms MS]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from remitai.backend.services.risk_pipeline import LatencyWindow
+from remitai.backend.utils.exchange_rates import ExchangeRateUtil, RateCache
+from remitai.backend.utils.order_book import OrderBookSnapshot
+
+PAIRS = [("NGN", "USDC", "BUY"), ("KES", "USDC", "BUY"), ("GHS", "USDC", "BUY"),
+         ("NGN", "USDC", "SELL"), ("KES", "USDC", "SELL"), ("GHS", "USDC", "SELL")]
+
+
+class FakeUpstream:
+    """Counts calls and answers with a one-price order book after a fixed delay."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, fiat_currency: str, asset: str, trade_type: str) -> OrderBookSnapshot:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        return OrderBookSnapshot.flat(1500.0 if trade_type == "SELL" else 1530.0, trade_type)
+
+
+def per_instance_cache_calls(threads: int, duration: float, ttl: float, upstream: FakeUpstream) -> int:
+    """Upstream calls of the old scheme: a lookup that finds its pair expired fetches it itself."""
+    cache, lock = {}, threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(i: int):
+        while time.perf_counter() < deadline:
+            key = PAIRS[i % len(PAIRS)]
+            with lock:
+                entry = cache.get(key)
+            if entry is None or time.perf_counter() - entry[1] >= ttl:
+                cache_value = upstream(*key)
+                with lock:
+                    cache[key] = (cache_value, time.perf_counter())
+            i += 1
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(client, range(threads)))
+    return upstream.calls
+
+
+def shared_cache_run(cache: RateCache, threads: int, duration: float) -> LatencyWindow:
+    latency = LatencyWindow(200000)
+    util = ExchangeRateUtil(rate_cache=cache)
+    deadline = time.perf_counter() + duration
+
+    def client(i: int):
+        while time.perf_counter() < deadline:
+            fiat, _, trade_type = PAIRS[i % len(PAIRS)]
+            started = time.perf_counter()
+            if trade_type == "BUY":
+                util.convert_to_usdc(1000.0, fiat)
+            else:
+                util.convert_from_usdc(10.0, fiat)
+            latency.add(time.perf_counter() - started)
+            i += 1
+            time.sleep(0.0005)
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(client, range(threads)))
+    return latency
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--upstream-ms", type=float, default=200.0)
+    parser.add_argument("--ttl", type=float, default=1.0, help="Scaled-down CACHE_DURATION in seconds")
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+    upstream_seconds = args.upstream_ms / 1e3
+    cycles = args.duration / (args.ttl * 0.8)
+
+    old_calls = per_instance_cache_calls(args.threads, args.duration, args.ttl, FakeUpstream(upstream_seconds))
+
+    upstream = FakeUpstream(upstream_seconds)
+    cache = RateCache(fetch=upstream, ttl_seconds=args.ttl, refresh_ahead_seconds=args.ttl * 0.2,
+                      max_stale_seconds=args.ttl * 10, fetch_wait_seconds=1.0,
+                      executor=ThreadPoolExecutor(len(PAIRS), thread_name_prefix="bench-fx"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        cache.prefetch(PAIRS)
+        shared_cache_run(cache, 1, upstream_seconds * 2) # Warm-up: every pair fetched once
+        warm_calls = upstream.calls
+        warm = shared_cache_run(cache, args.threads, args.duration)
+        steady_calls = upstream.calls - warm_calls
+        upstream.seconds = args.ttl * 4 # Upstream slows down: answers arrive well after rates go stale
+        slow = shared_cache_run(cache, args.threads, args.ttl * 3)
+    stats = cache.stats()
+
+    print(f"--- {args.threads} threads, {len(PAIRS)} pairs, TTL {args.ttl:.1f} s, upstream {args.upstream_ms:.0f} ms, "
+          f"{args.duration:.0f} s ---")
+    print(f"per-instance cache : {old_calls} upstream calls")
+    print(f"RateCache          : {steady_calls} upstream calls ({cycles:.1f} refresh cycles x {len(PAIRS)} pairs "
+          f"= {cycles * len(PAIRS):.0f} at most)")
+    print(f"{'lookups':<19}{'p50 us':>9}{'p99 us':>9}{'max ms':>9}{'count':>9}")
+    for name, latency in (("warm", warm), ("slow upstream", slow)):
+        s = latency.stats()
+        print(f"{name:<19}{s['p50_ms'] * 1e3:>9.1f}{s['p99_ms'] * 1e3:>9.1f}{s['max_ms']:>9.2f}{s['count']:>9}")
+    print(f"cache stats        : {stats}")
+
+    single_flight = steady_calls <= (int(cycles) + 1) * len(PAIRS)
+    warm_p99 = warm.stats()["p99_ms"]
+    never_waited = slow.stats()["max_ms"] < upstream_seconds * 1e3 and stats["miss_timeouts"] == 0
+    passed = single_flight and warm_p99 < 1.0 and never_waited
+    print(f"{'PASS' if passed else 'FAIL'}: {steady_calls} upstream calls vs {old_calls} per-instance, "
+          f"warm p99 {warm_p99 * 1e3:.1f} us, slow-upstream max {slow.stats()['max_ms']:.2f} ms")
+    sys.exit(0 if passed else 1)
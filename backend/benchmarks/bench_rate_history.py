@@ -0,0 +1,110 @@
+"""Size, append rate and query latency of the on-disk rate history.
+
+Appends --points rates of one pair (a random walk, one point every 30-90 s, so 2M points
+cover about four years) to a RateHistoryStore in a temporary directory, then:
+  - reports the bytes on disk per point and the segments written;
+  - runs range queries over an hour, a day and 30 days at random positions, and at()
+    lookups, checking them against the appended arrays;
+  - downsamples 30 days to hourly bars and computes stats over the whole history;
+  - reopens the store and checks that every point is still there.
+Passes when the history takes at most 6.1 bytes a point, every query matches (rates to
+the 0.001% tick), a one-day range query takes under a millisecond and nothing is lost
+on reopening.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_rate_history [--points N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from remitai.backend.services.rate_history import RATE_HISTORY_LOG_TICK, RateHistoryStore
+
+PAIR = "NGN_USDC_BUY"
+CLOCK_START = 1_600_000_000.0
+
+
+def disk_bytes(directory: str) -> int:
+    """Bytes allocated on disk (the active segment is a sparse file until it fills up)."""
+    return sum(os.stat(os.path.join(root, name)).st_blocks * 512 for root, _, names in os.walk(directory) for name in names)
+
+
+def query_timing(series, times, rates, window: float, rng, queries: int = 200):
+    """Mean microseconds per range query of the given width; False if any result is wrong."""
+    correct, elapsed = True, 0.0
+    for _ in range(queries):
+        start = rng.uniform(times[0], times[-1] - window)
+        started = time.perf_counter()
+        got_times, got_rates = series.range(start, start + window)
+        elapsed += time.perf_counter() - started
+        lo, hi = np.searchsorted(times, start, "left"), np.searchsorted(times, start + window, "right")
+        correct &= np.array_equal(got_times, times[lo:hi]) and np.allclose(got_rates, rates[lo:hi], rtol=RATE_HISTORY_LOG_TICK, atol=0)
+    return elapsed / queries * 1e6, bool(correct)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=2000000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(29)
+    times = CLOCK_START + np.cumsum(rng.integers(30, 91, args.points)).astype(np.float64)
+    rates = 1500 * np.exp(np.cumsum(rng.normal(0, 0.0008, args.points)))
+    rates_list, times_list = rates.tolist(), times.tolist()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = RateHistoryStore(directory)
+        series = store.series(PAIR)
+        started = time.perf_counter()
+        for timestamp, rate in zip(times_list, rates_list):
+            series.append(timestamp, rate)
+        append_seconds = time.perf_counter() - started
+        store.flush()
+        size = disk_bytes(directory)
+        info = series.info()
+
+        print(f"--- {args.points} points, {(times[-1] - times[0]) / 86400:.0f} days, "
+              f"rates {rates.min():.0f}-{rates.max():.0f} ---")
+        print(f"append             : {args.points / append_seconds:,.0f} points/s")
+        print(f"on disk            : {size / 2**20:.2f} MiB, {size / args.points:.2f} bytes/point, "
+              f"{info['segments']} segments ({info['segments_rotated']} rotations)")
+
+        all_correct = True
+        day_micros = None
+        for name, window in (("1 hour", 3600), ("1 day", 86400), ("30 days", 30 * 86400)):
+            micros, correct = query_timing(series, times, rates, window, rng)
+            all_correct &= correct
+            day_micros = micros if window == 86400 else day_micros
+            print(f"range {name:<12} : {micros:8.1f} us {'ok' if correct else 'WRONG'}")
+
+        probes = rng.uniform(times[0], times[-1], 1000)
+        started = time.perf_counter()
+        found = [series.at(t) for t in probes.tolist()]
+        at_micros = (time.perf_counter() - started) / len(probes) * 1e6
+        expected = rates[np.searchsorted(times, probes, "right") - 1]
+        at_correct = bool(np.allclose(found, expected, rtol=RATE_HISTORY_LOG_TICK, atol=0))
+        all_correct &= at_correct
+        print(f"at()               : {at_micros:8.1f} us {'ok' if at_correct else 'WRONG'}")
+
+        started = time.perf_counter()
+        bars = series.downsample(times[-1] - 30 * 86400, times[-1], 3600)
+        downsample_ms = (time.perf_counter() - started) * 1e3
+        started = time.perf_counter()
+        stats = series.stats()
+        stats_ms = (time.perf_counter() - started) * 1e3
+        print(f"30 days -> hourly  : {downsample_ms:.1f} ms, {len(bars['close'])} bars")
+        print(f"stats (all points) : {stats_ms:.1f} ms, p50 {stats['percentiles']['p50']:.2f}, "
+              f"annualized volatility {stats['annualized_volatility']:.1%} "
+              f"(generated {0.0008 * np.sqrt(365 * 86400 / 60):.1%})")
+
+        reopened = RateHistoryStore(directory).series(PAIR).info()["points"]
+        print(f"reopened           : {reopened} points")
+
+    passed = size / args.points <= 6.1 and all_correct and day_micros < 1000 and reopened == args.points
+    print(f"{'PASS' if passed else 'FAIL'}: {size / args.points:.2f} bytes/point, queries {'match' if all_correct else 'differ'}, "
+          f"1-day range {day_micros:.0f} us, {reopened}/{args.points} points after reopening")
+    sys.exit(0 if passed else 1)
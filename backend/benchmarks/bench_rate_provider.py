@@ -0,0 +1,86 @@
+"""Lookup cost, bulk conversion throughput and consistency of the rate matrix.
+
+1. Cost of RATE_PROVIDER.rate() for direct (NGN -> USDC) and cross (KES -> GHS) pairs.
+2. Converting --amounts amounts between random currency pairs one rate() call at a time
+   and with one RateMatrix.convert_many call, given currency codes and given indices from
+   RateMatrix.indices (map once, convert many times); all must give the same results.
+3. Consistency over every pair and triangle of currencies: a cross pair costs the same
+   as going through USD, buying and selling back never gains, and no round trip
+   i -> j -> k -> i ends with more than it started with.
+Passes when the results match, convert_many is at least 5x faster than the loop with
+currency codes and 50x with indices, and every consistency check holds.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_rate_provider [--amounts N]
+"""
+
+import argparse
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from remitai.backend.services.rate_provider import RATE_PROVIDER
+
+
+def consistency(matrix) -> dict:
+    bid, ask, usd = matrix.bid, matrix.ask, matrix.index["USD"]
+    via_usd = bid[:, usd][:, None] * bid[usd, :][None, :]
+    np.fill_diagonal(via_usd, 1.0)
+    round_trip = bid * bid.T
+    triangles = bid[:, :, None] * bid[None, :, :] * bid.T[:, None, :] # bid[i, j] * bid[j, k] * bid[k, i]
+    return {
+        "cross_vs_usd_max_rel_diff": float(np.max(np.abs(bid / via_usd - 1))),
+        "round_trip_max": float(round_trip.max()),
+        "ask_is_inverse_bid": bool(np.allclose(ask * bid.T, 1.0)),
+        "triangle_max": float(triangles.max()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--amounts", type=int, default=1000000)
+    args = parser.parse_args()
+    matrix = RATE_PROVIDER.current()
+    rng = np.random.default_rng(23)
+
+    print(f"--- {len(matrix.currencies)} currencies ---")
+    for pair in (("NGN", "USDC"), ("KES", "GHS")):
+        runs = 200000
+        micros = timeit.timeit(lambda: RATE_PROVIDER.rate(*pair), number=runs) / runs * 1e6
+        print(f"rate({pair[0]} -> {pair[1]}) : {micros:.2f} us, bid {RATE_PROVIDER.rate(*pair):.6g}, "
+              f"ask {RATE_PROVIDER.rate(*pair, side='ask'):.6g}")
+
+    codes = np.array(matrix.currencies)
+    amounts = rng.lognormal(5, 1.5, args.amounts)
+    sources = codes[rng.integers(len(codes), size=args.amounts)]
+    targets = codes[rng.integers(len(codes), size=args.amounts)]
+
+    started = time.perf_counter()
+    looped = np.array([amount * RATE_PROVIDER.rate(source, target)
+                       for amount, source, target in zip(amounts.tolist(), sources.tolist(), targets.tolist())])
+    loop_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    vectorized = matrix.convert_many(amounts, sources, targets)
+    codes_seconds = time.perf_counter() - started
+    source_indices, target_indices = matrix.indices(sources), matrix.indices(targets)
+    started = time.perf_counter()
+    indexed = matrix.convert_many(amounts, source_indices, target_indices)
+    index_seconds = time.perf_counter() - started
+    same = bool(np.allclose(looped, vectorized, rtol=1e-12, atol=0) and np.array_equal(vectorized, indexed))
+    codes_speedup, index_speedup = loop_seconds / codes_seconds, loop_seconds / index_seconds
+    print(f"\n{args.amounts} conversions")
+    print(f"rate() per amount  : {loop_seconds:.3f} s ({args.amounts / loop_seconds:,.0f}/s)")
+    print(f"convert_many codes : {codes_seconds:.3f} s ({args.amounts / codes_seconds:,.0f}/s), {codes_speedup:.0f}x")
+    print(f"convert_many index : {index_seconds:.3f} s ({args.amounts / index_seconds:,.0f}/s), {index_speedup:.0f}x, "
+          f"results {'match' if same else 'differ'}")
+
+    checks = consistency(matrix)
+    print(f"\nconsistency        : {checks}")
+    consistent = (checks["cross_vs_usd_max_rel_diff"] < 1e-12 and checks["round_trip_max"] <= 1.0 + 1e-12
+                  and checks["ask_is_inverse_bid"] and checks["triangle_max"] <= 1.0 + 1e-12)
+    passed = same and codes_speedup >= 5 and index_speedup >= 50 and consistent
+    print(f"{'PASS' if passed else 'FAIL'}: convert_many {codes_speedup:.0f}x (codes) / {index_speedup:.0f}x (indices) "
+          f"the per-amount loop, rates {'consistent' if consistent else 'inconsistent'}")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,154 @@
+"""Send-path latency and verdict parity of the two-tier risk pipeline.
+
+Replays assessments from many users (a few pay a look-alike of an earlier recipient)
+from concurrent threads, with the deep checks being RecipientLookalikeCheck plus a
+simulated heavy check (--deep-ms of blocking work, standing in for graph features or a
+remote model). Runs it twice:
+  - inline   : every check on the request path, as /assess-risk did before;
+  - two-tier : RiskPipeline, the caller waits only for the fast tier.
+Reports caller latency percentiles, final-verdict lag, the largest queue depth seen and
+whether both runs flag the same assessments. Passes when they do and the two-tier
+caller p99 stays under the fast deadline.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.bench_risk_pipeline [--assessments N] [--threads N] [--deep-ms MS]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from remitai.backend.services import fraud_detection_service
+from remitai.backend.services.fraud_detection_service import FRAUD_RULES, FraudDetectionService
+from remitai.backend.services.risk_pipeline import (
+    FRAUD_DEEP_WORKERS, FRAUD_FAST_DEADLINE_SECONDS, LatencyWindow, RecipientLookalikeCheck, RiskPipeline,
+)
+
+NAMES = ["amina_wanjiru", "kofi_mensah", "tunde_bakare", "fatima_sani", "jean_mugabo", "chidi_okafor"]
+
+
+class SimulatedHeavyCheck:
+    """Deep check that blocks for a fixed time and never flags."""
+
+    name = "simulated_heavy"
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def __call__(self, request):
+        time.sleep(self.seconds)
+        return None
+
+
+def account_suffix(u: int) -> str:
+    """Letters-only suffix per user: "_b", "_ba", ... (digits would make look-alikes distinct accounts)."""
+    letters = ""
+    while True:
+        u, digit = divmod(u, 26)
+        letters += "abcdefghijklmnopqrstuvwxyz"[digit]
+        if u == 0:
+            return "_" + letters
+
+
+def build_requests(count: int, seed: int = 17):
+    """Five payments per user, users interleaved round-robin so a user's payments stay in order.
+
+    Every user pays their own two recipients: recipients shared by hundreds of senders
+    trip the fan-in rules, and whether a payment does then depends on thread timing.
+    """
+    rng = random.Random(seed)
+    users = count // 5
+    pairs = [[name + account_suffix(u) for name in rng.sample(NAMES, 2)] for u in range(users)]
+    requests = []
+    for i in range(5):
+        for u, recipients in enumerate(pairs):
+            recipient = recipients[i % 2]
+            if i == 4 and u % 20 == 0: # Look-alike: one letter swapped for a similar one
+                recipient = recipient.replace("i", "l", 1) if "i" in recipient else recipient + "_"
+            requests.append((f"user_{u}", f"send {rng.randint(10, 900)} usd to {recipient}", float(rng.randint(10, 900)), recipient))
+    return requests
+
+
+def inline_run(requests, threads: int, deep_ms: float):
+    fraud_detection_service.FRAUD_STATE_BACKEND.clear()
+    deep_checks = [RecipientLookalikeCheck(), SimulatedHeavyCheck(deep_ms / 1e3)]
+    latency, flagged, lock = LatencyWindow(len(requests)), set(), threading.Lock()
+    suspicious_score = FRAUD_RULES.current().suspicious_score
+
+    def assess(request):
+        started = time.perf_counter()
+        user, command, amount, recipient = request
+        verdict = FraudDetectionService().assess_transaction_risk(user, command, amount, recipient)
+        hits = [check({"user_id": user, "recipient_id": recipient, "timestamp": verdict["timestamp"]}) for check in deep_checks]
+        score = verdict["risk_score"] + sum(hit[0] for hit in hits if hit)
+        latency.add(time.perf_counter() - started)
+        if score >= suspicious_score:
+            with lock:
+                flagged.add(request)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(assess, requests))
+    return latency, flagged, time.perf_counter() - started, None
+
+
+def two_tier_run(requests, threads: int, deep_ms: float, workers: int):
+    fraud_detection_service.FRAUD_STATE_BACKEND.clear()
+    pipeline = RiskPipeline(deep_checks=[RecipientLookalikeCheck(), SimulatedHeavyCheck(deep_ms / 1e3)], workers=workers)
+    latency, ids, lock = LatencyWindow(len(requests)), {}, threading.Lock()
+    max_depth = [0]
+
+    def assess(request):
+        started = time.perf_counter()
+        verdict = pipeline.assess(*request)
+        latency.add(time.perf_counter() - started)
+        with lock:
+            ids[verdict["assessment_id"]] = request
+            max_depth[0] = max(max_depth[0], pipeline._queue.qsize())
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(assess, requests))
+    elapsed = time.perf_counter() - started
+    pipeline._queue.join() # Every final verdict published
+    flagged = {request for assessment_id, request in ids.items() if pipeline.verdict(assessment_id)["is_suspicious"]}
+    return latency, flagged, elapsed, dict(pipeline.stats(), max_queue_depth=max_depth[0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assessments", type=int, default=4000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--deep-ms", type=float, default=5.0, help="Blocking time of the simulated heavy deep check")
+    parser.add_argument("--workers", type=int, default=FRAUD_DEEP_WORKERS * 8)
+    args = parser.parse_args()
+
+    requests = build_requests(args.assessments)
+    with contextlib.redirect_stdout(io.StringIO()):
+        inline = inline_run(requests, args.threads, args.deep_ms)
+        two_tier = two_tier_run(requests, args.threads, args.deep_ms, args.workers)
+
+    print(f"--- {len(requests)} assessments, {args.threads} caller threads, deep checks {args.deep_ms:.1f} ms, "
+          f"{args.workers} deep workers ---")
+    print(f"{'run':<10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'wall s':>8}{'flagged':>9}")
+    for name, (latency, flagged, elapsed, _) in (("inline", inline), ("two-tier", two_tier)):
+        stats = latency.stats()
+        print(f"{name:<10}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['max_ms']:>9.2f}"
+              f"{elapsed:>8.2f}{len(flagged):>9}")
+    stats = two_tier[3]
+    print(f"\nfinal verdict lag  : {stats['end_to_end']}")
+    print(f"deep tier          : {stats['deep_tier']}")
+    print(f"max queue depth    : {stats['max_queue_depth']} (capacity {stats['queue_capacity']}), "
+          f"deadline overruns {stats['fast_deadline_overruns']}, skipped {stats['deep_skipped_queue_full']}")
+
+    same = inline[1] == two_tier[1]
+    fast_p99 = two_tier[0].stats()["p99_ms"]
+    passed = same and fast_p99 < FRAUD_FAST_DEADLINE_SECONDS * 1e3
+    print(f"{'PASS' if passed else 'FAIL'}: final verdicts {'match' if same else 'differ from'} inline scoring, "
+          f"two-tier caller p99 {fast_p99:.2f} ms (deadline {FRAUD_FAST_DEADLINE_SECONDS * 1e3:.0f} ms)")
+    sys.exit(0 if passed else 1)
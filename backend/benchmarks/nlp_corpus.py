@@ -0,0 +1,153 @@
+"""Labelled multilingual command corpus for the NLP benchmarks.
+
+build_corpus() expands the templates below into commands in English, French, Swahili,
+Hausa, Yoruba, Igbo and Arabic, each with its expected parse and the English text the
+stub translator returns for it. Amounts are written as digits, with thousands
+separators, or spelled out in the command's language. The corpus is generated from a
+seed, so every run and every machine sees the same commands.
+"""
+
+import random
+from typing import Dict, List
+
+# language -> (command template, English template); {amount} {currency} {name} {country}
+PAYMENT_TEMPLATES = {
+    "en": [("Send {amount} {currency} to {name} in {country}", "Send {amount} {currency} to {name} in {country}"),
+           ("Pay {amount} {currency} to {name}", "Pay {amount} {currency} to {name}"),
+           ("Transfer {amount} {currency} to {name} in {country}", "Transfer {amount} {currency} to {name} in {country}"),
+           ("I want to send {amount} {currency} to {name} in {country}", "I want to send {amount} {currency} to {name} in {country}")],
+    "fr": [("Je veux envoyer {amount} {currency} à {name} au {country}", "I want to send {amount} {currency} to {name} in {country}"),
+           ("Envoyer {amount} {currency} à {name}", "Send {amount} {currency} to {name}"),
+           ("Payer {amount} {currency} à {name} au {country}", "Pay {amount} {currency} to {name} in {country}")],
+    "sw": [("Nataka kutuma {currency} {amount} kwa {name} nchini {country}", "I want to send {amount} {currency} to {name} in {country}"),
+           ("Tuma {currency} {amount} kwa {name}", "Send {amount} {currency} to {name}"),
+           ("Lipa {currency} {amount} kwa {name} nchini {country}", "Pay {amount} {currency} to {name} in {country}")],
+    "ha": [("Ziga {currency} {amount} zuwa {name} a {country}", "Send {amount} {currency} to {name} in {country}"),
+           ("Aika {currency} {amount} ga {name}", "Send {amount} {currency} to {name}")],
+    "yo": [("Fi {amount} {currency} ranṣẹ si {name} ni {country}", "Send {amount} {currency} to {name} in {country}"),
+           ("San {amount} {currency} fun {name}", "Pay {amount} {currency} to {name}")],
+    "ig": [("Zipu {currency} {amount} nye {name} na {country}", "Send {amount} {currency} to {name} in {country}"),
+           ("Kwụọ {currency} {amount} nye {name}", "Pay {amount} {currency} to {name}")],
+    "ar": [("أرسل {amount} {currency} إلى {name} في {country}", "Send {amount} {currency} to {name} in {country}"),
+           ("حول {amount} {currency} إلى {name}", "Transfer {amount} {currency} to {name}")],
+}
+
+# language -> [(word in the command, ISO code, English word)]
+CURRENCY_WORDS = {
+    "en": [("naira", "NGN", "naira"), ("cedis", "GHS", "cedis"), ("shillings", "KES", "shillings"),
+           ("dollars", "USD", "dollars"), ("rand", "ZAR", "rand"), ("birr", "ETB", "birr"), ("KES", "KES", "KES")],
+    "fr": [("dollars", "USD", "dollars"), ("euros", "EUR", "euros"), ("francs CFA", "XOF", "CFA francs"),
+           ("dirhams", "MAD", "dirhams")],
+    "sw": [("shilingi", "KES", "shillings"), ("dola", "USD", "dollars"), ("randi", "ZAR", "rand")],
+    "ha": [("Naira", "NGN", "Naira"), ("dala", "USD", "dollars"), ("cedi", "GHS", "cedi")],
+    "yo": [("naira", "NGN", "naira"), ("dọ́là", "USD", "dollars")],
+    "ig": [("Naira", "NGN", "Naira"), ("dọla", "USD", "dollars")],
+    "ar": [("دولار", "USD", "dollars"), ("جنيه", "EGP", "Egyptian pounds"), ("درهم", "MAD", "dirhams")],
+}
+
+# language -> [(word in the command, ISO code, English word)]
+COUNTRY_WORDS = {
+    "en": [("Kenya", "KE", "Kenya"), ("Ghana", "GH", "Ghana"), ("Nigeria", "NG", "Nigeria"),
+           ("Uganda", "UG", "Uganda"), ("Ethiopia", "ET", "Ethiopia")],
+    "fr": [("Ghana", "GH", "Ghana"), ("Sénégal", "SN", "Senegal"), ("Mali", "ML", "Mali"),
+           ("Maroc", "MA", "Morocco"), ("Kenya", "KE", "Kenya")],
+    "sw": [("Kenya", "KE", "Kenya"), ("Nigeria", "NG", "Nigeria"), ("Tanzania", "TZ", "Tanzania"),
+           ("Uganda", "UG", "Uganda")],
+    "ha": [("Kenya", "KE", "Kenya"), ("Najeriya", "NG", "Nigeria"), ("Gana", "GH", "Ghana"), ("Nijar", "NE", "Niger")],
+    "yo": [("Kenya", "KE", "Kenya"), ("Ghana", "GH", "Ghana")],
+    "ig": [("Kenya", "KE", "Kenya"), ("Ghana", "GH", "Ghana")],
+    "ar": [("مصر", "EG", "Egypt"), ("المغرب", "MA", "Morocco"), ("كينيا", "KE", "Kenya")],
+}
+
+NAMES = ["Amina", "Jean", "Kofi", "Maria", "Tunde", "Fatima", "Chidi", "Wanjiru", "Musa", "Awa", "Thabo", "Ngozi"]
+ARABIC_NAMES = ["فاطمة", "يوسف", "أحمد", "مريم"]
+
+# Spelled-out amounts per language (value -> words)
+SPELLED_AMOUNTS = {
+    "en": {},
+    "fr": {500: "cinq cents", 250000: "deux cent cinquante mille", 17000: "dix-sept mille", 90: "quatre-vingt-dix"},
+    "sw": {10000: "elfu kumi", 500: "mia tano", 25000: "elfu ishirini na tano", 10500: "elfu kumi na mia tano"},
+    "ha": {30000: "dubu talatin", 500: "dari biyar", 12000: "dubu goma sha biyu", 300: "dari uku"},
+    "yo": {30000: "ẹgbẹ̀rún ọgbọ̀n", 500: "ẹẹdẹgbẹta", 5000: "ẹgbẹrun marun"},
+    "ig": {30000: "puku iri atọ", 500: "narị ise", 5000: "puku ise"},
+    "ar": {20000: "عشرين ألف", 5500: "خمسة آلاف وخمسمائة", 300: "ثلاثمائة"},
+}
+
+# (language, command, English, intent) for commands that are not payments
+OTHER_INTENTS = [
+    ("en", "Can you tell me my current balance", "Can you tell me my current balance", "balance_inquiry"),
+    ("en", "How much do I have left", "How much do I have left", "balance_inquiry"),
+    ("en", "Open a savings vault for {months} months", "Open a savings vault for {months} months", "vault_creation"),
+    ("en", "Lock {amount} naira in a vault", "Lock {amount} naira in a vault", "vault_creation"),
+    ("en", "Withdraw {amount} dollars to my bank", "Withdraw {amount} dollars to my bank", "withdrawal"),
+    ("en", "Cash out my vault", "Cash out my vault", "withdrawal"),
+    ("en", "Show my last {months} transfers", "Show my last {months} transfers", "transaction_history"),
+    ("en", "What payments did I make last month", "What payments did I make last month", "transaction_history"),
+    ("en", "What is the cedi to naira rate today", "What is the cedi to naira rate today", "rate_check"),
+    ("en", "How much is {amount} usd in kes", "How much is {amount} usd in kes", "rate_check"),
+    ("fr", "Quel est mon solde actuel", "What is my current balance", "balance_inquiry"),
+    ("fr", "Je voudrais retirer {amount} euros", "I would like to withdraw {amount} euros", "withdrawal"),
+    ("fr", "Quel est le taux du dollar aujourd'hui", "What is the dollar rate today", "rate_check"),
+    ("sw", "Salio langu ni kiasi gani sasa", "What is my balance now", "balance_inquiry"),
+    ("sw", "Nataka kutoa pesa kutoka akiba yangu", "I want to withdraw money from my savings", "withdrawal"),
+    ("sw", "Nionyeshe historia ya miamala yangu", "Show me my transaction history", "transaction_history"),
+    ("ha", "Nawa ne ma'auni na yanzu", "What is my balance now", "balance_inquiry"),
+    ("yo", "Elo ni o wa ninu akọọlẹ mi bayi", "How much is in my account now", "balance_inquiry"),
+    ("ig", "Ego ole dị n'akaụntụ m ugbu a", "How much money is in my account now", "balance_inquiry"),
+    ("ar", "ما هو رصيدي الآن", "What is my balance now", "balance_inquiry"),
+]
+
+CORPUS_SEED = 20240601
+PAYMENT_SHARE = 0.8
+
+
+def _amount_text(rng: random.Random, language: str):
+    """(value, text) for a random amount, written as digits or words."""
+    spelled = SPELLED_AMOUNTS.get(language, {})
+    roll = rng.random()
+    if spelled and roll < 0.3:
+        value = rng.choice(sorted(spelled))
+        return value, spelled[value]
+    value = rng.choice([50, 75, 100, 250, 500, 1200, 5000, 10000, 20000, 30000, 150000])
+    if value >= 1000 and roll < 0.6 and language != "ar":
+        return value, f"{value:,}"
+    return value, str(value)
+
+
+def build_corpus(size: int = 3000, seed: int = CORPUS_SEED) -> List[Dict]:
+    """Deterministic list of {"text", "english", "language", "expected"} items."""
+    rng = random.Random(seed)
+    languages = sorted(PAYMENT_TEMPLATES)
+    corpus = []
+    while len(corpus) < size:
+        if rng.random() >= PAYMENT_SHARE:
+            language, text, english, intent = rng.choice(OTHER_INTENTS)
+            amount, months = rng.choice([100, 500, 2000]), rng.choice([3, 5, 6, 10])
+            corpus.append({
+                "text": text.format(amount=amount, months=months),
+                "english": english.format(amount=amount, months=months),
+                "language": language,
+                "expected": {"intent": intent},
+            })
+            continue
+
+        language = languages[len(corpus) % len(languages)]
+        template, english_template = rng.choice(PAYMENT_TEMPLATES[language])
+        value, amount_text = _amount_text(rng, language)
+        currency_word, currency_code, currency_english = rng.choice(CURRENCY_WORDS[language])
+        country_word, country_code, country_english = rng.choice(COUNTRY_WORDS[language])
+        name = rng.choice(ARABIC_NAMES if language == "ar" else NAMES)
+        has_country = "{country}" in template
+        corpus.append({
+            "text": template.format(amount=amount_text, currency=currency_word, name=name, country=country_word),
+            "english": english_template.format(amount=value, currency=currency_english, name=name, country=country_english),
+            "language": language,
+            "expected": {
+                "intent": "payment",
+                "amount": value,
+                "currency": currency_code,
+                "recipient_name": name,
+                "recipient_country_code": country_code if has_country else None,
+            },
+        })
+    return corpus
@@ -0,0 +1,131 @@
+"""Threaded stress test for the per-user locking of the fraud checks.
+
+Many threads call FraudDetectionService.assess_transaction_risk at once, as FastAPI's
+threadpool does for the sync /assess-risk endpoint. A few hot users each send the same
+command to a new recipient many times, spread over all threads, next to a crowd of
+one-off users. The backend is wrapped to record what each call saw. If one user's
+assessments are applied one after the other, a hot user's K transactions see window
+counts of exactly 1, 2, ..., K and its K commands see 0, 1, ... previous commands (up to
+COMMAND_HISTORY_LENGTH); a lost update or two calls reading the same state shows up as
+a repeated or missing value, and the user is counted as a violation; calls that raise
+(e.g. an OrderedDict mutated by another thread) are counted as errors. The run is repeated
+with no locking, one global lock and the striped locks (FRAUD_STATE_LOCK_STRIPES), with a
+tiny thread switch interval to provoke races.
+
+Run from the repository root:
+    python -m remitai.backend.benchmarks.stress_fraud_locks [--threads N] [--hot-users N] [--requests N]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from remitai.backend.services import fraud_detection_service
+from remitai.backend.services.fraud_backends import FraudStateBackend
+from remitai.backend.services.fraud_detection_service import COMMAND_HISTORY_LENGTH, FraudDetectionService
+from remitai.backend.services.fraud_state import UserLockStripes
+
+
+class NoLocks:
+    """Stand-in for UserLockStripes that locks nothing (the behaviour before striping)."""
+
+    def for_user(self, user_id):
+        return contextlib.nullcontext()
+
+
+class RecordingBackend(FraudStateBackend):
+    """Passes calls to a backend and keeps, per user, what each call returned."""
+
+    def __init__(self, backend: FraudStateBackend):
+        self.backend = backend
+        self.history_lengths, self.transaction_counts, self.recipient_counts = {}, {}, {}
+
+    def record_command(self, user_id, timestamp, signature):
+        history = self.backend.record_command(user_id, timestamp, signature)
+        self.history_lengths.setdefault(user_id, []).append(len(history))
+        return history
+
+    def record_transaction(self, user_id, recipient_id, timestamp):
+        transactions, recipients = self.backend.record_transaction(user_id, recipient_id, timestamp)
+        self.transaction_counts.setdefault(user_id, []).append(transactions)
+        self.recipient_counts.setdefault(user_id, []).append(recipients)
+        return transactions, recipients
+
+    def record_amount(self, user_id, recipient_id, amount, timestamp):
+        return self.backend.record_amount(user_id, recipient_id, amount, timestamp)
+
+    def record_fan_in(self, user_id, recipient_id, timestamp, windows):
+        return self.backend.record_fan_in(user_id, recipient_id, timestamp, windows)
+
+
+def build_requests(hot_users: int, requests_per_hot_user: int, cold_users: int, seed: int = 5):
+    rng = random.Random(seed)
+    requests = [(f"hot_{u}", "Send 10 USD to Amina", 20.0, f"hot_{u}_r{j}")
+                for u in range(hot_users) for j in range(requests_per_hot_user)]
+    requests += [(f"cold_{u}", f"send {rng.randint(10, 900)} usd to bob", 50.0, "bob") for u in range(cold_users)]
+    rng.shuffle(requests)
+    return requests
+
+
+def run(locks, requests, threads: int, requests_per_hot_user: int):
+    """Wall time, failed calls and the number of users whose calls did not see a sequential history."""
+    fraud_detection_service.FRAUD_STATE_BACKEND.clear()
+    backend = RecordingBackend(fraud_detection_service.FRAUD_STATE_BACKEND)
+    service = FraudDetectionService(backend=backend, locks=locks)
+
+    def assess(request):
+        try:
+            service.assess_transaction_risk(*request)
+            return 0
+        except RuntimeError: # State corrupted by a concurrent call
+            return 1
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(threads) as pool:
+        errors = sum(pool.map(assess, requests, chunksize=16))
+    elapsed = time.perf_counter() - started
+
+    sequential_counts = list(range(1, requests_per_hot_user + 1))
+    sequential_history = [min(i, COMMAND_HISTORY_LENGTH) for i in range(requests_per_hot_user)]
+    violations = 0
+    for user in backend.transaction_counts:
+        if not user.startswith("hot_"):
+            continue
+        if (sorted(backend.transaction_counts[user]) != sequential_counts
+                or sorted(backend.recipient_counts[user]) != sequential_counts
+                or sorted(backend.history_lengths[user]) != sequential_history):
+            violations += 1
+    return elapsed, errors, violations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--hot-users", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per hot user")
+    parser.add_argument("--cold-users", type=int, default=4000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    sys.setswitchinterval(1e-6) # Switch threads as often as possible to expose races
+    requests = build_requests(args.hot_users, args.requests, args.cold_users)
+    print(f"--- {len(requests)} requests ({args.hot_users} hot users x {args.requests}, {args.cold_users} one-off users), "
+          f"{args.threads} threads, {args.rounds} rounds ---")
+    print(f"{'locking':<22}{'errors':>8}{'violations':>12}{'requests/s':>12}")
+    results = {}
+    for name, locks in (("none", NoLocks()), ("one global lock", UserLockStripes(1)),
+                        (f"{len(UserLockStripes())} stripes", UserLockStripes())):
+        rounds = [run(locks, requests, args.threads, args.requests) for _ in range(args.rounds)]
+        errors, violations = sum(e for _, e, _ in rounds), sum(v for _, _, v in rounds)
+        rate = len(requests) * len(rounds) / sum(elapsed for elapsed, _, _ in rounds)
+        results[name] = errors + violations
+        print(f"{name:<22}{errors:>8}{violations:>12}{rate:>12.0f}")
+
+    passed = results[f"{len(UserLockStripes())} stripes"] == 0 and results["one global lock"] == 0
+    print(f"\n{'PASS' if passed else 'FAIL'}: striped locks kept every user's checks sequential "
+          f"({results['none']} errors and violating users without locks)")
+    sys.exit(0 if passed else 1)
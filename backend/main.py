@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.v1.endpoints import auth, nlp, transactions, wallet, voice
+from remitai.backend.utils.outbound_http import OUTBOUND_HTTP
 
 app = FastAPI(
     title="RemitAI API",
@@ -29,5 +30,10 @@ app.include_router(voice.router, prefix="/api/v1/voice", tags=["Voice Biometrics
 async def read_root():
     return {"message": "Welcome to RemitAI API", "version": "1.0.0"}
 
+@app.get("/api/v1/outbound/stats", tags=["Operations"])
+async def outbound_stats():
+    """Per-host connection pool and latency stats, and circuit breaker state per external dependency."""
+    return OUTBOUND_HTTP.stats()
+
 # To run this app:
 # uvicorn main:app --reload
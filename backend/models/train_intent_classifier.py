@@ -0,0 +1,194 @@
+"""Offline trainer for the hashed-n-gram intent classifier used by NLPIntentParser.
+
+Training commands are generated from the templates below (English plus the six languages
+the parser understands), split 80/20, and fitted with full-batch softmax regression in
+NumPy. The result is written to a versioned .npz next to this script; bump MODEL_VERSION
+and INTENT_MODEL_PATH together when the templates or features change.
+
+Run from the repository root:
+    python -m remitai.backend.models.train_intent_classifier [output_path]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from remitai.backend.services.intent_classifier import (
+    INTENT_HASH_DIM,
+    INTENT_LABELS,
+    INTENT_MODEL_PATH,
+    INTENT_NGRAM_RANGE,
+    IntentClassifier,
+    featurize_many,
+)
+
+MODEL_VERSION = "intent-ngram-v1"
+EPOCHS = 400
+LEARNING_RATE = 2.0
+L2_PENALTY = 1e-4
+HOLDOUT_SHARE = 0.2
+SEED = 0
+
+SLOTS = {
+    "amount": ["500", "1,000", "20000", "30,000", "250", "75", "1200", "five thousand", "elfu kumi", "dubu talatin"],
+    "currency": ["naira", "ngn", "cedi", "ghs", "shillings", "kes", "usd", "dollars", "rand", "birr", "euros"],
+    "name": ["Amina", "Jean", "Kofi", "Maria", "Tunde", "Fatima", "Chidi", "Wanjiru", "my mother", "my brother"],
+    "country": ["Kenya", "Ghana", "Nigeria", "South Africa", "Uganda", "Senegal", "Tanzania"],
+    "period": ["3 months", "6 months", "a year", "90 days", "30 days", "two weeks"],
+    "count": ["5", "10", "last", "recent", "20"],
+}
+
+TEMPLATES = {
+    "payment": [
+        "send {amount} {currency} to {name}", "send {amount} {currency} to {name} in {country}",
+        "pay {amount} {currency} to {name}", "transfer {amount} {currency} to {name} in {country}",
+        "i want to send {amount} {currency} to {name}", "please send {name} {amount} {currency}",
+        "remit {amount} {currency} to {name} in {country}", "can you pay {name} {amount} {currency}",
+        "send money to {name}", "pay {name} now",
+        "je veux envoyer {amount} {currency} à {name}", "envoyer {amount} {currency} à {name} au {country}",
+        "payer {amount} {currency} à {name}",
+        "nataka kutuma {currency} {amount} kwa {name}", "tuma {currency} {amount} kwa {name} nchini {country}",
+        "lipa {currency} {amount} kwa {name}",
+        "ziga {currency} {amount} zuwa {name} a {country}", "aika {currency} {amount} ga {name}",
+        "fi {amount} {currency} ranṣẹ si {name}", "san {amount} {currency} fun {name}",
+        "zipu {currency} {amount} nye {name}", "kwụọ {currency} {amount} nye {name}",
+        "ارسل {amount} {currency} الى {name}", "حول {amount} {currency} الى {name} في {country}",
+    ],
+    "balance_inquiry": [
+        "what is my balance", "check my balance", "show my account balance", "how much money do i have",
+        "how much is in my wallet", "what's my {currency} balance", "balance please", "my balance",
+        "do i have enough money to send {amount} {currency}", "how much is left in my account",
+        "what is my available balance in {currency}", "show me my wallet",
+        "quel est mon solde", "combien ai-je sur mon compte", "afficher mon solde",
+        "salio langu ni kiasi gani", "nina pesa ngapi kwenye akaunti yangu", "angalia salio",
+        "nawa ne ma'auni na", "kudi nawa ne a asusuna",
+        "elo ni o wa ninu akọọlẹ mi", "owo melo ni mo ni",
+        "ego ole dị n'akaụntụ m", "ego ole ka m nwere",
+        "ما هو رصيدي", "كم رصيدي في الحساب",
+    ],
+    "vault_creation": [
+        "create a savings vault", "open a new vault", "lock {amount} {currency} for {period}",
+        "create a vault with {amount} {currency} for {period}", "save {amount} {currency} for {period}",
+        "start a savings goal for {period}", "put {amount} {currency} in a vault", "set up a vault for school fees",
+        "i want to save {amount} {currency} every month", "new vault {period}", "lock my savings for {period}",
+        "créer un coffre d'épargne", "épargner {amount} {currency} pendant {period}",
+        "fungua akiba mpya", "weka akiba ya {currency} {amount} kwa {period}",
+        "bude sabon asusun ajiya", "ajiye {currency} {amount} na {period}",
+        "ṣii apo ifowopamọ tuntun", "fi {amount} {currency} pamọ fun {period}",
+        "mepee igbe nchekwa ọhụrụ", "chekwaa {currency} {amount} maka {period}",
+        "انشاء خزنة ادخار", "ادخر {amount} {currency} لمدة {period}",
+    ],
+    "withdrawal": [
+        "withdraw {amount} {currency}", "withdraw {amount} {currency} from my vault", "cash out {amount} {currency}",
+        "take {amount} {currency} out of my savings", "withdraw to my bank account", "withdraw my savings",
+        "cash out to mpesa", "move {amount} {currency} from my vault to my bank", "i want to withdraw money",
+        "unlock my vault and withdraw", "withdraw everything",
+        "retirer {amount} {currency}", "je voudrais retirer de l'argent de mon coffre",
+        "nataka kutoa pesa kutoka akiba yangu", "toa {currency} {amount}",
+        "ina so in cire kudi daga asusuna", "cire {currency} {amount}",
+        "mo fẹ gba owo jade lati inu apo ifowopamọ mi", "gba {amount} {currency} jade",
+        "achọrọ m iwepụ ego n'ebe nchekwa m", "wepụ {currency} {amount}",
+        "اسحب {amount} {currency}", "اريد سحب المال من الخزنة",
+    ],
+    "transaction_history": [
+        "show my transaction history", "show my {count} transactions", "list my {count} transfers",
+        "what did i send last week", "show recent payments", "history", "my past transfers",
+        "did {name} receive my money", "show all payments to {name}", "transactions this month",
+        "when did i last pay {name}", "statement for {period}",
+        "montre-moi l'historique des transactions", "mes dernières transactions",
+        "nionyeshe historia ya miamala", "miamala yangu ya {count}",
+        "nuna min tarihin ciniki", "tarihin kudin da na aika",
+        "fi itan iṣowo mi han mi", "itan owo ti mo fi ranṣẹ",
+        "gosi m akụkọ azụmahịa m", "akụkọ ego m zipuru",
+        "اعرض سجل المعاملات", "اخر التحويلات",
+    ],
+    "rate_check": [
+        "what is the exchange rate", "what is the {currency} to {currency} rate", "usd to ngn rate today",
+        "how much is 1 usd in kes", "convert {amount} {currency} to {currency}", "rate for {currency}",
+        "how many {currency} for {amount} {currency}", "exchange rate today", "what's the rate in {country}",
+        "check the exchange rate for today", "how much will {name} receive in {currency}",
+        "quel est le taux de change aujourd'hui", "taux {currency} {currency}",
+        "kiwango cha kubadilisha fedha leo ni kipi", "bei ya {currency} leo",
+        "menene farashin canji yau", "farashin {currency} yau",
+        "kini oṣuwọn paṣipaarọ loni", "oṣuwọn {currency} loni",
+        "gịnị bụ ọnụego mgbanwe taa", "ọnụego {currency} taa",
+        "ما هو سعر الصرف اليوم", "سعر {currency} اليوم",
+    ],
+}
+
+
+def generate_examples(rng: random.Random, per_template: int = 8):
+    examples = []
+    for intent, templates in TEMPLATES.items():
+        for template in templates:
+            variants = set()
+            for _ in range(per_template):
+                text = template
+                for slot, values in SLOTS.items():
+                    while "{" + slot + "}" in text:
+                        text = text.replace("{" + slot + "}", rng.choice(values), 1)
+                variants.add(text if rng.random() < 0.5 else text.capitalize())
+            examples.extend((text, intent) for text in sorted(variants))
+    rng.shuffle(examples)
+    return examples
+
+
+def train(texts, labels, epochs=EPOCHS, learning_rate=LEARNING_RATE, l2_penalty=L2_PENALTY):
+    """Full-batch softmax regression on the sparse hashed features; returns (weights, bias)."""
+    row_starts, buckets, values = featurize_many(texts, INTENT_HASH_DIM, INTENT_NGRAM_RANGE)
+    rows = np.repeat(np.arange(len(texts)), np.diff(np.append(row_starts, len(buckets))))
+    targets = np.zeros((len(texts), len(INTENT_LABELS)), dtype=np.float32)
+    targets[np.arange(len(texts)), [INTENT_LABELS.index(label) for label in labels]] = 1.0
+
+    weights_t = np.zeros((INTENT_HASH_DIM, len(INTENT_LABELS)), dtype=np.float32)
+    bias = np.zeros(len(INTENT_LABELS), dtype=np.float32)
+    for _ in range(epochs):
+        scores = np.add.reduceat(weights_t[buckets] * values[:, None], row_starts, axis=0) + bias
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        error = (probabilities - targets) / len(texts)
+        gradient = np.zeros_like(weights_t)
+        np.add.at(gradient, buckets, values[:, None] * error[rows])
+        weights_t -= learning_rate * (gradient + l2_penalty * weights_t)
+        bias -= learning_rate * error.sum(axis=0)
+    return weights_t.T, bias
+
+
+if __name__ == "__main__":
+    output_path = sys.argv[1] if len(sys.argv) > 1 else INTENT_MODEL_PATH
+    rng = random.Random(SEED)
+    examples = generate_examples(rng)
+    split = int(len(examples) * (1 - HOLDOUT_SHARE))
+    train_set, holdout = examples[:split], examples[split:]
+
+    start = time.perf_counter()
+    weights, bias = train([text for text, _ in train_set], [intent for _, intent in train_set])
+    print(f"Trained on {len(train_set)} commands in {time.perf_counter() - start:.1f}s")
+
+    classifier = IntentClassifier(weights, bias, INTENT_LABELS, INTENT_NGRAM_RANGE, {
+        "model_version": MODEL_VERSION, "training_examples": len(train_set), "seed": SEED,
+    })
+    predictions = classifier.predict_many([text for text, _ in holdout])
+    correct = sum(1 for (_, intent), (predicted, _) in zip(holdout, predictions) if predicted == intent)
+    print(f"Hold-out accuracy: {correct}/{len(holdout)} ({correct / len(holdout):.1%})")
+    for intent in INTENT_LABELS:
+        rows = [(expected, predicted) for (_, expected), (predicted, _) in zip(holdout, predictions) if expected == intent]
+        hits = sum(1 for expected, predicted in rows if expected == predicted)
+        print(f"  {intent:<20} {hits}/{len(rows)}")
+
+    holdout_texts = [text for text, _ in holdout]
+    start = time.perf_counter()
+    for text in holdout_texts:
+        classifier.predict(text)
+    single_us = (time.perf_counter() - start) / len(holdout_texts) * 1e6
+    start = time.perf_counter()
+    classifier.predict_many(holdout_texts)
+    batch_us = (time.perf_counter() - start) / len(holdout_texts) * 1e6
+    print(f"Latency: {single_us:.0f} us per single prediction, {batch_us:.0f} us per text in one batch")
+
+    classifier.metadata["holdout_accuracy"] = round(correct / len(holdout), 4)
+    classifier.save(output_path)
+    print(f"Saved {MODEL_VERSION} to {output_path}")
@@ -0,0 +1,174 @@
+import math
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Optional
+
+# Streaming amount statistics for the fraud checks.
+#
+# Everything here updates in O(1) and has a fixed size, however long a user's history:
+#   DecayedSum     sum of amounts with each one decaying as exp(-age / time_constant). With a
+#                  one-hour time constant it tracks "sent in the last hour": a burst counts
+#                  almost fully, a steady rate r settles at r * 1h, and old amounts fade
+#                  smoothly instead of dropping out of a window all at once.
+#   RunningStats   count, mean and variance of all amounts (Welford's update, which stays
+#                  accurate where sum-of-squares cancels badly).
+#   AmountSketch   quantiles from a histogram of AMOUNT_SKETCH_BUCKETS log-spaced buckets
+#                  (relative error at most sqrt(AMOUNT_SKETCH_GAMMA) - 1, about 18%). Counts are
+#                  halved when they reach AMOUNT_SKETCH_HALVE_AT, so the sketch leans towards
+#                  recent amounts and fits in 16-bit counters.
+# AmountProfile bundles one of each per user and computes the amount features of a
+# transaction against the user's history before it, then adds the transaction. It packs
+# into AMOUNT_PROFILE_BYTES bytes for the SQLite backend.
+
+AMOUNT_DECAY_TIME_CONSTANT_SECONDS = 3600 # "Sent in the last hour"
+AMOUNT_SKETCH_MIN = 0.01 # Amounts below land in the first bucket, above AMOUNT_SKETCH_MAX in the last
+AMOUNT_SKETCH_MAX = 1e7
+AMOUNT_SKETCH_BUCKETS = 64
+AMOUNT_SKETCH_GAMMA = (AMOUNT_SKETCH_MAX / AMOUNT_SKETCH_MIN) ** (1 / (AMOUNT_SKETCH_BUCKETS - 2))
+AMOUNT_SKETCH_HALVE_AT = 60000 # Under the 16-bit counter limit
+AMOUNT_ZSCORE_MIN_HISTORY = 5 # Fewer previous amounts give no z-score (0)
+AMOUNT_ZSCORE_MIN_STD_FRACTION = 0.1 # Std floor relative to the mean, for users who always send the same amount
+AMOUNT_PROFILE_IDLE_SECONDS = 90 * 24 * 3600 # A user's norm outlives the short rule windows by far
+RECIPIENT_AMOUNT_IDLE_SECONDS = 24 * AMOUNT_DECAY_TIME_CONSTANT_SECONDS # Decayed to exp(-24) of its value by then
+AMOUNT_FEATURES = ("amount_history", "amount_zscore", "amount_to_p95", "user_amount_1h", "recipient_amount_1h")
+
+_LOG_MIN = math.log(AMOUNT_SKETCH_MIN)
+_LOG_GAMMA = math.log(AMOUNT_SKETCH_GAMMA)
+_PROFILE_HEADER = struct.Struct("<ddQdd") # Decayed sum, its time, count, mean, M2
+AMOUNT_PROFILE_BYTES = _PROFILE_HEADER.size + 2 * AMOUNT_SKETCH_BUCKETS
+
+
+class DecayedSum:
+    """Exponentially decayed sum of amounts."""
+
+    __slots__ = ("time_constant", "value", "updated")
+
+    def __init__(self, time_constant: float = AMOUNT_DECAY_TIME_CONSTANT_SECONDS, value: float = 0.0, updated: float = 0.0):
+        self.time_constant = time_constant
+        self.value = value
+        self.updated = updated # Time value refers to
+
+    def value_at(self, timestamp: float) -> float:
+        if timestamp <= self.updated:
+            return self.value
+        return self.value * math.exp((self.updated - timestamp) / self.time_constant)
+
+    def add(self, amount: float, timestamp: float) -> float:
+        """Adds amount at timestamp; returns the sum at the later of timestamp and the last update."""
+        if timestamp >= self.updated:
+            self.value = self.value_at(timestamp) + amount
+            self.updated = timestamp
+        else: # Late event: decay it to the time the sum refers to
+            self.value += amount * math.exp((timestamp - self.updated) / self.time_constant)
+        return self.value
+
+
+class RunningStats:
+    """Count, mean and variance of a stream (Welford)."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2 # Sum of squared deviations from the mean
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def zscore(self, value: float, min_count: int = AMOUNT_ZSCORE_MIN_HISTORY,
+               min_std_fraction: float = AMOUNT_ZSCORE_MIN_STD_FRACTION) -> float:
+        """Standard deviations value lies above the mean (0 with too little history)."""
+        if self.count < min_count:
+            return 0.0
+        scale = max(self.std, min_std_fraction * abs(self.mean))
+        return (value - self.mean) / scale if scale > 0 else 0.0
+
+
+def _bucket(amount: float) -> int:
+    if amount < AMOUNT_SKETCH_MIN:
+        return 0
+    return min(AMOUNT_SKETCH_BUCKETS - 1, 1 + int((math.log(amount) - _LOG_MIN) / _LOG_GAMMA))
+
+
+class AmountSketch:
+    """Approximate quantiles over log-spaced buckets with 16-bit counts."""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, counts: Optional[array] = None):
+        self.counts = counts if counts is not None else array("H", bytes(2 * AMOUNT_SKETCH_BUCKETS))
+        self.total = sum(self.counts)
+
+    def add(self, amount: float):
+        if self.total + 1 >= AMOUNT_SKETCH_HALVE_AT:
+            counts = self.counts
+            for i in range(len(counts)): # In place: the array keeps its size
+                counts[i] >>= 1
+            self.total = sum(counts)
+        self.counts[_bucket(amount)] += 1
+        self.total += 1
+
+    def quantile(self, q: float) -> float:
+        """Amount at quantile q (geometric middle of its bucket); 0 when empty."""
+        if not self.total:
+            return 0.0
+        i = bisect_right(list(accumulate(self.counts)), q * (self.total - 1)) # Bucket holding the rank
+        if i == 0:
+            return AMOUNT_SKETCH_MIN
+        return AMOUNT_SKETCH_MIN * AMOUNT_SKETCH_GAMMA ** (i - 0.5)
+
+
+class AmountProfile:
+    """Fixed-size amount history of one user."""
+
+    __slots__ = ("sent", "stats", "sketch")
+
+    def __init__(self, sent: DecayedSum = None, stats: RunningStats = None, sketch: AmountSketch = None):
+        self.sent = sent or DecayedSum()
+        self.stats = stats or RunningStats()
+        self.sketch = sketch or AmountSketch()
+
+    def observe(self, amount: float, timestamp: float) -> dict:
+        """Amount features of a transaction against the history before it, then adds it."""
+        p95 = self.sketch.quantile(0.95)
+        features = {
+            "amount_history": self.stats.count,
+            "amount_zscore": self.stats.zscore(amount),
+            "amount_to_p95": amount / p95 if p95 > 0 else 0.0,
+            "user_amount_1h": self.sent.add(amount, timestamp),
+        }
+        self.stats.add(amount)
+        self.sketch.add(amount)
+        return features
+
+    def to_bytes(self) -> bytes:
+        counts = self.sketch.counts
+        if sys.byteorder != "little":
+            counts = array("H", counts)
+            counts.byteswap()
+        return (_PROFILE_HEADER.pack(self.sent.value, self.sent.updated, self.stats.count, self.stats.mean, self.stats.m2)
+                + counts.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "AmountProfile":
+        value, updated, count, mean, m2 = _PROFILE_HEADER.unpack_from(data)
+        counts = array("H")
+        counts.frombytes(data[_PROFILE_HEADER.size:])
+        if sys.byteorder != "little":
+            counts.byteswap()
+        return cls(DecayedSum(value=value, updated=updated), RunningStats(count, mean, m2), AmountSketch(counts))
+
+    def approx_bytes(self) -> int:
+        return (sys.getsizeof(self) + sys.getsizeof(self.sent) + sys.getsizeof(self.stats)
+                + sys.getsizeof(self.sketch) + sys.getsizeof(self.sketch.counts))
@@ -0,0 +1,82 @@
+import hashlib
+import math
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from .gazetteer import Gazetteer
+
+# Compact signatures for near-duplicate command detection.
+#
+# A command is folded (lowercase, no accents), stripped of punctuation and courtesy
+# filler words, and cut into character trigrams. Its SimHash is a SIMHASH_BITS-bit
+# integer where bit i is set when most trigrams' hashes have bit i set; the fraction of
+# differing bits between two SimHashes estimates the angle between their trigram count
+# vectors, so a cosine-similarity threshold becomes a maximum Hamming distance
+# (max_hamming_distance). The numbers in the command are fingerprinted separately and
+# must match exactly: "send 10 usd" and "send 100 usd" look alike but are different
+# payments. Comparing two signatures is one integer comparison, one XOR and a popcount.
+
+SIMHASH_BITS = 128
+SIGNATURE_NGRAM = 3
+FILLER_WORDS = frozenset({
+    "please", "pls", "plz", "kindly", "now", "asap", "quickly", "urgently", "urgent", "thanks", "thank",
+    "ok", "okay", "hey", "hi", "hello", "just", "again",
+})
+
+_WORD_RE = re.compile(r"[^\W_]+(?:[.,][0-9]+)*")
+
+
+class CommandSignature(NamedTuple):
+    numbers: int # CRC32 of the command's numbers, in order
+    simhash: int # SIMHASH_BITS-bit SimHash of its character trigrams
+
+
+@lru_cache(maxsize=65536)
+def _trigram_hash(gram: str) -> bytes:
+    return hashlib.blake2b(gram.encode("utf-8"), digest_size=SIMHASH_BITS // 8).digest()
+
+
+def _normalize_number(token: str) -> str:
+    value = token.replace(",", "")
+    try:
+        return repr(float(value))
+    except ValueError:
+        return value
+
+
+def command_signature(text: str) -> CommandSignature:
+    """Signature of a command; equal commands (up to case, accents, punctuation and fillers) get equal signatures."""
+    words = [w for w in _WORD_RE.findall(Gazetteer.fold(text)) if w not in FILLER_WORDS]
+    numbers = [_normalize_number(w) for w in words if w[0].isdigit()]
+    padded = f" {' '.join(words)} "
+    grams = Counter(padded[i:i + SIGNATURE_NGRAM] for i in range(len(padded) - SIGNATURE_NGRAM + 1))
+    if not words or not grams:
+        return CommandSignature(zlib.crc32(" ".join(numbers).encode()), 0)
+    weights = np.fromiter(grams.values(), dtype=np.int32, count=len(grams))
+    hashes = np.frombuffer(b"".join(map(_trigram_hash, grams)), dtype=np.uint8)
+    bits = np.unpackbits(hashes).reshape(len(grams), SIMHASH_BITS)
+    # Bit i is set when the trigrams with hash bit i set outweigh the ones without it.
+    simhash = int.from_bytes(np.packbits(2 * (weights @ bits) > weights.sum()).tobytes(), "big")
+    return CommandSignature(zlib.crc32(" ".join(numbers).encode()), simhash)
+
+
+def max_hamming_distance(min_similarity: float) -> int:
+    """Largest SimHash distance whose estimated cosine similarity is still >= min_similarity."""
+    min_similarity = min(max(min_similarity, -1.0), 1.0)
+    return int(SIMHASH_BITS * math.acos(min_similarity) / math.pi)
+
+
+def signature_similarity(a: CommandSignature, b: CommandSignature) -> float:
+    """Estimated cosine similarity of two commands (0.0 when their numbers differ)."""
+    if a.numbers != b.numbers:
+        return 0.0
+    return math.cos(math.pi * bin(a.simhash ^ b.simhash).count("1") / SIMHASH_BITS)
+
+
+def are_near_duplicates(a: CommandSignature, b: CommandSignature, max_distance: int) -> bool:
+    return a.numbers == b.numbers and bin(a.simhash ^ b.simhash).count("1") <= max_distance
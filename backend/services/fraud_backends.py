@@ -0,0 +1,300 @@
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+from .amount_stats import AMOUNT_PROFILE_IDLE_SECONDS, RECIPIENT_AMOUNT_IDLE_SECONDS, AmountProfile, DecayedSum
+from .command_signature import CommandSignature
+from .fraud_state import BoundedUserState
+from .windowed_counters import WindowedDistinctSketch
+
+# Where FraudDetectionService keeps its per-user counters.
+#
+# A backend offers three atomic operations, each of which records an event and returns the
+# window the rules need in the same step, so concurrent requests for one user can never
+# both miss each other:
+#   record_command(user_id, timestamp, signature) -> the user's previous commands
+#   record_transaction(user_id, recipient_id, timestamp) -> (transactions, distinct recipients)
+#   record_amount(user_id, recipient_id, amount, timestamp) -> amount features (see amount_stats)
+#   record_fan_in(user_id, recipient_id, timestamp, windows) -> distinct senders of the recipient per window
+# The amount state is a fixed-size AmountProfile per user plus a decayed sum per recipient.
+# Together with each user's recipients (the spam window's ExpiringSet) the per-recipient
+# WindowedDistinctSketch of senders makes a sender<->recipient index that is updated in
+# place on every transaction. Recipients are shared between users, so their state is
+# guarded by the backend itself rather than by the caller's per-user lock.
+# InProcessFraudBackend keeps the state in this process (BoundedUserState stores), which
+# is exact for a single worker. With several uvicorn workers a user's requests are spread
+# over processes, so SQLiteFraudBackend keeps the same counters in one SQLite file (WAL
+# mode, one BEGIN IMMEDIATE transaction per operation) that every worker on the host
+# shares. Both use the same bucket-aligned transaction window and expiring recipient set,
+# so they flag the same transactions.
+
+
+class FraudStateBackend:
+    """Interface of the fraud state backends."""
+
+    name = "abstract"
+
+    def record_command(self, user_id: str, timestamp: float, signature: CommandSignature) -> List[Tuple[float, CommandSignature]]:
+        """Appends a command; returns the user's previous commands (oldest first) from before it."""
+        raise NotImplementedError
+
+    def record_transaction(self, user_id: str, recipient_id: str, timestamp: float) -> Tuple[int, int]:
+        """Records a transaction; returns (transactions, distinct recipients) in the window ending at timestamp."""
+        raise NotImplementedError
+
+    def record_amount(self, user_id: str, recipient_id: str, amount: float, timestamp: float) -> dict:
+        """Adds the amount to the user's profile and the recipient's sum; returns the amount features."""
+        raise NotImplementedError
+
+    def record_fan_in(self, user_id: str, recipient_id: str, timestamp: float, windows: Tuple[float, ...]) -> Tuple[float, ...]:
+        """Adds user_id to the recipient's senders; returns the estimated distinct senders in each window."""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class InProcessFraudBackend(FraudStateBackend):
+    """Fraud state in this process's memory; exact for one worker, not shared between workers."""
+
+    name = "in_process"
+
+    def __init__(self, command_history: BoundedUserState, transaction_patterns: BoundedUserState,
+                 amount_profiles: BoundedUserState, recipient_amounts: BoundedUserState,
+                 recipient_senders: BoundedUserState):
+        """
+        Args:
+            command_history: user_id -> deque of (timestamp, CommandSignature).
+            transaction_patterns: user_id -> {"transactions": WindowedCounter, "recipients": ExpiringSet}.
+            amount_profiles: user_id -> AmountProfile.
+            recipient_amounts: recipient_id -> DecayedSum of the amounts it received.
+            recipient_senders: recipient_id -> WindowedDistinctSketch of its senders.
+        """
+        self.command_history = command_history
+        self.transaction_patterns = transaction_patterns
+        self.amount_profiles = amount_profiles
+        self.recipient_amounts = recipient_amounts
+        self.recipient_senders = recipient_senders
+        self._recipient_lock = threading.Lock()
+
+    def record_command(self, user_id, timestamp, signature):
+        history = self.command_history.get(user_id, timestamp)
+        previous = list(history)
+        history.append((timestamp, signature))
+        return previous
+
+    def record_transaction(self, user_id, recipient_id, timestamp):
+        user_patterns = self.transaction_patterns.get(user_id, timestamp)
+        user_patterns["transactions"].add(timestamp)
+        user_patterns["recipients"].add(recipient_id, timestamp)
+        return user_patterns["transactions"].count(timestamp), user_patterns["recipients"].count(timestamp)
+
+    def record_amount(self, user_id, recipient_id, amount, timestamp):
+        features = self.amount_profiles.get(user_id, timestamp).observe(amount, timestamp)
+        with self._recipient_lock:
+            features["recipient_amount_1h"] = self.recipient_amounts.get(recipient_id, timestamp).add(amount, timestamp)
+        return features
+
+    def record_fan_in(self, user_id, recipient_id, timestamp, windows):
+        with self._recipient_lock:
+            senders = self.recipient_senders.get(recipient_id, timestamp)
+            senders.add(user_id, timestamp)
+            return tuple(senders.count(timestamp, window) for window in windows)
+
+    def stats(self) -> dict:
+        stores = {"command_history": self.command_history.stats(), "transaction_patterns": self.transaction_patterns.stats(),
+                  "amount_profiles": self.amount_profiles.stats(), "recipient_amounts": self.recipient_amounts.stats(),
+                  "recipient_senders": self.recipient_senders.stats()}
+        return dict(stores, backend=self.name,
+                    tracked_users=max(stores[name]["tracked_users"] for name in ("command_history", "transaction_patterns", "amount_profiles")),
+                    approx_bytes=sum(stats["approx_bytes"] for stats in stores.values()))
+
+    def clear(self):
+        self.command_history.clear()
+        self.transaction_patterns.clear()
+        self.amount_profiles.clear()
+        self.recipient_amounts.clear()
+        self.recipient_senders.clear()
+
+
+SQLITE_FRAUD_BUSY_TIMEOUT_SECONDS = 5.0
+SQLITE_FRAUD_COMPACT_EVERY = 1000 # Operations per process between deletions of expired rows
+SQLITE_FRAUD_FAN_IN_RETENTION_SECONDS = 24 * 3600 # Sender sketches not updated for this long are deleted
+
+_SQLITE_FRAUD_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS fraud_transaction_buckets ("
+    " user_id TEXT NOT NULL, bucket INTEGER NOT NULL, count INTEGER NOT NULL,"
+    " PRIMARY KEY (user_id, bucket))",
+    "CREATE TABLE IF NOT EXISTS fraud_recipients ("
+    " user_id TEXT NOT NULL, recipient_id TEXT NOT NULL, last_seen REAL NOT NULL,"
+    " PRIMARY KEY (user_id, recipient_id))",
+    "CREATE INDEX IF NOT EXISTS fraud_recipients_last_seen ON fraud_recipients (last_seen)",
+    "CREATE TABLE IF NOT EXISTS fraud_commands ("
+    " seq INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, timestamp REAL NOT NULL,"
+    " numbers INTEGER NOT NULL, simhash BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS fraud_commands_user ON fraud_commands (user_id, seq)",
+    "CREATE TABLE IF NOT EXISTS fraud_amount_profiles ("
+    " user_id TEXT PRIMARY KEY, last_seen REAL NOT NULL, profile BLOB NOT NULL)", # AmountProfile.to_bytes()
+    "CREATE TABLE IF NOT EXISTS fraud_recipient_amounts ("
+    " recipient_id TEXT PRIMARY KEY, value REAL NOT NULL, updated REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS fraud_recipient_senders ("
+    " recipient_id TEXT PRIMARY KEY, updated REAL NOT NULL, sketch BLOB NOT NULL)", # WindowedDistinctSketch.to_bytes()
+]
+_SQLITE_FRAUD_TABLES = ("fraud_transaction_buckets", "fraud_recipients", "fraud_commands",
+                        "fraud_amount_profiles", "fraud_recipient_amounts", "fraud_recipient_senders")
+
+
+class SQLiteFraudBackend(FraudStateBackend):
+    """Fraud state in a SQLite file shared by every worker process on the host."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str, window_seconds: float, bucket_seconds: float, duplicate_window_seconds: float,
+                 history_length: int, compact_every: int = SQLITE_FRAUD_COMPACT_EVERY,
+                 amount_idle_seconds: float = AMOUNT_PROFILE_IDLE_SECONDS,
+                 recipient_amount_idle_seconds: float = RECIPIENT_AMOUNT_IDLE_SECONDS,
+                 fan_in_retention_seconds: float = SQLITE_FRAUD_FAN_IN_RETENTION_SECONDS):
+        """
+        Args:
+            db_path: SQLite file; created if missing.
+            window_seconds: Spam window (same as the in-process WindowedCounter/ExpiringSet).
+            bucket_seconds: Resolution of the transaction window.
+            duplicate_window_seconds: Commands older than this are never compared and get deleted.
+            history_length: Previous commands returned by record_command.
+            compact_every: Operations per process between deletions of expired rows.
+            amount_idle_seconds: Amount profiles of users not seen for this long are deleted.
+            recipient_amount_idle_seconds: Recipient sums not updated for this long are deleted.
+            fan_in_retention_seconds: Longest fan-in window; sender sketches idle for longer are deleted.
+        """
+        self.db_path = db_path
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.ring = int(window_seconds // bucket_seconds)
+        self.duplicate_window_seconds = duplicate_window_seconds
+        self.history_length = history_length
+        self.compact_every = compact_every
+        self.amount_idle_seconds = amount_idle_seconds
+        self.recipient_amount_idle_seconds = recipient_amount_idle_seconds
+        self.fan_in_retention_seconds = fan_in_retention_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self.counters = {"operations": 0, "compactions": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        """Connection for this process (opened again after a fork)."""
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.db_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=SQLITE_FRAUD_BUSY_TIMEOUT_SECONDS,
+                                         isolation_level=None, check_same_thread=False)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL") # Counters may lose the last writes on power loss, never corrupt
+            for statement in _SQLITE_FRAUD_SCHEMA:
+                self._conn.execute(statement)
+        return self._conn
+
+    def _transaction(self, operation, *args):
+        """Runs operation(conn, *args) inside one write transaction, compacting now and then."""
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(conn, *args)
+                self.counters["operations"] += 1
+                if self.counters["operations"] % self.compact_every == 0:
+                    self._compact(conn, args[1]) # args are (user_id, timestamp, ...)
+                conn.execute("COMMIT")
+                return result
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _compact(self, conn: sqlite3.Connection, now: float):
+        """Deletes rows more than two windows old; the spare window covers workers whose clocks lag a little."""
+        conn.execute("DELETE FROM fraud_transaction_buckets WHERE bucket <= ?",
+                     (int(now // self.bucket_seconds) - 2 * self.ring,))
+        conn.execute("DELETE FROM fraud_recipients WHERE last_seen < ?", (now - 2 * self.window_seconds,))
+        conn.execute("DELETE FROM fraud_commands WHERE timestamp < ?", (now - 2 * self.duplicate_window_seconds,))
+        conn.execute("DELETE FROM fraud_amount_profiles WHERE last_seen < ?", (now - self.amount_idle_seconds,))
+        conn.execute("DELETE FROM fraud_recipient_amounts WHERE updated < ?", (now - self.recipient_amount_idle_seconds,))
+        conn.execute("DELETE FROM fraud_recipient_senders WHERE updated < ?", (now - self.fan_in_retention_seconds,))
+        self.counters["compactions"] += 1
+
+    def _record_command(self, conn, user_id, timestamp, signature):
+        rows = conn.execute("SELECT timestamp, numbers, simhash FROM fraud_commands WHERE user_id = ? "
+                            "ORDER BY seq DESC LIMIT ?", (user_id, self.history_length)).fetchall()
+        conn.execute("INSERT INTO fraud_commands (user_id, timestamp, numbers, simhash) VALUES (?, ?, ?, ?)",
+                     (user_id, timestamp, signature.numbers, signature.simhash.to_bytes(16, "big")))
+        return [(ts, CommandSignature(numbers, int.from_bytes(simhash, "big"))) for ts, numbers, simhash in reversed(rows)]
+
+    def _record_transaction(self, conn, user_id, timestamp, recipient_id):
+        bucket = int(timestamp // self.bucket_seconds)
+        conn.execute("INSERT INTO fraud_transaction_buckets (user_id, bucket, count) VALUES (?, ?, 1) "
+                     "ON CONFLICT (user_id, bucket) DO UPDATE SET count = count + 1", (user_id, bucket))
+        conn.execute("INSERT INTO fraud_recipients (user_id, recipient_id, last_seen) VALUES (?, ?, ?) "
+                     "ON CONFLICT (user_id, recipient_id) DO UPDATE SET last_seen = max(last_seen, excluded.last_seen)",
+                     (user_id, recipient_id, timestamp))
+        transactions = conn.execute("SELECT COALESCE(SUM(count), 0) FROM fraud_transaction_buckets "
+                                    "WHERE user_id = ? AND bucket > ?", (user_id, bucket - self.ring)).fetchone()[0]
+        recipients = conn.execute("SELECT COUNT(*) FROM fraud_recipients WHERE user_id = ? AND last_seen >= ?",
+                                  (user_id, timestamp - self.window_seconds)).fetchone()[0]
+        return transactions, recipients
+
+    def _record_amount(self, conn, user_id, timestamp, recipient_id, amount):
+        row = conn.execute("SELECT profile FROM fraud_amount_profiles WHERE user_id = ?", (user_id,)).fetchone()
+        profile = AmountProfile.from_bytes(row[0]) if row else AmountProfile()
+        features = profile.observe(amount, timestamp)
+        conn.execute("INSERT INTO fraud_amount_profiles (user_id, last_seen, profile) VALUES (?, ?, ?) "
+                     "ON CONFLICT (user_id) DO UPDATE SET last_seen = max(last_seen, excluded.last_seen), profile = excluded.profile",
+                     (user_id, timestamp, profile.to_bytes()))
+        row = conn.execute("SELECT value, updated FROM fraud_recipient_amounts WHERE recipient_id = ?", (recipient_id,)).fetchone()
+        received = DecayedSum(value=row[0], updated=row[1]) if row else DecayedSum()
+        features["recipient_amount_1h"] = received.add(amount, timestamp)
+        conn.execute("INSERT OR REPLACE INTO fraud_recipient_amounts (recipient_id, value, updated) VALUES (?, ?, ?)",
+                     (recipient_id, received.value, received.updated))
+        return features
+
+    def _record_fan_in(self, conn, user_id, timestamp, recipient_id, windows):
+        row = conn.execute("SELECT sketch FROM fraud_recipient_senders WHERE recipient_id = ?", (recipient_id,)).fetchone()
+        senders = WindowedDistinctSketch(data=row[0]) if row else WindowedDistinctSketch()
+        senders.add(user_id, timestamp)
+        conn.execute("INSERT INTO fraud_recipient_senders (recipient_id, updated, sketch) VALUES (?, ?, ?) "
+                     "ON CONFLICT (recipient_id) DO UPDATE SET updated = max(updated, excluded.updated), sketch = excluded.sketch",
+                     (recipient_id, timestamp, senders.to_bytes()))
+        return tuple(senders.count(timestamp, window) for window in windows)
+
+    def record_command(self, user_id, timestamp, signature):
+        return self._transaction(self._record_command, user_id, timestamp, signature)
+
+    def record_transaction(self, user_id, recipient_id, timestamp):
+        return self._transaction(self._record_transaction, user_id, timestamp, recipient_id)
+
+    def record_amount(self, user_id, recipient_id, amount, timestamp):
+        return self._transaction(self._record_amount, user_id, timestamp, recipient_id, amount)
+
+    def record_fan_in(self, user_id, recipient_id, timestamp, windows):
+        return self._transaction(self._record_fan_in, user_id, timestamp, recipient_id, tuple(windows))
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._db()
+            tracked = conn.execute("SELECT COUNT(*) FROM (SELECT user_id FROM fraud_transaction_buckets "
+                                   "UNION SELECT user_id FROM fraud_commands "
+                                   "UNION SELECT user_id FROM fraud_amount_profiles)").fetchone()[0]
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            return dict(self.counters, backend=self.name, db_path=self.db_path,
+                        tracked_users=tracked, approx_bytes=page_count * page_size)
+
+    def clear(self):
+        with self._lock:
+            conn = self._db()
+            for table in _SQLITE_FRAUD_TABLES:
+                conn.execute(f"DELETE FROM {table}")
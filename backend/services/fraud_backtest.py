@@ -0,0 +1,408 @@
+"""Offline backtesting of the FraudDetectionService rules over a historical transaction log.
+
+The log is JSONL or CSV with one assess-risk call per row: user_id, timestamp (Unix
+seconds), amount, recipient_id and, optionally, currency (default USD; amounts are
+converted to USD as the service does) and command_text (rows without it are left out of
+the duplicate rule). Rows must be in the order the service saw them, i.e. by
+time. The log is read in chunks; each chunk is evaluated together with the previous
+rows that are still inside the largest rule window, so memory stays bounded by the chunk
+size plus one window of traffic.
+
+Per chunk, every rule is computed for all rows at once with NumPy:
+    frequency   transactions in the user's bucket-aligned spam window (sorted keys + searchsorted)
+    recipients  distinct recipients in the window (each row covers an interval of later rows
+                until the recipient recurs or the row leaves the window; coverage is a cumsum)
+    duplicate   near-duplicate signatures among the user's last COMMAND_HISTORY_LENGTH commands
+                within the duplicate window (one vectorised comparison per history slot)
+The amount features (amount_stats) depend on a user's whole history and the fan-in
+features on every sender of a recipient over the last day, so they are computed row by row
+in a sequential pass that carries one fixed-size AmountProfile per user and one decayed sum
+and sender sketch per recipient from chunk to chunk (a few hundred bytes each).
+The per-row counts are the features of the fraud rules (fraud_rules); the current rule
+set is evaluated on them column-wise for the configured flag rates. They also go into a
+(transactions, recipients, amount class) histogram, from which the flag rate of every
+combination of the high-frequency, many-recipients and low-value thresholds of the spam
+rules is read off in one pass (the low-value rule's transaction count stays as
+configured). --verify replays the first rows through FraudDetectionService and checks
+that both flag exactly the same rows with the current rules (spam, duplicate, amount and mule groups).
+
+Run from the repository root:
+    python -m remitai.backend.services.fraud_backtest LOG [--max-transactions 6,8,10,12]
+        [--max-recipients 3,5,8] [--low-value 0.5,1,2] [--chunk-events N] [--verify N] [--output report.json]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import json
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+from .amount_stats import (
+    AMOUNT_FEATURES, AMOUNT_PROFILE_IDLE_SECONDS, RECIPIENT_AMOUNT_IDLE_SECONDS, AmountProfile, DecayedSum,
+)
+from .command_signature import SIMHASH_BITS, command_signature, max_hamming_distance
+from .fraud_detection_service import (
+    COMMAND_HISTORY_LENGTH,
+    DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE,
+    DUPLICATE_COMMAND_TIME_WINDOW_SECONDS,
+    FAN_IN_BASELINE_WINDOW_SECONDS,
+    FAN_IN_WINDOW_SECONDS,
+    FRAUD_AMOUNT_CURRENCY,
+    FRAUD_RULES,
+    MOCK_AMOUNT_PROFILES,
+    MOCK_COMMAND_HISTORY,
+    MOCK_RECIPIENT_AMOUNTS,
+    MOCK_RECIPIENT_SENDERS,
+    MOCK_TRANSACTION_PATTERNS,
+    SPAM_FREQUENCY_BUCKET_SECONDS,
+    SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS,
+    FraudDetectionService,
+)
+from .fraud_rules import FRAUD_FEATURES, CompiledRuleSet
+from .rate_provider import RATE_PROVIDER
+from .windowed_counters import WindowedDistinctSketch
+
+BACKTEST_CHUNK_EVENTS = 200000 # Rows parsed per chunk; peak memory is roughly 1-2 KB per row
+DEFAULT_MAX_TRANSACTIONS = [6, 8, 10, 12, 15, 20]
+DEFAULT_MAX_RECIPIENTS = [3, 4, 5, 6, 8, 10]
+DEFAULT_LOW_VALUE = [0.5, 1.0, 2.0, 5.0]
+# Sweep parameter -> (rule, feature) whose threshold is its configured value
+SWEEP_THRESHOLDS = {
+    "max_transactions": ("high_transaction_frequency", "transactions_in_window"),
+    "max_recipients": ("many_recipients", "recipients_in_window"),
+    "low_value_threshold": ("frequent_low_value", "amount"),
+    "low_value_min_transactions": ("frequent_low_value", "transactions_in_window"),
+}
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_LOW_64 = (1 << 64) - 1
+assert SIMHASH_BITS == 128 # Stored as two uint64 halves below
+
+
+def read_events(path: str) -> Iterator[dict]:
+    """Rows of a JSONL or CSV (by extension) transaction log."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def to_arrays(rows: Sequence[dict]) -> Dict[str, np.ndarray]:
+    """Column arrays for a chunk of rows; command texts become signatures (memoised per chunk)."""
+    signatures = {}
+    numbers, high, low, has_text = [], [], [], []
+    for row in rows:
+        text = row.get("command_text")
+        if text:
+            signature = signatures.get(text)
+            if signature is None:
+                signature = signatures[text] = command_signature(text)
+            numbers.append(signature.numbers)
+            high.append(signature.simhash >> 64)
+            low.append(signature.simhash & _LOW_64)
+            has_text.append(True)
+        else:
+            numbers.append(0), high.append(0), low.append(0), has_text.append(False)
+    return {
+        "user": np.array([str(row["user_id"]) for row in rows], dtype=object),
+        "recipient": np.array([str(row["recipient_id"]) for row in rows], dtype=object),
+        "timestamp": np.array([float(row["timestamp"]) for row in rows], dtype=np.float64),
+        "amount": RATE_PROVIDER.convert_many([float(row["amount"]) for row in rows],
+                                             [row.get("currency") or FRAUD_AMOUNT_CURRENCY for row in rows],
+                                             FRAUD_AMOUNT_CURRENCY, side="mid"),
+        "numbers": np.array(numbers, dtype=np.uint32),
+        "simhash_high": np.array(high, dtype=np.uint64),
+        "simhash_low": np.array(low, dtype=np.uint64),
+        "has_text": np.array(has_text, dtype=bool),
+    }
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    return _POPCOUNT[values.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.int32)
+
+
+def evaluate(events: Dict[str, np.ndarray], max_signature_distance: int,
+             window: float = SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS,
+             bucket_seconds: float = SPAM_FREQUENCY_BUCKET_SECONDS) -> Dict[str, np.ndarray]:
+    """Per-row transactions in window, distinct recipients in window and duplicate count, in row order."""
+    n = len(events["timestamp"])
+    if n == 0:
+        return {"transactions": np.zeros(0, np.int64), "recipients": np.zeros(0, np.int64), "duplicates": np.zeros(0, np.int64)}
+    _, user = np.unique(events["user"], return_inverse=True)
+    _, recipient = np.unique(events["recipient"], return_inverse=True)
+    row = np.arange(n)
+    # Sorted by user, then time, then row (the order the service processed them in)
+    order = np.lexsort((row, events["timestamp"], user))
+    u, t = user[order], events["timestamp"][order]
+    position = np.arange(n)
+    user_start = np.searchsorted(u, u, side="left")
+
+    # Frequency: rows of the same user whose bucket is within the last len(ring) buckets.
+    ring = int(window // bucket_seconds)
+    bucket = np.floor_divide(t, bucket_seconds).astype(np.int64) # Same as the service's int(t // bucket_seconds)
+    bucket -= bucket.min()
+    stride = int(bucket.max()) + ring + 1
+    bucket_key = u.astype(np.int64) * stride + bucket
+    transactions = position - np.searchsorted(bucket_key, bucket_key - (ring - 1), side="left") + 1
+
+    # Distinct recipients: row j keeps its recipient "active" for rows j..end_j, where end_j is
+    # the row before the recipient recurs or the last row whose window still reaches back to j.
+    micros = np.round((t - t.min()) * 1e6).astype(np.int64)
+    span = int(micros.max()) + int(window * 1e6) + 1
+    time_key = u.astype(np.int64) * span + micros
+    window_start = np.searchsorted(time_key, time_key - int(round(window * 1e6)), side="left")
+    by_recipient = np.lexsort((position, recipient[order], u))
+    following = np.full(n, n, dtype=np.int64)
+    same = (u[by_recipient[1:]] == u[by_recipient[:-1]]) & (recipient[order][by_recipient[1:]] == recipient[order][by_recipient[:-1]])
+    following[by_recipient[:-1][same]] = by_recipient[1:][same]
+    last_reaching = np.searchsorted(window_start, position, side="right") - 1
+    end = np.minimum(following - 1, last_reaching)
+    delta = np.ones(n + 1, dtype=np.int64)
+    delta[n] = 0
+    delta -= np.bincount(end + 1, minlength=n + 1)
+    recipients = np.cumsum(delta[:n])
+
+    # Duplicates: compare with each of the user's previous COMMAND_HISTORY_LENGTH commands.
+    numbers, high, low = events["numbers"][order], events["simhash_high"][order], events["simhash_low"][order]
+    has_text = events["has_text"][order]
+    duplicates = np.zeros(n, dtype=np.int64)
+    for lag in range(1, COMMAND_HISTORY_LENGTH + 1):
+        current = position[lag:]
+        previous = current - lag
+        candidate = ((previous >= user_start[current]) & has_text[current] & has_text[previous]
+                     & (t[current] - t[previous] <= DUPLICATE_COMMAND_TIME_WINDOW_SECONDS)
+                     & (numbers[current] == numbers[previous]))
+        if not candidate.any():
+            continue
+        hits = current[candidate]
+        distance = _popcount(high[hits] ^ high[hits - lag]) + _popcount(low[hits] ^ low[hits - lag])
+        duplicates[hits[distance <= max_signature_distance]] += 1
+
+    unsorted = np.empty(n, dtype=np.int64)
+    unsorted[order] = position
+    return {"transactions": transactions[unsorted], "recipients": recipients[unsorted], "duplicates": duplicates[unsorted]}
+
+
+def amount_features(events: Dict[str, np.ndarray], profiles: Dict[str, AmountProfile],
+                    received: Dict[str, DecayedSum]) -> Dict[str, np.ndarray]:
+    """Per-row amount features in row order; updates the per-user profiles and per-recipient sums passed in."""
+    n = len(events["amount"])
+    columns = {feature: np.empty(n, dtype=np.float64) for feature in AMOUNT_FEATURES}
+    rows = zip(events["user"], events["recipient"], events["amount"].tolist(), events["timestamp"].tolist())
+    for i, (user, recipient, amount, timestamp) in enumerate(rows):
+        profile = profiles.get(user)
+        if profile is None or profile.sent.updated < timestamp - AMOUNT_PROFILE_IDLE_SECONDS: # Dropped as idle online
+            profile = profiles[user] = AmountProfile()
+        sums = received.get(recipient)
+        if sums is None or sums.updated < timestamp - RECIPIENT_AMOUNT_IDLE_SECONDS:
+            sums = received[recipient] = DecayedSum()
+        features = profile.observe(amount, timestamp)
+        features["recipient_amount_1h"] = sums.add(amount, timestamp)
+        for feature in AMOUNT_FEATURES:
+            columns[feature][i] = features[feature]
+    return columns
+
+
+def fan_in_features(events: Dict[str, np.ndarray], sketches: Dict[str, WindowedDistinctSketch]) -> Dict[str, np.ndarray]:
+    """Per-row recipient fan-in features in row order; updates the per-recipient sender sketches passed in."""
+    n = len(events["timestamp"])
+    senders, baseline = np.empty(n, dtype=np.float64), np.empty(n, dtype=np.float64)
+    for i, (user, recipient, timestamp) in enumerate(zip(events["user"], events["recipient"], events["timestamp"].tolist())):
+        sketch = sketches.get(recipient)
+        if sketch is None:
+            sketch = sketches[recipient] = WindowedDistinctSketch()
+        sketch.add(user, timestamp)
+        senders[i] = sketch.count(timestamp, FAN_IN_WINDOW_SECONDS)
+        baseline[i] = sketch.count(timestamp, FAN_IN_BASELINE_WINDOW_SECONDS)
+    return {"recipient_senders_1h": senders, "recipient_senders_24h": baseline, "recipient_senders_1h_share": senders / baseline}
+
+
+def rule_flags(rules: CompiledRuleSet, metrics: Dict[str, np.ndarray], amounts: np.ndarray) -> Dict[str, np.ndarray]:
+    """Flags per rule, per rule group and overall ("suspicious") of a compiled rule set, row by row."""
+    features = {"similar_commands": metrics["duplicates"] + 1, "transactions_in_window": metrics["transactions"],
+                "recipients_in_window": metrics["recipients"], "amount": amounts}
+    features.update((feature, values) for feature, values in metrics.items() if feature in FRAUD_FEATURES)
+    flags = rules.evaluate_arrays(features)
+    score = np.zeros(len(amounts), dtype=np.int64)
+    for rule in rules.rules:
+        score += rule.weight * flags[rule.name]
+    for group, indexes in rules.groups.items():
+        flags[group] = np.logical_or.reduce([flags[rules.rules[i].name] for i in indexes])
+    flags["suspicious"] = score >= rules.suspicious_score
+    return flags
+
+
+class BacktestReport:
+    """Accumulates per-chunk results into flag rates for the rule set and the threshold grid."""
+
+    def __init__(self, max_transactions: List[int], max_recipients: List[int], low_values: List[float],
+                 rules: CompiledRuleSet = None):
+        self.rules = rules or FRAUD_RULES.current()
+        self.thresholds = {key: self.rules.condition_value(*spec) for key, spec in SWEEP_THRESHOLDS.items()}
+        configured = lambda key: {self.thresholds[key]} if self.thresholds[key] is not None else set()
+        self.max_transactions = sorted(set(max_transactions) | configured("max_transactions"))
+        self.max_recipients = sorted(set(max_recipients) | configured("max_recipients"))
+        self.low_values = sorted(set(low_values) | configured("low_value_threshold"))
+        self.low_value_min_transactions = self.thresholds["low_value_min_transactions"] or 0
+        self.transaction_cap = int(max(self.max_transactions[-1], self.low_value_min_transactions)) + 1
+        self.recipient_cap = self.max_recipients[-1] + 1
+        self.shape = (self.transaction_cap + 1, self.recipient_cap + 1, len(self.low_values) + 1)
+        self.histogram = np.zeros(self.shape, dtype=np.int64)
+        self.events = 0
+        self.configured = dict.fromkeys([rule.name for rule in self.rules.rules] + list(self.rules.groups) + ["suspicious"], 0)
+
+    def add(self, metrics: Dict[str, np.ndarray], amounts: np.ndarray):
+        transactions = np.minimum(metrics["transactions"], self.transaction_cap)
+        recipients = np.minimum(metrics["recipients"], self.recipient_cap)
+        # Amount class k: how many low-value thresholds are <= amount (amount < low_values[k] <=> class <= k)
+        amount_class = np.searchsorted(np.array(self.low_values), amounts, side="right")
+        cells = np.ravel_multi_index((transactions, recipients, amount_class), self.shape)
+        self.histogram += np.bincount(cells, minlength=self.histogram.size).reshape(self.shape)
+        self.events += len(amounts)
+
+        for key, flags in rule_flags(self.rules, metrics, amounts).items():
+            self.configured[key] += int(flags.sum())
+
+    def sweep(self) -> List[dict]:
+        transactions, recipients, amount_class = np.indices(self.shape)
+        rows = []
+        for max_transactions, max_recipients, (k, low_value) in itertools.product(
+                self.max_transactions, self.max_recipients, enumerate(self.low_values)):
+            flagged = ((transactions > max_transactions) | (recipients > max_recipients)
+                       | ((amount_class <= k) & (transactions > self.low_value_min_transactions)))
+            count = int(self.histogram[flagged].sum())
+            rows.append({"max_transactions": max_transactions, "max_recipients": max_recipients,
+                         "low_value_threshold": low_value, "flagged": count,
+                         "flag_rate": round(count / self.events, 6) if self.events else 0.0})
+        return rows
+
+    def to_dict(self) -> dict:
+        rates = {key: round(value / self.events, 6) if self.events else 0.0 for key, value in self.configured.items()}
+        return {
+            "events": self.events,
+            "configured": dict(
+                self.thresholds, rules=self.rules.source, rules_version=self.rules.version,
+                min_similarity=DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE, flagged=self.configured, flag_rates=rates,
+            ),
+            "sweep": self.sweep(),
+        }
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def backtest(rows: Iterable[dict], report: BacktestReport, chunk_events: int = BACKTEST_CHUNK_EVENTS,
+             min_similarity: float = DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE) -> BacktestReport:
+    """Streams rows through the rules chunk by chunk, carrying one window of context between chunks."""
+    max_distance = max_hamming_distance(min_similarity)
+    carry = None
+    profiles, received, sketches = {}, {}, {}
+    for chunk in _chunks(rows, chunk_events):
+        events = to_arrays(chunk)
+        carried = 0 if carry is None else len(carry["timestamp"])
+        if carried:
+            events = {key: np.concatenate((carry[key], values)) for key, values in events.items()}
+        metrics = {key: values[carried:] for key, values in evaluate(events, max_distance).items()}
+        new_events = {key: values[carried:] for key, values in events.items()}
+        metrics.update(amount_features(new_events, profiles, received))
+        metrics.update(fan_in_features(new_events, sketches))
+        report.add(metrics, events["amount"][carried:])
+        recent = events["timestamp"] >= events["timestamp"].max() - SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS
+        carry = {key: values[recent] for key, values in events.items()}
+    return report
+
+
+def verify_against_service(rows: List[dict], min_similarity: float = DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE) -> dict:
+    """Replays rows through FraudDetectionService (current rules) and compares row verdicts."""
+    stores = (MOCK_COMMAND_HISTORY, MOCK_TRANSACTION_PATTERNS, MOCK_AMOUNT_PROFILES, MOCK_RECIPIENT_AMOUNTS, MOCK_RECIPIENT_SENDERS)
+    for store in stores:
+        store.clear()
+    rules = FRAUD_RULES.current()
+    service = FraudDetectionService(min_similarity)
+    online_spam, online_duplicate, online_amount, online_mule = [], [], [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for row in rows:
+            timestamp = float(row["timestamp"])
+            if row.get("command_text"):
+                online_duplicate.append(service.check_duplicate_command(str(row["user_id"]), row["command_text"], timestamp)[0])
+            else:
+                online_duplicate.append(False)
+            currency = row.get("currency") or FRAUD_AMOUNT_CURRENCY
+            online_spam.append(service.check_spam_transaction_patterns(
+                str(row["user_id"]), float(row["amount"]), str(row["recipient_id"]), timestamp, currency)[0])
+            online_amount.append(service.check_amount_anomalies(
+                str(row["user_id"]), float(row["amount"]), str(row["recipient_id"]), timestamp, currency)[0])
+            online_mule.append(service.check_recipient_fan_in(str(row["user_id"]), str(row["recipient_id"]), timestamp)[0])
+    for store in stores:
+        store.clear()
+
+    events = to_arrays(rows)
+    metrics = evaluate(events, max_hamming_distance(min_similarity))
+    metrics.update(amount_features(events, {}, {}))
+    metrics.update(fan_in_features(events, {}))
+    flags = rule_flags(rules, metrics, events["amount"])
+    no_match = np.zeros(len(rows), dtype=bool)
+    mismatches = {group: np.flatnonzero(flags.get(group, no_match) != np.array(online, dtype=bool))
+                  for group, online in (("spam", online_spam), ("duplicate", online_duplicate), ("amount", online_amount), ("mule", online_mule))}
+    return dict({f"{group}_mismatches": len(mismatched) for group, mismatched in mismatches.items()}, rows=len(rows),
+                first_mismatches=sorted(set().union(*(mismatched[:5].tolist() for mismatched in mismatches.values()))))
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v]
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description="Backtest the fraud rules over a JSONL/CSV transaction log.")
+    arguments.add_argument("log", help="JSONL or CSV file (by extension)")
+    arguments.add_argument("--max-transactions", type=_int_list, default=DEFAULT_MAX_TRANSACTIONS)
+    arguments.add_argument("--max-recipients", type=_int_list, default=DEFAULT_MAX_RECIPIENTS)
+    arguments.add_argument("--low-value", type=_float_list, default=DEFAULT_LOW_VALUE)
+    arguments.add_argument("--min-similarity", type=float, default=DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE)
+    arguments.add_argument("--chunk-events", type=int, default=BACKTEST_CHUNK_EVENTS)
+    arguments.add_argument("--verify", type=int, default=0, help="replay the first N rows through the online service")
+    arguments.add_argument("--output", help="write the JSON report here (default: stdout)")
+    options = arguments.parse_args()
+
+    started = time.perf_counter()
+    report = backtest(read_events(options.log), BacktestReport(options.max_transactions, options.max_recipients, options.low_value),
+                      options.chunk_events, options.min_similarity)
+    elapsed = time.perf_counter() - started
+    result = report.to_dict()
+    result["elapsed_s"] = round(elapsed, 3)
+    result["events_per_s"] = round(report.events / elapsed) if elapsed else None
+    if options.verify:
+        result["verification"] = verify_against_service(list(itertools.islice(read_events(options.log), options.verify)),
+                                                        options.min_similarity)
+
+    configured = result["configured"]["flag_rates"]
+    print(f"[FRAUD_BACKTEST] {report.events} events in {elapsed:.1f} s ({result['events_per_s']}/s); configured thresholds flag "
+          + ", ".join(f"{key} {rate:.3%}" for key, rate in configured.items()), file=sys.stderr)
+    if "verification" in result:
+        print(f"[FRAUD_BACKTEST] Verification against FraudDetectionService: {result['verification']}", file=sys.stderr)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+    verification = result.get("verification")
+    sys.exit(1 if verification and any(verification[f"{group}_mismatches"] for group in ("spam", "duplicate", "amount", "mule")) else 0)
@@ -1,37 +1,174 @@
+import os
+import sys
 import time
-from collections import defaultdict, deque
+from collections import deque
+
+from .amount_stats import AMOUNT_PROFILE_IDLE_SECONDS, RECIPIENT_AMOUNT_IDLE_SECONDS, AmountProfile, DecayedSum
+from .command_signature import CommandSignature, are_near_duplicates, command_signature, max_hamming_distance
+from .fraud_backends import FraudStateBackend, InProcessFraudBackend, SQLiteFraudBackend
+from .fraud_rules import FraudRuleEngine
+from .fraud_state import BoundedUserState, UserLockStripes
+from .rate_provider import RATE_PROVIDER
+from .windowed_counters import ExpiringSet, WindowedCounter, WindowedDistinctSketch
+
+# Windows the per-user state is kept for. The rules themselves (thresholds, weights, reasons)
+# are in fraud_rules.json and reloaded when it changes (see fraud_rules).
+DUPLICATE_COMMAND_TIME_WINDOW_SECONDS = 60  # 1 minute
+DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE = 0.9 # Cosine similarity of character trigrams, estimated from SimHash signatures
+COMMAND_HISTORY_LENGTH = 10 # Commands kept per user for the duplicate check
+
+SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS = 300 # 5 minutes
+SPAM_FREQUENCY_BUCKET_SECONDS = 5 # Resolution of the transaction frequency window
+
+# Amount features and thresholds are in this currency: a transaction's amount is converted
+# at the RATE_PROVIDER mid rate before it reaches the rules or a user's amount statistics,
+# so 30,000 NGN and 30,000 USD are not the same "amount".
+FRAUD_AMOUNT_CURRENCY = "USD"
+
+# Mule detection: distinct senders paying one recipient, recently and over a longer baseline
+FAN_IN_WINDOW_SECONDS = 3600 # 1 hour
+FAN_IN_BASELINE_WINDOW_SECONDS = 24 * 3600 # 1 day
+
+# Values besides the features that rule reasons may refer to
+FRAUD_REASON_CONTEXT = {"duplicate_window_seconds": DUPLICATE_COMMAND_TIME_WINDOW_SECONDS,
+                        "spam_window_seconds": SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS}
+
+# Users idle for longer than the largest rule window no longer affect any check
+FRAUD_STATE_IDLE_SECONDS = max(DUPLICATE_COMMAND_TIME_WINDOW_SECONDS, SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS)
+COMMAND_HISTORY_ENTRY_BYTES = 200 # (timestamp, CommandSignature) tuple
+
+
+def _command_history_bytes(history: deque) -> int:
+    return sys.getsizeof(history) + COMMAND_HISTORY_ENTRY_BYTES * len(history)
+
+
+def _new_transaction_patterns() -> dict:
+    return {
+        # Transactions in the spam window, counted in SPAM_FREQUENCY_BUCKET_SECONDS buckets
+        "transactions": WindowedCounter(SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS, SPAM_FREQUENCY_BUCKET_SECONDS),
+        "recipients": ExpiringSet(SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS) # Distinct recipients in the spam window
+    }
+
+
+def _transaction_patterns_bytes(patterns: dict) -> int:
+    return sys.getsizeof(patterns) + patterns["transactions"].approx_bytes() + patterns["recipients"].approx_bytes()
+
+
+# Amount state has a fixed size per user/recipient (see amount_stats), so the estimate is a constant
+AMOUNT_PROFILE_MEMORY_BYTES = AmountProfile().approx_bytes()
+RECIPIENT_AMOUNT_MEMORY_BYTES = sys.getsizeof(DecayedSum())
+RECIPIENT_SENDERS_MEMORY_BYTES = WindowedDistinctSketch().approx_bytes()
+
 
 # Mock database to store recent command history for fraud detection
 # In a real application, use a more robust and scalable data store (e.g., Redis, a database).
-MOCK_COMMAND_HISTORY = defaultdict(lambda: deque(maxlen=10)) # Store last 10 commands per user_id
-MOCK_TRANSACTION_PATTERNS = defaultdict(lambda: {
-    "timestamps": deque(maxlen=20), # Timestamps of recent transactions
-    "recipient_counts": defaultdict(lambda: deque(maxlen=5)) # Timestamps for each recipient
-})
+# Users are kept in LRU order; idle users are compacted away and the total is capped (see fraud_state).
+MOCK_COMMAND_HISTORY = BoundedUserState(lambda: deque(maxlen=COMMAND_HISTORY_LENGTH), _command_history_bytes, # Store last 10 commands per user_id
+                                        FRAUD_STATE_IDLE_SECONDS)
+MOCK_TRANSACTION_PATTERNS = BoundedUserState(_new_transaction_patterns, _transaction_patterns_bytes, FRAUD_STATE_IDLE_SECONDS)
+# A user's amount norm is kept for months, the recipients' hourly sums for a day
+MOCK_AMOUNT_PROFILES = BoundedUserState(AmountProfile, lambda profile: AMOUNT_PROFILE_MEMORY_BYTES, AMOUNT_PROFILE_IDLE_SECONDS)
+MOCK_RECIPIENT_AMOUNTS = BoundedUserState(DecayedSum, lambda received: RECIPIENT_AMOUNT_MEMORY_BYTES, RECIPIENT_AMOUNT_IDLE_SECONDS)
+MOCK_RECIPIENT_SENDERS = BoundedUserState(WindowedDistinctSketch, lambda senders: RECIPIENT_SENDERS_MEMORY_BYTES,
+                                          FAN_IN_BASELINE_WINDOW_SECONDS)
 
-# Thresholds for fraud detection (configurable in a real system)
-DUPLICATE_COMMAND_TIME_WINDOW_SECONDS = 60  # 1 minute
-DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE = 0.9 # For text similarity (not implemented in this mock, using exact match)
-MAX_COMMANDS_IN_WINDOW_FOR_DUPLICATE = 2 # More than 2 identical commands in window is suspicious
+# With several worker processes, point this at a SQLite file (e.g. backend/data/fraud_state.sqlite3)
+# so that all workers count a user's commands and transactions together (see fraud_backends).
+FRAUD_STATE_DB_PATH = os.environ.get("FRAUD_STATE_DB_PATH")
 
-SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS = 300 # 5 minutes
-SPAM_MAX_TRANSACTIONS_IN_WINDOW = 10 # More than 10 transactions in 5 mins is suspicious
-SPAM_MAX_NEW_RECIPIENTS_IN_WINDOW = 5 # Transactions to >5 new recipients in 5 mins is suspicious
-SPAM_LOW_VALUE_THRESHOLD = 1.0 # Transactions below this amount might be part of spam (if frequent)
+
+def sqlite_fraud_backend(db_path: str) -> SQLiteFraudBackend:
+    """Shared SQLite backend with this module's rule windows."""
+    return SQLiteFraudBackend(db_path, SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS, SPAM_FREQUENCY_BUCKET_SECONDS,
+                              DUPLICATE_COMMAND_TIME_WINDOW_SECONDS, COMMAND_HISTORY_LENGTH,
+                              fan_in_retention_seconds=FAN_IN_BASELINE_WINDOW_SECONDS)
+
+
+FRAUD_STATE_BACKEND: FraudStateBackend = (sqlite_fraud_backend(FRAUD_STATE_DB_PATH) if FRAUD_STATE_DB_PATH
+                                          else InProcessFraudBackend(MOCK_COMMAND_HISTORY, MOCK_TRANSACTION_PATTERNS,
+                                                                     MOCK_AMOUNT_PROFILES, MOCK_RECIPIENT_AMOUNTS,
+                                                                     MOCK_RECIPIENT_SENDERS))
+
+# Per-user locks shared by every FraudDetectionService instance (one is created per request),
+# so concurrent threads never interleave one user's checks (see fraud_state.UserLockStripes)
+FRAUD_STATE_LOCKS = UserLockStripes()
+
+# Compiled rules from fraud_rules.json, shared by all instances and swapped in when the file changes
+FRAUD_RULES = FraudRuleEngine()
 
 class FraudDetectionService:
 
-    def __init__(self):
-        self.command_history = MOCK_COMMAND_HISTORY
-        self.transaction_patterns = MOCK_TRANSACTION_PATTERNS
+    def __init__(self, min_similarity: float = DUPLICATE_COMMAND_MIN_SIMILARITY_SCORE, backend: FraudStateBackend = None,
+                 locks: UserLockStripes = None, rules: FraudRuleEngine = None):
+        self.backend = backend or FRAUD_STATE_BACKEND
+        self.locks = locks or FRAUD_STATE_LOCKS
+        self.rules = rules or FRAUD_RULES
+        self.max_signature_distance = max_hamming_distance(min_similarity)
+
+    def _are_signatures_similar(self, sig1: CommandSignature, sig2: CommandSignature) -> bool:
+        return are_near_duplicates(sig1, sig2, self.max_signature_distance)
 
     def _are_commands_similar(self, cmd1_text: str, cmd2_text: str) -> bool:
-        """Mock similarity check. In a real app, use NLP techniques (e.g., Levenshtein, embeddings)."""
-        # For this mock, we use exact match for simplicity after basic normalization.
-        return cmd1_text.strip().lower() == cmd2_text.strip().lower()
+        """Near-duplicate check: same numbers and SimHash similarity >= the configured minimum."""
+        return self._are_signatures_similar(command_signature(cmd1_text), command_signature(cmd2_text))
+
+    def _command_features(self, user_id: str, command_text: str, timestamp: float) -> dict:
+        """Records the command and returns its rule features."""
+        signature = command_signature(command_text)
+        # Stores the current command and returns the ones before it in one step, so two workers
+        # handling the same user at once still see each other's commands
+        with self.locks.for_user(user_id):
+            history = self.backend.record_command(user_id, timestamp, signature) # Only the signature is kept, not the command text
+        duplicate_count = 0
+        
+        for prev_cmd_time, prev_signature in history:
+            if (timestamp - prev_cmd_time) <= DUPLICATE_COMMAND_TIME_WINDOW_SECONDS:
+                if self._are_signatures_similar(signature, prev_signature):
+                    duplicate_count += 1
+
+        return {"similar_commands": duplicate_count + 1} # The current command included
+
+    @staticmethod
+    def _rule_amount(amount: float, currency: str) -> float:
+        """amount in FRAUD_AMOUNT_CURRENCY; raises ValueError for a currency without a rate."""
+        rate = RATE_PROVIDER.rate(currency, FRAUD_AMOUNT_CURRENCY, side="mid")
+        if rate is None:
+            raise ValueError(f"No {FRAUD_AMOUNT_CURRENCY} rate for currency {currency!r}")
+        return amount * rate
+
+    def _transaction_features(self, user_id: str, amount: float, recipient_id: str, timestamp: float) -> dict:
+        """Records the transaction and returns its rule features."""
+        # Records the transaction and reads both window counts atomically (shared between workers
+        # when the backend is)
+        with self.locks.for_user(user_id):
+            recent_tx_count, active_recipients_in_window = self.backend.record_transaction(user_id, recipient_id, timestamp)
+        return {"transactions_in_window": recent_tx_count, "recipients_in_window": active_recipients_in_window, "amount": amount}
+
+    def _amount_features(self, user_id: str, amount: float, recipient_id: str, timestamp: float) -> dict:
+        """Adds the amount to the user's and the recipient's statistics and returns its rule features."""
+        with self.locks.for_user(user_id):
+            features = self.backend.record_amount(user_id, recipient_id, amount, timestamp)
+        features["amount"] = amount
+        return features
+
+    def _fan_in_features(self, user_id: str, recipient_id: str, timestamp: float) -> dict:
+        """Adds the sender->recipient edge and returns the recipient's fan-in features."""
+        with self.locks.for_user(user_id):
+            senders, baseline = self.backend.record_fan_in(user_id, recipient_id, timestamp,
+                                                           (FAN_IN_WINDOW_SECONDS, FAN_IN_BASELINE_WINDOW_SECONDS))
+        return {"recipient_senders_1h": senders, "recipient_senders_24h": baseline,
+                "recipient_senders_1h_share": senders / baseline} # baseline >= 1: this sender is in it
+
+    def _check_group(self, group: str, user_id: str, features: dict, clean_reason: str) -> tuple[bool, str]:
+        match = self.rules.current().evaluate_group(group, features, FRAUD_REASON_CONTEXT)
+        if match is None:
+            return False, clean_reason
+        reason = match[1]
+        print(f"[FRAUD_DETECTION] User {user_id}: {reason}")
+        return True, reason
 
     def check_duplicate_command(self, user_id: str, command_text: str, timestamp: float = None) -> tuple[bool, str]:
-        """Checks for potentially duplicate commands made in rapid succession.
+        """Checks for potentially duplicate commands made in rapid succession (rule group "duplicate").
 
         Args:
             user_id: The unique identifier for the user.
@@ -43,101 +180,95 @@ class FraudDetectionService:
         """
         if timestamp is None:
             timestamp = time.time()
+        features = self._command_features(user_id, command_text, timestamp)
+        return self._check_group("duplicate", user_id, features, "No duplicate command detected.")
 
-        history = self.command_history[user_id]
-        duplicate_count = 0
-        
-        for prev_cmd_time, prev_cmd_text in list(history): # Iterate over a copy for safe modification if needed
-            if (timestamp - prev_cmd_time) <= DUPLICATE_COMMAND_TIME_WINDOW_SECONDS:
-                if self._are_commands_similar(command_text, prev_cmd_text):
-                    duplicate_count += 1
-            else:
-                # Remove very old commands from consideration to keep deque size relevant
-                # Though deque maxlen handles this, explicit removal can be done if needed for other logic
-                pass 
+    def check_spam_transaction_patterns(self, user_id: str, amount: float, recipient_id: str, timestamp: float = None,
+            currency: str = FRAUD_AMOUNT_CURRENCY) -> tuple[bool, str]:
+        """Checks for spam-like transaction patterns (rule group "spam").
 
-        # Add current command to history *after* checking against past ones
-        history.append((timestamp, command_text))
+        Args:
+            user_id: The unique identifier for the user.
+            amount: The transaction amount.
+            recipient_id: The unique identifier for the recipient.
+            timestamp: The time of the transaction (Unix timestamp).
+            currency: The currency of amount.
 
-        if duplicate_count >= MAX_COMMANDS_IN_WINDOW_FOR_DUPLICATE: # Current command makes it N+1
-            reason = (f"Potential duplicate command: Similar command issued {duplicate_count + 1} "
-                      f"times within {DUPLICATE_COMMAND_TIME_WINDOW_SECONDS} seconds.")
-            print(f"[FRAUD_DETECTION] User {user_id}: {reason}")
-            return True, reason
-        
-        return False, "No duplicate command detected."
+        Returns:
+            A tuple (is_suspicious: bool, reason: str).
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        features = self._transaction_features(user_id, self._rule_amount(amount, currency), recipient_id, timestamp)
+        return self._check_group("spam", user_id, features, "No spam transaction pattern detected.")
 
-    def check_spam_transaction_patterns(self, user_id: str, amount: float, recipient_id: str, timestamp: float = None) -> tuple[bool, str]:
-        """Checks for spam-like transaction patterns.
+    def check_amount_anomalies(self, user_id: str, amount: float, recipient_id: str, timestamp: float = None,
+            currency: str = FRAUD_AMOUNT_CURRENCY) -> tuple[bool, str]:
+        """Checks the amount against the user's usual amounts and recent volumes (rule group "amount").
 
         Args:
             user_id: The unique identifier for the user.
             amount: The transaction amount.
             recipient_id: The unique identifier for the recipient.
             timestamp: The time of the transaction (Unix timestamp).
+            currency: The currency of amount.
 
         Returns:
             A tuple (is_suspicious: bool, reason: str).
         """
         if timestamp is None:
             timestamp = time.time()
+        features = self._amount_features(user_id, self._rule_amount(amount, currency), recipient_id, timestamp)
+        return self._check_group("amount", user_id, features, "No unusual amount detected.")
 
-        user_patterns = self.transaction_patterns[user_id]
-        user_patterns["timestamps"].append(timestamp)
-        user_patterns["recipient_counts"][recipient_id].append(timestamp)
+    def check_recipient_fan_in(self, user_id: str, recipient_id: str, timestamp: float = None) -> tuple[bool, str]:
+        """Checks for many distinct senders suddenly paying the same recipient (rule group "mule").
 
-        # Rule 1: High frequency of transactions
-        recent_tx_timestamps = [t for t in user_patterns["timestamps"] if (timestamp - t) <= SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS]
-        if len(recent_tx_timestamps) > SPAM_MAX_TRANSACTIONS_IN_WINDOW:
-            reason = (f"Potential spam: High transaction frequency ({len(recent_tx_timestamps)} transactions "
-                      f"within {SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS} seconds).")
-            print(f"[FRAUD_DETECTION] User {user_id}: {reason}")
-            return True, reason
-
-        # Rule 2: Transactions to many new/distinct recipients in a short period
-        # (Simplified: counts distinct recipients with recent activity)
-        active_recipients_in_window = 0
-        for r_id, r_timestamps in user_patterns["recipient_counts"].items():
-            if any((timestamp - rt) <= SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS for rt in r_timestamps):
-                active_recipients_in_window += 1
-        
-        if active_recipients_in_window > SPAM_MAX_NEW_RECIPIENTS_IN_WINDOW:
-            reason = (f"Potential spam: Transactions to many distinct recipients ({active_recipients_in_window}) "
-                      f"within {SPAM_TRANSACTION_FREQUENCY_WINDOW_SECONDS} seconds.")
-            print(f"[FRAUD_DETECTION] User {user_id}: {reason}")
-            return True, reason
+        Args:
+            user_id: The unique identifier for the user (the sender).
+            recipient_id: The unique identifier for the recipient.
+            timestamp: The time of the transaction (Unix timestamp).
 
-        # Rule 3: High frequency of low-value transactions (can be combined with Rule 1)
-        if amount < SPAM_LOW_VALUE_THRESHOLD and len(recent_tx_timestamps) > (SPAM_MAX_TRANSACTIONS_IN_WINDOW / 2):
-            reason = (f"Potential spam: High frequency of low-value transactions (amount: {amount}, "
-                      f"count: {len(recent_tx_timestamps)} within window).")
-            print(f"[FRAUD_DETECTION] User {user_id}: {reason}")
-            return True, reason
+        Returns:
+            A tuple (is_suspicious: bool, reason: str).
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        features = self._fan_in_features(user_id, recipient_id, timestamp)
+        return self._check_group("mule", user_id, features, "No unusual recipient fan-in detected.")
 
-        return False, "No spam transaction pattern detected."
+    def state_stats(self) -> dict:
+        """Live size of the per-user fraud state (and eviction counters per store for the in-process backend)."""
+        return self.backend.stats()
 
-    def assess_transaction_risk(self, user_id: str, command_text: str, amount: float, recipient_id: str) -> dict:
-        """Assesses overall risk for a given transaction based on command and pattern checks."""
-        timestamp = time.time()
-        
-        is_duplicate, duplicate_reason = self.check_duplicate_command(user_id, command_text, timestamp)
-        is_spam, spam_reason = self.check_spam_transaction_patterns(user_id, amount, recipient_id, timestamp)
-
-        risk_score = 0 # Lower is better
-        reasons = []
-
-        if is_duplicate:
-            risk_score += 50
-            reasons.append(duplicate_reason)
-        if is_spam:
-            risk_score += 50
-            reasons.append(spam_reason)
+    def assess_transaction_risk(self, user_id: str, command_text: str, amount: float, recipient_id: str,
+                                currency: str = FRAUD_AMOUNT_CURRENCY) -> dict:
+        """Assesses overall risk for a given transaction with every rule in the current rule set.
+
+        amount is in currency; the rules see it in FRAUD_AMOUNT_CURRENCY.
+        """
+        amount = self._rule_amount(amount, currency) # Before any state changes: an unknown currency records nothing
+        # All records of one assessment run under the user's lock, so concurrent assessments of the
+        # same user are applied one after the other (timestamps included) and never interleave
+        with self.locks.for_user(user_id):
+            timestamp = time.time()
+
+            features = self._command_features(user_id, command_text, timestamp)
+            features.update(self._transaction_features(user_id, amount, recipient_id, timestamp))
+            features.update(self._amount_features(user_id, amount, recipient_id, timestamp))
+            features.update(self._fan_in_features(user_id, recipient_id, timestamp))
+
+        rules = self.rules.current() # One rule set for the whole assessment, even if a reload swaps it meanwhile
+        risk_score, reasons, matched_rules = rules.evaluate(features, FRAUD_REASON_CONTEXT) # Lower is better
+        for reason in reasons:
+            print(f"[FRAUD_DETECTION] User {user_id}: {reason}")
         
         return {
             "user_id": user_id,
-            "is_suspicious": risk_score > 0,
-            "risk_score": risk_score, # Max 100 for this mock
+            "is_suspicious": risk_score >= rules.suspicious_score,
+            "risk_score": risk_score, # Sum of the matching rules' weights
             "reasons": reasons,
+            "matched_rules": matched_rules,
             "timestamp": timestamp
         }
 
@@ -161,22 +292,36 @@ if __name__ == "__main__":
     print(f"Cmd4 (variant): {cmd_variant}")
     print(service.assess_transaction_risk(user1, cmd_variant, 10.0, "john_doe_1"))
 
+    cmd_near = "send 10 usd to john doe pls" # Near duplicate
+    print(f"Cmd4b (near duplicate): {cmd_near}")
+    print(service.assess_transaction_risk(user1, cmd_near, 10.0, "john_doe_1"))
+
+    cmd_other_amount = "Send 100 USD to John Doe" # Different amount, never a duplicate
+    print(f"Cmd4c (different amount): {cmd_other_amount}")
+    print(service.assess_transaction_risk("user_fraud_test_001b", cmd1, 10.0, "john_doe_1"))
+    print(service.assess_transaction_risk("user_fraud_test_001b", cmd1, 10.0, "john_doe_1"))
+    print(service.assess_transaction_risk("user_fraud_test_001b", cmd_other_amount, 100.0, "john_doe_1"))
+
     # Simulate time passing beyond window for duplicate check
     print("\nSimulating time passing for duplicate check reset...")
-    service.command_history[user1].append((time.time() - DUPLICATE_COMMAND_TIME_WINDOW_SECONDS * 2, "old command"))
+    service.backend.record_command(user1, time.time() - DUPLICATE_COMMAND_TIME_WINDOW_SECONDS * 2, command_signature("old command"))
     print(f"Cmd5 (same after long time): {cmd1}")
     # Reset history for this specific test or use a new user
-    service.command_history[user1].clear() 
+    service.backend.clear() 
     print(service.assess_transaction_risk(user1, cmd1, 10.0, "john_doe_1")) # First again
     print(service.assess_transaction_risk(user1, cmd1, 10.0, "john_doe_1")) # Second
     print(service.assess_transaction_risk(user1, cmd1, 10.0, "john_doe_1")) # Third, now duplicate
 
 
     print("\n--- Testing Spam Transaction Pattern Detection ---")
+    rules = FRAUD_RULES.current()
+    max_transactions = int(rules.condition_value("high_transaction_frequency", "transactions_in_window"))
+    max_recipients = int(rules.condition_value("many_recipients", "recipients_in_window"))
+    low_value_threshold = rules.condition_value("frequent_low_value", "amount")
     user2 = "user_fraud_test_002"
     # High frequency
     print("Simulating high frequency transactions...")
-    for i in range(SPAM_MAX_TRANSACTIONS_IN_WINDOW + 1):
+    for i in range(max_transactions + 1):
         res = service.assess_transaction_risk(user2, f"tx {i}", 5.0, f"recipient_{i % 3}")
         if res["is_suspicious"] and any("High transaction frequency" in r for r in res["reasons"]):
             print(f"Transaction {i+1}: {res}")
@@ -186,7 +331,7 @@ if __name__ == "__main__":
     # Many new recipients
     print("\nSimulating transactions to many new recipients...")
     user3 = "user_fraud_test_003"
-    for i in range(SPAM_MAX_NEW_RECIPIENTS_IN_WINDOW + 1):
+    for i in range(max_recipients + 1):
         res = service.assess_transaction_risk(user3, f"tx_new_recip {i}", 20.0, f"new_recipient_{i}")
         if res["is_suspicious"] and any("many distinct recipients" in r for r in res["reasons"]):
             print(f"Transaction {i+1} to new recipient: {res}")
@@ -196,10 +341,10 @@ if __name__ == "__main__":
     # Low value, high frequency
     print("\nSimulating low-value, high-frequency transactions...")
     user4 = "user_fraud_test_004"
-    # Need to hit more than half of SPAM_MAX_TRANSACTIONS_IN_WINDOW
-    trigger_count = (SPAM_MAX_TRANSACTIONS_IN_WINDOW // 2) + 2 
+    # Need to hit more than half of max_transactions
+    trigger_count = (max_transactions // 2) + 2 
     for i in range(trigger_count):
-        res = service.assess_transaction_risk(user4, f"low_val_tx {i}", SPAM_LOW_VALUE_THRESHOLD - 0.1, f"recipient_low_val_{i % 2}")
+        res = service.assess_transaction_risk(user4, f"low_val_tx {i}", low_value_threshold - 0.1, f"recipient_low_val_{i % 2}")
         if res["is_suspicious"] and any("low-value transactions" in r for r in res["reasons"]):
             print(f"Low-value transaction {i+1}: {res}")
             break
@@ -220,3 +365,28 @@ if __name__ == "__main__":
             break
         time.sleep(0.01)
 
+
+    print("\n--- Testing Amount Anomaly Detection ---")
+    user6 = "user_fraud_test_006"
+    start = time.time() - 30 * 24 * 3600 # A month of ordinary payments, a few a day
+    for i in range(30):
+        service.check_amount_anomalies(user6, 40.0 + (i * 7) % 25, "family_member", start + i * 24 * 3600)
+    print(service.check_amount_anomalies(user6, 55.0, "family_member")) # Within the user's norm
+    print(service.check_amount_anomalies(user6, 900.0, "new_recipient_x")) # Far above it
+    user7 = "user_fraud_test_007"
+    for i in range(4): # Large payments in quick succession
+        res = service.check_amount_anomalies(user7, 3000.0, f"merchant_{i}")
+    print(res)
+    user8 = "user_fraud_test_008"
+    for i in range(4): # The same figures in naira are about 2 USD each: ordinary
+        res = service.check_amount_anomalies(user8, 3000.0, f"merchant_{i}", currency="NGN")
+    print(res)
+
+    print("\n--- Testing Recipient Fan-in (Mule) Detection ---")
+    now = time.time()
+    for i in range(12): # Regular customers of a shop over the last day
+        service.check_recipient_fan_in(f"shop_customer_{i}", "corner_shop", now - 20 * 3600 + i * 1800)
+    print(service.check_recipient_fan_in("shop_customer_new", "corner_shop", now))
+    for i in range(10): # Many first-time senders within minutes
+        res = service.check_recipient_fan_in(f"scam_victim_{i}", "mule_account_1", now - 600 + i * 60)
+    print(res)
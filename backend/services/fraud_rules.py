@@ -0,0 +1,247 @@
+import json
+import math
+import operator
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Declarative fraud rules, compiled to Python functions and hot-reloaded from disk.
+#
+# A rule file (JSON, see fraud_rules.json) lists groups of rules over the per-request
+# feature vector FraudDetectionService computes (FRAUD_FEATURES). A rule matches when all
+# of its conditions hold; within a group only the first matching rule counts (the groups
+# are the old "duplicate" and "spam" checks, whose rules were an if/elif chain). The risk
+# score is the sum of the weights of the matching rules and the request is suspicious at
+# suspicious_score or above. Reasons are format strings over the features and the
+# service's window sizes.
+#
+# compile_rules validates the file and generates one function per group plus one for all
+# groups, with thresholds inlined as literals, so an assessment is a handful of
+# comparisons (about a microsecond for dozens of rules). FraudRuleEngine checks the
+# file's mtime at most every reload_interval seconds and swaps in the newly compiled rule
+# set with a single reference assignment; callers take current() once per request and
+# keep a consistent rule set even if a reload happens meanwhile. A file that fails to
+# load or compile is reported and the previous rule set stays in force.
+
+FRAUD_FEATURES = (
+    "similar_commands", # Commands similar to this one within the duplicate window, this one included
+    "transactions_in_window", # The user's transactions in the spam window, this one included
+    "recipients_in_window", # Distinct recipients in the spam window, this one included
+    "amount", # Amount of this transaction in USD (fraud_detection_service.FRAUD_AMOUNT_CURRENCY), as are the other amounts
+    "amount_history", # The user's previous amounts (in the running statistics)
+    "amount_zscore", # Standard deviations this amount lies above the user's previous amounts (0 with little history)
+    "amount_to_p95", # This amount over the user's 95th-percentile amount (0 without history)
+    "user_amount_1h", # Decayed sum of the user's amounts, one-hour time constant, this one included
+    "recipient_amount_1h", # Decayed sum of what the recipient received from all users, this one included
+    "recipient_senders_1h", # Estimated distinct users who paid the recipient in the fan-in window, this one included
+    "recipient_senders_24h", # The same over the fan-in baseline window
+    "recipient_senders_1h_share", # recipient_senders_1h / recipient_senders_24h: near 1 when the senders are all new
+)
+DEFAULT_FRAUD_RULES_PATH = os.path.join(os.path.dirname(__file__), "fraud_rules.json")
+FRAUD_RULES_RELOAD_INTERVAL_SECONDS = 2.0
+
+_OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+
+
+class Condition(NamedTuple):
+    feature: str
+    op: str
+    value: float
+
+
+class Rule(NamedTuple):
+    name: str
+    group: str
+    weight: int
+    conditions: Tuple[Condition, ...]
+    reason: str
+
+
+def _number(value, where: str):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{where}: expected a finite number, got {value!r}")
+    return value
+
+
+def _parse_rule(raw: dict, group: str, where: str) -> Rule:
+    if not isinstance(raw, dict) or not isinstance(raw.get("name"), str) or not raw.get("name"):
+        raise ValueError(f"{where}: a rule needs a non-empty 'name'")
+    where = f"{where} ({raw['name']})"
+    weight = _number(raw.get("weight"), f"{where} weight")
+    if not isinstance(weight, int):
+        raise ValueError(f"{where}: weight must be an integer")
+    conditions = []
+    for condition in raw.get("when") or []:
+        if not isinstance(condition, dict) or condition.get("feature") not in FRAUD_FEATURES:
+            raise ValueError(f"{where}: unknown feature in {condition!r} (known: {', '.join(FRAUD_FEATURES)})")
+        if condition.get("op") not in _OPERATORS:
+            raise ValueError(f"{where}: unknown operator in {condition!r} (known: {' '.join(_OPERATORS)})")
+        conditions.append(Condition(condition["feature"], condition["op"], _number(condition.get("value"), where)))
+    if not conditions:
+        raise ValueError(f"{where}: a rule needs at least one condition in 'when'")
+    reason = raw.get("reason", raw["name"])
+    if not isinstance(reason, str):
+        raise ValueError(f"{where}: reason must be a string")
+    return Rule(raw["name"], group, weight, tuple(conditions), reason)
+
+
+def parse_rules(document: dict) -> Tuple[List[Rule], int]:
+    """Validated rules (in evaluation order) and the suspicious_score of a rule document."""
+    if not isinstance(document, dict) or not isinstance(document.get("groups"), list):
+        raise ValueError("rule file: expected an object with a 'groups' list")
+    rules, names = [], set()
+    for g, group in enumerate(document["groups"]):
+        if not isinstance(group, dict) or not isinstance(group.get("name"), str) or not isinstance(group.get("rules"), list):
+            raise ValueError(f"groups[{g}]: a group needs a 'name' and a 'rules' list")
+        for r, raw in enumerate(group["rules"]):
+            rule = _parse_rule(raw, group["name"], f"groups[{g}].rules[{r}]")
+            if rule.name in names:
+                raise ValueError(f"groups[{g}].rules[{r}]: duplicate rule name {rule.name!r}")
+            names.add(rule.name)
+            rules.append(rule)
+    suspicious_score = _number(document.get("suspicious_score", 1), "suspicious_score")
+    return rules, suspicious_score
+
+
+def _generate(rules: List[Rule], indexes: List[int], function_name: str) -> str:
+    """Source of a function(features) -> list of matching rule indexes (first match per group)."""
+    features = sorted({c.feature for i in indexes for c in rules[i].conditions})
+    lines = [f"def {function_name}(features):"]
+    lines += [f"    {feature} = features[{feature!r}]" for feature in features]
+    lines.append("    hits = []")
+    previous_group = None
+    for i in indexes:
+        rule = rules[i]
+        test = " and ".join(f"{c.feature} {c.op} {c.value!r}" for c in rule.conditions)
+        keyword = "elif" if rule.group == previous_group else "if"
+        lines += [f"    {keyword} {test}:", f"        hits.append({i})"]
+        previous_group = rule.group
+    lines.append("    return hits")
+    return "\n".join(lines)
+
+
+class CompiledRuleSet:
+    """An immutable, compiled rule set."""
+
+    def __init__(self, rules: List[Rule], suspicious_score: int = 1, source: str = "<rules>", version: str = ""):
+        self.rules = rules
+        self.suspicious_score = suspicious_score
+        self.source = source
+        self.version = version
+        self.groups: Dict[str, List[int]] = {}
+        for i, rule in enumerate(rules):
+            self.groups.setdefault(rule.group, []).append(i)
+        # Rules of a group must be contiguous for the if/elif chain; order groups by first appearance.
+        order = [i for indexes in self.groups.values() for i in indexes]
+        namespace: dict = {}
+        sources = [_generate(rules, order, "evaluate_all")]
+        sources += [_generate(rules, indexes, f"evaluate_group_{g}") for g, indexes in enumerate(self.groups.values())]
+        exec(compile("\n\n".join(sources), f"<fraud rules {source}>", "exec"), namespace)
+        self._evaluate_all = namespace["evaluate_all"]
+        self._evaluate_group = {name: namespace[f"evaluate_group_{g}"] for g, name in enumerate(self.groups)}
+
+    def evaluate(self, features: Dict[str, float], context: Optional[dict] = None) -> Tuple[int, List[str], List[str]]:
+        """(risk score, reasons, names of the matching rules) over all groups."""
+        hits = self._evaluate_all(features)
+        if not hits:
+            return 0, [], []
+        values = dict(context or {}, **features)
+        rules = [self.rules[i] for i in hits]
+        return sum(rule.weight for rule in rules), [rule.reason.format_map(values) for rule in rules], [rule.name for rule in rules]
+
+    def evaluate_group(self, group: str, features: Dict[str, float], context: Optional[dict] = None) -> Optional[Tuple[Rule, str]]:
+        """The matching rule of one group and its reason, or None (unknown groups never match)."""
+        evaluate = self._evaluate_group.get(group)
+        hits = evaluate(features) if evaluate else []
+        if not hits:
+            return None
+        rule = self.rules[hits[0]]
+        return rule, rule.reason.format_map(dict(context or {}, **features))
+
+    def evaluate_arrays(self, features: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Per-rule boolean match arrays (first match per group) over feature columns, for backtests."""
+        matches = {}
+        for indexes in self.groups.values():
+            remaining = None
+            for i in indexes:
+                rule = self.rules[i]
+                hit = np.logical_and.reduce([_OPERATORS[c.op](np.asarray(features[c.feature]), c.value) for c in rule.conditions])
+                hit = hit if remaining is None else hit & remaining
+                remaining = ~hit if remaining is None else remaining & ~hit
+                matches[rule.name] = hit
+        return matches
+
+    def condition_value(self, rule_name: str, feature: str) -> Optional[float]:
+        """Threshold of rule_name's (first) condition on feature, if any."""
+        for rule in self.rules:
+            if rule.name == rule_name:
+                return next((c.value for c in rule.conditions if c.feature == feature), None)
+        return None
+
+
+def compile_rules(document: dict, source: str = "<rules>", version: str = "") -> CompiledRuleSet:
+    rules, suspicious_score = parse_rules(document)
+    return CompiledRuleSet(rules, suspicious_score, source, version)
+
+
+def load_rules(path: str) -> CompiledRuleSet:
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    return compile_rules(document, path, str(document.get("version", "")))
+
+
+class FraudRuleEngine:
+    """The current compiled rule set of a rule file, reloaded when the file changes."""
+
+    def __init__(self, path: str = DEFAULT_FRAUD_RULES_PATH, reload_interval: float = FRAUD_RULES_RELOAD_INTERVAL_SECONDS):
+        """
+        Args:
+            path: JSON rule file; must load at startup, later broken edits are ignored.
+            reload_interval: Seconds between checks of the file's mtime (0 checks on every call).
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self._reload_lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._rules = load_rules(path)
+        self._next_check = time.monotonic() + reload_interval
+        self.counters = {"reloads": 0, "failed_reloads": 0}
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def current(self) -> CompiledRuleSet:
+        now = time.monotonic()
+        if now >= self._next_check and self._reload_lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.reload_interval
+                self._reload_if_changed()
+            finally:
+                self._reload_lock.release()
+        return self._rules
+
+    def _reload_if_changed(self):
+        try:
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return
+            self._stamp = stamp # Also for a broken file: retry only after the next edit
+            rules = load_rules(self.path)
+        except (OSError, ValueError) as e: # json.JSONDecodeError is a ValueError
+            self.counters["failed_reloads"] += 1
+            print(f"[FRAUD_RULES] Keeping the current rules, could not reload {self.path}: {e}")
+            return
+        self._rules = rules # Atomic swap; requests already holding the old rule set finish with it
+        self.counters["reloads"] += 1
+        print(f"[FRAUD_RULES] Reloaded {len(rules.rules)} rules (version {rules.version or '-'}) from {self.path}")
+
+    def reload(self) -> CompiledRuleSet:
+        """Checks the file now instead of waiting for the reload interval."""
+        with self._reload_lock:
+            self._next_check = time.monotonic() + self.reload_interval
+            self._reload_if_changed()
+        return self._rules
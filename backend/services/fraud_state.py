@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+# Per-user state for the fraud checks, with bounded memory.
+#
+# BoundedUserState is a mapping user_id -> state object (created on first use by a
+# factory) kept in least-recently-used order, with three limits:
+#   - idle compaction: users not seen for idle_seconds (the largest rule window) carry no
+#     signal any more and are dropped; they sit at the LRU front, so each access only looks
+#     at the few users that just went idle;
+#   - max_users: the least recently used user is evicted beyond this count;
+#   - max_bytes: an approximate byte budget (estimated by size_fn) enforced the same way.
+# A user's size is re-estimated whenever it is accessed, i.e. before the caller's change
+# lands, so the total lags by at most one update per user. Evicting a user that is still
+# active forgets its history, which is why stats() exposes the evictions per cause.
+#
+# The store's own lock only guards the LRU; the state objects it hands out are mutated
+# afterwards. UserLockStripes serialises that per user: a user_id always maps to the same
+# one of a fixed set of reentrant locks, so one user's checks run one at a time while
+# users on other stripes proceed in parallel, without one lock object per user.
+
+FRAUD_STATE_MAX_USERS = 100000 # Per store
+FRAUD_STATE_MAX_BYTES = 64 * 1024 * 1024 # Per store, approximate
+FRAUD_STATE_USER_OVERHEAD_BYTES = 300 # LRU slot, user_id string and bookkeeping per user
+FRAUD_STATE_LOCK_STRIPES = 256 # Users sharing a stripe wait for each other; more stripes, fewer collisions
+
+
+class BoundedUserState:
+    """LRU of per-user state objects with idle compaction and a byte budget."""
+
+    def __init__(self, factory: Callable[[], object], size_fn: Callable[[object], int], idle_seconds: float,
+                 max_users: int = FRAUD_STATE_MAX_USERS, max_bytes: int = FRAUD_STATE_MAX_BYTES):
+        """
+        Args:
+            factory: Builds the empty state for a new user.
+            size_fn: Approximate bytes held by one state object; must be cheap.
+            idle_seconds: Users not seen for this long are dropped.
+            max_users: Most users kept; the least recently used is evicted beyond it.
+            max_bytes: Approximate memory budget for all users together.
+        """
+        self.factory = factory
+        self.size_fn = size_fn
+        self.idle_seconds = idle_seconds
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self._users: "OrderedDict[Hashable, list]" = OrderedDict() # user_id -> [state, last_seen, bytes]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"created": 0, "evicted_idle": 0, "evicted_lru": 0, "evicted_budget": 0}
+
+    def _drop_oldest(self, counter: str):
+        _, (_, _, size) = self._users.popitem(last=False)
+        self._bytes -= size
+        self.counters[counter] += 1
+
+    def _compact(self, now: float):
+        cutoff = now - self.idle_seconds
+        users = self._users
+        while users:
+            entry = next(iter(users.values()))
+            if entry[1] >= cutoff:
+                break
+            self._drop_oldest("evicted_idle")
+
+    def get(self, user_id: Hashable, timestamp: Optional[float] = None):
+        """State for user_id, created if needed; timestamp (default now) marks the user as active."""
+        now = time.time() if timestamp is None else timestamp
+        with self._lock:
+            entry = self._users.pop(user_id, None)
+            if entry is None:
+                entry = [self.factory(), now, 0]
+                self.counters["created"] += 1
+            size = self.size_fn(entry[0]) + FRAUD_STATE_USER_OVERHEAD_BYTES
+            self._bytes += size - entry[2]
+            entry[1], entry[2] = max(entry[1], now), size
+            self._compact(now)
+            self._users[user_id] = entry
+            while len(self._users) > self.max_users:
+                self._drop_oldest("evicted_lru")
+            while self._bytes > self.max_bytes and len(self._users) > 1:
+                self._drop_oldest("evicted_budget")
+            return entry[0]
+
+    def __getitem__(self, user_id: Hashable):
+        return self.get(user_id)
+
+    def __contains__(self, user_id: Hashable) -> bool:
+        return user_id in self._users
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """Drops every idle user now (accesses do this incrementally); returns how many."""
+        with self._lock:
+            before = len(self._users)
+            self._compact(time.time() if now is None else now)
+            return before - len(self._users)
+
+    def clear(self):
+        """Forgets every user (counters are kept)."""
+        with self._lock:
+            self._users.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["tracked_users"] = len(self._users)
+            stats["approx_bytes"] = self._bytes
+            stats["max_users"] = self.max_users
+            stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+class UserLockStripes:
+    """Fixed set of reentrant locks; every user_id maps to one of them."""
+
+    def __init__(self, stripes: int = FRAUD_STATE_LOCK_STRIPES):
+        self._locks = [threading.RLock() for _ in range(max(1, stripes))]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def for_user(self, user_id: Hashable) -> threading.RLock:
+        """The lock guarding user_id's state (reentrant, so nested checks may take it again)."""
+        return self._locks[hash(user_id) % len(self._locks)]
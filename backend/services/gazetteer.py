@@ -0,0 +1,319 @@
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Country and currency gazetteer for the NLP parser.
+#
+# Every name, ISO currency code and local-language synonym below is compiled into a single
+# Aho-Corasick automaton, so all entities in a command are found in one pass over the text
+# no matter how many patterns there are. Text is folded (lowercased, accents dropped, curly
+# apostrophes straightened) one character at a time, so match offsets line up with the
+# lowercased input the extractor works on.
+#
+# Callers that know where a name should start (the intent extractor) use match_at instead
+# of a full scan: a lone ASCII word that begins no multi-word name is one dict lookup.
+#
+# Country ISO codes are deliberately not patterns: "so", "ne", "ma", "na", "et" are
+# ordinary words in the supported languages.
+
+# ISO 3166-1 alpha-2 code -> names, first one canonical (English, French, Swahili, Hausa,
+# Yoruba, Igbo and Arabic forms where they differ).
+COUNTRY_TABLE: Dict[str, Tuple[str, ...]] = {
+    "DZ": ("algeria", "algerie", "aljeriya", "الجزائر"),
+    "AO": ("angola",),
+    "BJ": ("benin", "jamhuri ya benin"),
+    "BW": ("botswana",),
+    "BF": ("burkina faso", "burkina"),
+    "BI": ("burundi",),
+    "CV": ("cape verde", "cabo verde", "cap-vert"),
+    "CM": ("cameroon", "cameroun", "kamerun", "kameru"),
+    "CF": ("central african republic", "republique centrafricaine", "centrafrique"),
+    "TD": ("chad", "tchad", "cadi"),
+    "KM": ("comoros", "comores", "komoro"),
+    "CG": ("republic of the congo", "congo-brazzaville", "congo brazzaville", "congo"),
+    "CD": ("democratic republic of the congo", "dr congo", "drc", "rdc", "congo-kinshasa", "congo kinshasa"),
+    "CI": ("cote d'ivoire", "ivory coast", "kodivwa"),
+    "DJ": ("djibouti", "jibuti"),
+    "EG": ("egypt", "egypte", "misri", "masar", "ijipiti", "مصر"),
+    "GQ": ("equatorial guinea", "guinee equatoriale"),
+    "ER": ("eritrea", "erythree"),
+    "SZ": ("eswatini", "swaziland", "uswazi"),
+    "ET": ("ethiopia", "ethiopie", "uhabeshi", "habasha"),
+    "GA": ("gabon",),
+    "GM": ("the gambia", "gambia", "gambie"),
+    "GH": ("ghana", "gana"),
+    "GN": ("guinea", "guinee", "gine"),
+    "GW": ("guinea-bissau", "guinea bissau", "guinee-bissau"),
+    "KE": ("kenya", "kenia", "كينيا"),
+    "LS": ("lesotho",),
+    "LR": ("liberia",),
+    "LY": ("libya", "libye", "libiya", "ليبيا"),
+    "MG": ("madagascar", "madagaska"),
+    "MW": ("malawi",),
+    "ML": ("mali",),
+    "MR": ("mauritania", "mauritanie", "moritaniya"),
+    "MU": ("mauritius", "ile maurice"),
+    "MA": ("morocco", "maroc", "moroko", "المغرب"),
+    "MZ": ("mozambique", "msumbiji"),
+    "NA": ("namibia", "namibie"),
+    "NE": ("niger", "nijar"),
+    "NG": ("nigeria", "naijeriya", "najeriya", "naijiria", "naija", "نيجيريا"),
+    "RW": ("rwanda", "ruwanda"),
+    "ST": ("sao tome and principe", "sao tome"),
+    "SN": ("senegal",),
+    "SC": ("seychelles", "shelisheli"),
+    "SL": ("sierra leone", "saliyo"),
+    "SO": ("somalia", "somalie", "somaliya", "الصومال"),
+    "ZA": ("south africa", "afrique du sud", "afrika kusini", "afirka ta kudu"),
+    "SS": ("south sudan", "soudan du sud", "sudan kusini"),
+    "SD": ("sudan", "soudan", "السودان"),
+    "TZ": ("tanzania", "tanzanie", "tanzaniya"),
+    "TG": ("togo",),
+    "TN": ("tunisia", "tunisie", "tunisiya", "تونس"),
+    "UG": ("uganda", "ouganda", "yuganda"),
+    "ZM": ("zambia", "zambie"),
+    "ZW": ("zimbabwe",),
+}
+
+# ISO 4217 code -> (issuing countries, names). The lowercased code is always a pattern too.
+# Names shared by several currencies ("franc", "dinar", "kwacha") are only listed in their
+# qualified forms; "shilling" keeps its historical meaning of KES.
+CURRENCY_TABLE: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "NGN": (("NG",), ("naira", "nairas", "nigerian naira")),
+    "KES": (("KE",), ("shilling", "shillings", "shilingi", "kenyan shilling", "kenyan shillings",
+                      "kenya shilling", "kenya shillings")),
+    "GHS": (("GH",), ("cedi", "cedis", "ghana cedi", "ghana cedis", "ghanaian cedi", "ghanaian cedis")),
+    "ZAR": (("ZA",), ("rand", "rands", "randi", "south african rand", "south african rands")),
+    "EGP": (("EG",), ("egyptian pound", "egyptian pounds", "livre egyptienne", "جنيه")),
+    "ETB": (("ET",), ("birr", "birrs", "ethiopian birr")),
+    "TZS": (("TZ",), ("tanzanian shilling", "tanzanian shillings", "shilingi ya tanzania")),
+    "UGX": (("UG",), ("ugandan shilling", "ugandan shillings", "uganda shilling", "uganda shillings",
+                      "shilingi ya uganda")),
+    "RWF": (("RW",), ("rwandan franc", "rwandan francs", "franc rwandais", "amafaranga")),
+    "BIF": (("BI",), ("burundian franc", "burundian francs", "franc burundais")),
+    "XOF": (("BJ", "BF", "CI", "GW", "ML", "NE", "SN", "TG"),
+            ("cfa franc", "cfa francs", "franc cfa", "francs cfa", "west african cfa franc")),
+    "XAF": (("CM", "CF", "TD", "CG", "GQ", "GA"), ("central african cfa franc", "central african cfa francs")),
+    "CDF": (("CD",), ("congolese franc", "congolese francs", "franc congolais")),
+    "DJF": (("DJ",), ("djiboutian franc", "djiboutian francs")),
+    "KMF": (("KM",), ("comorian franc", "comorian francs")),
+    "GNF": (("GN",), ("guinean franc", "guinean francs", "franc guineen")),
+    "MAD": (("MA",), ("dirham", "dirhams", "moroccan dirham", "moroccan dirhams", "درهم")),
+    "DZD": (("DZ",), ("algerian dinar", "algerian dinars", "dinar algerien")),
+    "TND": (("TN",), ("tunisian dinar", "tunisian dinars", "dinar tunisien")),
+    "LYD": (("LY",), ("libyan dinar", "libyan dinars")),
+    "SDG": (("SD",), ("sudanese pound", "sudanese pounds")),
+    "SSP": (("SS",), ("south sudanese pound", "south sudanese pounds")),
+    "SOS": (("SO",), ("somali shilling", "somali shillings")),
+    "ERN": (("ER",), ("nakfa",)),
+    "AOA": (("AO",), ("kwanza", "kwanzas")),
+    "ZMW": (("ZM",), ("zambian kwacha",)),
+    "MWK": (("MW",), ("malawian kwacha",)),
+    "MZN": (("MZ",), ("metical", "meticais", "mozambican metical")),
+    "BWP": (("BW",), ("pula", "botswana pula")),
+    "NAD": (("NA",), ("namibian dollar", "namibian dollars")),
+    "LSL": (("LS",), ("loti", "maloti")),
+    "SZL": (("SZ",), ("lilangeni", "emalangeni")),
+    "ZWG": (("ZW",), ("zimbabwe gold",)),
+    "MGA": (("MG",), ("ariary",)),
+    "MUR": (("MU",), ("mauritian rupee", "mauritian rupees")),
+    "SCR": (("SC",), ("seychellois rupee", "seychellois rupees")),
+    "CVE": (("CV",), ("cape verdean escudo", "escudo", "escudos")),
+    "GMD": (("GM",), ("dalasi", "dalasis")),
+    "SLE": (("SL",), ("leone", "leones")),
+    "LRD": (("LR",), ("liberian dollar", "liberian dollars")),
+    "MRU": (("MR",), ("ouguiya",)),
+    "STN": (("ST",), ("dobra", "dobras")),
+    "USD": ((), ("dollars", "dollar", "us dollar", "us dollars", "dola", "dolla", "dollari", "dalar", "dolar", "dala",
+                 "دولار", "دولارات")),
+    "EUR": ((), ("euro", "euros", "yuro", "يورو")),
+    "GBP": ((), ("british pound", "british pounds", "pound sterling", "pounds sterling")),
+}
+
+
+class GazetteerMatch(NamedTuple):
+    start: int
+    end: int
+    kind: str  # "country" or "currency"
+    code: str
+
+
+@lru_cache(maxsize=4096)
+def fold_char(ch: str) -> str:
+    """Lowercases ch and drops its accents, always returning exactly one character."""
+    if ch in "’‘`":
+        return "'"
+    base = unicodedata.normalize("NFD", ch.lower())[:1]
+    return base if base else ch
+
+
+_ASCII_WORD_RE = re.compile(r"[a-z0-9]++(?![^\x00-\x7f])") # Lowercase ASCII word not followed by a non-ASCII character
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or unicodedata.category(ch) == "Mn"
+
+
+class Gazetteer:
+    """Aho-Corasick matcher over country and currency names, plus O(1) lookup tables."""
+
+    def __init__(self, country_table: Dict[str, Tuple[str, ...]] = None,
+                 currency_table: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = None):
+        country_table = country_table if country_table is not None else COUNTRY_TABLE
+        currency_table = currency_table if currency_table is not None else CURRENCY_TABLE
+
+        # Flat name -> code dictionaries (the parser's AFRICAN_COUNTRIES / CURRENCIES).
+        self.countries: Dict[str, str] = {}
+        for code, names in country_table.items():
+            for name in names:
+                self.countries[self.fold(name)] = code
+        self.currencies: Dict[str, str] = {}
+        for code, (_, names) in currency_table.items():
+            self.currencies[code.lower()] = code
+            for name in names:
+                self.currencies[self.fold(name)] = code
+
+        # Reverse index used to infer the sender's country from the currency; only
+        # currencies issued by a single country are included.
+        self.currency_country: Dict[str, str] = {
+            code: issuers[0] for code, (issuers, _) in currency_table.items() if len(issuers) == 1
+        }
+        self.country_currency: Dict[str, str] = {}
+        for code, (issuers, _) in currency_table.items():
+            for country_code in issuers:
+                self.country_currency.setdefault(country_code, code)
+        self.country_names: Dict[str, str] = {code: names[0] for code, names in country_table.items()}
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, str, str]]] = [[]]
+        for name, code in self.countries.items():
+            self._add_pattern(name, "country", code)
+        for name, code in self.currencies.items():
+            self._add_pattern(name, "currency", code)
+        self._build_failure_links()
+
+        # Single-word lookups for match_at: names by folded text (countries first, as in
+        # scan) and the first words of multi-word names, which need the trie walk.
+        self._names: Dict[str, Tuple[str, str]] = {}
+        self.multiword_first_words = set()
+        for kind, table in (("country", self.countries), ("currency", self.currencies)):
+            for name, code in table.items():
+                self._names.setdefault(name, (kind, code))
+                first_word = _ASCII_WORD_RE.match(name)
+                if first_word and first_word.end() < len(name):
+                    self.multiword_first_words.add(first_word.group())
+        self.longest_name = max(map(len, self._names), default=0)
+
+    @staticmethod
+    def fold(text: str) -> str:
+        """Folds text character by character (see fold_char); the length never changes."""
+        if text.isascii():
+            return text.lower().replace("`", "'")
+        return "".join(fold_char(ch) for ch in text)
+
+    def _add_pattern(self, pattern: str, kind: str, code: str):
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(pattern), kind, code))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                # Patterns ending at the failure state also end here.
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def scan(self, text: str) -> List[GazetteerMatch]:
+        """Returns every whole-word entity in text, leftmost-longest and non-overlapping."""
+        folded = self.fold(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        candidates: Dict[int, GazetteerMatch] = {}
+        state = 0
+        for index, ch in enumerate(folded):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not outputs[state]:
+                continue
+            end = index + 1
+            if end < len(folded) and _is_word_char(folded[end]):
+                continue
+            for length, kind, code in outputs[state]:
+                start = end - length
+                if start > 0 and _is_word_char(folded[start - 1]):
+                    continue
+                best = candidates.get(start)
+                if best is None or end > best.end:
+                    candidates[start] = GazetteerMatch(start, end, kind, code)
+
+        matches: List[GazetteerMatch] = []
+        covered_until = 0
+        for start in sorted(candidates):
+            if start >= covered_until:
+                matches.append(candidates[start])
+                covered_until = candidates[start].end
+        return matches
+
+    def match_at(self, text: str, start: int) -> Optional[GazetteerMatch]:
+        """Longest whole-word entity starting exactly at start, walking the trie from there.
+
+        Costs the length of the entity rather than of the text, for callers that already
+        know where a name should be. Unlike scan(), it does not check whether an earlier
+        entity overlaps start.
+        """
+        if start >= len(text) or (start > 0 and _is_word_char(fold_char(text[start - 1]))):
+            return None
+        word = _ASCII_WORD_RE.match(text, start)
+        if word and word.group() not in self.multiword_first_words:
+            name = self._names.get(word.group())
+            return GazetteerMatch(start, word.end(), *name) if name else None
+        goto, outputs = self._goto, self._outputs
+        best = None
+        state = 0
+        for index in range(start, len(text)):
+            ch = text[index]
+            state = goto[state].get(ch if "a" <= ch <= "z" else fold_char(ch))
+            if state is None:
+                break
+            if not outputs[state]:
+                continue
+            end = index + 1
+            if end < len(text) and _is_word_char(fold_char(text[end])):
+                continue
+            for length, kind, code in outputs[state]:
+                if length == end - start:
+                    best = GazetteerMatch(start, end, kind, code)
+                    break
+        return best
+
+    def country_code(self, value: Optional[str]) -> Optional[str]:
+        """Resolves a country name or ISO alpha-2 code to the ISO code."""
+        if not value:
+            return None
+        if value.upper() in self.country_names:
+            return value.upper()
+        return self.countries.get(self.fold(value.strip()))
+
+    def sender_country_for_currency(self, currency: Optional[str]) -> Optional[str]:
+        return self.currency_country.get(currency) if currency else None
+
+
+# Shared by every parser instance (building the automaton takes a few milliseconds).
+GAZETTEER = Gazetteer()
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .gazetteer import Gazetteer
+
+logger = logging.getLogger(__name__)
+
+# Linear intent classifier over hashed character n-grams.
+#
+# A command is lowercased, stripped of accents, padded with spaces and cut into character
+# 2- to 4-grams; each n-gram is hashed (CRC32, stable across processes) into one of
+# INTENT_HASH_DIM buckets. Scores are one dot product per intent over the (L2-normalised)
+# bucket counts, so classification is a few NumPy gathers and never leaves the process.
+# Character n-grams work the same for every supported language and survive typos.
+#
+# The weights are produced offline by backend/models/train_intent_classifier.py and stored
+# in a versioned .npz file that is loaded once, when nlp_service is imported.
+
+INTENT_LABELS = ["payment", "balance_inquiry", "vault_creation", "withdrawal", "transaction_history", "rate_check"]
+INTENT_MODEL_FORMAT_VERSION = 1
+INTENT_HASH_DIM = 2 ** 14
+INTENT_NGRAM_RANGE = (2, 4)
+INTENT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "models", "intent_classifier_v1.npz")
+
+
+def hashed_ngrams(text: str, dim: int = INTENT_HASH_DIM, ngram_range: Tuple[int, int] = INTENT_NGRAM_RANGE) -> Dict[int, int]:
+    """Bucket -> count for the character n-grams of text."""
+    folded = f" {' '.join(Gazetteer.fold(text).split())} "
+    counts: Dict[int, int] = {}
+    low, high = ngram_range
+    for n in range(low, high + 1):
+        for i in range(len(folded) - n + 1):
+            bucket = zlib.crc32(folded[i:i + n].encode("utf-8")) % dim
+            counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+def featurize_many(texts: List[str], dim: int = INTENT_HASH_DIM,
+                   ngram_range: Tuple[int, int] = INTENT_NGRAM_RANGE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sparse rows for texts as (row_starts, buckets, values); values are L2-normalised per row."""
+    row_starts, buckets, values = [], [], []
+    for text in texts:
+        counts = hashed_ngrams(text, dim, ngram_range)
+        row_starts.append(len(buckets))
+        norm = sum(c * c for c in counts.values()) ** 0.5 or 1.0
+        for bucket, count in counts.items():
+            buckets.append(bucket)
+            values.append(count / norm)
+    return (np.asarray(row_starts, dtype=np.int64), np.asarray(buckets, dtype=np.int64),
+            np.asarray(values, dtype=np.float32))
+
+
+class IntentClassifier:
+    """Scores texts against INTENT_LABELS with a (labels x buckets) weight matrix."""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: List[str],
+                 ngram_range: Tuple[int, int] = INTENT_NGRAM_RANGE, metadata: Optional[dict] = None):
+        if weights.shape != (len(labels), weights.shape[1]) or bias.shape != (len(labels),):
+            raise ValueError(f"Weight shapes {weights.shape}/{bias.shape} do not match {len(labels)} labels")
+        # Stored bucket-major so one text's buckets are a contiguous gather.
+        self.weights_t = np.ascontiguousarray(weights.T, dtype=np.float32)
+        self.bias = bias.astype(np.float32)
+        self.labels = list(labels)
+        self.dim = weights.shape[1]
+        self.ngram_range = tuple(ngram_range)
+        self.metadata = metadata or {}
+
+    @classmethod
+    def load(cls, path: str = INTENT_MODEL_PATH) -> "IntentClassifier":
+        with np.load(path, allow_pickle=False) as model:
+            metadata = json.loads(str(model["metadata"]))
+            if metadata.get("format_version") != INTENT_MODEL_FORMAT_VERSION:
+                raise ValueError(f"{path}: model format {metadata.get('format_version')} is not "
+                                 f"{INTENT_MODEL_FORMAT_VERSION}; retrain with train_intent_classifier")
+            return cls(model["weights"], model["bias"], metadata["labels"], tuple(metadata["ngram_range"]), metadata)
+
+    def save(self, path: str):
+        metadata = dict(self.metadata, format_version=INTENT_MODEL_FORMAT_VERSION, labels=self.labels,
+                        dim=self.dim, ngram_range=list(self.ngram_range))
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        np.savez_compressed(path, weights=self.weights_t.T, bias=self.bias, metadata=np.array(json.dumps(metadata)))
+
+    def scores_many(self, texts: List[str]) -> np.ndarray:
+        """Raw (texts x labels) scores; the whole batch is featurized once and scored in one pass."""
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        row_starts, buckets, values = featurize_many(texts, self.dim, self.ngram_range)
+        contributions = self.weights_t[buckets] * values[:, None]
+        return np.add.reduceat(contributions, row_starts, axis=0) + self.bias
+
+    def predict_many(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """(intent, softmax probability) for each text."""
+        scores = self.scores_many(texts)
+        if not len(scores):
+            return []
+        scores = scores - scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        return [(self.labels[b], round(float(probabilities[i, b]), 4)) for i, b in enumerate(best)]
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        return self.predict_many([text])[0]
+
+    def incremental(self) -> "IncrementalIntentScores":
+        """Scores for a text that only grows, updated per appended piece (see IncrementalIntentScores)."""
+        return IncrementalIntentScores(self)
+
+
+class IncrementalIntentScores:
+    """IntentClassifier.predict for a growing text without re-featurizing it.
+
+    Keeps the bucket counts of " " + folded text (no trailing pad), their sum of squares
+    and the unnormalised score vector. Appending a piece only hashes the n-grams that end
+    in it; predict adds the few n-grams that touch the trailing pad on the side, so the
+    cost of both depends on the piece, not on the text so far.
+    """
+
+    __slots__ = ("classifier", "_counts", "_sum_squares", "_raw", "_tail")
+
+    def __init__(self, classifier: IntentClassifier):
+        self.classifier = classifier
+        self.reset()
+
+    def reset(self):
+        self._counts: Dict[int, int] = {}
+        self._sum_squares = 0
+        self._raw = np.zeros(len(self.classifier.labels), dtype=np.float64)
+        self._tail = " " # Last ngram_range[1] - 1 characters of the padded text
+
+    def _buckets(self, text: str, start: int) -> List[int]:
+        """Buckets of the n-grams of text that end after position start."""
+        low, high = self.classifier.ngram_range
+        dim = self.classifier.dim
+        return [zlib.crc32(text[i:i + n].encode("utf-8")) % dim
+                for n in range(low, high + 1) for i in range(max(0, start - n + 1), len(text) - n + 1)]
+
+    def append(self, text: str):
+        """Extends the scored text by text (joined with one space, as the transcript is)."""
+        piece = " ".join(Gazetteer.fold(text).split())
+        if not piece:
+            return
+        if self._tail != " ":
+            piece = f" {piece}"
+        extended = self._tail + piece
+        buckets = self._buckets(extended, len(self._tail))
+        counts, sum_squares = self._counts, self._sum_squares
+        for bucket in buckets:
+            count = counts.get(bucket, 0)
+            counts[bucket] = count + 1
+            sum_squares += 2 * count + 1
+        self._sum_squares = sum_squares
+        self._raw += self.classifier.weights_t[buckets].sum(axis=0, dtype=np.float64)
+        self._tail = extended[-(self.classifier.ngram_range[1] - 1):]
+
+    def predict(self) -> Tuple[str, float]:
+        """Same answer as IntentClassifier.predict on the text appended so far."""
+        padded = self._tail + " "
+        buckets = self._buckets(padded, len(padded) - 1)
+        sum_squares, extra = self._sum_squares, {}
+        for bucket in buckets:
+            count = self._counts.get(bucket, 0) + extra.get(bucket, 0)
+            extra[bucket] = extra.get(bucket, 0) + 1
+            sum_squares += 2 * count + 1
+        raw = self._raw + self.classifier.weights_t[buckets].sum(axis=0, dtype=np.float64)
+        scores = raw / (sum_squares ** 0.5) + self.classifier.bias
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        best = int(probabilities.argmax())
+        return self.classifier.labels[best], round(float(probabilities[best]), 4)
+
+
+def load_intent_classifier(path: str = INTENT_MODEL_PATH) -> Optional[IntentClassifier]:
+    """Loads the shipped model; returns None (and logs) if it is missing or incompatible."""
+    try:
+        classifier = IntentClassifier.load(path)
+        logger.info("[NLP] Loaded intent classifier %s from %s", classifier.metadata.get("model_version"), path)
+        return classifier
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("[NLP] Intent classifier unavailable (%s). Intents default to payment.", e)
+        return None
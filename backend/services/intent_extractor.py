@@ -0,0 +1,149 @@
+import re
+from typing import Dict, Optional
+
+from .gazetteer import Gazetteer
+
+# Linear-time extractor for amount, currency, recipient and country.
+#
+# NLPIntentParser used to run five separate re.search calls over every command. The
+# recipient patterns (`to\s+([a-zA-Z]+(?:\s+[a-zA-Z]+)*)\s+in\s+...`) rescan every word
+# after every "to", and the amount pattern rescans long digit runs from every digit, so
+# both go quadratic on long inputs. Here the lowercased text is split into digit runs and
+# word chains (letter runs separated only by whitespace) by precompiled patterns, each
+# token is looked at a bounded number of times, and the results are the same as the old
+# regexes, including their quirks (e.g. "usd 30000" is read as 300 USD).
+#
+# Country and currency names are resolved by the Gazetteer entity starting where the old
+# single-word lookup looked, so multi-word names such as "south africa" or "kenyan
+# shillings" are picked up too. Only those offsets are looked at (a plain dict lookup for
+# most words, Gazetteer.match_at otherwise), never the whole text. Even so, a typical
+# command still takes about 1.2-1.6x as long as the legacy regexes: on short input a few
+# Python-level steps cost more than five searches in C. That is the price of the linear
+# worst case (milliseconds instead of seconds on 10 KB inputs).
+
+# Digit runs that could start an amount: followed by a ",ddd" group or by a word.
+_DIGIT_RUN_RE = re.compile(r"(?<!\d)\d++(?=,\d{3}|\s*[a-z])")
+_COMMA_GROUPS_RE = re.compile(r"(?:,\d{3})*+")
+_WS_WORD_RE = re.compile(r"\s*([a-z]+)")
+_CODE_AMOUNT_RE = re.compile(r"([a-z]{3})\s*(\d{1,3}(?:,\d{3})*|\d+)")
+
+_CHAIN_RE = re.compile(r"[a-z]+(?:\s+[a-z]+)*")
+_TO_WORD_RE = re.compile(r"to\s+(?=[a-z])")
+_LAST_IN_RE = re.compile(r"(.*\S)\s+in\s+([a-z]+)", re.S)
+_PAREN_WORD_RE = re.compile(r"\s+\(([a-z]+)\)")
+
+
+class IntentExtractor:
+    """Extracts payment entities from lowercased English text in linear time."""
+
+    def __init__(self, gazetteer: Gazetteer):
+        self.gazetteer = gazetteer
+        self.countries = gazetteer.countries
+        self.currencies = gazetteer.currencies
+        self.multiword_first_words = gazetteer.multiword_first_words
+
+    def _entity(self, text: str, kind: str, start: int, word: str) -> Optional[str]:
+        """Code of the entity of this kind starting at start, else a single-word lookup."""
+        table = self.countries if kind == "country" else self.currencies
+        end = start + len(word)
+        if word not in self.multiword_first_words and (end == len(text) or text[end] < "\x80"):
+            return table.get(word) # No longer name can start here: same answer as the trie walk
+        entity = self.gazetteer.match_at(text, start)
+        if entity is not None and entity.kind == kind:
+            return entity.code
+        return table.get(word)
+
+    def _find_amount(self, text: str):
+        """Equivalent of re.search(r"(\\d{1,3}(?:,\\d{3})*|\\d+)\\s*([a-z]+)", text).
+
+        Returns (amount_str, currency_word_match) or None.
+        """
+        groups_end = -1     # End of the last ",ddd" run that was scanned
+        groups_ok = False   # Whether a word followed that run
+        for run in _DIGIT_RUN_RE.finditer(text):
+            start, end = run.span()
+            if end > groups_end and text[end:end + 1] != ",":
+                # Common case: no ",ddd" groups, so the run's lookahead saw a word.
+                return text[start:end], _WS_WORD_RE.match(text, end)
+            if end <= groups_end:
+                # This run is one of the ",ddd" groups that was already scanned.
+                run_groups_end, followed = groups_end, groups_ok
+            else:
+                run_groups_end = _COMMA_GROUPS_RE.match(text, end).end()
+                followed = _WS_WORD_RE.match(text, run_groups_end) is not None
+                groups_end, groups_ok = run_groups_end, followed
+
+            # Same alternation order as the regex: up to three digits plus comma groups,
+            # then the whole run, then a match starting inside a longer run.
+            if end - start <= 3 and followed:
+                return text[start:run_groups_end], _WS_WORD_RE.match(text, run_groups_end)
+            word = _WS_WORD_RE.match(text, end)
+            if word:
+                return text[start:end], word
+            if followed:
+                return text[end - 3:run_groups_end], _WS_WORD_RE.match(text, run_groups_end)
+        return None
+
+    def extract(self, text_lower: str) -> Dict[str, Optional[object]]:
+        text = text_lower
+        amount = None
+        currency = None
+
+        amount_match = self._find_amount(text)
+        if amount_match:
+            amount = int(amount_match[0].replace(",", ""))
+            word = amount_match[1]
+            currency = self._entity(text, "currency", word.start(1), word.group(1))
+        else:
+            code_match = _CODE_AMOUNT_RE.search(text)
+            if code_match:
+                amount = int(code_match.group(2).replace(",", ""))
+                currency = self.currencies.get(code_match.group(1))
+
+        # Only the first "to <name>" of a word chain can match, and chains do not overlap:
+        # each search resumes after the chain of the previous "to", so every chain is
+        # inspected once and chains without a "to" are skipped by the regex engine.
+        in_match = paren_match = to_match = None
+        pos = 0
+        while True:
+            to_word = _TO_WORD_RE.search(text, pos)
+            if not to_word:
+                break
+            name_start = to_word.end()
+            pos = _CHAIN_RE.match(text, name_start).end()
+            name = text[name_start:pos]
+            if to_match is None:
+                to_match = (name, name_start)
+            if in_match is None:
+                last_in = _LAST_IN_RE.match(name)
+                if last_in:
+                    in_match = (last_in.group(1), self._entity(text, "country", name_start + last_in.start(2), last_in.group(2)))
+            if paren_match is None:
+                paren = _PAREN_WORD_RE.match(text, pos)
+                if paren:
+                    paren_match = (name, self._entity(text, "country", paren.start(1), paren.group(1)))
+            if in_match and (in_match[1] or paren_match):
+                break # The recipient is settled: nothing after this chain can change it
+
+        recipient_name = None
+        recipient_country = None
+        if in_match and in_match[1]:
+            recipient_name = in_match[0].title()
+            recipient_country = in_match[1]
+        if not recipient_name and paren_match and paren_match[1]:
+            recipient_name = paren_match[0].title()
+            recipient_country = paren_match[1]
+        if not recipient_name and amount is not None and to_match:
+            # "to south africa" names a country, not a recipient.
+            name, name_start = to_match
+            entity = self.gazetteer.match_at(text, name_start)
+            is_country = entity is not None and entity.kind == "country" and entity.end >= name_start + len(name)
+            if not is_country and not self.countries.get(name):
+                recipient_name = name.title()
+
+        return {
+            "amount": amount,
+            "currency": currency,
+            "recipient_name": recipient_name,
+            "recipient_country": recipient_country,
+        }
@@ -0,0 +1,169 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Deterministic pre-classifier for the languages RemitAI parses:
+# English (en), Yoruba (yo), Igbo (ig), Hausa (ha), French (fr), Arabic (ar), Swahili (sw).
+#
+# langdetect is slow (~6 ms per call), loads its profiles on first use, is random unless
+# seeded, and has no Yoruba, Igbo or Hausa profiles at all. Most commands are short and
+# full of tell-tale words ("send", "to", "kwa", "zuwa", "ranṣẹ"), so they are scored here
+# on stopword hits, script/diacritic hints and a small character-trigram model. Only when
+# the evidence is weak does the caller need to fall back to langdetect.
+
+FAST_PATH_MIN_STOPWORD_HITS = 2
+FAST_PATH_MIN_CONFIDENCE = 0.66 # Share of stopword evidence held by the winning language
+
+# Command vocabulary, written without diacritics (tokens are stripped before lookup).
+# Currency and country names are left out because they are shared across languages.
+STOPWORDS: Dict[str, set] = {
+    "en": {"send", "to", "in", "pay", "the", "i", "want", "my", "money", "transfer", "please", "what",
+           "is", "how", "much", "from", "for", "and", "of", "me", "check", "balance", "rate", "withdraw",
+           "show", "history", "now", "today", "account", "brother", "mother", "thousand", "hundred"},
+    "fr": {"je", "veux", "envoyer", "envoie", "a", "au", "aux", "de", "des", "du", "le", "la", "les",
+           "mon", "ma", "mes", "et", "pour", "payer", "argent", "quel", "est", "voudrais", "vers",
+           "combien", "sur", "un", "une", "mille", "cents", "retirer", "solde", "taux", "aujourd"},
+    "sw": {"nataka", "kutuma", "tuma", "kwa", "nchini", "na", "ya", "wa", "pesa", "shilingi", "elfu",
+           "mia", "lipa", "yangu", "langu", "kutoka", "tafadhali", "sasa", "kwenda", "ni", "kiasi",
+           "gani", "nina", "kumi", "tano", "salio", "fedha", "leo"},
+    "ha": {"ina", "so", "in", "aika", "kudi", "zuwa", "ga", "a", "ziga", "dubu", "dari", "biyar",
+           "talatin", "biya", "nawa", "ne", "na", "daga", "don", "allah", "yanzu", "tura", "min",
+           "da", "cire", "asusuna", "yau", "kudin"},
+    "yo": {"mo", "fe", "fi", "owo", "ranse", "si", "ni", "san", "fun", "mi", "jowo", "naa", "bayi",
+           "lo", "gbe", "elo", "melo", "kini", "egberun", "ogbon", "loni", "jade", "lati"},
+    "ig": {"achoro", "m", "iziga", "zipu", "ego", "nye", "na", "kwuo", "puku", "iri", "ato", "nari",
+           "ise", "ole", "di", "biko", "ahu", "ugbu", "a", "nwere", "ka", "gosi", "taa", "bufee"},
+}
+
+# Letters that only show up in one or two of the supported languages; each counts as a hit.
+DIACRITIC_HINTS: Dict[str, str] = {
+    "ṣ": "yo", "ẹ": "yo", "ọ": "yo ig", "ị": "ig", "ụ": "ig", "ṅ": "ig",
+    "ɓ": "ha", "ɗ": "ha", "ƙ": "ha", "ƴ": "ha",
+    "é": "fr", "è": "fr", "ê": "fr", "à": "fr", "ç": "fr", "ù": "fr",
+}
+
+# Seed sentences for the trigram model (typical commands in each language).
+SEED_CORPUS: Dict[str, List[str]] = {
+    "en": ["send money to my mother in kenya", "pay five thousand naira to john",
+           "i want to send 500 dollars to jean in ghana", "how much is in my account",
+           "transfer the money to my brother", "what is my balance", "please send it now",
+           "check the exchange rate for today", "withdraw from my vault", "show my transaction history"],
+    "fr": ["je veux envoyer de l'argent à ma mère", "envoyer cinq cents dollars à jean au ghana",
+           "payer mille nairas à mon frère", "quel est mon solde", "je voudrais retirer de l'argent de mon coffre",
+           "montre-moi l'historique des transactions", "quel est le taux de change aujourd'hui",
+           "envoie l'argent maintenant s'il te plaît", "transférer des fonds vers le kenya",
+           "combien ai-je sur mon compte"],
+    "sw": ["nataka kutuma pesa kwa mama yangu nchini kenya", "tuma shilingi elfu kumi kwa maria",
+           "lipa shilingi mia tano kwa john", "salio langu ni kiasi gani", "nataka kutoa pesa kutoka akiba yangu",
+           "nionyeshe historia ya miamala", "kiwango cha kubadilisha fedha leo ni kipi", "tafadhali tuma pesa sasa",
+           "hamisha fedha kwenda ghana", "nina pesa ngapi kwenye akaunti yangu"],
+    "ha": ["ina so in aika kudi zuwa ga mahaifiyata a kenya", "ziga naira dubu talatin zuwa amina a kenya",
+           "biya naira dari biyar ga musa", "nawa ne ma'auni na", "ina so in cire kudi daga asusuna",
+           "nuna min tarihin ciniki", "menene farashin canji yau", "don allah aika kudin yanzu",
+           "tura kudi zuwa ghana", "kudi nawa ne a asusuna"],
+    "yo": ["mo fẹ fi owo ranṣẹ si iya mi ni kenya", "fi ẹgbẹrun ọgbọn naira ranṣẹ si amina ni kenya",
+           "san ẹẹdẹgbẹta naira fun tunde", "elo ni o wa ninu akọọlẹ mi",
+           "mo fẹ gba owo jade lati inu apo ifowopamọ mi", "fi itan iṣowo mi han mi",
+           "kini oṣuwọn paṣipaarọ loni", "jọwọ fi owo naa ranṣẹ bayi", "gbe owo lọ si ghana", "owo melo ni mo ni"],
+    "ig": ["achọrọ m iziga ego nye nne m na kenya", "zipu naira puku iri atọ nye amina na kenya",
+           "kwụọ naira narị ise nye chidi", "ego ole dị n'akaụntụ m", "achọrọ m iwepụ ego n'ebe nchekwa m",
+           "gosi m akụkọ azụmahịa m", "gịnị bụ ọnụego mgbanwe taa", "biko zipu ego ahụ ugbu a",
+           "bufee ego na ghana", "ego ole ka m nwere"],
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def _strip_marks(text: str) -> str:
+    """Drops combining accents so "ranṣẹ" and "ranse" look the same."""
+    return "".join(ch for ch in unicodedata.normalize("NFD", text) if not unicodedata.combining(ch))
+
+
+def _trigrams(text: str) -> List[str]:
+    padded = f" {' '.join(_WORD_RE.findall(text))} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _is_arabic(ch: str) -> bool:
+    return "؀" <= ch <= "ۿ" or "ݐ" <= ch <= "ݿ" or "ﭐ" <= ch <= "﻿"
+
+
+class FastLanguageDetector:
+    """Scores a command against the supported languages; returns None when unsure."""
+
+    def __init__(self, stopwords: Dict[str, set] = None, seed_corpus: Dict[str, List[str]] = None):
+        self.stopwords = stopwords if stopwords is not None else STOPWORDS
+        corpus = seed_corpus if seed_corpus is not None else SEED_CORPUS
+        self.languages = sorted(self.stopwords)
+        self._stopword_langs: Dict[str, Tuple[str, ...]] = {}
+        for lang in self.languages:
+            for word in self.stopwords[lang]:
+                self._stopword_langs[word] = self._stopword_langs.get(word, ()) + (lang,)
+
+        # Add-one smoothed trigram log-probabilities, built once from the seed corpus.
+        self._trigram_logp: Dict[str, Dict[str, float]] = {}
+        self._unseen_logp: Dict[str, float] = {}
+        vocabulary = {gram for sentences in corpus.values() for s in sentences for gram in _trigrams(s.lower())}
+        for lang in self.languages:
+            counts = Counter(gram for s in corpus.get(lang, []) for gram in _trigrams(s.lower()))
+            denominator = sum(counts.values()) + len(vocabulary) + 1
+            self._trigram_logp[lang] = {gram: math.log((c + 1) / denominator) for gram, c in counts.items()}
+            self._unseen_logp[lang] = math.log(1 / denominator)
+
+        self.counters = {"fast_path": 0, "fallback": 0}
+
+    def _trigram_winner(self, text_lower: str) -> Optional[str]:
+        grams = _trigrams(text_lower)
+        if not grams:
+            return None
+        best_lang, best_score = None, -math.inf
+        for lang in self.languages:
+            table, unseen = self._trigram_logp[lang], self._unseen_logp[lang]
+            score = sum(table.get(gram, unseen) for gram in grams)
+            if score > best_score:
+                best_lang, best_score = lang, score
+        return best_lang
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Stopword and diacritic hits per language."""
+        text_lower = unicodedata.normalize("NFC", text.lower())
+        hits = dict.fromkeys(self.languages, 0.0)
+        for word in _WORD_RE.findall(_strip_marks(text_lower)):
+            for lang in self._stopword_langs.get(word, ()):
+                hits[lang] += 1
+        for ch in set(text_lower):
+            for lang in DIACRITIC_HINTS.get(ch, "").split():
+                hits[lang] += 1
+        return hits
+
+    def classify(self, text: str) -> Tuple[Optional[str], float]:
+        """Returns (language, confidence); language is None when the evidence is too weak."""
+        letters = [ch for ch in text if ch.isalpha()]
+        if letters:
+            arabic_share = sum(1 for ch in letters if _is_arabic(ch)) / len(letters)
+            if arabic_share >= 0.5:
+                return "ar", arabic_share
+
+        hits = self.scores(text)
+        ranked = sorted(hits.items(), key=lambda item: (-item[1], item[0]))
+        (best_lang, best_hits), (_, second_hits) = ranked[0], ranked[1]
+        confidence = best_hits / (best_hits + second_hits) if best_hits else 0.0
+        if best_hits < FAST_PATH_MIN_STOPWORD_HITS or confidence < FAST_PATH_MIN_CONFIDENCE:
+            return None, confidence
+        if self._trigram_winner(unicodedata.normalize("NFC", text.lower())) != best_lang:
+            return None, confidence
+        return best_lang, confidence
+
+    def detect(self, text: str) -> Optional[str]:
+        """Fast-path language for text, or None if the caller should use langdetect."""
+        language, _ = self.classify(text)
+        self.counters["fast_path" if language else "fallback"] += 1
+        return language
+
+    def stats(self) -> Dict[str, float]:
+        total = self.counters["fast_path"] + self.counters["fallback"]
+        stats = dict(self.counters)
+        stats["fast_path_hit_rate"] = round(self.counters["fast_path"] / total, 4) if total else 0.0
+        return stats
@@ -0,0 +1,369 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple, Union
+
+from .gazetteer import GAZETTEER, Gazetteer
+
+# Offline grammar for payment commands in the non-English languages the parser supports.
+#
+# "Tuma shilingi elfu kumi kwa Maria nchini Kenya" or "Zipu Naira puku iri atọ nye Amina"
+# have a small, regular shape: a send/pay verb, an amount (digits or spelled-out number
+# words) next to a currency name, a recipient after a preposition and optionally a country
+# after a locative. When every part is found the command is resolved here and the network
+# translation is skipped; otherwise the caller translates as before.
+#
+# Words are matched after Gazetteer.fold (lowercase, no accents), so "ẹgbẹrun" and
+# "egberun", or "أرسل" and "ارسل", are the same word.
+
+# How spelled-out numbers compose:
+# - "multiplier_first": a multiplier is followed by its count ("elfu kumi" = 1000 x 10,
+#   "puku iri ato" = 1000 x (10 x 3)); conjunctions add ("ishirini na tano" = 25).
+# - "count_first": the count comes before the multiplier ("cinq cents", "ثلاثون ألف").
+GRAMMARS: Dict[str, dict] = {
+    "sw": {
+        "order": "multiplier_first",
+        "numbers": {"sifuri": 0, "moja": 1, "mbili": 2, "tatu": 3, "nne": 4, "tano": 5, "sita": 6, "saba": 7,
+                    "nane": 8, "tisa": 9, "kumi": 10, "ishirini": 20, "thelathini": 30, "arobaini": 40,
+                    "hamsini": 50, "sitini": 60, "sabini": 70, "themanini": 80, "tisini": 90, "mia": 100,
+                    "elfu": 1000, "laki": 100000, "milioni": 1000000},
+        "multipliers": {"mia", "elfu", "laki", "milioni"},
+        "conjunctions": {"na"},
+        "verbs": {"tuma", "kutuma", "nitumie", "tumia", "nitume", "lipa", "kulipa", "hamisha", "kuhamisha",
+                  "peleka", "kupeleka", "tumeni"},
+        "recipient_markers": {"kwa"},
+        "location_markers": {"nchini", "huko", "katika", "kule", "ya", "wa"},
+    },
+    "ha": {
+        "order": "multiplier_first",
+        "numbers": {"sifiri": 0, "daya": 1, "biyu": 2, "uku": 3, "hudu": 4, "biyar": 5, "shida": 6,
+                    "bakwai": 7, "takwas": 8, "tara": 9, "goma": 10, "ashirin": 20, "talatin": 30,
+                    "arba'in": 40, "arbain": 40, "hamsin": 50, "sittin": 60, "saba'in": 70, "sabain": 70,
+                    "tamanin": 80, "casa'in": 90, "casain": 90, "dari": 100, "dubu": 1000,
+                    "miliyan": 1000000},
+        "multipliers": {"dari", "dubu", "miliyan"},
+        "conjunctions": {"da", "sha"},
+        "verbs": {"aika", "aiko", "tura", "turo", "ziga", "biya", "aikawa", "turawa"},
+        "recipient_markers": {"zuwa", "ga", "wa"},
+        "location_markers": {"a", "cikin", "na", "dake"},
+    },
+    "yo": {
+        "order": "multiplier_first",
+        "numbers": {"odo": 0, "ookan": 1, "okan": 1, "kan": 1, "eeji": 2, "eji": 2, "meji": 2, "eeta": 3,
+                    "eta": 3, "meta": 3, "eerin": 4, "erin": 4, "merin": 4, "aarun": 5, "arun": 5, "marun": 5,
+                    "eefa": 6, "efa": 6, "mefa": 6, "eeje": 7, "eje": 7, "meje": 7, "eejo": 8, "ejo": 8,
+                    "mejo": 8, "eesan": 9, "esan": 9, "mesan": 9, "eewa": 10, "ewa": 10, "mewa": 10,
+                    "ogun": 20, "ogbon": 30, "ogoji": 40, "aadota": 50, "ogota": 60, "aadorin": 70,
+                    "ogorin": 80, "aadorun": 90, "ogorun": 100, "igba": 200, "oodunrun": 300,
+                    "irinwo": 400, "eedegbeta": 500, "egbeta": 600, "egberin": 800, "egberun": 1000,
+                    "egbaa": 2000, "oke": 20000, "milionu": 1000000, "milioonu": 1000000},
+        "multipliers": {"ogorun", "egberun", "egbaa", "oke", "milionu", "milioonu"},
+        "conjunctions": {"le", "ati"},
+        "verbs": {"ranse", "fi", "san", "sanwo", "gbe"},
+        "recipient_markers": {"si", "fun"},
+        "location_markers": {"ni", "l'", "lati"},
+    },
+    "ig": {
+        "order": "multiplier_first",
+        "numbers": {"efu": 0, "otu": 1, "abuo": 2, "ato": 3, "ano": 4, "ise": 5, "isii": 6, "asaa": 7,
+                    "asato": 8, "itoolu": 9, "iteghete": 9, "iri": 10, "nari": 100, "puku": 1000,
+                    "nde": 1000000},
+        "multipliers": {"iri", "nari", "puku", "nde"},
+        "conjunctions": {"na"},
+        "verbs": {"zipu", "ziga", "izipu", "iziga", "kwuo", "kwuru", "kwu", "buga"},
+        "recipient_markers": {"nye", "maka"},
+        "location_markers": {"na", "n'", "nke"},
+    },
+    "fr": {
+        "order": "count_first",
+        "numbers": {"zero": 0, "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4, "cinq": 5, "six": 6,
+                    "sept": 7, "huit": 8, "neuf": 9, "dix": 10, "onze": 11, "douze": 12, "treize": 13,
+                    "quatorze": 14, "quinze": 15, "seize": 16, "vingt": 20, "vingts": 20, "trente": 30,
+                    "quarante": 40, "cinquante": 50, "soixante": 60, "quatre-vingt": 80,
+                    "quatre-vingts": 80, "cent": 100, "cents": 100, "mille": 1000, "million": 1000000,
+                    "millions": 1000000},
+        "multipliers": {"cent", "cents", "mille", "million", "millions"},
+        "conjunctions": {"et"},
+        "verbs": {"envoyer", "envoie", "envoyez", "envoies", "envoyons", "payer", "paie", "payez", "paye",
+                  "transferer", "transfere", "transferez", "virer", "vire", "virez", "expedier"},
+        "recipient_markers": {"a", "pour"},
+        "location_markers": {"au", "aux", "en", "dans", "a", "du"},
+    },
+    "ar": {
+        "order": "count_first",
+        "numbers": {"صفر": 0, "واحد": 1, "واحدة": 1, "اثنان": 2, "اثنين": 2, "ثلاثة": 3, "ثلاث": 3,
+                    "اربعة": 4, "اربع": 4, "خمسة": 5, "خمس": 5, "ستة": 6, "ست": 6, "سبعة": 7, "سبع": 7,
+                    "ثمانية": 8, "ثماني": 8, "تسعة": 9, "تسع": 9, "عشرة": 10, "عشر": 10, "عشرون": 20,
+                    "عشرين": 20, "ثلاثون": 30, "ثلاثين": 30, "اربعون": 40, "اربعين": 40, "خمسون": 50,
+                    "خمسين": 50, "ستون": 60, "ستين": 60, "سبعون": 70, "سبعين": 70, "ثمانون": 80,
+                    "ثمانين": 80, "تسعون": 90, "تسعين": 90, "مائة": 100, "مئة": 100, "مائتان": 200,
+                    "مائتين": 200, "ثلاثمائة": 300, "اربعمائة": 400, "خمسمائة": 500, "ستمائة": 600,
+                    "سبعمائة": 700, "ثمانمائة": 800, "تسعمائة": 900, "الف": 1000, "الاف": 1000,
+                    "الفين": 2000, "الفان": 2000, "مليون": 1000000, "ملايين": 1000000},
+        "multipliers": {"مائة", "مئة", "الف", "الاف", "مليون", "ملايين"},
+        "conjunctions": {"و"},
+        "verbs": {"ارسال", "ارسل", "ارسلي", "ابعث", "بعث", "حول", "تحويل", "حولي", "ادفع", "دفع"},
+        "recipient_markers": {"الى"},
+        "location_markers": {"في"},
+    },
+}
+
+# Longest recipient name taken after a recipient marker, in words.
+NATIVE_GRAMMAR_MAX_NAME_WORDS = 3
+
+_TOKEN_RE = re.compile(r"\d+(?:[.,]\d+)*|(?:[^\W\d_][\u0300-\u036f]*)+(?:['’\-](?:[^\W\d_][\u0300-\u036f]*)+)*['’]?")
+
+
+def _digits_value(word: str) -> Union[int, float, None]:
+    """Value of a digit token: "5000", "5,000" and "5.000" are 5000, "12.50" and "12,50"
+    are 12.5, "1,234.50" is 1234.5. None for anything else ("1.2.3", "12,5,0")."""
+    if word.isdigit():
+        return int(word)
+    groups = re.split(r"[.,]", word)
+    separators = [ch for ch in word if ch in ".,"]
+    if len(groups[0]) <= 3 and all(len(group) == 3 for group in groups[1:]) and len(set(separators)) == 1:
+        return int("".join(groups)) # Thousands groups
+    whole, fraction = groups[:-1], groups[-1]
+    if separators[-1] not in separators[:-1] and len(set(separators[:-1])) <= 1 \
+            and (len(whole) == 1 or (len(whole[0]) <= 3 and all(len(group) == 3 for group in whole[1:]))):
+        return float(f"{''.join(whole)}.{fraction}") # The last, different separator is the decimal point
+    return None
+
+
+class NativeGrammar:
+    """Resolves payment commands in sw/ha/yo/ig/fr/ar without translating them."""
+
+    def __init__(self, grammars: Dict[str, dict] = None, gazetteer: Gazetteer = None):
+        self.gazetteer = gazetteer if gazetteer is not None else GAZETTEER
+        self.grammars: Dict[str, dict] = {}
+        for language, grammar in (grammars if grammars is not None else GRAMMARS).items():
+            fold = self.gazetteer.fold
+            self.grammars[language] = {
+                "order": grammar["order"],
+                "numbers": {fold(word): value for word, value in grammar["numbers"].items()},
+                "multipliers": {fold(word) for word in grammar["multipliers"]},
+                "conjunctions": {fold(word) for word in grammar["conjunctions"]},
+                "verbs": {fold(word) for word in grammar["verbs"]},
+                "recipient_markers": {fold(word) for word in grammar["recipient_markers"]},
+                "location_markers": {fold(word) for word in grammar["location_markers"]},
+            }
+        self.counters = {"resolved": 0, "unresolved": 0}
+
+    def supports(self, language: str) -> bool:
+        return language in self.grammars
+
+    # --- numbers -----------------------------------------------------------------------
+
+    def _number_parts(self, word: str, grammar: dict) -> Optional[List[str]]:
+        """The number words making up word ("dix-sept" -> ["dix", "sept"]), or None."""
+        numbers = grammar["numbers"]
+        if word in numbers or word[0].isdigit():
+            return [word]
+        if "-" in word:
+            parts, pieces = [], word.split("-")
+            i = 0
+            while i < len(pieces):
+                joined = "-".join(pieces[i:i + 2])
+                if joined in numbers: # "quatre-vingt"
+                    parts.append(joined)
+                    i += 2
+                elif pieces[i] in numbers or pieces[i] in grammar["conjunctions"]:
+                    parts.append(pieces[i])
+                    i += 1
+                else:
+                    return None
+            return parts
+        # Arabic writes "and" as a prefix: "وخمسون".
+        for conjunction in grammar["conjunctions"]:
+            if len(conjunction) == 1 and word.startswith(conjunction) and word[1:] in numbers:
+                return [conjunction, word[1:]]
+        return None
+
+    @staticmethod
+    def _value(word: str, grammar: dict) -> Union[int, float, None]:
+        return _digits_value(word) if word[0].isdigit() else grammar["numbers"][word]
+
+    def _evaluate(self, words: List[str], grammar: dict) -> Union[int, float, None]:
+        """Value of a run of number words, or None when the digits in it are not one number."""
+        for i, word in enumerate(words):
+            if word[0].isdigit() and (_digits_value(word) is None
+                                      or (i + 1 < len(words) and words[i + 1][0].isdigit())):
+                return None # "2 3 euros", "1.2.3": leave it to the translation path
+        value = self._sum(words, grammar)
+        return int(value) if isinstance(value, float) and value.is_integer() else value
+
+    def _sum(self, words: List[str], grammar: dict) -> Union[int, float]:
+        if grammar["order"] == "count_first":
+            total = current = 0
+            for word in words:
+                if word in grammar["conjunctions"]:
+                    continue
+                value = self._value(word, grammar)
+                if value >= 1000:
+                    total += max(current, 1) * value
+                    current = 0
+                elif value == 100:
+                    current = max(current, 1) * 100
+                else:
+                    current += value
+            return total + current
+
+        conjunctions, multipliers = grammar["conjunctions"], grammar["multipliers"]
+
+        def product(i: int) -> Tuple[int, int]:
+            value = self._value(words[i], grammar)
+            i += 1
+            if words[i - 1] in multipliers and i < len(words) and words[i] not in conjunctions \
+                    and self._value(words[i], grammar) < value:
+                count, i = count_of(i, value)
+                value *= count
+            return value, i
+
+        def count_of(i: int, limit: int) -> Tuple[int, int]:
+            # Counts keep adding only while the terms get smaller ("ishirini na tano"), so
+            # "elfu kumi na mia tano" is 1000 x 10 + 500, not 1000 x 510.
+            count, i = product(i)
+            last = count
+            while i + 1 < len(words) and words[i] in conjunctions and words[i + 1] not in conjunctions:
+                next_value, next_i = product(i + 1)
+                if next_value >= last or count + next_value >= limit:
+                    break
+                count, last, i = count + next_value, next_value, next_i
+            return count, i
+
+        total, i = product(0)
+        while i < len(words):
+            if words[i] in conjunctions:
+                i += 1
+                continue
+            value, i = product(i)
+            total += value
+        return total
+
+    def _number_spans(self, words: List[str], grammar: dict) -> List[Tuple[int, int, List[str]]]:
+        """Maximal runs of number words as (first token, end token, number words)."""
+        spans = []
+        i = 0
+        while i < len(words):
+            parts = self._number_parts(words[i], grammar)
+            if not parts:
+                i += 1
+                continue
+            start, collected = i, list(parts)
+            i += 1
+            while i < len(words):
+                if words[i] in grammar["conjunctions"] and i + 1 < len(words):
+                    following = self._number_parts(words[i + 1], grammar)
+                    if following:
+                        collected += [words[i]] + following
+                        i += 2
+                        continue
+                    break
+                following = self._number_parts(words[i], grammar)
+                if not following:
+                    break
+                if collected[-1].isdigit() and len(following[0]) == 3 and following[0].isdigit():
+                    collected[-1] += following[0] # "5 000"
+                    following = following[1:]
+                collected += following
+                i += 1
+            spans.append((start, i, collected))
+        return spans
+
+    # --- commands ----------------------------------------------------------------------
+
+    def parse(self, text: str, language: str) -> Optional[Dict[str, Optional[object]]]:
+        """Entities of a fully resolved command, in IntentExtractor.extract's format, or None.
+
+        Resolved means a payment verb, an amount next to a currency name and a recipient
+        were all found; the recipient's country is filled in when present.
+        """
+        return self.parse_settled(text, language)[0]
+
+    def parse_settled(self, text: str, language: str) -> Tuple[Optional[Dict[str, Optional[object]]], bool]:
+        """parse(), plus whether appending more words to text can no longer change the answer.
+
+        That holds once the command resolved with a country and every token it used is
+        followed by two more tokens and by more characters than the longest gazetteer
+        name, so no number, name or entity it read can run on into the appended words.
+        """
+        grammar = self.grammars.get(language)
+        if grammar is None:
+            return None, False
+        entities, settled = self._parse(unicodedata.normalize("NFC", text), grammar)
+        self.counters["resolved" if entities else "unresolved"] += 1
+        return entities, settled
+
+    def _parse(self, text: str, grammar: dict) -> Tuple[Optional[Dict[str, Optional[object]]], bool]:
+        tokens = [(m.start(), m.end()) for m in _TOKEN_RE.finditer(text)]
+        words = ["".join(ch for ch in self.gazetteer.fold(text[start:end]) if not unicodedata.combining(ch))
+                 for start, end in tokens]
+        if not any(word in grammar["verbs"] for word in words):
+            return None, False
+
+        # Map gazetteer entities onto token ranges.
+        token_at = {start: index for index, (start, _) in enumerate(tokens)}
+        currency_span = None
+        countries: List[Tuple[int, int, str]] = []
+        entity_tokens = set()
+        for entity in self.gazetteer.scan(text):
+            first = token_at.get(entity.start)
+            if first is None:
+                continue
+            last = first
+            while last < len(tokens) and tokens[last][1] <= entity.end:
+                last += 1
+            entity_tokens.update(range(first, last))
+            if entity.kind == "currency" and currency_span is None:
+                currency_span = (first, last, entity.code)
+            elif entity.kind == "country":
+                countries.append((first, last, entity.code))
+        if currency_span is None:
+            return None, False
+
+        amount = amount_end = None
+        for start, end, number_words in self._number_spans(words, grammar):
+            if end == currency_span[0] or start == currency_span[1]:
+                amount, amount_end = self._evaluate(number_words, grammar), end
+                break
+        if not amount:
+            return None, False
+
+        recipient_name, name_end = None, None
+        stop_words = grammar["location_markers"] | grammar["verbs"] | grammar["conjunctions"]
+        for index, word in enumerate(words):
+            if word not in grammar["recipient_markers"]:
+                continue
+            name_tokens = []
+            for follow in range(index + 1, min(len(words), index + 1 + NATIVE_GRAMMAR_MAX_NAME_WORDS)):
+                if (words[follow] in stop_words or follow in entity_tokens
+                        or self._number_parts(words[follow], grammar)):
+                    break
+                name_tokens.append(follow)
+            if name_tokens:
+                recipient_name = text[tokens[name_tokens[0]][0]:tokens[name_tokens[-1]][1]].title()
+                name_end = name_tokens[-1] + 1
+                break
+        if not recipient_name:
+            return None, False
+
+        recipient_country = settled = None
+        for first, last, code in countries:
+            if first >= name_end and (first == name_end or words[first - 1] in grammar["location_markers"]):
+                recipient_country = code
+                used_end = max(currency_span[1], amount_end, last)
+                settled = (used_end + 2 <= len(tokens)
+                           and len(text) - tokens[used_end - 1][1] > self.gazetteer.longest_name)
+                break
+
+        return {
+            "amount": amount,
+            "currency": currency_span[2],
+            "recipient_name": recipient_name,
+            "recipient_country": recipient_country,
+        }, bool(settled)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.counters["resolved"] + self.counters["unresolved"]
+        stats = dict(self.counters)
+        stats["resolved_rate"] = round(self.counters["resolved"] / total, 4) if total else 0.0
+        return stats
@@ -1,120 +1,232 @@
+import asyncio
+import logging
 import re
-from deep_translator import GoogleTranslator
-from langdetect import detect, LangDetectException
-
-# Mock data for countries and currencies for simplicity
-AFRICAN_COUNTRIES = {
-    "nigeria": "NG",
-    "kenya": "KE",
-    "ghana": "GH",
-    # Add more countries as needed
-}
-
-CURRENCIES = {
-    "naira": "NGN",
-    "shilling": "KES", # Kenyan Shilling
-    "cedi": "GHS",   # Ghanaian Cedi
-    "ngn": "NGN",
-    "kes": "KES",
-    "ghs": "GHS",
-    "dollars": "USD", # Added for more general cases
-    "usd": "USD",
-    # Add more currency names and codes
-}
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from deep_translator.constants import BASE_URLS
+from deep_translator.exceptions import RequestError, TooManyRequests, TranslationNotFound
+from deep_translator.validate import is_input_valid, request_failed
+from langdetect import detect, detector_factory, LangDetectException
+
+from .gazetteer import GAZETTEER
+from .intent_classifier import IntentClassifier, load_intent_classifier
+from .intent_extractor import IntentExtractor
+from .language_detector import FastLanguageDetector
+from .native_grammar import NativeGrammar
+from .translation_cache import TranslationCache
+from ..utils.outbound_http import OUTBOUND_HTTP
+
+# Per-request trace lines (detected language, translations) are logged at DEBUG: they come
+# from the executor threads on every request. Failures and missed deadlines are WARNINGs.
+logger = logging.getLogger(__name__)
+
+# Country and currency names (all of Africa, ISO currency codes and local-language synonyms).
+# Both map a folded name to its ISO code; see gazetteer.py for the source tables.
+AFRICAN_COUNTRIES = GAZETTEER.countries
+CURRENCIES = GAZETTEER.currencies
 
 # Supported languages for translation to English before parsing
 # Yoruba (yo), Igbo (ig), Hausa (ha), French (fr), Arabic (ar), Swahili (sw)
 SUPPORTED_LANGUAGES_FOR_TRANSLATION = ["yo", "ig", "ha", "fr", "ar", "sw"]
 
+# Shared by every parser instance.
+# Country and currency names are kept verbatim if template mode is switched on.
+TRANSLATION_CACHE = TranslationCache(keep_words=list(AFRICAN_COUNTRIES) + list(CURRENCIES))
+
+# Deterministic pre-classifier tried before langdetect (see language_detector.py).
+LANGUAGE_DETECTOR = FastLanguageDetector()
+
+# Offline grammar tried before translating (see native_grammar.py); commands it fully
+# resolves are never sent to the translator.
+NATIVE_GRAMMAR = NativeGrammar()
+
+# Hashed-n-gram intent model (see intent_classifier.py), loaded once at import.
+# None if the model file is missing, in which case every command is a payment.
+INTENT_CLASSIFIER = load_intent_classifier()
+
+# Batched translation joins texts with newlines into as few requests as possible.
+# Google Translate rejects requests over 5000 characters.
+GOOGLE_TRANSLATE_MAX_CHARS = 5000
+BULK_TRANSLATION_MAX_CHARS = 4500
+
+# The async parse methods run langdetect (CPU-bound) and translation (blocking network I/O)
+# on these bounded pools so a slow stage never blocks the event loop. Translation has its
+# own pool so hung translator calls cannot starve detection.
+NLP_DETECT_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="nlp-detect")
+NLP_TRANSLATE_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="nlp-translate")
+NLP_DETECT_DEADLINE_SECONDS = 0.5
+NLP_TRANSLATE_DEADLINE_SECONDS = 2.0
+GOOGLE_TRANSLATE_URL = BASE_URLS["GOOGLE_TRANSLATE"]
+GOOGLE_TRANSLATE_DEADLINE_SECONDS = 10.0 # Per Google Translate call, retries included; a late answer still fills the cache
+NLP_BATCH_DEADLINE_SECONDS = 10.0 # Per stage (and per language group) of a batch
+
+# langdetect publishes its global factory before the language profiles finish loading, so
+# concurrent first calls from the executor threads can detect with a half-loaded model.
+# It is also seeded here; unseeded it can give different answers for the same text.
+_LANGDETECT_INIT_LOCK = threading.Lock()
+_langdetect_loaded = False
+
+def _ensure_langdetect_loaded():
+    global _langdetect_loaded
+    if not _langdetect_loaded:
+        with _LANGDETECT_INIT_LOCK:
+            detector_factory.DetectorFactory.seed = 0
+            detector_factory.init_factory()
+            _langdetect_loaded = True
+
+# langdetect treats digits as word breaks, so commands that differ only in their amounts
+# share one detection inside a batch.
+_DIGIT_RUN_RE = re.compile(r"\d+")
+
+def google_translate(text: str, source_language: str) -> str:
+    """Translates text to English with Google Translate (one network round trip).
+
+    Makes the same request as deep_translator's GoogleTranslator.translate, but through the
+    shared OUTBOUND_HTTP client so calls reuse pooled connections and share one circuit
+    breaker (the library calls requests.get itself and has no session hook). It relies on
+    the library's URL table, validation and page layout, so deep-translator is pinned in
+    requirements.txt; raises its NotValidLength for input of GOOGLE_TRANSLATE_MAX_CHARS or more.
+    """
+    is_input_valid(text, max_chars=GOOGLE_TRANSLATE_MAX_CHARS)
+    text = text.strip()
+    if not text or source_language == "en":
+        return text
+    response = OUTBOUND_HTTP.request("google_translate", "GET", GOOGLE_TRANSLATE_URL,
+                                     deadline_seconds=GOOGLE_TRANSLATE_DEADLINE_SECONDS,
+                                     params={"tl": "en", "sl": source_language, "q": text})
+    if response.status_code == 429:
+        raise TooManyRequests()
+    if request_failed(status_code=response.status_code):
+        raise RequestError()
+    soup = BeautifulSoup(response.text, "html.parser")
+    element = soup.find("div", {"class": "t0"}) or soup.find("div", {"class": "result-container"})
+    if element is None:
+        raise TranslationNotFound(text)
+    return element.get_text(strip=True)
+
 class NLPIntentParser:
-    def __init__(self):
-        pass
+    def __init__(self, translation_cache: TranslationCache = None, translate_fn=None,
+                 language_detector: FastLanguageDetector = None, native_grammar: NativeGrammar = None,
+                 intent_classifier: IntentClassifier = None):
+        """
+        Args:
+            translation_cache: Cache for translations; defaults to the process-wide TRANSLATION_CACHE.
+            translate_fn: Callable (text, source_language) -> English text; defaults to google_translate.
+            language_detector: Fast-path detector tried before langdetect; defaults to LANGUAGE_DETECTOR.
+            native_grammar: Offline grammar tried before translating; defaults to NATIVE_GRAMMAR.
+            intent_classifier: Model filling the "intent" field; defaults to INTENT_CLASSIFIER.
+        """
+        self.extractor = IntentExtractor(GAZETTEER)
+        self.translation_cache = translation_cache if translation_cache is not None else TRANSLATION_CACHE
+        self.translate_fn = translate_fn if translate_fn is not None else google_translate
+        self.language_detector = language_detector if language_detector is not None else LANGUAGE_DETECTOR
+        self.native_grammar = native_grammar if native_grammar is not None else NATIVE_GRAMMAR
+        self.intent_classifier = intent_classifier if intent_classifier is not None else INTENT_CLASSIFIER
+
+    def _classify_many(self, texts: List[str]) -> List[Tuple[str, Optional[float]]]:
+        """(intent, confidence) per text, scored as one batch; ("payment", None) without a model."""
+        if self.intent_classifier is None:
+            return [("payment", None)] * len(texts)
+        return self.intent_classifier.predict_many(texts)
+
+    def _detect_language(self, text: str) -> str:
+        fast_lang = self.language_detector.detect(text)
+        if fast_lang is not None:
+            logger.debug("[NLP] Detected language (fast path): %s for input: \"%s\"", fast_lang, text)
+            return fast_lang
+
+        _ensure_langdetect_loaded()
+        try:
+            detected_lang = detect(text)
+            logger.debug("[NLP] Detected language: %s for input: \"%s\"", detected_lang, text)
+            return detected_lang
+        except LangDetectException:
+            logger.debug("[NLP] Could not detect language for: \"%s\". Assuming English.", text)
+            return "en" # Default to English
 
     def _translate_to_english(self, text: str, source_language: str) -> str:
-        """Translates text from source_language to English."""
+        """Translates text from source_language to English, reusing cached translations."""
         try:
-            translated_text = GoogleTranslator(source=source_language, target="en").translate(text)
-            print(f"[NLP] Translated from {source_language} to en: \"{text}\" -> \"{translated_text}\"")
+            translated_text = self.translation_cache.translate(
+                source_language, text, lambda t: self.translate_fn(t, source_language)
+            )
+            logger.debug("[NLP] Translated from %s to en: \"%s\" -> \"%s\"", source_language, text, translated_text)
             return translated_text
         except Exception as e:
-            print(f"[NLP] Error translating from {source_language}: {e}")
+            logger.warning("[NLP] Error translating from %s: %s", source_language, e)
             return text # Return original text if translation fails
 
-    def parse_intent(self, text: str, sender_country_code: str = None):
-        original_text = text
-        detected_lang = "en" # Default to English
+    def _bulk_translate(self, texts: List[str], source_language: str) -> List[str]:
+        """Translates many texts with one translate_fn call per BULK_TRANSLATION_MAX_CHARS of input.
+
+        Texts are flattened to single lines and joined with newlines, which translators keep.
+        A chunk whose line count does not survive is retried item by item.
+        """
+        lines = [" ".join(text.split()) for text in texts]
+        results: List[str] = []
+        start = 0
+        while start < len(lines):
+            end, size = start, 0
+            while end < len(lines) and (end == start or size + len(lines[end]) + 1 <= BULK_TRANSLATION_MAX_CHARS):
+                size += len(lines[end]) + 1
+                end += 1
+            chunk = lines[start:end]
+            translated = self.translate_fn("\n".join(chunk), source_language).split("\n")
+            if len(translated) == len(chunk):
+                results.extend(line.strip() for line in translated)
+            else:
+                results.extend(self.translate_fn(line, source_language) for line in chunk)
+            start = end
+        return results
+
+    def _translate_many_to_english(self, texts: List[str], source_language: str) -> List[str]:
+        """Batch counterpart of _translate_to_english: cached texts are skipped, the rest share requests."""
         try:
-            detected_lang = detect(text)
-            print(f"[NLP] Detected language: {detected_lang} for input: \"{text}\"")
-        except LangDetectException:
-            print(f"[NLP] Could not detect language for: \"{text}\". Assuming English.")
+            translated_texts = self.translation_cache.translate_many(
+                source_language, texts, lambda batch: self._bulk_translate(batch, source_language)
+            )
+            logger.debug("[NLP] Translated %d texts from %s to en", len(texts), source_language)
+            return translated_texts
+        except Exception as e:
+            logger.warning("[NLP] Error batch translating from %s: %s", source_language, e)
+            return list(texts) # Return original texts if translation fails
 
-        if detected_lang != "en" and detected_lang in SUPPORTED_LANGUAGES_FOR_TRANSLATION:
-            text = self._translate_to_english(text, detected_lang)
-        elif detected_lang != "en" and detected_lang not in SUPPORTED_LANGUAGES_FOR_TRANSLATION:
-            print(f"[NLP] Language {detected_lang} not in supported list for direct translation to English for parsing. Proceeding with original text, parsing might be less accurate.")
-            # For unsupported languages, we might still try to parse if it contains numbers/keywords
-            # or return an error/request for English input.
+    def _resolve_natively(self, text: str, detected_lang: str) -> Optional[dict]:
+        """Entities from the offline grammar, or None if the text still needs translating."""
+        entities = self.native_grammar.parse(text, detected_lang)
+        if entities is not None:
+            logger.debug("[NLP] Resolved %s command without translation: \"%s\"", detected_lang, text)
+        return entities
 
+    def _parse_english(self, original_text: str, text: str, detected_lang: str, sender_country_code: str = None,
+                       intent: Tuple[str, Optional[float]] = None) -> dict:
+        """Extracts payment details from text, the (possibly translated) form of original_text."""
         text_lower = text.lower() # Parse the (potentially translated) English text
-        
-        amount = None
-        currency = None
-        recipient_name = None
-        recipient_country = None
-        sender_country = AFRICAN_COUNTRIES.get(sender_country_code.lower()) if sender_country_code else None
+        entities = self.extractor.extract(text_lower)
+        parsed_text_language = "en" if text != original_text else detected_lang
+        return self._build_result(original_text, detected_lang, parsed_text_language, entities, sender_country_code, intent)
 
-        amount_currency_match = re.search(r"(\d{1,3}(?:,\d{3})*|\d+)\s*([a-zA-Z]+)", text_lower)
-        currency_amount_match = re.search(r"([a-zA-Z]{3})\s*(\d{1,3}(?:,\d{3})*|\d+)", text_lower)
-
-        if amount_currency_match:
-            try:
-                amount_str = amount_currency_match.group(1).replace(",", "")
-                amount = int(amount_str)
-                currency_word = amount_currency_match.group(2)
-                currency = CURRENCIES.get(currency_word)
-            except ValueError:
-                pass
-        elif currency_amount_match:
-            try:
-                amount_str = currency_amount_match.group(2).replace(",", "")
-                amount = int(amount_str)
-                currency_code_match = currency_amount_match.group(1)
-                currency = CURRENCIES.get(currency_code_match)
-            except ValueError:
-                pass
-
-        recipient_match_in = re.search(r"to\s+([a-zA-Z]+(?:\s+[a-zA-Z]+)*)\s+in\s+([a-zA-Z]+)", text_lower)
-        if recipient_match_in:
-            potential_name = recipient_match_in.group(1).strip()
-            potential_country = recipient_match_in.group(2).strip()
-            if AFRICAN_COUNTRIES.get(potential_country):
-                recipient_name = potential_name.title()
-                recipient_country = AFRICAN_COUNTRIES.get(potential_country)
-        
-        if not recipient_name:
-            recipient_match_parentheses = re.search(r"to\s+([a-zA-Z]+(?:\s+[a-zA-Z]+)*)\s+\(([a-zA-Z]+)\)", text_lower)
-            if recipient_match_parentheses:
-                potential_name = recipient_match_parentheses.group(1).strip()
-                potential_country_in_paren = recipient_match_parentheses.group(2).strip()
-                if AFRICAN_COUNTRIES.get(potential_country_in_paren):
-                    recipient_name = potential_name.title()
-                    recipient_country = AFRICAN_COUNTRIES.get(potential_country_in_paren)
-
-        if not recipient_name and amount is not None:
-            recipient_only_match = re.search(r"to\s+([a-zA-Z]+(?:\s+[a-zA-Z]+)*)", text_lower)
-            if recipient_only_match:
-                possible_name_candidate = recipient_only_match.group(1).strip()
-                if not AFRICAN_COUNTRIES.get(possible_name_candidate):
-                     recipient_name = possible_name_candidate.title()
+    def _build_result(self, original_text: str, detected_lang: str, parsed_text_language: str,
+                      entities: dict, sender_country_code: str = None,
+                      intent: Tuple[str, Optional[float]] = None) -> dict:
+        """Result dict for original_text; intent is (label, confidence), classified here if not given."""
+        sender_country = GAZETTEER.country_code(sender_country_code)
+        amount = entities["amount"]
+        currency = entities["currency"]
+        recipient_name = entities["recipient_name"]
+        recipient_country = entities["recipient_country"]
 
         if not sender_country and currency:
-            for country_name, country_code_val in AFRICAN_COUNTRIES.items():
-                if currency == "NGN" and country_code_val == "NG": sender_country = "NG"; break
-                if currency == "KES" and country_code_val == "KE": sender_country = "KE"; break
-                if currency == "GHS" and country_code_val == "GH": sender_country = "GH"; break
+            sender_country = GAZETTEER.sender_country_for_currency(currency)
         
-        parsed_data = {"original_text": original_text, "detected_language": detected_lang, "parsed_text_language": "en" if text != original_text else detected_lang}
+        intent, intent_confidence = intent if intent is not None else self._classify_many([original_text])[0]
+
+        parsed_data = {"original_text": original_text, "detected_language": detected_lang, "parsed_text_language": parsed_text_language}
+        parsed_data["intent"] = intent
+        if intent_confidence is not None: parsed_data["intent_confidence"] = intent_confidence
         if amount is not None: parsed_data["amount"] = amount
         if currency: parsed_data["currency"] = currency
         if sender_country: parsed_data["sender_country_code"] = sender_country
@@ -123,7 +235,168 @@ class NLPIntentParser:
 
         return parsed_data
 
+    def _should_translate(self, detected_lang: str) -> bool:
+        if detected_lang != "en" and detected_lang in SUPPORTED_LANGUAGES_FOR_TRANSLATION:
+            return True
+        elif detected_lang != "en" and detected_lang not in SUPPORTED_LANGUAGES_FOR_TRANSLATION:
+            logger.debug("[NLP] Language %s not in supported list for direct translation to English for parsing. Proceeding with original text, parsing might be less accurate.", detected_lang)
+            # For unsupported languages, we might still try to parse if it contains numbers/keywords
+            # or return an error/request for English input.
+        return False
+
+    def parse_intent(self, text: str, sender_country_code: str = None):
+        original_text = text
+        detected_lang = self._detect_language(text)
+
+        if self._should_translate(detected_lang):
+            entities = self._resolve_natively(text, detected_lang)
+            if entities is not None:
+                return self._build_result(original_text, detected_lang, detected_lang, entities, sender_country_code)
+            text = self._translate_to_english(text, detected_lang)
+
+        return self._parse_english(original_text, text, detected_lang, sender_country_code)
+
+    async def parse_intent_async(self, text: str, sender_country_code: str = None):
+        """parse_intent for the event loop: detection and translation run on bounded executors.
+
+        A stage that misses its deadline is abandoned: detection falls back to English and
+        translation falls back to parsing the untranslated text.
+        """
+        loop = asyncio.get_running_loop()
+        original_text = text
+        try:
+            detected_lang = await asyncio.wait_for(
+                loop.run_in_executor(NLP_DETECT_EXECUTOR, self._detect_language, text),
+                NLP_DETECT_DEADLINE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning("[NLP] Language detection missed its %ss deadline for: \"%s\". Assuming English.", NLP_DETECT_DEADLINE_SECONDS, text)
+            detected_lang = "en"
+
+        if self._should_translate(detected_lang):
+            entities = self._resolve_natively(text, detected_lang)
+            if entities is not None:
+                return self._build_result(original_text, detected_lang, detected_lang, entities, sender_country_code)
+            try:
+                text = await asyncio.wait_for(
+                    loop.run_in_executor(NLP_TRANSLATE_EXECUTOR, self._translate_to_english, text, detected_lang),
+                    NLP_TRANSLATE_DEADLINE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                logger.warning("[NLP] Translation from %s missed its %ss deadline. Parsing untranslated text.", detected_lang, NLP_TRANSLATE_DEADLINE_SECONDS)
+
+        return self._parse_english(original_text, text, detected_lang, sender_country_code)
+
+    def _detect_languages(self, texts: List[str]) -> Tuple[List[Optional[str]], Dict[int, str]]:
+        """Detects each text's language; returns the languages and per-index error messages."""
+        detected: List[Optional[str]] = [None] * len(texts)
+        errors: Dict[int, str] = {}
+        detections: Dict[str, str] = {}
+        for index, text in enumerate(texts):
+            detection_key = _DIGIT_RUN_RE.sub("0", text)
+            try:
+                if detection_key not in detections:
+                    detections[detection_key] = self._detect_language(text)
+                detected[index] = detections[detection_key]
+            except Exception as e:
+                errors[index] = f"Language detection failed: {e}"
+        return detected, errors
+
+    def _detect_and_resolve(self, texts: List[str]) -> Tuple[List[Optional[str]], Dict[int, str], Dict[int, dict]]:
+        """_detect_languages plus the offline grammar; the third result maps indices to resolved entities."""
+        detected, errors = self._detect_languages(texts)
+        native: Dict[int, dict] = {}
+        for index, (text, detected_lang) in enumerate(zip(texts, detected)):
+            if detected_lang is not None and self.native_grammar.supports(detected_lang):
+                entities = self._resolve_natively(text, detected_lang)
+                if entities is not None:
+                    native[index] = entities
+        return detected, errors, native
+
+    def _translation_groups(self, detected: List[Optional[str]], native: Dict[int, dict]) -> Dict[str, List[int]]:
+        groups: Dict[str, List[int]] = {}
+        for index, detected_lang in enumerate(detected):
+            if index not in native and detected_lang is not None and self._should_translate(detected_lang):
+                groups.setdefault(detected_lang, []).append(index)
+        return groups
+
+    def _parse_all(self, texts: List[str], translated: List[str], detected: List[Optional[str]],
+                   errors: Dict[int, str], native: Dict[int, dict], intents: List[Tuple[str, Optional[float]]],
+                   sender_country_code: str = None) -> List[dict]:
+        results = []
+        for index, text in enumerate(texts):
+            if index in errors:
+                results.append({"original_text": text, "error": errors[index]})
+                continue
+            try:
+                if index in native:
+                    results.append(self._build_result(text, detected[index], detected[index], native[index],
+                                                      sender_country_code, intents[index]))
+                    continue
+                results.append(self._parse_english(text, translated[index], detected[index], sender_country_code, intents[index]))
+            except Exception as e:
+                results.append({"original_text": text, "error": f"Parsing failed: {e}"})
+        return results
+
+    def parse_intents(self, texts: List[str], sender_country_code: str = None) -> List[dict]:
+        """Parses many commands at once, in input order.
+
+        Texts the offline grammar resolves are not translated; the rest are grouped by
+        detected language and each group is translated in bulk. A text that fails is returned as {"original_text": ..., "error": ...} without
+        affecting the others.
+        """
+        detected, errors, native = self._detect_and_resolve(texts)
+        translated = list(texts)
+        for language, indices in self._translation_groups(detected, native).items():
+            for index, translated_text in zip(indices, self._translate_many_to_english([texts[i] for i in indices], language)):
+                translated[index] = translated_text
+        return self._parse_all(texts, translated, detected, errors, native, self._classify_many(texts), sender_country_code)
+
+    async def parse_intents_async(self, texts: List[str], sender_country_code: str = None) -> List[dict]:
+        """parse_intents for the event loop, with the same executors and fallbacks as parse_intent_async.
+
+        Language groups are translated concurrently, each under its own deadline, while the
+        intents are classified on the detection pool.
+        """
+        loop = asyncio.get_running_loop()
+        intents_future = loop.run_in_executor(NLP_DETECT_EXECUTOR, self._classify_many, texts)
+        try:
+            detected, errors, native = await asyncio.wait_for(
+                loop.run_in_executor(NLP_DETECT_EXECUTOR, self._detect_and_resolve, texts),
+                NLP_BATCH_DEADLINE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning("[NLP] Batch language detection missed its %ss deadline. Assuming English.", NLP_BATCH_DEADLINE_SECONDS)
+            detected, errors, native = ["en"] * len(texts), {}, {}
+
+        groups = list(self._translation_groups(detected, native).items())
+        translations = await asyncio.gather(*(
+            asyncio.wait_for(
+                loop.run_in_executor(NLP_TRANSLATE_EXECUTOR, self._translate_many_to_english, [texts[i] for i in indices], language),
+                NLP_BATCH_DEADLINE_SECONDS
+            )
+            for language, indices in groups
+        ), return_exceptions=True)
+
+        translated = list(texts)
+        for (language, indices), group_translation in zip(groups, translations):
+            if isinstance(group_translation, asyncio.TimeoutError):
+                logger.warning("[NLP] Batch translation from %s missed its %ss deadline. Parsing untranslated texts.", language, NLP_BATCH_DEADLINE_SECONDS)
+                continue
+            if isinstance(group_translation, BaseException):
+                raise group_translation
+            for index, translated_text in zip(indices, group_translation):
+                translated[index] = translated_text
+
+        try:
+            intents = await asyncio.wait_for(intents_future, NLP_BATCH_DEADLINE_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("[NLP] Batch intent classification missed its %ss deadline. Assuming payment.", NLP_BATCH_DEADLINE_SECONDS)
+            intents = [("payment", None)] * len(texts)
+        return self._parse_all(texts, translated, detected, errors, native, intents, sender_country_code)
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s") # Show the per-stage trace lines
     parser = NLPIntentParser()
     
     test_phrases = [
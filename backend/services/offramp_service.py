@@ -2,6 +2,8 @@ import time
 import json
 from typing import Dict, List, Optional, Union, Any
 
+from .rate_provider import RATE_PROVIDER
+
 # Mock data for initial development or if API fails
 MOCK_OFFRAMP_PROVIDERS = {
     "flutterwave_mock": {
@@ -32,17 +34,6 @@ MOCK_OFFRAMP_PROVIDERS = {
     }
 }
 
-# Mock exchange rates (USDC to Fiat)
-# In a real scenario, this would come from the ExchangeRateUtil or the provider itself
-MOCK_USDC_TO_FIAT_RATES = {
-    "USDC_NGN": 1520.00,
-    "USDC_KES": 129.50,
-    "USDC_GHS": 141.00,
-    "USDC_ZAR": 18.50,
-    "USDC_UGX": 3800.00,
-    "USDC_TZS": 2500.00
-}
-
 class OffRampService:
     def __init__(self, use_mock: bool = True, preferred_provider: str = "flutterwave_mock"):
         self.use_mock = use_mock
@@ -89,7 +80,7 @@ class OffRampService:
         net_usdc_to_convert = usdc_amount - total_fee_usdc
 
         exchange_rate_pair = f"USDC_{target_currency}"
-        exchange_rate = MOCK_USDC_TO_FIAT_RATES.get(exchange_rate_pair)
+        exchange_rate = RATE_PROVIDER.rate("USDC", target_currency)
 
         if exchange_rate is None:
             return {"error": f"Exchange rate for {exchange_rate_pair} not available."}
@@ -3,6 +3,8 @@ import json
 import time
 from typing import Dict, List, Optional, Union, Any
 
+from .rate_provider import RATE_PROVIDER
+
 # Mock data for initial development or if API fails
 MOCK_ONRAMP_PROVIDERS = {
     "binance_p2p": {
@@ -188,19 +190,9 @@ class OnRampService:
             if "error" in fee_info:
                 return {"error": fee_info["error"]}
             
-            # Mock exchange rate (this would come from exchange_rates.py in production)
-            mock_exchange_rates = {
-                "NGN_USDC": 0.00065,
-                "KES_USDC": 0.0077,
-                "GHS_USDC": 0.0070,
-                "ZAR_USDC": 0.055,
-                "ETB_USDC": 0.018,
-                "TZS_USDC": 0.00039,
-                "UGX_USDC": 0.00026,
-                "RWF_USDC": 0.00085
-            }
-            
-            exchange_rate = mock_exchange_rates.get(f"{currency.upper()}_USDC", 0.0001)
+            exchange_rate = RATE_PROVIDER.rate(currency, "USDC")
+            if exchange_rate is None:
+                return {"error": f"Exchange rate for {currency.upper()}_USDC not available."}
             usdc_amount = (amount - fee_info["total_fee"]) * exchange_rate
             
             # Mock payment instructions
@@ -0,0 +1,381 @@
+import fcntl
+import math
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Append-only history of the rates fetched for each currency pair, on disk.
+#
+# Each pair has a directory of segment files, written through a memory map. A segment is
+# a 64-byte header followed by two columns of up to `capacity` points:
+#   times  uint32  whole seconds since the segment's base_time
+#   ticks  int16   log(rate) - ref_log in steps of RATE_HISTORY_LOG_TICK (0.001% of the
+#                  rate), ref_log being the log of the segment's first rate
+# i.e. 6 bytes a point, about 6 MB per million points. A new segment is started when the
+# active one is full or a rate moves more than about 39% from its reference (the int16
+# range); a segment that is left is compacted to the points it holds. Only the newest
+# RATE_HISTORY_MAX_SEGMENTS segments of a pair are kept.
+#
+# Queries map the segments read-only and only touch the ones overlapping the requested
+# range; within a segment the time column is binary-searched in place, so a range query
+# reads just the pages it returns. Downsampling and statistics run on the decoded arrays
+# with NumPy. Points must arrive in time order per pair (late ones are counted and dropped).
+#
+# Every uvicorn worker refreshes rates and appends to the same directories, so writers are
+# serialized across processes by an flock on the pair's lock file, which also holds the
+# number of the next segment to create. A process that finds that number changed since it
+# last looked (another worker rotated) re-reads the segment list before writing; the point
+# counts themselves live in the shared segment headers. New segments are written whole to a
+# temporary file and linked into place, which fails rather than replacing an existing one.
+
+RATE_HISTORY_DIR = os.environ.get("RATE_HISTORY_DIR", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "rate_history"))
+RATE_HISTORY_SEGMENT_POINTS = 1 << 18 # 1.5 MB per full segment
+RATE_HISTORY_MAX_SEGMENTS = 64 # Per pair: about 16.7M points
+RATE_HISTORY_LOG_TICK = 1e-5
+RATE_HISTORY_VOLATILITY_INTERVAL_SECONDS = 3600 # Returns are taken between hourly closes
+RATE_HISTORY_LOCK_FILE = "writer.lock" # Per pair directory: flock for writers, next segment number
+_SECONDS_PER_YEAR = 365 * 24 * 3600
+
+_HEADER = np.dtype([("magic", "S4"), ("version", "<u2"), ("reserved", "<u2"), ("capacity", "<u4"), ("count", "<u4"),
+                    ("base_time", "<f8"), ("ref_log", "<f8"), ("tick", "<f8")])
+_HEADER_BYTES = 64
+_MAGIC = b"RTHS"
+_MAX_OFFSET = np.iinfo(np.uint32).max
+_MAX_TICK = np.iinfo(np.int16).max
+_PAIR_RE = re.compile(r"^[A-Z0-9_]+$")
+
+
+def _bars(times: np.ndarray, rates: np.ndarray, origin: float, bucket_seconds: float) -> Dict[str, np.ndarray]:
+    if not len(times):
+        empty = np.empty(0)
+        return {"bucket_start": empty, "open": empty, "high": empty, "low": empty, "close": empty,
+                "mean": empty, "count": np.empty(0, dtype=np.int64)}
+    buckets = np.floor((times - origin) / bucket_seconds).astype(np.int64)
+    firsts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    lasts = np.concatenate((firsts[1:] - 1, [len(times) - 1]))
+    counts = lasts - firsts + 1
+    return {
+        "bucket_start": origin + buckets[firsts] * bucket_seconds,
+        "open": rates[firsts],
+        "high": np.maximum.reduceat(rates, firsts),
+        "low": np.minimum.reduceat(rates, firsts),
+        "close": rates[lasts],
+        "mean": np.add.reduceat(rates, firsts) / counts,
+        "count": counts,
+    }
+
+
+class _Segment:
+    """One memory-mapped segment file."""
+
+    def __init__(self, path: str, writable: bool):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r+" if writable else "r")
+        self.header = self._map[:_HEADER.itemsize].view(_HEADER)[0:1]
+        capacity = int(self.header["capacity"][0])
+        self.times = self._map[_HEADER_BYTES:_HEADER_BYTES + 4 * capacity].view("<u4")
+        self.ticks = self._map[_HEADER_BYTES + 4 * capacity:_HEADER_BYTES + 6 * capacity].view("<i2")
+        self.base_time = float(self.header["base_time"][0])
+        self.ref_log = float(self.header["ref_log"][0])
+        self.tick = float(self.header["tick"][0])
+        self.capacity = capacity
+
+    @classmethod
+    def create(cls, path: str, capacity: int, base_time: float, ref_log: float) -> "_Segment":
+        """Writes a new empty segment; raises FileExistsError rather than replacing one."""
+        header = np.zeros(1, dtype=_HEADER)
+        header[0] = (_MAGIC, 1, 0, capacity, 0, base_time, ref_log, RATE_HISTORY_LOG_TICK)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(header.tobytes())
+            f.truncate(_HEADER_BYTES + 6 * capacity)
+        try:
+            os.link(temporary, path) # Readers never see a segment without its header
+        finally:
+            os.remove(temporary)
+        return cls(path, writable=True)
+
+    @property
+    def count(self) -> int:
+        return int(self.header["count"][0])
+
+    @property
+    def first_time(self) -> float:
+        return self.base_time + float(self.times[0]) if self.count else self.base_time
+
+    @property
+    def last_time(self) -> float:
+        count = self.count
+        return self.base_time + float(self.times[count - 1]) if count else self.base_time
+
+    def encode(self, timestamp: float, log_rate: float) -> Optional[Tuple[int, int]]:
+        """(time offset, tick) of a point, or None if it does not fit this segment."""
+        offset = int(timestamp - self.base_time)
+        tick = round((log_rate - self.ref_log) / self.tick)
+        if self.count >= self.capacity or not 0 <= offset <= _MAX_OFFSET or abs(tick) > _MAX_TICK:
+            return None
+        return offset, tick
+
+    def append(self, offset: int, tick: int):
+        count = self.count
+        self.times[count] = offset
+        self.ticks[count] = tick
+        self.header["count"] = count + 1 # After the point, so a reader never sees a half-written one
+
+    def slice(self, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, rates) of the points with start <= timestamp <= end."""
+        count = self.count
+        times = self.times[:count]
+        # Bounds become uint32 keys so the search runs on the mapped column without converting it
+        if start <= self.base_time:
+            lo = 0
+        elif start - self.base_time > _MAX_OFFSET:
+            lo = count
+        else:
+            lo = int(np.searchsorted(times, np.uint32(math.ceil(start - self.base_time)), side="left"))
+        if end < self.base_time:
+            hi = 0
+        elif end - self.base_time >= _MAX_OFFSET:
+            hi = count
+        else:
+            hi = int(np.searchsorted(times, np.uint32(math.floor(end - self.base_time)), side="right"))
+        return (self.base_time + times[lo:hi].astype(np.float64),
+                np.exp(self.ref_log + self.ticks[lo:hi].astype(np.float64) * self.tick))
+
+    def rate_at(self, timestamp: float) -> Optional[float]:
+        """Rate of the last point at or before timestamp, or None if there is none in this segment."""
+        if timestamp < self.base_time:
+            return None
+        key = np.uint32(min(math.floor(timestamp - self.base_time), _MAX_OFFSET))
+        index = int(np.searchsorted(self.times[:self.count], key, side="right")) - 1
+        return math.exp(self.ref_log + int(self.ticks[index]) * self.tick) if index >= 0 else None
+
+    def compact(self) -> "_Segment":
+        """Rewrites the segment with capacity equal to its count; returns it reopened read-only."""
+        count = self.count
+        header = self.header.copy()
+        header["capacity"] = count
+        data = header.tobytes().ljust(_HEADER_BYTES, b"\0") + self.times[:count].tobytes() + self.ticks[:count].tobytes()
+        self._map.flush()
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, self.path)
+        return _Segment(self.path, writable=False)
+
+    def nbytes(self) -> int:
+        return _HEADER_BYTES + 6 * self.capacity
+
+
+class RateSeries:
+    """History of one currency pair."""
+
+    def __init__(self, directory: str, segment_points: int = RATE_HISTORY_SEGMENT_POINTS,
+                 max_segments: int = RATE_HISTORY_MAX_SEGMENTS):
+        self.directory = directory
+        self.segment_points = segment_points
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        self._next_number = 0
+        self._lock_fd = None
+        self._lock_pid = None
+        self.counters = {"appended": 0, "out_of_order": 0, "invalid": 0, "segments_rotated": 0, "segments_dropped": 0}
+        self._load()
+
+    def _load(self):
+        """Reads the segment list from the directory; the newest segment stays writable until full."""
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(".seg")) if os.path.isdir(self.directory) else []
+        segments = []
+        for k, name in enumerate(names):
+            try:
+                segment = _Segment(os.path.join(self.directory, name), writable=False)
+                if k == len(names) - 1 and segment.count < segment.capacity:
+                    segment = _Segment(segment.path, writable=True) # Unfinished: keep appending to it
+            except FileNotFoundError: # Dropped by another process meanwhile
+                continue
+            segments.append(segment)
+        self._segments = segments
+        self._next_number = int(names[-1].split(".")[0]) + 1 if names else 0
+
+    def _lock_file(self, create: bool) -> Optional[int]:
+        """Descriptor of the pair's lock file, opened once per process (a forked child must not share its flock)."""
+        if self._lock_pid != os.getpid():
+            if not create and not os.path.isdir(self.directory):
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_fd = os.open(os.path.join(self.directory, RATE_HISTORY_LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+            self._lock_pid = os.getpid()
+        return self._lock_fd
+
+    def _sync(self, fd: int, writer: bool):
+        """Re-reads the segments if another process rotated since this one last looked."""
+        data = os.pread(fd, 8, 0)
+        next_number = int.from_bytes(data, "little") if len(data) == 8 else -1
+        if next_number != self._next_number:
+            self._load()
+            if writer and next_number != self._next_number: # Lock file older than the segments
+                os.pwrite(fd, self._next_number.to_bytes(8, "little"), 0)
+
+    def _refresh(self):
+        """Picks up segments rotated by other processes before a query (called with self._lock held)."""
+        fd = self._lock_file(create=False)
+        if fd is not None:
+            self._sync(fd, writer=False)
+
+    def _rotate(self, timestamp: float, log_rate: float) -> _Segment:
+        if self._segments and self._segments[-1].header.flags.writeable: # Seal the active segment
+            active = self._segments[-1]
+            if active.count < active.capacity:
+                self._segments[-1] = active.compact()
+            else:
+                active._map.flush()
+                self._segments[-1] = _Segment(active.path, writable=False)
+        path = os.path.join(self.directory, f"{self._next_number:08d}.seg")
+        self._next_number += 1
+        segment = _Segment.create(path, self.segment_points, float(math.floor(timestamp)), log_rate)
+        self._segments.append(segment)
+        self.counters["segments_rotated"] += 1
+        while len(self._segments) > self.max_segments:
+            dropped = self._segments.pop(0)
+            os.remove(dropped.path)
+            self.counters["segments_dropped"] += 1
+        os.pwrite(self._lock_fd, self._next_number.to_bytes(8, "little"), 0) # Tells the other processes to re-read
+        return segment
+
+    def append(self, timestamp: float, rate: float) -> bool:
+        """Adds a point; False if the rate is not a positive number or the point is older than the last one."""
+        if not rate > 0 or not math.isfinite(rate) or not math.isfinite(timestamp):
+            self.counters["invalid"] += 1
+            return False
+        log_rate = math.log(rate)
+        with self._lock:
+            fd = self._lock_file(create=True)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                self._sync(fd, writer=True)
+                active = self._segments[-1] if self._segments else None
+                if active is not None and active.count and timestamp < active.last_time:
+                    self.counters["out_of_order"] += 1
+                    return False
+                encoded = active.encode(timestamp, log_rate) if active is not None and active.header.flags.writeable else None
+                if encoded is None:
+                    active = self._rotate(timestamp, log_rate)
+                    encoded = active.encode(timestamp, log_rate)
+                active.append(*encoded)
+                self.counters["appended"] += 1
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        return True
+
+    def range(self, start: float = -math.inf, end: float = math.inf) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, rates) of every point with start <= timestamp <= end, oldest first."""
+        with self._lock:
+            self._refresh()
+            segments = list(self._segments)
+        parts = [segment.slice(start, end) for segment in segments
+                 if segment.count and segment.first_time <= end and segment.last_time >= start]
+        if not parts:
+            return np.empty(0), np.empty(0)
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def at(self, timestamp: float) -> Optional[float]:
+        """Rate in force at timestamp (the last point at or before it), or None before the first point."""
+        with self._lock:
+            self._refresh()
+            segments = list(self._segments)
+        for segment in reversed(segments):
+            rate = segment.rate_at(timestamp) if segment.count else None
+            if rate is not None:
+                return rate
+        return None
+
+    def downsample(self, start: float, end: float, bucket_seconds: float) -> Dict[str, np.ndarray]:
+        """Open/high/low/close/mean/count per bucket_seconds bucket (empty buckets are left out)."""
+        times, rates = self.range(start, end)
+        return _bars(times, rates, start if math.isfinite(start) else (times[0] if len(times) else 0.0), bucket_seconds)
+
+    def stats(self, start: float = -math.inf, end: float = math.inf, percentiles=(5, 50, 95),
+              interval_seconds: float = RATE_HISTORY_VOLATILITY_INTERVAL_SECONDS) -> dict:
+        """Summary of the points in [start, end]: range, mean, percentiles and volatility.
+
+        Volatility is the standard deviation of log returns between interval_seconds closes,
+        also annualized.
+        """
+        times, rates = self.range(start, end)
+        if not len(rates):
+            return {"count": 0}
+        closes = _bars(times, rates, times[0], interval_seconds)["close"]
+        returns = np.diff(np.log(closes))
+        volatility = float(np.std(returns, ddof=1)) if len(returns) > 1 else 0.0
+        return {
+            "count": int(len(rates)),
+            "first_time": float(times[0]),
+            "last_time": float(times[-1]),
+            "min": float(rates.min()),
+            "max": float(rates.max()),
+            "mean": float(rates.mean()),
+            "percentiles": {f"p{p:g}": float(v) for p, v in zip(percentiles, np.percentile(rates, percentiles))},
+            "interval_seconds": interval_seconds,
+            "return_volatility": volatility,
+            "annualized_volatility": volatility * math.sqrt(_SECONDS_PER_YEAR / interval_seconds),
+        }
+
+    def info(self) -> dict:
+        with self._lock:
+            self._refresh()
+            segments = list(self._segments)
+            counters = dict(self.counters)
+        return dict(counters, segments=len(segments), points=sum(s.count for s in segments),
+                    bytes=sum(s.nbytes() for s in segments))
+
+    def flush(self):
+        with self._lock:
+            if self._segments and self._segments[-1].header.flags.writeable:
+                self._segments[-1]._map.flush()
+
+
+class RateHistoryStore:
+    """Rate series by pair name (e.g. "NGN_USDC_BUY"), one directory each under root."""
+
+    def __init__(self, root: str = RATE_HISTORY_DIR, segment_points: int = RATE_HISTORY_SEGMENT_POINTS,
+                 max_segments: int = RATE_HISTORY_MAX_SEGMENTS):
+        self.root = root
+        self.segment_points = segment_points
+        self.max_segments = max_segments
+        self._series: Dict[str, RateSeries] = {}
+        self._lock = threading.Lock()
+
+    def series(self, pair: str) -> RateSeries:
+        pair = pair.upper()
+        if not _PAIR_RE.match(pair):
+            raise ValueError(f"Invalid pair name {pair!r}")
+        with self._lock:
+            series = self._series.get(pair)
+            if series is None:
+                series = self._series[pair] = RateSeries(os.path.join(self.root, pair), self.segment_points, self.max_segments)
+            return series
+
+    def append(self, pair: str, timestamp: float, rate: float) -> bool:
+        return self.series(pair).append(timestamp, rate)
+
+    def pairs(self) -> List[str]:
+        on_disk = set(os.listdir(self.root)) if os.path.isdir(self.root) else set()
+        with self._lock:
+            return sorted(on_disk | set(self._series))
+
+    def stats(self) -> Dict[str, dict]:
+        return {pair: self.series(pair).info() for pair in self.pairs()}
+
+    def flush(self):
+        with self._lock:
+            series = list(self._series.values())
+        for s in series:
+            s.flush()
+
+
+RATE_HISTORY = RateHistoryStore()
@@ -0,0 +1,158 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+# Single source of exchange rates for the on-ramp, off-ramp and vault services and the
+# mock fallback of ExchangeRateUtil (each of which used to keep its own, disagreeing table).
+#
+# Rates are held as mid rates per US dollar plus a half-spread per currency; a RateMatrix
+# precomputes every pair from them:
+#   mid[i, j] = units of j per unit of i, i.e. per_usd[j] / per_usd[i];
+#   bid[i, j] = units of j received for 1 unit of i (converting i -> j). Each currency's
+#               half-spread is charged once, so a cross pair such as KES -> GHS costs what
+#               KES -> USD -> GHS would, without doing two conversions;
+#   ask[i, j] = units of j paid for 1 unit of i, = 1 / bid[j, i], so buying and selling
+#               back never makes money.
+# A pair is then two dict lookups and an array read, and convert_many converts whole
+# arrays of amounts in one vectorized gather. The matrix is immutable: RateProvider
+# builds a new one when rates are updated and swaps it in with a single assignment, so
+# callers that take current() once see a consistent set of rates.
+
+RATE_CURRENCIES = ("USD", "USDC", "NGN", "KES", "GHS", "ZAR", "ETB", "TZS", "UGX", "RWF")
+MOCK_MID_RATES_PER_USD = {
+    "USD": 1.0,
+    "USDC": 1.0,
+    "NGN": 1530.0,
+    "KES": 130.0,
+    "GHS": 142.0,
+    "ZAR": 18.5,
+    "ETB": 56.0,
+    "TZS": 2560.0,
+    "UGX": 3800.0,
+    "RWF": 1180.0,
+}
+MOCK_HALF_SPREADS = { # Fraction of the mid rate charged per side on conversions into or out of the currency
+    "USD": 0.0,
+    "USDC": 0.0005,
+    "NGN": 0.006,
+    "KES": 0.004,
+    "GHS": 0.005,
+    "ZAR": 0.003,
+    "ETB": 0.01,
+    "TZS": 0.006,
+    "UGX": 0.006,
+    "RWF": 0.008,
+}
+
+
+class RateMatrix:
+    """Immutable mid/bid/ask rates between every pair of currencies."""
+
+    def __init__(self, per_usd: Dict[str, float], half_spreads: Dict[str, float],
+                 currencies: Sequence[str] = RATE_CURRENCIES, updated_at: Optional[float] = None):
+        self.currencies = tuple(currencies)
+        self.index = {code: i for i, code in enumerate(self.currencies)}
+        order = np.argsort(np.array(self.currencies))
+        self._sorted_codes = np.array(self.currencies)[order] # For vectorized code -> index lookups
+        self._sorted_to_index = order.astype(np.intp)
+        per_usd_vector = np.array([per_usd[code] for code in self.currencies], dtype=np.float64)
+        keep = 1.0 - np.array([half_spreads.get(code, 0.0) for code in self.currencies], dtype=np.float64)
+        if (per_usd_vector <= 0).any() or (keep <= 0).any():
+            raise ValueError("Rates must be positive and half-spreads below 1")
+        self.mid = per_usd_vector[None, :] / per_usd_vector[:, None]
+        self.bid = self.mid * keep[:, None] * keep[None, :]
+        self.ask = 1.0 / self.bid.T
+        for matrix in (self.mid, self.bid, self.ask):
+            np.fill_diagonal(matrix, 1.0) # Converting a currency to itself is free
+            matrix.setflags(write=False)
+        self.updated_at = updated_at if updated_at is not None else time.time()
+
+    def _matrix(self, side: str) -> np.ndarray:
+        if side == "bid":
+            return self.bid
+        if side == "ask":
+            return self.ask
+        if side == "mid":
+            return self.mid
+        raise ValueError(f"Unknown rate side {side!r}")
+
+    def rate(self, from_currency: str, to_currency: str, side: str = "bid") -> Optional[float]:
+        """Rate of from_currency in to_currency (None if either is not supported).
+
+        side: "bid" for converting from_currency into to_currency, "ask" for the price of
+        one unit of from_currency paid in to_currency, "mid" for the rate without spread.
+        """
+        i = self.index.get(from_currency.upper())
+        j = self.index.get(to_currency.upper())
+        if i is None or j is None:
+            return None
+        return float(self._matrix(side)[i, j])
+
+    def indices(self, codes: Union[str, Iterable[str], np.ndarray]) -> np.ndarray:
+        """Matrix indices of currency codes (integer arrays pass through as indices).
+
+        Raises KeyError naming an unsupported code.
+        """
+        if isinstance(codes, str):
+            return np.intp(self.index[codes.upper()])
+        codes = np.asarray(codes if isinstance(codes, np.ndarray) else list(codes))
+        if np.issubdtype(codes.dtype, np.integer):
+            return codes
+        codes = codes.astype(str)
+        positions = np.searchsorted(self._sorted_codes, codes).clip(0, len(self._sorted_codes) - 1)
+        unknown = self._sorted_codes[positions] != codes
+        if unknown.any(): # Lower-case or unsupported codes: retry the upper-cased ones
+            codes = codes.copy()
+            codes[unknown] = np.char.upper(codes[unknown])
+            positions[unknown] = np.searchsorted(self._sorted_codes, codes[unknown]).clip(0, len(self._sorted_codes) - 1)
+            unknown = self._sorted_codes[positions] != codes
+            if unknown.any():
+                raise KeyError(str(codes[unknown][0]))
+        return self._sorted_to_index[positions]
+
+    def convert_many(self, amounts, from_currencies, to_currencies, side: str = "bid") -> np.ndarray:
+        """Converts an array of amounts; currencies are one code for all or one per amount."""
+        amounts = np.asarray(amounts, dtype=np.float64)
+        return amounts * self._matrix(side)[self.indices(from_currencies), self.indices(to_currencies)]
+
+    def to_dict(self) -> dict:
+        return {
+            "currencies": list(self.currencies),
+            "mid_per_usd": {code: float(self.mid[self.index["USD"], i]) for i, code in enumerate(self.currencies)},
+            "updated_at": self.updated_at,
+        }
+
+
+class RateProvider:
+    """Holds the current RateMatrix and rebuilds it when rates change."""
+
+    def __init__(self, per_usd: Dict[str, float] = None, half_spreads: Dict[str, float] = None,
+                 currencies: Sequence[str] = RATE_CURRENCIES):
+        self._per_usd = dict(per_usd or MOCK_MID_RATES_PER_USD)
+        self._half_spreads = dict(half_spreads or MOCK_HALF_SPREADS)
+        self._currencies = tuple(currencies)
+        self._lock = threading.Lock()
+        self._matrix = RateMatrix(self._per_usd, self._half_spreads, self._currencies)
+
+    def current(self) -> RateMatrix:
+        return self._matrix
+
+    def update_rates(self, per_usd: Dict[str, float] = None, half_spreads: Dict[str, float] = None) -> RateMatrix:
+        """Replaces some mid rates (units per USD) and/or half-spreads and swaps in a new matrix."""
+        with self._lock:
+            new_per_usd = dict(self._per_usd, **{k.upper(): v for k, v in (per_usd or {}).items()})
+            new_half_spreads = dict(self._half_spreads, **{k.upper(): v for k, v in (half_spreads or {}).items()})
+            matrix = RateMatrix(new_per_usd, new_half_spreads, self._currencies) # Raises before anything changes
+            self._per_usd, self._half_spreads, self._matrix = new_per_usd, new_half_spreads, matrix
+        return matrix
+
+    def rate(self, from_currency: str, to_currency: str, side: str = "bid") -> Optional[float]:
+        return self._matrix.rate(from_currency, to_currency, side)
+
+    def convert_many(self, amounts, from_currencies, to_currencies, side: str = "bid") -> np.ndarray:
+        return self._matrix.convert_many(amounts, from_currencies, to_currencies, side)
+
+
+RATE_PROVIDER = RateProvider()
@@ -0,0 +1,345 @@
+import difflib
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, List, Optional
+
+from .fraud_detection_service import FRAUD_AMOUNT_CURRENCY, FRAUD_RULES, FraudDetectionService
+from .fraud_state import BoundedUserState
+from .gazetteer import Gazetteer
+
+# Two-tier risk scoring.
+#
+# The fast tier is FraudDetectionService.assess_transaction_risk (state updates and the
+# compiled rules). It runs on FRAUD_FAST_EXECUTOR and the caller waits at most
+# FRAUD_FAST_DEADLINE_SECONDS for it; the answer is a provisional verdict, or "pending"
+# when the fast tier overran (it keeps running and its result still counts). Every
+# assessment is then queued for the deep tier: FRAUD_DEEP_WORKERS background threads
+# that wait for the fast result, run the deep checks (slower checks such as fuzzy
+# matching; each returns a weight and a reason, or None) and publish the final verdict:
+# fast score plus deep weights, suspicious at the rule set's suspicious_score.
+#
+# Verdicts are kept in memory by assessment id (and the latest per user) for
+# FRAUD_VERDICT_TTL_SECONDS, together with the amount, currency and recipient assessed.
+# The initiate endpoints call authorize before moving funds: only the user's latest
+# assessment counts, its final verdict must be clean, the transfer must go to the assessed
+# recipient for at most the assessed USD value, and each verdict authorizes one transfer.
+# No verdict (never assessed, expired, or assessed by another worker) means no transfer.
+# When the queue is full the deep tier is skipped and the final verdict is the fast one,
+# marked deep_checks_skipped; it is published when the fast tier finishes, without holding
+# up the request. Verdicts live in this process, like the in-process fraud state.
+
+FRAUD_FAST_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fraud-fast")
+FRAUD_FAST_DEADLINE_SECONDS = 0.05
+FRAUD_DEEP_WORKERS = 2
+FRAUD_DEEP_QUEUE_SIZE = 10000
+FRAUD_VERDICT_TTL_SECONDS = 600
+FRAUD_VERDICT_MAX_ENTRIES = 100000
+FRAUD_FINAL_VERDICT_WAIT_SECONDS = 2.0 # How long an initiate request waits for a pending final verdict
+FRAUD_VERDICT_AMOUNT_TOLERANCE = 0.01 # Fraction by which an initiated USD value may exceed the assessed one (rounding)
+RISK_LATENCY_SAMPLES = 2048 # Recent latencies kept per tier for the percentiles
+
+# Deep check: paying a recipient whose id looks like, but is not, one the user paid recently
+# (a typo, or a look-alike account slipped into the conversation). Ids that differ only in
+# their digits (recipient_1, recipient_2; account numbers) are distinct accounts, not look-alikes.
+RECIPIENT_LOOKALIKE_MIN_RATIO = 0.85
+RECIPIENT_LOOKALIKE_WEIGHT = 50
+RECIPIENT_HISTORY_LENGTH = 20
+RECIPIENT_HISTORY_IDLE_SECONDS = 7 * 24 * 3600
+_DIGITS_RE = re.compile(r"\d+")
+
+
+class LatencyWindow:
+    """Percentiles over the most recent latency samples."""
+
+    def __init__(self, samples: int = RISK_LATENCY_SAMPLES):
+        self._samples = deque(maxlen=samples)
+        self.count = 0
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def stats(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1e3, 3)
+        return {"count": self.count, "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+                "max_ms": round(samples[-1] * 1e3, 3)}
+
+
+class RecipientLookalikeCheck:
+    """Deep check: the recipient id is a near miss of one the user paid recently."""
+
+    name = "recipient_lookalike"
+
+    def __init__(self, min_ratio: float = RECIPIENT_LOOKALIKE_MIN_RATIO, weight: int = RECIPIENT_LOOKALIKE_WEIGHT):
+        self.min_ratio = min_ratio
+        self.weight = weight
+        self.recipients = BoundedUserState(lambda: deque(maxlen=RECIPIENT_HISTORY_LENGTH),
+                                           lambda history: 100 * len(history), RECIPIENT_HISTORY_IDLE_SECONDS)
+        self._lock = threading.Lock()
+
+    def __call__(self, request: dict) -> Optional[tuple]:
+        recipient = Gazetteer.fold(request["recipient_id"]).strip()
+        with self._lock:
+            history = self.recipients.get(request["user_id"], request["timestamp"])
+            previous = list(history)
+            if recipient not in history:
+                history.append(recipient)
+        if recipient in previous:
+            return None
+        matcher = difflib.SequenceMatcher(None, b=recipient) # b is the side difflib indexes once
+        letters = _DIGITS_RE.sub("", recipient)
+        for other in previous:
+            if _DIGITS_RE.sub("", other) == letters:
+                continue
+            matcher.set_seq1(other)
+            if matcher.real_quick_ratio() >= self.min_ratio and matcher.quick_ratio() >= self.min_ratio:
+                ratio = matcher.ratio()
+                if ratio >= self.min_ratio:
+                    return self.weight, (f"Recipient '{request['recipient_id']}' looks like previous recipient "
+                                         f"'{other}' (similarity {ratio:.2f}).")
+        return None
+
+
+class RiskPipeline:
+    """Fast provisional scoring plus a background queue publishing final verdicts."""
+
+    def __init__(self, service_factory: Callable[[], FraudDetectionService] = FraudDetectionService,
+                 deep_checks: Optional[List[Callable[[dict], Optional[tuple]]]] = None,
+                 workers: int = FRAUD_DEEP_WORKERS, queue_size: int = FRAUD_DEEP_QUEUE_SIZE,
+                 fast_deadline: float = FRAUD_FAST_DEADLINE_SECONDS):
+        """
+        Args:
+            service_factory: Builds the FraudDetectionService of the fast tier.
+            deep_checks: Callables request -> (weight, reason) or None; request has user_id,
+                command_text, amount, currency, recipient_id and timestamp.
+            workers: Background threads running the deep checks.
+            queue_size: Assessments waiting for the deep tier before it is skipped.
+            fast_deadline: Seconds the caller waits for the fast tier.
+        """
+        self.service_factory = service_factory
+        self.deep_checks = deep_checks if deep_checks is not None else [RecipientLookalikeCheck()]
+        self.workers = workers
+        self.fast_deadline = fast_deadline
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._verdicts: "OrderedDict[str, dict]" = OrderedDict()
+        self._latest_by_user = {}
+        self._lock = threading.Lock()
+        self._finalized = threading.Condition(self._lock)
+        self._threads = []
+        self.fast_latency = LatencyWindow()
+        self.deep_latency = LatencyWindow()
+        self.end_to_end_latency = LatencyWindow() # Submission to final verdict
+        self.counters = {"submitted": 0, "finalized": 0, "fast_deadline_overruns": 0, "deep_skipped_queue_full": 0,
+                         "deep_check_errors": 0, "fast_tier_errors": 0}
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _start_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"fraud-deep-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run_fast(self, request: dict, started: float) -> dict:
+        try:
+            return self.service_factory().assess_transaction_risk(
+                request["user_id"], request["command_text"], request["amount"], request["recipient_id"], request["currency"])
+        finally:
+            self.fast_latency.add(time.perf_counter() - started)
+
+    def assess(self, user_id: str, command_text: str, amount: float, recipient_id: str,
+               currency: str = FRAUD_AMOUNT_CURRENCY) -> dict:
+        """Provisional verdict within the fast deadline; the final one follows from the deep tier."""
+        self._start_workers()
+        started = time.perf_counter()
+        request = {"user_id": user_id, "command_text": command_text, "amount": amount, "currency": currency,
+                   "recipient_id": recipient_id, "timestamp": time.time()}
+        assessment_id = uuid.uuid4().hex
+        future = FRAUD_FAST_EXECUTOR.submit(self._run_fast, request, started)
+        try:
+            fast = future.result(timeout=self.fast_deadline)
+            verdict = dict(fast, status="provisional")
+        except FutureTimeoutError:
+            self._count("fast_deadline_overruns")
+            print(f"[FRAUD_PIPELINE] Fast checks for user {user_id} exceeded {self.fast_deadline * 1e3:.0f} ms; verdict pending")
+            verdict = {"user_id": user_id, "is_suspicious": False, "risk_score": 0, "matched_rules": [],
+                       "reasons": ["Fast checks still running; the final verdict decides."],
+                       "timestamp": request["timestamp"], "status": "pending"}
+        verdict["assessment_id"] = assessment_id
+        self._store(assessment_id, request, verdict)
+
+        try:
+            self._queue.put_nowait((assessment_id, request, future, started))
+        except queue.Full:
+            self._count("deep_skipped_queue_full")
+            print(f"[FRAUD_PIPELINE] Deep check queue full; final verdict for {assessment_id} uses the fast tier only")
+            # Published by whichever thread completes the fast tier (this one if it already has)
+            future.add_done_callback(lambda done: self._finalize(assessment_id, request, done, [], started,
+                                                                 deep_checks_skipped=True))
+        return dict(verdict)
+
+    def _store(self, assessment_id: str, request: dict, verdict: dict):
+        with self._lock:
+            self.counters["submitted"] += 1
+            self._verdicts[assessment_id] = {"verdict": verdict, "final": None, "request": request, "used": False,
+                                             "stored_at": time.monotonic()}
+            self._latest_by_user[request["user_id"]] = assessment_id
+            self._expire()
+
+    def _expire(self):
+        cutoff = time.monotonic() - FRAUD_VERDICT_TTL_SECONDS
+        while self._verdicts:
+            assessment_id, entry = next(iter(self._verdicts.items()))
+            if entry["stored_at"] >= cutoff and len(self._verdicts) <= FRAUD_VERDICT_MAX_ENTRIES:
+                break
+            del self._verdicts[assessment_id]
+            user_id = entry["verdict"]["user_id"]
+            if self._latest_by_user.get(user_id) == assessment_id:
+                del self._latest_by_user[user_id]
+
+    def _work(self):
+        while True:
+            assessment_id, request, future, started = self._queue.get()
+            try:
+                deep_started = time.perf_counter()
+                hits = []
+                for check in self.deep_checks:
+                    try:
+                        hit = check(request)
+                    except Exception as e:
+                        self._count("deep_check_errors")
+                        print(f"[FRAUD_PIPELINE] Deep check {getattr(check, 'name', check)} failed: {e}")
+                        continue
+                    if hit is not None:
+                        hits.append((getattr(check, "name", type(check).__name__),) + tuple(hit))
+                self.deep_latency.add(time.perf_counter() - deep_started)
+                self._finalize(assessment_id, request, future, hits, started)
+            finally:
+                self._queue.task_done()
+
+    def _finalize(self, assessment_id: str, request: dict, future, hits: list, started: float,
+                  deep_checks_skipped: bool = False):
+        fast_failed = False
+        try:
+            fast = future.result() # Done, except in a deep worker when the fast tier overran
+        except Exception as e:
+            self._count("fast_tier_errors")
+            print(f"[FRAUD_PIPELINE] Fast checks failed for {assessment_id}: {e}")
+            fast, fast_failed = {"risk_score": 0, "reasons": [f"Fast checks failed: {e}"], "matched_rules": []}, True
+        score = fast["risk_score"] + sum(weight for _, weight, _ in hits)
+        final = {
+            "assessment_id": assessment_id,
+            "user_id": request["user_id"],
+            "status": "final",
+            "is_suspicious": fast_failed or score >= FRAUD_RULES.current().suspicious_score, # Unchecked is not clean
+            "risk_score": score,
+            "provisional_risk_score": fast["risk_score"],
+            "reasons": fast["reasons"] + [reason for _, _, reason in hits],
+            "matched_rules": fast["matched_rules"] + [name for name, _, _ in hits],
+            "deep_checks_skipped": deep_checks_skipped,
+            "timestamp": request["timestamp"],
+        }
+        for reason in final["reasons"][len(fast["reasons"]):]:
+            print(f"[FRAUD_DETECTION] User {request['user_id']}: {reason}")
+        self.end_to_end_latency.add(time.perf_counter() - started)
+        with self._finalized:
+            entry = self._verdicts.get(assessment_id)
+            if entry is not None:
+                entry["final"] = final
+            self.counters["finalized"] += 1
+            self._finalized.notify_all()
+
+    def verdict(self, assessment_id: str) -> Optional[dict]:
+        """The final verdict if published, else the provisional one; None if unknown or expired."""
+        with self._lock:
+            entry = self._verdicts.get(assessment_id)
+            if entry is None:
+                return None
+            return dict(entry["final"] or entry["verdict"])
+
+    def latest_assessment_id(self, user_id: str) -> Optional[str]:
+        with self._lock:
+            return self._latest_by_user.get(user_id)
+
+    def wait_for_final(self, assessment_id: str, timeout: float = FRAUD_FINAL_VERDICT_WAIT_SECONDS) -> Optional[dict]:
+        """Blocks until the final verdict is published (or timeout); returns the latest verdict known."""
+        deadline = time.monotonic() + timeout
+        with self._finalized:
+            while True:
+                entry = self._verdicts.get(assessment_id)
+                if entry is None:
+                    return None
+                if entry["final"] is not None:
+                    return dict(entry["final"])
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return dict(entry["verdict"])
+                self._finalized.wait(remaining)
+
+    def authorize(self, user_id: str, assessment_id: Optional[str], amount: float, currency: str, recipient_id: str,
+                  timeout: float = FRAUD_FINAL_VERDICT_WAIT_SECONDS) -> dict:
+        """Checks a transfer about to be initiated against the user's latest final verdict.
+
+        Waits up to timeout for a pending final verdict. On success the verdict is used up and
+        {"verdict": final_verdict} is returned; otherwise {"error": message, "reason": reason}
+        with reason "missing", "stale", "pending", "suspicious", "used" or "mismatch".
+
+        Raises:
+            ValueError: currency has no USD rate.
+        """
+        amount_usd = FraudDetectionService._rule_amount(amount, currency)
+        deadline = time.monotonic() + timeout
+        with self._finalized:
+            while True: # Re-read after every wait: a newer assessment replaces the one waited for
+                latest = self._latest_by_user.get(user_id)
+                if latest is None:
+                    return {"error": "No risk assessment for this user; call /assess-risk first", "reason": "missing"}
+                if assessment_id is not None and assessment_id != latest:
+                    return {"error": "Risk assessment is unknown, expired or not the user's latest", "reason": "stale"}
+                entry = self._verdicts[latest]
+                if entry["final"] is not None:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return {"error": "Risk assessment still in progress, retry shortly", "reason": "pending"}
+                self._finalized.wait(remaining)
+            final, assessed = entry["final"], entry["request"]
+            if final["is_suspicious"]:
+                return {"error": "Transaction blocked by fraud checks: " + " ".join(final["reasons"]), "reason": "suspicious"}
+            if entry["used"]:
+                return {"error": "Risk assessment already used for a transaction; assess this one", "reason": "used"}
+            if Gazetteer.fold(recipient_id).strip() != Gazetteer.fold(assessed["recipient_id"]).strip():
+                return {"error": f"Recipient {recipient_id!r} is not the assessed recipient", "reason": "mismatch"}
+            assessed_usd = FraudDetectionService._rule_amount(assessed["amount"], assessed["currency"])
+            if amount_usd > assessed_usd * (1 + FRAUD_VERDICT_AMOUNT_TOLERANCE):
+                return {"error": f"Amount {amount:.2f} {currency} exceeds the assessed {assessed['amount']:.2f} "
+                                 f"{assessed['currency']}", "reason": "mismatch"}
+            entry["used"] = True
+            return {"verdict": dict(final)}
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            tracked = len(self._verdicts)
+            pending = sum(1 for entry in self._verdicts.values() if entry["final"] is None)
+        return dict(counters, queue_depth=self._queue.qsize(), queue_capacity=self._queue.maxsize,
+                    workers=self.workers, tracked_verdicts=tracked, pending_verdicts=pending,
+                    fast_deadline_ms=self.fast_deadline * 1e3, fast_tier=self.fast_latency.stats(),
+                    deep_tier=self.deep_latency.stats(), end_to_end=self.end_to_end_latency.stats())
+
+
+# Shared by all requests of this process; workers start with the first assessment.
+RISK_PIPELINE = RiskPipeline()
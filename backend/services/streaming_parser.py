@@ -0,0 +1,123 @@
+from typing import Dict, List, Optional
+
+from .nlp_service import NLPIntentParser
+
+# Incremental intent parsing for live voice transcripts.
+#
+# A StreamingIntentSession receives transcript fragments as the user speaks and, after
+# each one, re-extracts the payment fields from the transcript so far. A field is pushed
+# to the client once it has had the same value for STREAM_STABLE_UPDATES updates in a row
+# (speech recognisers often revise the last word), and pushed again if it later settles
+# on a different value. Updates only use in-process work (fast-path language detection,
+# the offline grammar, the English extractor and the intent model), so they never block;
+# langdetect and translation run once, on the final transcript, via parse_intent_async.
+#
+# A session carries its extraction state between fragments instead of starting over:
+#   - the intent classifier's n-gram counts and scores (IncrementalIntentScores), so each
+#     fragment only hashes what it appended;
+#   - the offline grammar's result once NativeGrammar.parse_settled says no appended word
+#     can change it (resolved with a country and followed by enough text);
+#   - the detected language, rerun only when the transcript has grown noticeably.
+# The English extractor still reads the whole (capped) transcript, because a later word
+# can revise an earlier field ("to amina" + "in kenya"); it is a linear pass of
+# precompiled regexes and a small share of an update. Carrying the state makes an update
+# cost roughly the same at 2000 characters as at 20 (~0.1 ms); on a short command it costs
+# a little more than scoring from scratch (~115 vs ~95 us in bench_nlp_stream).
+#
+# The transcript is capped at STREAM_MAX_TRANSCRIPT_CHARS; a fragment that goes past the
+# cap is cut and feed returns a {"type": "truncated"} event saying how much was dropped.
+#
+# Sessions keep only the transcript, a few small dicts and the n-gram counts (__slots__, no
+# history; about 12 KB after a typical command), so a worker can hold thousands of them.
+
+STREAM_STABLE_UPDATES = 2
+STREAM_MAX_TRANSCRIPT_CHARS = 2000
+STREAM_REDETECT_GROWTH = 1.5 # Re-detect the language once the transcript is this much longer
+STREAM_FIELDS = ("language", "intent", "amount", "currency", "recipient_name", "recipient_country")
+
+
+class StreamingIntentSession:
+    """Parse state for one live transcript."""
+
+    __slots__ = ("parser", "transcript", "language", "_detected_at_chars", "_candidates", "_emitted", "updates",
+                 "_intent_scores", "_settled")
+
+    def __init__(self, parser: NLPIntentParser):
+        self.parser = parser
+        classifier = parser.intent_classifier
+        self._intent_scores = classifier.incremental() if classifier is not None else None
+        self.reset()
+
+    def reset(self):
+        """Forgets the transcript so the session can take the next command."""
+        self.transcript = ""
+        self.language: Optional[str] = None
+        self._detected_at_chars = 0
+        self._candidates: Dict[str, list] = {} # field -> [value, consecutive updates]
+        self._emitted: Dict[str, object] = {}
+        self.updates = 0
+        self._settled: Optional[tuple] = None # (language, entities) the grammar can no longer revise
+        if self._intent_scores is not None:
+            self._intent_scores.reset()
+
+    def _extend(self, text: str, replace: bool) -> int:
+        """Updates the transcript and the carried scores; returns the number of characters cut off."""
+        previous = "" if replace else self.transcript
+        transcript = " ".join(f"{previous} {text}".split())
+        self.transcript = transcript[:STREAM_MAX_TRANSCRIPT_CHARS].rstrip()
+        if replace:
+            self._settled = None
+        if self._intent_scores is not None:
+            if replace:
+                self._intent_scores.reset()
+            self._intent_scores.append(self.transcript[len(previous):])
+        return len(transcript) - len(self.transcript)
+
+    def _current_language(self) -> Optional[str]:
+        # Detection only reruns when the transcript has grown noticeably; a few more words
+        # rarely change the answer.
+        if self.language is None or len(self.transcript) >= self._detected_at_chars * STREAM_REDETECT_GROWTH:
+            detected = self.parser.language_detector.detect(self.transcript)
+            if detected is not None:
+                self.language = detected
+            self._detected_at_chars = len(self.transcript)
+        return self.language
+
+    def _snapshot(self) -> Dict[str, object]:
+        """Best current values of STREAM_FIELDS without leaving the process."""
+        language = self._current_language()
+        entities = None
+        if self._settled is not None and self._settled[0] == language:
+            entities = self._settled[1]
+        elif language is not None and self.parser.native_grammar.supports(language):
+            entities, settled = self.parser.native_grammar.parse_settled(self.transcript, language)
+            self._settled = (language, entities) if settled else None
+        if entities is None:
+            entities = self.parser.extractor.extract(self.transcript.lower())
+        intent = self._intent_scores.predict()[0] if self._intent_scores is not None else "payment"
+        return dict(entities, language=language, intent=intent)
+
+    def feed(self, text: str, replace: bool = False) -> List[dict]:
+        """Adds a fragment (or replaces the transcript) and returns the fields that just settled,
+        preceded by a truncated event if the fragment went past STREAM_MAX_TRANSCRIPT_CHARS."""
+        dropped = self._extend(text, replace)
+        self.updates += 1
+        events = []
+        if dropped:
+            events.append({"type": "truncated", "max_chars": STREAM_MAX_TRANSCRIPT_CHARS, "dropped_chars": dropped})
+        if not self.transcript:
+            return events
+
+        snapshot = self._snapshot()
+        for field in STREAM_FIELDS:
+            value = snapshot.get(field)
+            candidate = self._candidates.get(field)
+            if candidate is not None and candidate[0] == value:
+                candidate[1] += 1
+            else:
+                candidate = self._candidates[field] = [value, 1]
+            if value is None or candidate[1] < STREAM_STABLE_UPDATES or self._emitted.get(field) == value:
+                continue
+            events.append({"type": "partial", "field": field, "value": value, "revised": field in self._emitted})
+            self._emitted[field] = value
+        return events
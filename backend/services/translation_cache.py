@@ -0,0 +1,299 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Two-tier cache for machine translations used by NLPIntentParser.
+# Tier 1 is a bounded in-memory LRU, tier 2 is a SQLite file that survives restarts.
+# Both tiers are keyed by (source_language, normalized text) and honour the same TTL.
+
+TRANSLATION_CACHE_MAX_MEMORY_ENTRIES = 2048
+TRANSLATION_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Translations of fixed phrases rarely change
+TRANSLATION_CACHE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         "data", "translation_cache.sqlite3")
+
+# In template mode numbers and capitalized names are swapped for placeholder tokens before
+# translating, so "Fi 30000 Naira ranṣẹ si Amina" and "Fi 500 Naira ranṣẹ si Tunde" share
+# one cached translation. Placeholders are plain alphanumerics so translators keep them.
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_NAME_RE = re.compile(r"(?<!\w)[^\W\d_][^\W_]*")
+_PLACEHOLDER_PREFIX = "Zqx"
+_PLACEHOLDER_RE = re.compile(_PLACEHOLDER_PREFIX + r"(\d+)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used in cache keys: NFC, case-folded, single-spaced."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip().casefold()
+
+
+def make_template(text: str, keep_words: Iterable[str] = ()) -> Tuple[str, List[str]]:
+    """Replaces numbers and capitalized names (except the first word and keep_words) with placeholders.
+
+    Returns the template and the original values in placeholder order.
+    """
+    keep = {word.casefold() for word in keep_words}
+    slots: List[str] = []
+
+    def _slot(value: str) -> str:
+        slots.append(value)
+        return f"{_PLACEHOLDER_PREFIX}{len(slots) - 1}"
+
+    template = _NUMBER_RE.sub(lambda m: _slot(m.group()), text.strip())
+    first_word = True
+
+    def _name(match: re.Match) -> str:
+        nonlocal first_word
+        word = match.group()
+        is_first, first_word = first_word, False
+        if is_first or not word[0].isupper() or word.casefold() in keep or word.startswith(_PLACEHOLDER_PREFIX):
+            return word
+        return _slot(word)
+
+    template = _NAME_RE.sub(_name, template)
+    return template, slots
+
+
+def fill_template(translated: str, slots: List[str]) -> Optional[str]:
+    """Puts the original values back; returns None unless every placeholder survived exactly once."""
+    seen = [0] * len(slots)
+
+    def _restore(match: re.Match) -> str:
+        index = int(match.group(1))
+        if index < len(slots):
+            seen[index] += 1
+            return slots[index]
+        return match.group()
+
+    filled = _PLACEHOLDER_RE.sub(_restore, translated)
+    if any(count != 1 for count in seen):
+        return None
+    return filled
+
+
+class TranslationCache:
+    """Bounded LRU + TTL cache in front of a SQLite store of translations."""
+
+    def __init__(self, db_path: Optional[str] = TRANSLATION_CACHE_DB_PATH,
+                 max_memory_entries: int = TRANSLATION_CACHE_MAX_MEMORY_ENTRIES,
+                 ttl_seconds: float = TRANSLATION_CACHE_TTL_SECONDS,
+                 template_mode: bool = False,
+                 keep_words: Iterable[str] = ()):
+        """
+        Args:
+            db_path: SQLite file for the persistent tier, or None for memory only.
+            max_memory_entries: Capacity of the in-memory LRU.
+            ttl_seconds: Age after which an entry is ignored and dropped.
+            template_mode: Cache translations of number/name templates instead of raw text.
+            keep_words: Capitalized words never replaced in template mode (e.g. currency names).
+        """
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.template_mode = template_mode
+        self.keep_words = set(keep_words)
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "template_fallbacks": 0,
+        }
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Opens the SQLite tier on first use."""
+        if self._conn is None and self.db_path:
+            directory = os.path.dirname(self.db_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " source_language TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " translation TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (source_language, text))"
+            )
+            self._conn.execute("DELETE FROM translations WHERE created_at < ?",
+                               (time.time() - self.ttl_seconds,))
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key: Tuple[str, str], translation: str, created_at: float):
+        self._memory[key] = (translation, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def get(self, source_language: str, text: str) -> Optional[str]:
+        key = (source_language, normalize_text(text))
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+                self.counters["expirations"] += 1
+
+            conn = self._db()
+            if conn is not None:
+                row = conn.execute(
+                    "SELECT translation, created_at FROM translations WHERE source_language = ? AND text = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    if now - row[1] < self.ttl_seconds:
+                        self._remember(key, row[0], row[1])
+                        self.counters["disk_hits"] += 1
+                        return row[0]
+                    conn.execute("DELETE FROM translations WHERE source_language = ? AND text = ?", key)
+                    conn.commit()
+                    self.counters["expirations"] += 1
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, source_language: str, text: str, translation: str):
+        self.put_many(source_language, [(text, translation)])
+
+    def put_many(self, source_language: str, translations: List[Tuple[str, str]]):
+        """Caches (text, translation) pairs; the SQLite tier writes them in one transaction."""
+        if not translations:
+            return
+        now = time.time()
+        rows = [(source_language, normalize_text(text), translation, now) for text, translation in translations]
+        with self._lock:
+            for row in rows:
+                self._remember(row[:2], row[2], now)
+            conn = self._db()
+            if conn is not None:
+                conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)", rows)
+                conn.commit()
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def translate(self, source_language: str, text: str, translate_fn: Callable[[str], str]) -> str:
+        """Returns a cached translation of text, calling translate_fn(text) on a miss.
+
+        In template mode the template is translated and cached; if the translator mangles a
+        placeholder, the full text is translated and cached as-is instead.
+        """
+        if self.template_mode:
+            template, slots = make_template(text, self.keep_words)
+            if slots:
+                translated_template = self.get(source_language, template)
+                if translated_template is None:
+                    translated_template = translate_fn(template)
+                    filled = fill_template(translated_template, slots)
+                    if filled is not None:
+                        self.put(source_language, template, translated_template)
+                        return filled
+                else:
+                    filled = fill_template(translated_template, slots)
+                    if filled is not None:
+                        return filled
+                self._count("template_fallbacks")
+
+        translation = self.get(source_language, text)
+        if translation is None:
+            translation = translate_fn(text)
+            self.put(source_language, text, translation)
+        return translation
+
+    def translate_many(self, source_language: str, texts: List[str],
+                       translate_many_fn: Callable[[List[str]], List[str]]) -> List[str]:
+        """Batch form of translate: all misses go to a single translate_many_fn call.
+
+        translate_many_fn receives distinct texts and must return their translations in order.
+        In template mode, texts whose placeholders do not survive take a second call as raw text.
+        """
+        results: List[Optional[str]] = [None] * len(texts)
+        fallbacks: List[int] = []
+
+        def _resolve(requests: Dict[str, List[Tuple[int, Optional[List[str]]]]]):
+            pending = list(requests)
+            if not pending:
+                return
+            to_cache = []
+            for request, translation in zip(pending, translate_many_fn(pending)):
+                cache_it = False
+                for index, slots in requests[request]:
+                    if slots is None:
+                        results[index] = translation
+                        cache_it = True
+                        continue
+                    filled = fill_template(translation, slots)
+                    if filled is None:
+                        self._count("template_fallbacks")
+                        fallbacks.append(index)
+                    else:
+                        results[index] = filled
+                        cache_it = True
+                if cache_it:
+                    to_cache.append((request, translation))
+            self.put_many(source_language, to_cache) # One SQLite commit per batch
+
+        requests: Dict[str, List[Tuple[int, Optional[List[str]]]]] = {}
+        for index, text in enumerate(texts):
+            request, slots = text, None
+            if self.template_mode:
+                template, template_slots = make_template(text, self.keep_words)
+                if template_slots:
+                    request, slots = template, template_slots
+            cached = self.get(source_language, request)
+            if cached is None:
+                requests.setdefault(request, []).append((index, slots))
+            elif slots is None:
+                results[index] = cached
+            else:
+                filled = fill_template(cached, slots)
+                if filled is None:
+                    self._count("template_fallbacks")
+                    fallbacks.append(index)
+                else:
+                    results[index] = filled
+        _resolve(requests)
+
+        raw_requests: Dict[str, List[Tuple[int, Optional[List[str]]]]] = {}
+        for index in fallbacks:
+            cached = self.get(source_language, texts[index])
+            if cached is None:
+                raw_requests.setdefault(texts[index], []).append((index, None))
+            else:
+                results[index] = cached
+        _resolve(raw_requests)
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["max_memory_entries"] = self.max_memory_entries
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drops every entry from both tiers (counters are kept)."""
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM translations")
+                conn.commit()
@@ -1,7 +1,12 @@
+import os
 import random
 import string
 import time
 
+import requests
+
+from ..utils.outbound_http import OUTBOUND_HTTP
+
 # Mock database to store OTPs and their expiry times, and user 2FA settings
 # In a real application, use a secure database.
 MOCK_OTP_DB = {}
@@ -12,6 +17,15 @@ MOCK_OTP_DB = {}
 OTP_LENGTH = 6
 OTP_VALIDITY_DURATION_SECONDS = 300  # 5 minutes
 
+# Delivery gateways. Without a URL the sender stays a mock that only prints the OTP.
+# Messages go through the shared OUTBOUND_HTTP client and are not retried once sent
+# (a retry could deliver the OTP twice).
+SMS_GATEWAY_URL = os.environ.get("SMS_GATEWAY_URL") # POST {"to", "message"} with a bearer token
+SMS_GATEWAY_TOKEN = os.environ.get("SMS_GATEWAY_TOKEN", "")
+WHATSAPP_API_URL = os.environ.get("WHATSAPP_API_URL") # WhatsApp Business Cloud API messages endpoint
+WHATSAPP_API_TOKEN = os.environ.get("WHATSAPP_API_TOKEN", "")
+OTP_DELIVERY_DEADLINE_SECONDS = 5.0
+
 class TwoFactorAuthService:
     def __init__(self):
         self.otp_db = MOCK_OTP_DB
@@ -20,17 +34,38 @@ class TwoFactorAuthService:
         """Generates a random OTP."""
         return "".join(random.choices(string.digits, k=OTP_LENGTH))
 
+    def _post_message(self, dependency: str, url: str, token: str, payload: dict) -> bool:
+        """Posts a message to a delivery gateway; True when it accepted it."""
+        try:
+            response = OUTBOUND_HTTP.request(dependency, "POST", url, deadline_seconds=OTP_DELIVERY_DEADLINE_SECONDS,
+                                             idempotent=False, json=payload,
+                                             headers={"Authorization": f"Bearer {token}"})
+        except requests.exceptions.RequestException as e:
+            print(f"[2FA] Error sending OTP via {dependency}: {e}")
+            return False
+        if not response.ok:
+            print(f"[2FA] {dependency} rejected the OTP message: HTTP {response.status_code}")
+        return response.ok
+
     def _send_otp_sms(self, phone_number: str, otp: str) -> bool:
-        """Mocks sending OTP via SMS."""
-        print(f"[MOCK SMS] Sending OTP {otp} to {phone_number}")
-        # In a real implementation, integrate with an SMS gateway API
-        return True
+        """Sends OTP via the SMS gateway (mocked when SMS_GATEWAY_URL is not set)."""
+        if not SMS_GATEWAY_URL:
+            print(f"[MOCK SMS] Sending OTP {otp} to {phone_number}")
+            return True
+        return self._post_message("sms_gateway", SMS_GATEWAY_URL, SMS_GATEWAY_TOKEN,
+                                  {"to": phone_number, "message": f"Your RemitAI code is {otp}"})
 
     def _send_otp_whatsapp(self, phone_number: str, otp: str) -> bool:
-        """Mocks sending OTP via WhatsApp."""
-        print(f"[MOCK WhatsApp] Sending OTP {otp} to {phone_number} via WhatsApp")
-        # In a real implementation, integrate with WhatsApp Business API
-        return True
+        """Sends OTP via WhatsApp (mocked when WHATSAPP_API_URL is not set)."""
+        if not WHATSAPP_API_URL:
+            print(f"[MOCK WhatsApp] Sending OTP {otp} to {phone_number} via WhatsApp")
+            return True
+        return self._post_message("whatsapp", WHATSAPP_API_URL, WHATSAPP_API_TOKEN, {
+            "messaging_product": "whatsapp",
+            "to": phone_number,
+            "type": "text",
+            "text": {"body": f"Your RemitAI code is {otp}"},
+        })
 
     def request_otp(self, user_id: str, delivery_method: str = "sms", phone_number: str = None) -> tuple[bool, str]:
         """Generates and sends an OTP to the user.
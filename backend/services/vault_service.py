@@ -3,29 +3,21 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 from ..api.v1.schemas.vault_schemas import VaultCreate, Vault, VaultStatusResponse
+from .rate_provider import RATE_PROVIDER
 
 # --- Mock Data Store --- 
 # In a real application, this would be a database.
 # Key: user_id, Value: Dict[vault_id, Vault]
 mock_vault_db: Dict[str, Dict[str, Vault]] = {}
 
-# --- Mock Conversion Rates --- 
-# In a real application, fetch this from an API.
-MOCK_RATES = {
-    "NGN_USD": 1/1500.0,
-    "KES_USD": 1/130.0,
-    "USD_NGN": 1550.0, # Slightly different for withdrawal simulation
-    "USD_KES": 135.0,
-}
-
 # --- Mock Yield Rate (Annual) ---
 MOCK_ANNUAL_YIELD_RATE = 0.05 # 5% annual yield
 
 class VaultService:
 
     def _get_mock_conversion_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
-        key = f"{from_currency}_{to_currency}"
-        return MOCK_RATES.get(key)
+        """Rate for converting from_currency into to_currency (spread included) from RATE_PROVIDER."""
+        return RATE_PROVIDER.rate(from_currency, to_currency)
 
     def _calculate_mock_yield(self, usdc_amount: float, duration_days: int) -> float:
         daily_rate = MOCK_ANNUAL_YIELD_RATE / 365.0
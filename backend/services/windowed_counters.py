@@ -0,0 +1,158 @@
+import hashlib
+import math
+import sys
+from collections import OrderedDict
+from typing import Hashable
+
+import numpy as np
+
+# Sliding-window counters for the fraud checks.
+#
+# WindowedCounter counts events in the last window_seconds with a ring of time buckets:
+# an event adds to its bucket and to a running total, and advancing the clock clears the
+# buckets that fell out of the window (at most one pass over the ring, however long the
+# gap). The window is therefore bucket-aligned: a count covers between
+# window_seconds - bucket_seconds and window_seconds of history.
+#
+# ExpiringSet holds the distinct keys seen in the last window_seconds, ordered by when
+# they were last seen, so expired keys are always at the front and each key is expired at
+# most once per insertion. Both structures are O(1) (amortised) per event and their size
+# depends on the window, not on how many events or keys a user has ever had.
+#
+# WindowedDistinctSketch estimates distinct keys in fixed memory, for keys that may have
+# far more distinct counterparts than a user has recipients (e.g. a recipient's senders).
+# Each key hashes (stably, so processes sharing a sketch agree) to one of a fixed number of
+# registers holding the last second it was hit; the distinct count in any window up to the
+# sketch's retention follows from the registers hit in it by linear counting,
+# m * ln(m / empty). With 128 registers the estimate is unbiased to a few percent up to a
+# couple of hundred keys (single estimates within about 20%) and saturates at m * ln(m),
+# about 620.
+
+EXPIRING_SET_ENTRY_BYTES = 150 # Short str key, float and ordering links, used for memory estimates
+DISTINCT_SKETCH_REGISTERS = 128
+
+
+class WindowedCounter:
+    """Number of events in a sliding time window, kept in a ring of buckets."""
+
+    __slots__ = ("window_seconds", "bucket_seconds", "_counts", "_head", "total")
+
+    def __init__(self, window_seconds: float, bucket_seconds: float):
+        if bucket_seconds <= 0 or window_seconds < bucket_seconds:
+            raise ValueError("bucket_seconds must be positive and no larger than window_seconds")
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self._counts = [0] * int(window_seconds // bucket_seconds)
+        self._head = None # Bucket index of the newest bucket
+        self.total = 0
+
+    def _advance(self, bucket: int):
+        if self._head is None:
+            self._head = bucket
+            return
+        steps = bucket - self._head
+        if steps <= 0:
+            return
+        size = len(self._counts)
+        if steps >= size:
+            self._counts = [0] * size
+            self.total = 0
+        else:
+            for expired in range(self._head + 1, bucket + 1):
+                slot = expired % size
+                self.total -= self._counts[slot]
+                self._counts[slot] = 0
+        self._head = bucket
+
+    def add(self, timestamp: float, count: int = 1):
+        bucket = int(timestamp // self.bucket_seconds)
+        self._advance(bucket)
+        if self._head - bucket >= len(self._counts):
+            return # Older than the window
+        self._counts[bucket % len(self._counts)] += count
+        self.total += count
+
+    def count(self, timestamp: float) -> int:
+        """Events in the window ending at timestamp."""
+        self._advance(int(timestamp // self.bucket_seconds))
+        return self.total
+
+    def approx_bytes(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self._counts)
+
+
+class ExpiringSet:
+    """Distinct keys seen within the last window_seconds."""
+
+    __slots__ = ("window_seconds", "_last_seen")
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._last_seen: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def _expire(self, timestamp: float):
+        cutoff = timestamp - self.window_seconds
+        last_seen = self._last_seen
+        while last_seen:
+            key, seen = next(iter(last_seen.items()))
+            if seen >= cutoff:
+                break
+            del last_seen[key]
+
+    def add(self, key: Hashable, timestamp: float):
+        previous = self._last_seen.pop(key, None)
+        # Keys stay ordered by last-seen time, so a late (out-of-order) event never moves a key back.
+        self._last_seen[key] = timestamp if previous is None else max(previous, timestamp)
+        self._expire(timestamp)
+
+    def count(self, timestamp: float) -> int:
+        """Distinct keys seen in the window ending at timestamp."""
+        self._expire(timestamp)
+        return len(self._last_seen)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._last_seen
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def approx_bytes(self) -> int:
+        """Container sizes plus an average-sized key and timestamp per entry."""
+        return sys.getsizeof(self) + sys.getsizeof(self._last_seen) + len(self._last_seen) * EXPIRING_SET_ENTRY_BYTES
+
+
+def stable_hash(key: str) -> int:
+    """64-bit hash of key, the same in every process (unlike hash())."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class WindowedDistinctSketch:
+    """Approximate distinct keys in any recent window, from timestamped registers (linear counting)."""
+
+    __slots__ = ("_registers",)
+
+    def __init__(self, registers: int = DISTINCT_SKETCH_REGISTERS, data: bytes = None):
+        # Last Unix second each register was hit; 0 = never
+        if data is None:
+            self._registers = np.zeros(registers, dtype=np.uint32)
+        else:
+            self._registers = np.frombuffer(data, dtype="<u4").astype(np.uint32)
+
+    def add(self, key: str, timestamp: float):
+        registers = self._registers
+        slot = stable_hash(key) % len(registers)
+        if registers[slot] < int(timestamp): # Late events never move a register back
+            registers[slot] = int(timestamp)
+
+    def count(self, timestamp: float, window_seconds: float) -> float:
+        """Estimated distinct keys seen in the window ending at timestamp (one-second resolution)."""
+        registers = self._registers
+        m = len(registers)
+        empty = m - int(np.count_nonzero(registers >= max(1, int(timestamp - window_seconds))))
+        return m * math.log(m / empty) if empty else m * math.log(m)
+
+    def to_bytes(self) -> bytes:
+        return self._registers.astype("<u4").tobytes()
+
+    def approx_bytes(self) -> int:
+        return sys.getsizeof(self) + self._registers.nbytes + 112 # ndarray header
@@ -0,0 +1,65 @@
+import pytest
+from fastapi import HTTPException
+
+from remitai.backend.api.v1.endpoints.transactions import assess_transaction_risk_endpoint
+from remitai.backend.api.v1.schemas.transaction_schemas import AssessRiskRequest
+from remitai.backend.services.fraud_detection_service import FraudDetectionService, sqlite_fraud_backend
+from remitai.backend.services.rate_provider import RATE_PROVIDER
+from remitai.backend.services.risk_pipeline import RiskPipeline
+
+
+@pytest.fixture
+def service(tmp_path):
+    return FraudDetectionService(backend=sqlite_fraud_backend(str(tmp_path / "fraud_state.sqlite3")))
+
+
+@pytest.mark.parametrize("amount,currency", [(30000.0, "NGN"), (12000.0, "KES"), (150000.0, "NGN")])
+def test_everyday_local_amounts_are_not_flagged(service, amount, currency):
+    result = service.assess_transaction_risk("user_local", f"Send {amount:.0f} {currency} to Amina", amount, "amina", currency)
+    assert not result["is_suspicious"]
+    assert "high_hourly_volume" not in result["matched_rules"]
+
+
+def test_hourly_volume_compares_usd_values(service):
+    for i in range(3): # 3 x 30,000 NGN is about 59 USD
+        result = service.assess_transaction_risk("user_ngn", f"Pay invoice {i}", 30000.0, f"shop_{i}", "NGN")
+    assert "high_hourly_volume" not in result["matched_rules"]
+    result = service.assess_transaction_risk("user_ngn", "Pay rent deposit", 20_000_000.0, "landlord", "NGN")
+    assert "high_hourly_volume" in result["matched_rules"] # About 13,000 USD
+    assert "USD" in " ".join(result["reasons"])
+
+
+def test_recipient_inflow_compares_usd_values(service):
+    for i in range(10): # 300,000 KES in total is about 2,300 USD
+        result = service.assess_transaction_risk(f"sender_{i}", "Send 30000 KES to the school", 30000.0, "school_fees", "KES")
+    assert "recipient_high_inflow" not in result["matched_rules"]
+
+
+def test_amount_checks_take_the_currency(service):
+    for i in range(4):
+        suspicious, _ = service.check_amount_anomalies("user_kes", 3000.0, f"merchant_{i}", currency="KES")
+    assert not suspicious
+    for i in range(4):
+        suspicious, reason = service.check_amount_anomalies("user_usd", 3000.0, f"merchant_{i}")
+    assert suspicious and "USD" in reason
+
+
+def test_unsupported_currency_is_refused_before_recording(service):
+    with pytest.raises(ValueError):
+        service.assess_transaction_risk("user_xyz", "Send 10 XYZ to Bob", 10.0, "bob", "XYZ")
+    assert service.backend.stats()["tracked_users"] == 0
+
+
+def test_rule_amount_uses_the_mid_rate():
+    assert FraudDetectionService._rule_amount(30000.0, "NGN") == pytest.approx(30000.0 / 1530.0)
+    assert FraudDetectionService._rule_amount(12000.0, "kes") == pytest.approx(12000.0 * RATE_PROVIDER.rate("KES", "USD", "mid"))
+
+
+def test_assess_risk_endpoint_passes_the_currency(service):
+    pipeline = RiskPipeline(service_factory=lambda: service, deep_checks=[], fast_deadline=5.0)
+    request = AssessRiskRequest(user_id="user_api", command_text="Send 20000000 NGN to Bola", amount=20_000_000.0,
+                                currency="NGN", recipient_id="bola")
+    assert "high_hourly_volume" in assess_transaction_risk_endpoint(request, pipeline).matched_rules
+    with pytest.raises(HTTPException) as refused:
+        assess_transaction_risk_endpoint(request.copy(update={"currency": "XYZ"}), pipeline)
+    assert refused.value.status_code == 400
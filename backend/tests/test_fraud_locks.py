@@ -0,0 +1,47 @@
+import sys
+import threading
+
+import pytest
+
+from remitai.backend.benchmarks.stress_fraud_locks import build_requests, run
+from remitai.backend.services import fraud_detection_service
+from remitai.backend.services.fraud_detection_service import FraudDetectionService
+from remitai.backend.services.fraud_state import UserLockStripes
+
+REQUESTS_PER_HOT_USER = 200 # Without locking, a few of the hot users lose an update per run at this load
+
+
+@pytest.fixture
+def racy():
+    """Switch threads as often as possible; leaves the shared fraud state empty afterwards."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+    fraud_detection_service.FRAUD_STATE_BACKEND.clear()
+
+
+def test_striped_locks_lose_no_updates(racy):
+    requests = build_requests(hot_users=16, requests_per_hot_user=REQUESTS_PER_HOT_USER, cold_users=200)
+    for _ in range(2):
+        _, errors, violations = run(UserLockStripes(), requests, threads=32, requests_per_hot_user=REQUESTS_PER_HOT_USER)
+        assert (errors, violations) == (0, 0)
+
+
+def test_one_global_lock_loses_no_updates(racy):
+    requests = build_requests(hot_users=4, requests_per_hot_user=REQUESTS_PER_HOT_USER, cold_users=100)
+    _, errors, violations = run(UserLockStripes(1), requests, threads=16, requests_per_hot_user=REQUESTS_PER_HOT_USER)
+    assert (errors, violations) == (0, 0)
+
+
+def test_other_users_are_not_blocked_by_a_held_user_lock(racy):
+    locks = UserLockStripes()
+    other = next(f"user_{i}" for i in range(1000) if locks.for_user(f"user_{i}") is not locks.for_user("busy_user"))
+    service = FraudDetectionService(locks=locks)
+    done = threading.Event()
+    with locks.for_user("busy_user"):
+        thread = threading.Thread(target=lambda: (service.assess_transaction_risk(other, "Send 10 USD to Bob", 10.0, "bob"),
+                                                  done.set()))
+        thread.start()
+        assert done.wait(5)
+    thread.join()
@@ -0,0 +1,50 @@
+import multiprocessing
+
+import pytest
+
+from remitai.backend.benchmarks.bench_fraud_multiworker import CLOCK_START, build_stream, run
+from remitai.backend.services import fraud_detection_service
+from remitai.backend.services.fraud_detection_service import sqlite_fraud_backend
+
+WORKERS = 4
+EVENTS_PER_WORKER = 150
+
+
+def record_many(db_path: str, worker: int, start: multiprocessing.Barrier):
+    """Records EVENTS_PER_WORKER transactions of one shared user; returns the window counts seen."""
+    backend = sqlite_fraud_backend(db_path)
+    start.wait()
+    counts = []
+    for i in range(EVENTS_PER_WORKER):
+        transactions, recipients = backend.record_transaction("shared_user", f"r_{worker}_{i}", CLOCK_START + i * 0.01)
+        counts.append((transactions, recipients))
+    return counts
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / "fraud_state.sqlite3")
+    fraud_detection_service.FRAUD_STATE_BACKEND.clear() # The single-process reference runs in this process
+
+
+def test_processes_sharing_the_sqlite_backend_lose_no_updates(db_path):
+    context = multiprocessing.get_context("fork")
+    start = context.Manager().Barrier(WORKERS)
+    with context.Pool(WORKERS) as pool:
+        results = pool.starmap(record_many, [(db_path, w, start) for w in range(WORKERS)])
+    total = WORKERS * EVENTS_PER_WORKER
+    # Each increment-and-count is atomic: the counts seen across all processes are exactly 1..total
+    assert sorted(transactions for counts in results for transactions, _ in counts) == list(range(1, total + 1))
+    assert sorted(recipients for counts in results for _, recipients in counts) == list(range(1, total + 1))
+    assert sqlite_fraud_backend(db_path).stats()["tracked_users"] == 1
+
+
+def test_shared_workers_flag_what_a_single_process_flags(db_path):
+    stream = build_stream(2000)
+    reference, _, _ = run(stream, 1, None, rate=1e6) # Order only matters between workers: no pacing needed
+    split, _, _ = run(stream, WORKERS, None, rate=1e6)
+    shared, _, _ = run(stream, WORKERS, db_path, rate=1000.0) # Paced so workers stay in stream order
+    flagged = sum(duplicate + spam for duplicate, spam in reference)
+    assert flagged > 0
+    assert sum(a != b for a, b in zip(shared, reference)) <= 2 # Lagging worker races, as in production
+    assert sum(duplicate + spam for duplicate, spam in split) < flagged # Without sharing, workers miss flags
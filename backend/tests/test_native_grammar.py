@@ -0,0 +1,36 @@
+import pytest
+
+from remitai.backend.benchmarks.bench_native_grammar import LABELLED_CORPUS
+from remitai.backend.services.native_grammar import NativeGrammar, _digits_value
+
+
+@pytest.fixture(scope="module")
+def grammar():
+    return NativeGrammar()
+
+
+@pytest.mark.parametrize("language,command,expected", LABELLED_CORPUS)
+def test_labelled_corpus(grammar, language, command, expected):
+    assert grammar.parse(command, language) == expected
+
+
+@pytest.mark.parametrize("word,value", [
+    ("5000", 5000), ("5,000", 5000), ("5.000", 5000), ("12.50", 12.5), ("12,50", 12.5),
+    ("1,234.50", 1234.5), ("1.234,50", 1234.5), ("1.2.3", None), ("12,5,0", None),
+])
+def test_digits_value(word, value):
+    assert _digits_value(word) == value
+
+
+@pytest.mark.parametrize("language,command,amount", [
+    ("sw", "Tuma dola 12.50 kwa Maria nchini Kenya", 12.5),
+    ("sw", "Tuma shilingi 1.5 kwa Maria", 1.5),
+    ("fr", "Envoyer 12,50 euros à Jean", 12.5),
+    ("fr", "Envoie 5 000 francs CFA à Moussa", 5000),
+    ("fr", "Envoyer 5 000 000 euros à Jean", 5000000),
+    ("fr", "Envoyer 2 3 euros à Jean", None),
+    ("sw", "Tuma shilingi 12 50 kwa Maria", None),
+])
+def test_digit_amounts_are_read_as_one_number(grammar, language, command, amount):
+    entities = grammar.parse(command, language)
+    assert (entities and entities["amount"]) == amount
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from remitai.backend.services import nlp_service
+from remitai.backend.services.native_grammar import NativeGrammar
+from remitai.backend.services.nlp_service import NLPIntentParser
+from remitai.backend.services.translation_cache import TranslationCache
+
+FRENCH = "Je veux envoyer 500 dollars à Jean au Ghana"
+
+
+class Blocking:
+    """Translator or language detector that does not answer until released."""
+
+    def __init__(self, language: str = "fr"):
+        self.language = language
+        self.release = threading.Event()
+
+    def __call__(self, text: str, source_language: str) -> str:
+        self.release.wait(10)
+        return "I want to send 500 dollars to Jean in Ghana"
+
+    def detect(self, text: str) -> str:
+        self.release.wait(10)
+        return self.language
+
+
+class Fixed:
+    def __init__(self, language: str):
+        self.language = language
+
+    def detect(self, text: str) -> str:
+        return self.language
+
+
+@pytest.fixture
+def hanging():
+    blocking = Blocking()
+    yield blocking
+    blocking.release.set()
+
+
+def parser(translate_fn, language_detector) -> NLPIntentParser:
+    return NLPIntentParser(translation_cache=TranslationCache(db_path=None), translate_fn=translate_fn,
+                           language_detector=language_detector, native_grammar=NativeGrammar(grammars={}))
+
+
+async def timed_with_ticks(coroutine):
+    """Runs coroutine; returns (result, seconds, largest gap between event loop ticks meanwhile)."""
+    gaps, done = [], asyncio.Event()
+
+    async def tick():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticker = asyncio.create_task(tick())
+    started = time.perf_counter()
+    result = await coroutine
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticker
+    return result, elapsed, max(gaps)
+
+
+def test_missed_translation_deadline_parses_the_untranslated_text(hanging, monkeypatch):
+    monkeypatch.setattr(nlp_service, "NLP_TRANSLATE_DEADLINE_SECONDS", 0.2)
+    nlp = parser(hanging, Fixed("fr"))
+    result, elapsed, gap = asyncio.run(timed_with_ticks(nlp.parse_intent_async(FRENCH)))
+    assert 0.2 <= elapsed < 1.0
+    assert gap < 0.1 # The event loop kept serving other work while the translator hung
+    assert result["detected_language"] == "fr"
+    assert result["parsed_text_language"] == "fr"
+
+
+def test_missed_detection_deadline_assumes_english(hanging, monkeypatch):
+    monkeypatch.setattr(nlp_service, "NLP_DETECT_DEADLINE_SECONDS", 0.2)
+    nlp = parser(lambda text, language: pytest.fail("English text is not translated"), hanging)
+    result, elapsed, gap = asyncio.run(timed_with_ticks(nlp.parse_intent_async("Send 50 USD to Bob in Kenya")))
+    assert 0.2 <= elapsed < 1.0 and gap < 0.1
+    assert result["detected_language"] == "en"
+    assert result["amount"] == 50
+
+
+def test_translation_within_the_deadline_is_used(monkeypatch):
+    monkeypatch.setattr(nlp_service, "NLP_TRANSLATE_DEADLINE_SECONDS", 2.0)
+    answered = Blocking()
+    answered.release.set()
+    result = asyncio.run(parser(answered, Fixed("fr")).parse_intent_async(FRENCH))
+    assert result["parsed_text_language"] == "en"
+    assert result["amount"] == 500
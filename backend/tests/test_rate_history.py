@@ -0,0 +1,58 @@
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+from remitai.backend.services.rate_history import RATE_HISTORY_LOG_TICK, RateHistoryStore
+
+PAIR = "NGN_USDC_BUY"
+WORKERS = 4
+POINTS_PER_WORKER = 400
+SEGMENT_POINTS = 64 # Small segments: the workers rotate dozens of times while they race
+WORKER_TIMEOUT_SECONDS = 60 # A worker killed by a truncated segment (SIGBUS) would otherwise hang the pool
+
+
+def append_many(root: str, worker: int, start: multiprocessing.Barrier):
+    """Appends POINTS_PER_WORKER points stamped with the wall clock; returns those accepted."""
+    series = RateHistoryStore(root, segment_points=SEGMENT_POINTS, max_segments=1000).series(PAIR)
+    start.wait()
+    accepted = []
+    for i in range(POINTS_PER_WORKER):
+        timestamp, rate = time.time(), 1000.0 + worker + i / 1000
+        if series.append(timestamp, rate):
+            accepted.append((int(timestamp), rate))
+    return accepted
+
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / "rate_history")
+
+
+def test_processes_appending_to_one_pair_lose_no_points(root):
+    context = multiprocessing.get_context("fork")
+    start = context.Manager().Barrier(WORKERS)
+    with context.Pool(WORKERS) as pool:
+        results = pool.starmap_async(append_many, [(root, w, start) for w in range(WORKERS)]).get(WORKER_TIMEOUT_SECONDS)
+    accepted = sorted(point for points in results for point in points)
+    assert len(accepted) > WORKERS * POINTS_PER_WORKER // 2
+
+    series = RateHistoryStore(root, segment_points=SEGMENT_POINTS, max_segments=1000).series(PAIR)
+    times, rates = series.range()
+    assert series.info()["segments"] > WORKERS
+    assert np.all(np.diff(times) >= 0)
+    stored = sorted(zip(times.astype(np.int64).tolist(), rates.tolist()))
+    assert [t for t, _ in stored] == [t for t, _ in accepted]
+    assert np.allclose([r for _, r in stored], [r for _, r in accepted], rtol=RATE_HISTORY_LOG_TICK, atol=0)
+
+
+def test_reader_sees_segments_rotated_by_another_process(root):
+    reader = RateHistoryStore(root, segment_points=SEGMENT_POINTS).series(PAIR)
+    assert reader.range()[0].size == 0
+    context = multiprocessing.get_context("fork")
+    start = context.Manager().Barrier(1)
+    with context.Pool(1) as pool:
+        accepted = pool.starmap_async(append_many, [(root, 0, start)]).get(WORKER_TIMEOUT_SECONDS)[0]
+    assert reader.info()["points"] == len(accepted)
+    assert reader.at(time.time()) == pytest.approx(accepted[-1][1], rel=RATE_HISTORY_LOG_TICK)
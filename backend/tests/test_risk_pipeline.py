@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from remitai.backend.api.v1.endpoints.transactions import (
+    get_onramp_service,
+    initiate_onramp_endpoint,
+    require_clean_risk_verdict,
+)
+from remitai.backend.api.v1.schemas.transaction_schemas import OnRampInitiateRequest
+from remitai.backend.services.fraud_detection_service import FraudDetectionService, sqlite_fraud_backend
+from remitai.backend.services.risk_pipeline import LatencyWindow, RiskPipeline
+
+
+def flag_mallory(request):
+    """Deep check marking any payment to "mallory" suspicious."""
+    return (1000, "Paying mallory.") if request["recipient_id"] == "mallory" else None
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    service = FraudDetectionService(backend=sqlite_fraud_backend(str(tmp_path / "fraud_state.sqlite3")))
+    return RiskPipeline(service_factory=lambda: service, deep_checks=[flag_mallory], fast_deadline=5.0)
+
+
+def assess_final(pipeline, user_id, amount, currency, recipient_id):
+    assessment_id = pipeline.assess(user_id, f"Send {amount} {currency} to {recipient_id}", amount, recipient_id,
+                                    currency)["assessment_id"]
+    assert pipeline.wait_for_final(assessment_id)["status"] == "final"
+    return assessment_id
+
+
+def require(pipeline, user_id, assessment_id, amount, currency, recipient_id):
+    """Status code require_clean_risk_verdict refuses with, or None when it lets the transfer through."""
+    try:
+        asyncio.run(require_clean_risk_verdict(pipeline, user_id, assessment_id, amount, currency, recipient_id))
+    except HTTPException as e:
+        return e.status_code
+    return None
+
+
+def test_older_clean_assessment_does_not_bypass_a_newer_suspicious_one(pipeline):
+    clean_id = assess_final(pipeline, "user_a", 100.0, "USD", "bob")
+    assess_final(pipeline, "user_a", 100.0, "USD", "mallory")
+    assert pipeline.authorize("user_a", clean_id, 100.0, "USD", "bob")["reason"] == "stale"
+    assert require(pipeline, "user_a", clean_id, 100.0, "USD", "bob") == 400
+    assert require(pipeline, "user_a", None, 100.0, "USD", "mallory") == 403
+
+
+def test_missing_verdict_fails_closed(pipeline):
+    assert pipeline.authorize("never_assessed", None, 10.0, "USD", "bob")["reason"] == "missing"
+    assert require(pipeline, "never_assessed", None, 10.0, "USD", "bob") == 403
+
+
+def test_verdict_covers_the_assessed_recipient_and_amount(pipeline):
+    assess_final(pipeline, "user_b", 1530.0, "NGN", "bob") # 1 USD at the mid rate
+    assert pipeline.authorize("user_b", None, 1.0, "USD", "carol")["reason"] == "mismatch"
+    assert pipeline.authorize("user_b", None, 1.5, "USDC", "bob")["reason"] == "mismatch"
+    assert require(pipeline, "user_b", None, 1.5, "USDC", "bob") == 403
+    assert "verdict" in pipeline.authorize("user_b", None, 1.0, "USDC", " Bob ")
+
+
+def test_verdict_authorizes_one_transfer(pipeline):
+    assessment_id = assess_final(pipeline, "user_c", 50.0, "USD", "bob")
+    assert require(pipeline, "user_c", assessment_id, 50.0, "USD", "bob") is None
+    assert require(pipeline, "user_c", assessment_id, 50.0, "USD", "bob") == 409
+
+
+def test_onramp_endpoint_checks_the_verdict(pipeline):
+    request = OnRampInitiateRequest(user_id="user_d", fiat_amount=1000.0, fiat_currency="KES", recipient_id="user_d")
+    with pytest.raises(HTTPException) as refused:
+        asyncio.run(initiate_onramp_endpoint(request, get_onramp_service(), pipeline))
+    assert refused.value.status_code == 403
+    assess_final(pipeline, "user_d", 1000.0, "KES", "user_d")
+    assert asyncio.run(initiate_onramp_endpoint(request, get_onramp_service(), pipeline)).success
+
+
+class BlockedService:
+    """Fast tier that does not finish until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def assess_transaction_risk(self, user_id, command_text, amount, recipient_id, currency):
+        self.release.wait(10)
+        return {"user_id": user_id, "is_suspicious": False, "risk_score": 0, "matched_rules": [], "reasons": [],
+                "timestamp": time.time()}
+
+
+def test_full_queue_does_not_wait_for_the_fast_tier():
+    service = BlockedService()
+    pipeline = RiskPipeline(service_factory=lambda: service, deep_checks=[], workers=0, queue_size=1,
+                            fast_deadline=0.01)
+    try:
+        pipeline.assess("user_e", "Send 5 USD to Bob", 5.0, "bob") # Fills the queue: no workers drain it
+        started = time.perf_counter()
+        verdict = pipeline.assess("user_e", "Send 5 USD to Bob", 5.0, "bob")
+        assert time.perf_counter() - started < 1.0
+        assert verdict["status"] == "pending"
+        assert pipeline.authorize("user_e", None, 5.0, "USD", "bob", timeout=0.0)["reason"] == "pending"
+    finally:
+        service.release.set()
+    final = pipeline.wait_for_final(verdict["assessment_id"])
+    assert final["status"] == "final" and final["deep_checks_skipped"]
+    assert pipeline.stats()["deep_skipped_queue_full"] == 1
+
+
+def test_latency_window_is_only_a_latency_window():
+    assert sorted(name for name in vars(LatencyWindow) if not name.startswith("_")) == ["add", "stats"]
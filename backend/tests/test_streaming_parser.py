@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from remitai.backend.benchmarks.nlp_corpus import build_corpus
+from remitai.backend.services.nlp_service import NLPIntentParser
+from remitai.backend.services.streaming_parser import STREAM_MAX_TRANSCRIPT_CHARS, StreamingIntentSession
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return NLPIntentParser()
+
+
+def full_snapshot(parser, session):
+    """What a session would compute from scratch on its current transcript."""
+    grammar, language = parser.native_grammar, session.language
+    entities = grammar.parse(session.transcript, language) if language and grammar.supports(language) else None
+    if entities is None:
+        entities = parser.extractor.extract(session.transcript.lower())
+    intent = parser.intent_classifier.predict(session.transcript)[0] if parser.intent_classifier else "payment"
+    return dict(entities, language=language, intent=intent)
+
+
+def test_carried_state_matches_full_reparse(parser):
+    rng = random.Random(7)
+    corpus = build_corpus(150)
+    for item in corpus:
+        session = StreamingIntentSession(parser)
+        words = f"{item['text']} {rng.choice(corpus)['text']} {rng.choice(corpus)['text']}".split()
+        i = 0
+        while i < len(words):
+            step = rng.randint(1, 3)
+            session.feed(" ".join(words[i:i + step]))
+            i += step
+            assert session._snapshot() == full_snapshot(parser, session)
+
+
+def test_incremental_intent_scores_match_predict(parser):
+    if parser.intent_classifier is None:
+        pytest.skip("intent model not available")
+    scores = parser.intent_classifier.incremental()
+    text = ""
+    for fragment in ["Nataka", "kutuma shilingi", "elfu kumi", "kwa Maria nchini", "Nigeria tafadhali"]:
+        scores.append(fragment)
+        text = f"{text} {fragment}".strip()
+        label, probability = scores.predict()
+        expected_label, expected_probability = parser.intent_classifier.predict(text)
+        assert label == expected_label
+        assert probability == pytest.approx(expected_probability, abs=2e-4)
+
+
+def test_replace_drops_carried_state(parser):
+    session = StreamingIntentSession(parser)
+    for fragment in ["Nataka kutuma shilingi elfu kumi kwa Maria nchini Nigeria", "tafadhali sana leo asubuhi"] * 3:
+        session.feed(fragment)
+    session.feed("send 500 usd to jean in ghana", replace=True)
+    assert session._snapshot() == full_snapshot(parser, session)
+
+
+def test_overflow_sends_truncated_event(parser):
+    session = StreamingIntentSession(parser)
+    session.feed("a" * (STREAM_MAX_TRANSCRIPT_CHARS - 10))
+    events = session.feed("send 30,000 naira to amina")
+    assert events[0] == {"type": "truncated", "max_chars": STREAM_MAX_TRANSCRIPT_CHARS, "dropped_chars": 17}
+    assert len(session.transcript) <= STREAM_MAX_TRANSCRIPT_CHARS
+    assert session.feed("in kenya")[0]["dropped_chars"] == len(" in kenya")
@@ -0,0 +1,49 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from remitai.backend.services.translation_cache import TranslationCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranslationCache(db_path=str(tmp_path / "translation_cache.sqlite3"), template_mode=True)
+
+
+def commits_during(cache, action) -> int:
+    statements = []
+    cache._db().set_trace_callback(statements.append)
+    try:
+        action()
+    finally:
+        cache._db().set_trace_callback(None)
+    return sum(1 for statement in statements if statement.strip().upper() == "COMMIT")
+
+
+def test_translate_many_commits_once_per_batch(cache):
+    texts = [f"phrase {chr(97 + i % 26)}{chr(97 + i // 26)} in yoruba" for i in range(300)] # 300 distinct requests
+    commits = commits_during(cache, lambda: cache.translate_many(
+        "yo", texts, lambda pending: [f"translated: {text}" for text in pending]))
+    assert commits == 1
+    reopened = TranslationCache(db_path=cache.db_path, template_mode=True)
+    assert [reopened.get("yo", text) for text in texts] == [f"translated: {text}" for text in texts]
+    assert reopened.stats()["disk_hits"] == len(texts)
+
+
+def test_put_many_writes_every_pair_in_one_commit(cache):
+    pairs = [(f"text {i}", f"translation {i}") for i in range(50)]
+    assert commits_during(cache, lambda: cache.put_many("ha", pairs)) == 1
+    assert [cache.get("ha", text) for text, _ in pairs] == [translation for _, translation in pairs]
+
+
+def test_template_fallbacks_are_counted_exactly_under_threads(cache):
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(16) as pool:
+            # The translator drops the placeholders, so every call falls back to the raw text
+            list(pool.map(lambda i: cache.translate("yo", f"Fi {i} Naira ranṣẹ", lambda text: "send money"), range(2000)))
+    finally:
+        sys.setswitchinterval(interval)
+    assert cache.stats()["template_fallbacks"] == 2000
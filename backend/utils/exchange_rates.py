@@ -1,70 +1,68 @@
-import requests
-import json
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
 
-# Mock data for initial development or if API fails
-MOCK_RATES = {
-    "NGN_USDC": {"price": "0.00065", "last_updated": time.time()},
-    "KES_USDC": {"price": "0.0077", "last_updated": time.time()},
-    "GHS_USDC": {"price": "0.0070", "last_updated": time.time()}, # Adjusted GHS for more variance
-    "USD_USDC": {"price": "1.0", "last_updated": time.time()},
-    # Inverse for USDC to fiat (less common for P2P direct quote but useful for conversion)
-    "USDC_NGN": {"price": "1530.00", "last_updated": time.time()},
-    "USDC_KES": {"price": "130.00", "last_updated": time.time()},
-    "USDC_GHS": {"price": "142.00", "last_updated": time.time()}
-}
+import numpy as np
+
+from ..services.rate_history import RATE_HISTORY
+from ..services.rate_provider import RATE_PROVIDER
+from .order_book import OrderBookSnapshot
+from .outbound_http import OUTBOUND_HTTP
 
 CACHE_DURATION = 300 # Cache duration in seconds (5 minutes)
 
-class ExchangeRateUtil:
-    def __init__(self, use_mock=False):
-        self.use_mock = use_mock
-        self.cache = MOCK_RATES if use_mock else {}
+# Process-wide rate cache (stale-while-revalidate with single-flight refresh).
+#
+# Every ExchangeRateUtil shares RATE_CACHE, so a pair is fetched once per process rather
+# than once per instance. What is cached per pair is a depth snapshot of the P2P book
+# (see utils/order_book.py): price and fillable quantity of the best ads, up to
+# BINANCE_P2P_DEPTH_PAGES pages. The pair's rate is the book's best price, and quotes for
+# a given amount - the volume-weighted price of the ads it would fill - are computed from
+# the cached book, never with a Binance call of their own. A lookup never waits on Binance once the pair has been seen:
+#   - younger than CACHE_DURATION - RATE_REFRESH_AHEAD_SECONDS: served from memory;
+#   - close to or past CACHE_DURATION but younger than RATE_MAX_STALE_SECONDS: served from
+#     memory while one background refresh runs on RATE_REFRESH_EXECUTOR;
+#   - older than RATE_MAX_STALE_SECONDS (upstream down for a long time) or never fetched:
+#     the caller joins the pair's refresh and waits at most RATE_FETCH_WAIT_SECONDS, then
+#     falls back to the mock rate.
+# Concurrent refreshes of a pair are coalesced into one request (single flight). A failed
+# refresh keeps the old rate, so a slow or failing upstream only makes rates staler, up
+# to the RATE_MAX_STALE_SECONDS bound. Every fetched best price is also appended to RATE_HISTORY
+# (see services/rate_history.py) under "<FIAT>_<ASSET>_<TRADE_TYPE>".
+RATE_REFRESH_AHEAD_SECONDS = 60 # Refresh this long before a rate expires
+RATE_MAX_STALE_SECONDS = 900 # Oldest rate ever served
+RATE_FETCH_WAIT_SECONDS = 2.0 # Longest a lookup waits for a pair it has no usable rate for
+RATE_REQUEST_TIMEOUT_SECONDS = 10 # Per Binance call, retries included; runs off the request path
+RATE_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fx-refresh")
+BINANCE_P2P_ROWS_PER_PAGE = 20 # Most ads the search returns per page
+BINANCE_P2P_DEPTH_PAGES = 5 # Pages fetched per refresh: a book of up to 100 ads
 
-    def _get_from_cache(self, pair: str):
-        if pair in self.cache:
-            cached_data = self.cache[pair]
-            if time.time() - cached_data.get("last_updated", 0) < CACHE_DURATION:
-                return float(cached_data["price"])
-        return None
+BINANCE_P2P_URL = "https://p2p.binance.com/bapi/c2c/v2/friendly/c2c/adv/search"
+BINANCE_P2P_HEADERS = {
+    "Content-Type": "application/json",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+}
 
-    def _update_cache(self, pair: str, price: float):
-        self.cache[pair] = {"price": str(price), "last_updated": time.time()}
+RateKey = Tuple[str, str, str] # (fiat, asset, trade_type)
 
-    def get_live_fx_rate_binance_p2p(self, fiat_currency: str, asset: str = "USDT", trade_type: str = "BUY"):
-        """
-        Fetches live P2P rates from Binance. 
-        Note: Binance P2P API is not officially public and might be unstable or require specific headers.
-        This is a conceptual implementation. For production, a reliable, official API is recommended.
-        For RemitAI, we are primarily interested in FIAT -> USDC (or USDT as proxy) and USDC -> FIAT.
-        If asset is USDC and trade_type is BUY, it means user is buying USDC with FIAT (e.g., NGN -> USDC).
-        If asset is USDC and trade_type is SELL, it means user is selling USDC for FIAT (e.g., USDC -> NGN).
-        """
-        if self.use_mock:
-            pair_key = f"{fiat_currency.upper()}_{asset.upper()}" if trade_type == "BUY" else f"{asset.upper()}_{fiat_currency.upper()}"
-            if pair_key in MOCK_RATES:
-                print(f"Using mock rate for {pair_key}")
-                return float(MOCK_RATES[pair_key]["price"])
-            else:
-                print(f"Mock rate for {pair_key} not found, returning None.")
-                return None
 
-        pair_key_cache = f"{fiat_currency.upper()}_{asset.upper()}_{trade_type}" # More specific cache key
-        cached_rate = self._get_from_cache(pair_key_cache)
-        if cached_rate is not None:
-            print(f"Using cached rate for {pair_key_cache}: {cached_rate}")
-            return cached_rate
-
-        # This is a simplified conceptual API call structure for Binance P2P
-        # The actual API endpoint and parameters can change and are not officially documented for public use.
-        url = "https://p2p.binance.com/bapi/c2c/v2/friendly/c2c/adv/search"
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
-        }
+def fetch_binance_p2p_depth(fiat_currency: str, asset: str, trade_type: str) -> Optional[OrderBookSnapshot]:
+    """Fetches up to BINANCE_P2P_DEPTH_PAGES pages of P2P ads from Binance as a depth snapshot.
+
+    Returns None when there are no ads or the API reports an error on the first page; an
+    error on a later page only makes the book shallower. Raises requests.exceptions.RequestException
+    when Binance cannot be reached for the first page (CircuitOpenError while its breaker is open).
+    """
+    # This is a simplified conceptual API call structure for Binance P2P
+    # The actual API endpoint and parameters can change and are not officially documented for public use.
+    print(f"Attempting to fetch live P2P order book for {fiat_currency}/{asset} ({trade_type}) from Binance...")
+    ads = []
+    for page in range(1, BINANCE_P2P_DEPTH_PAGES + 1):
         payload = {
-            "page": 1,
-            "rows": 5, # Fetch a few ads to get an idea of the rate
+            "page": page,
+            "rows": BINANCE_P2P_ROWS_PER_PAGE,
             "payTypes": [], # Can specify payment types if needed
             "countries": [], # Can specify country if needed
             "tradeType": trade_type, # BUY (user buys asset with fiat) or SELL (user sells asset for fiat)
@@ -72,46 +70,243 @@ class ExchangeRateUtil:
             "fiat": fiat_currency, # e.g., NGN, KES, GHS
             "publisherType": None # or "merchant"
         }
-
         try:
-            print(f"Attempting to fetch live P2P rate for {fiat_currency}/{asset} ({trade_type}) from Binance...")
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
+            response = OUTBOUND_HTTP.request("binance_p2p", "POST", BINANCE_P2P_URL, deadline_seconds=RATE_REQUEST_TIMEOUT_SECONDS,
+                                             headers=BINANCE_P2P_HEADERS, json=payload)
             response.raise_for_status() # Raise an exception for bad status codes
             data = response.json()
-            
-            if data.get("code") == "000000" and data.get("data"):
-                ads = data["data"]
-                if ads:
-                    # Get the price from the first (often best) ad
-                    # Prices can vary, so averaging or selecting the best might be needed
-                    price = float(ads[0]["adv"]["price"])
-                    print(f"Live rate for {fiat_currency}/{asset} ({trade_type}): {price}")
-                    self._update_cache(pair_key_cache, price)
-                    return price
-                else:
-                    print(f"No P2P ads found for {fiat_currency}/{asset} ({trade_type}).")
-                    return None
-            else:
-                print(f"Error from Binance P2P API: {data.get('message', 'Unknown error')}")
+        except Exception as e:
+            if page == 1:
+                raise
+            print(f"Error fetching page {page} of the P2P order book for {fiat_currency}/{asset} ({trade_type}): {e}")
+            break
+        if data.get("code") != "000000":
+            print(f"Error from Binance P2P API: {data.get('message', 'Unknown error')}")
+            if page == 1:
                 return None
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching live P2P rate: {e}")
-            print("Falling back to mock rates for this request if available.")
-            # Fallback to mock if API fails for this specific request
-            pair_key_mock = f"{fiat_currency.upper()}_{asset.upper()}" if trade_type == "BUY" else f"{asset.upper()}_{fiat_currency.upper()}"
-            if pair_key_mock in MOCK_RATES:
-                return float(MOCK_RATES[pair_key_mock]["price"])
+            break
+        page_ads = data.get("data") or []
+        ads.extend(page_ads)
+        if len(page_ads) < BINANCE_P2P_ROWS_PER_PAGE: # Last page
+            break
+
+    book = OrderBookSnapshot.from_binance_ads(ads, trade_type)
+    if not len(book):
+        print(f"No P2P ads found for {fiat_currency}/{asset} ({trade_type}).")
+        return None
+    print(f"Live order book for {fiat_currency}/{asset} ({trade_type}): best {book.best_price}, "
+          f"{len(book)} ads, {book.depth_quantity:.2f} {asset} deep")
+    return book
+
+
+class RateCache:
+    """Stale-while-revalidate cache of upstream rates with one refresh in flight per pair."""
+
+    def __init__(self, fetch: Callable[..., Any] = fetch_binance_p2p_depth,
+                 ttl_seconds: float = CACHE_DURATION,
+                 refresh_ahead_seconds: float = RATE_REFRESH_AHEAD_SECONDS,
+                 max_stale_seconds: float = RATE_MAX_STALE_SECONDS,
+                 fetch_wait_seconds: float = RATE_FETCH_WAIT_SECONDS,
+                 executor: ThreadPoolExecutor = RATE_REFRESH_EXECUTOR,
+                 on_rate: Optional[Callable[[RateKey, Any, float], None]] = None):
+        """
+        Args:
+            fetch: fetch(*key) returns the rate (an OrderBookSnapshot by default), None if upstream
+                has none, or raises.
+            ttl_seconds: Age after which a rate is stale (still served, refreshed in the background).
+            refresh_ahead_seconds: How long before ttl_seconds the background refresh starts.
+            max_stale_seconds: Age after which a rate is no longer served.
+            fetch_wait_seconds: Longest get() waits when it has no servable rate.
+            executor: Runs the refreshes.
+            on_rate: Called with (key, rate, fetched_at) for every rate fetched, on the refresh thread.
+        """
+        self.fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.fetch_wait_seconds = fetch_wait_seconds
+        self.executor = executor
+        self.on_rate = on_rate
+        self._entries: Dict[RateKey, Tuple[Any, float]] = {} # key -> (rate, fetched_at)
+        self._in_flight: Dict[RateKey, Future] = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            "fresh_hits": 0,
+            "stale_hits": 0, # Served past the refresh point while a refresh runs
+            "misses": 0, # Nothing servable: the caller waited for a refresh
+            "miss_timeouts": 0, # ... and gave up after fetch_wait_seconds
+            "refreshes": 0, # Upstream requests started
+            "coalesced": 0, # Refreshes asked for while one was already in flight
+            "refresh_failures": 0,
+        }
+
+    def _refresh_locked(self, key: RateKey) -> Future:
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+            return future
+        self.counters["refreshes"] += 1
+        future = self.executor.submit(self._run_refresh, key)
+        self._in_flight[key] = future
+        return future
+
+    def _run_refresh(self, key: RateKey) -> Any:
+        rate = None
+        try:
+            rate = self.fetch(*key)
+        except Exception as e:
+            print(f"Error fetching live P2P rate for {key}: {e}")
+        fetched_at = time.time()
+        with self._lock:
+            if rate is not None:
+                self._entries[key] = (rate, fetched_at)
+            else:
+                self.counters["refresh_failures"] += 1
+            self._in_flight.pop(key, None)
+        if rate is not None and self.on_rate is not None:
+            try:
+                self.on_rate(key, rate, fetched_at)
+            except Exception as e:
+                print(f"Error recording rate for {key}: {e}")
+        return rate
+
+    def get(self, key: RateKey) -> Any:
+        """Rate for key, from memory whenever a rate younger than max_stale_seconds exists.
+
+        Returns None when there is no such rate and no refresh delivers one within
+        fetch_wait_seconds.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                rate, fetched_at = entry
+                age = time.time() - fetched_at
+                if age < self.ttl_seconds - self.refresh_ahead_seconds:
+                    self.counters["fresh_hits"] += 1
+                    return rate
+                if age < self.max_stale_seconds:
+                    self.counters["stale_hits"] += 1
+                    self._refresh_locked(key)
+                    return rate
+            self.counters["misses"] += 1
+            future = self._refresh_locked(key)
+        try:
+            return future.result(timeout=self.fetch_wait_seconds)
+        except FutureTimeoutError:
+            with self._lock:
+                self.counters["miss_timeouts"] += 1
             return None
 
+    def prefetch(self, keys: Iterable[RateKey]):
+        """Starts refreshes of keys without waiting, e.g. to warm the cache at startup."""
+        with self._lock:
+            for key in keys:
+                self._refresh_locked(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["in_flight"] = len(self._in_flight)
+            lookups = stats["fresh_hits"] + stats["stale_hits"] + stats["misses"]
+            stats["memory_hit_rate"] = round((stats["fresh_hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drops every cached rate (counters and refreshes in flight are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+
+def record_rate_history(key: RateKey, book: OrderBookSnapshot, fetched_at: float):
+    RATE_HISTORY.append("_".join(key), fetched_at, book.best_price)
+
+
+RATE_CACHE = RateCache(on_rate=record_rate_history)
+
+
+def _mock_rate(fiat_currency: str, asset: str, trade_type: str) -> Optional[float]:
+    """Mock P2P price from RATE_PROVIDER: fiat paid per unit of asset (BUY) or received for it (SELL)."""
+    return RATE_PROVIDER.rate(asset, fiat_currency, "ask" if trade_type == "BUY" else "bid")
+
+
+def _mock_order_book(fiat_currency: str, asset: str, trade_type: str) -> Optional[OrderBookSnapshot]:
+    """Book of unlimited depth at the mock rate, so mock quotes do not depend on the amount."""
+    rate = _mock_rate(fiat_currency, asset, trade_type)
+    return OrderBookSnapshot.flat(rate, trade_type) if rate is not None else None
+
+
+class ExchangeRateUtil:
+    def __init__(self, use_mock=False, rate_cache: RateCache = None):
+        self.use_mock = use_mock
+        self.rate_cache = rate_cache or RATE_CACHE
+
+    def get_p2p_order_book(self, fiat_currency: str, asset: str = "USDT", trade_type: str = "BUY") -> Optional[OrderBookSnapshot]:
+        """Depth snapshot of the pair's P2P ads from RATE_CACHE, or a flat book at the mock rate."""
+        if self.use_mock:
+            pair_key = f"{fiat_currency.upper()}/{asset.upper()} ({trade_type})"
+            book = _mock_order_book(fiat_currency, asset, trade_type)
+            if book is not None:
+                print(f"Using mock rate for {pair_key}")
+            else:
+                print(f"Mock rate for {pair_key} not found, returning None.")
+            return book
+
+        book = self.rate_cache.get((fiat_currency.upper(), asset.upper(), trade_type))
+        if book is not None:
+            return book
+        # Fallback to mock if no live rate is available in time for this request
+        print(f"No live P2P rate for {fiat_currency}/{asset} ({trade_type}); falling back to mock rates if available.")
+        return _mock_order_book(fiat_currency, asset, trade_type)
+
+    def get_live_fx_rate_binance_p2p(self, fiat_currency: str, asset: str = "USDT", trade_type: str = "BUY"):
+        """
+        Fetches live P2P rates from Binance. 
+        Note: Binance P2P API is not officially public and might be unstable or require specific headers.
+        This is a conceptual implementation. For production, a reliable, official API is recommended.
+        For RemitAI, we are primarily interested in FIAT -> USDC (or USDT as proxy) and USDC -> FIAT.
+        If asset is USDC and trade_type is BUY, it means user is buying USDC with FIAT (e.g., NGN -> USDC).
+        If asset is USDC and trade_type is SELL, it means user is selling USDC for FIAT (e.g., USDC -> NGN).
+        The rate is the best price of the pair's cached order book, so it only holds for small
+        amounts; use quote_p2p for a given amount.
+        """
+        book = self.get_p2p_order_book(fiat_currency, asset, trade_type)
+        return book.best_price if book is not None else None
+
+    def quote_p2p(self, fiat_currency: str, amounts, asset: str = "USDC", trade_type: str = "BUY", amount_in: str = "fiat"):
+        """Volume-weighted P2P quotes for one amount or an array of amounts, from the cached order book.
+
+        amount_in is "fiat" for amounts of fiat_currency paid (BUY) or to be received (SELL), or
+        "asset" for amounts of the asset. Returns the fields of OrderBookSnapshot.quote_notional
+        (numbers for a single amount, arrays for several) plus the book's best_price, ads and
+        fetched_at, or an error dict.
+        """
+        if amount_in not in ("fiat", "asset"):
+            return {"error": f"amount_in must be 'fiat' or 'asset', not {amount_in!r}"}
+        book = self.get_p2p_order_book(fiat_currency, asset, trade_type)
+        if book is None:
+            return {"error": f"No rate available for {fiat_currency}/{asset} ({trade_type})"}
+        quote = book.quote_notional(amounts) if amount_in == "fiat" else book.quote_quantity(amounts)
+        if np.ndim(amounts) == 0:
+            quote = {field: value.item() for field, value in quote.items()}
+        quote.update(best_price=book.best_price, ads=len(book), fetched_at=book.fetched_at)
+        return quote
+
     def convert_to_usdc(self, amount: float, from_currency: str):
         """Converts a given amount of local currency to USDC."""
         if from_currency.upper() == "USDC":
             return amount
         
-        # We are buying USDC with from_currency
-        rate = self.get_live_fx_rate_binance_p2p(fiat_currency=from_currency, asset="USDC", trade_type="BUY")
-        if rate and rate > 0: # Rate here is how much FIAT for 1 USDC
-            return amount / rate 
+        # We are buying USDC with from_currency, through as many ads as the amount needs
+        book = self.get_p2p_order_book(fiat_currency=from_currency, asset="USDC", trade_type="BUY")
+        if book is not None: # Prices here are how much FIAT for 1 USDC
+            quote = book.quote_notional(amount)
+            usdc = float(quote["quantity"])
+            if not quote["fully_filled"]:
+                worst_price = float(quote["worst_price"])
+                print(f"{amount} {from_currency} is more than the P2P book holds; pricing the rest at its deepest ad ({worst_price}).")
+                usdc += (amount - float(quote["notional"])) / worst_price
+            return usdc
         print(f"Could not get conversion rate for {from_currency} to USDC.")
         return None
 
@@ -120,10 +315,16 @@ class ExchangeRateUtil:
         if to_currency.upper() == "USDC":
             return usdc_amount
         
-        # We are selling USDC for to_currency
-        rate = self.get_live_fx_rate_binance_p2p(fiat_currency=to_currency, asset="USDC", trade_type="SELL")
-        if rate: # Rate here is how much FIAT for 1 USDC
-            return usdc_amount * rate
+        # We are selling USDC for to_currency, through as many ads as the amount needs
+        book = self.get_p2p_order_book(fiat_currency=to_currency, asset="USDC", trade_type="SELL")
+        if book is not None: # Prices here are how much FIAT for 1 USDC
+            quote = book.quote_quantity(usdc_amount)
+            fiat = float(quote["notional"])
+            if not quote["fully_filled"]:
+                worst_price = float(quote["worst_price"])
+                print(f"{usdc_amount} USDC is more than the P2P book holds; pricing the rest at its deepest ad ({worst_price}).")
+                fiat += (usdc_amount - float(quote["quantity"])) * worst_price
+            return fiat
         print(f"Could not get conversion rate for USDC to {to_currency}.")
         return None
 
@@ -170,6 +371,13 @@ if __name__ == "__main__":
     else:
         print(f"Could not fetch rate to BUY USDC with NGN.\n")
 
+    print("--- Amount-Aware Quotes (BUY USDC with NGN) ---")
+    quotes = exchange_util.quote_p2p("NGN", [10000, 1000000, 10000000], asset="USDC", trade_type="BUY")
+    if "error" not in quotes:
+        print(f"Average NGN per USDC for 10k / 1M / 10M NGN: {quotes['average_price']}\n")
+    else:
+        print(f"{quotes['error']}\n")
+
     print("--- Direct Rate Fetching Example (SELL USDC for KES) ---")
     rate_usdc_kes_sell = exchange_util.get_live_fx_rate_binance_p2p(fiat_currency="KES", asset="USDC", trade_type="SELL")
     if rate_usdc_kes_sell:
@@ -0,0 +1,126 @@
+import math
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# Depth snapshots of one side of a P2P order book, and amount-aware quotes from them.
+#
+# A snapshot keeps the ads' prices (fiat per unit of asset) best first - lowest first
+# when the user buys the asset, highest first when they sell it - with the quantity of
+# asset each ad can still fill, plus the cumulative quantity and notional (fiat) down the
+# book. Quoting walks the book as a market order would: an amount fills the best ads
+# first and the quote is the volume-weighted price of what it took. With the cumulative
+# arrays that walk is one searchsorted per amount, so a whole array of amounts is quoted
+# in a few vectorized operations and never goes back to the exchange.
+# Amounts beyond the book's depth are quoted for the part the book can fill
+# (fully_filled is False).
+
+ORDER_BOOK_SIDES = ("BUY", "SELL") # As Binance P2P's tradeType: the user buys or sells the asset
+
+
+class OrderBookSnapshot:
+    """One side of an order book at a point in time, best price first."""
+
+    __slots__ = ("side", "prices", "quantities", "fetched_at", "_cum_quantity", "_cum_notional")
+
+    def __init__(self, prices: Iterable[float], quantities: Iterable[float], side: str = "BUY",
+                 fetched_at: Optional[float] = None):
+        if side not in ORDER_BOOK_SIDES:
+            raise ValueError(f"Unknown order book side {side!r}")
+        prices = np.asarray(prices, dtype=np.float64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        keep = (prices > 0) & (quantities > 0)
+        prices, quantities = prices[keep], quantities[keep]
+        order = np.argsort(prices if side == "BUY" else -prices, kind="stable")
+        self.side = side
+        self.prices = prices[order]
+        self.quantities = quantities[order]
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self._cum_quantity = np.concatenate(([0.0], np.cumsum(self.quantities)))
+        self._cum_notional = np.concatenate(([0.0], np.cumsum(self.prices * self.quantities)))
+
+    @classmethod
+    def flat(cls, price: float, side: str = "BUY") -> "OrderBookSnapshot":
+        """A book of unlimited depth at one price (for mock rates)."""
+        return cls([price], [math.inf], side)
+
+    @classmethod
+    def from_binance_ads(cls, ads: Iterable[dict], side: str, fetched_at: Optional[float] = None) -> "OrderBookSnapshot":
+        """Book from Binance P2P ad search results ({"adv": {"price", "surplusAmount", ...}} each).
+
+        An ad fills at most its remaining asset (surplusAmount) and at most its per-order
+        fiat limit (maxSingleTransAmount) worth of it.
+        """
+        prices, quantities = [], []
+        for ad in ads:
+            adv = ad.get("adv") or {}
+            try:
+                price = float(adv["price"])
+                quantity = float(adv.get("surplusAmount") or adv.get("tradableQuantity") or 0)
+                max_fiat = float(adv.get("maxSingleTransAmount") or 0)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if max_fiat > 0 and price > 0:
+                quantity = min(quantity, max_fiat / price)
+            prices.append(price)
+            quantities.append(quantity)
+        return cls(prices, quantities, side, fetched_at)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def best_price(self) -> Optional[float]:
+        return float(self.prices[0]) if len(self.prices) else None
+
+    @property
+    def depth_quantity(self) -> float:
+        return float(self._cum_quantity[-1])
+
+    @property
+    def depth_notional(self) -> float:
+        return float(self._cum_notional[-1])
+
+    def _result(self, quantity: np.ndarray, notional: np.ndarray, level: np.ndarray, fully_filled: np.ndarray) -> Dict[str, np.ndarray]:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            average = np.where(quantity > 0, notional / quantity, self.prices[0])
+        return {
+            "quantity": quantity, # Asset filled
+            "notional": notional, # Fiat paid (BUY) or received (SELL)
+            "average_price": average, # notional / quantity; the best price for zero amounts
+            "worst_price": self.prices[level], # Price of the last ad the amount reached
+            "levels": level + 1, # Ads used
+            "fully_filled": fully_filled,
+        }
+
+    def quote_quantity(self, quantities) -> Dict[str, np.ndarray]:
+        """Quotes for buying/selling each of quantities of the asset (arrays, one entry per amount)."""
+        if not len(self.prices):
+            raise ValueError("Cannot quote from an empty order book")
+        wanted = np.asarray(quantities, dtype=np.float64)
+        filled = np.minimum(wanted, self._cum_quantity[-1])
+        level = np.clip(np.searchsorted(self._cum_quantity, filled, side="left") - 1, 0, len(self.prices) - 1)
+        notional = self._cum_notional[level] + (filled - self._cum_quantity[level]) * self.prices[level]
+        return self._result(filled, notional, level, filled >= wanted)
+
+    def quote_notional(self, notionals) -> Dict[str, np.ndarray]:
+        """Quotes for spending (BUY) or receiving (SELL) each of notionals in fiat."""
+        if not len(self.prices):
+            raise ValueError("Cannot quote from an empty order book")
+        wanted = np.asarray(notionals, dtype=np.float64)
+        filled = np.minimum(wanted, self._cum_notional[-1])
+        level = np.clip(np.searchsorted(self._cum_notional, filled, side="left") - 1, 0, len(self.prices) - 1)
+        quantity = self._cum_quantity[level] + (filled - self._cum_notional[level]) / self.prices[level]
+        return self._result(quantity, filled, level, filled >= wanted)
+
+    def to_dict(self, levels: int = 20) -> dict:
+        return {
+            "side": self.side,
+            "fetched_at": self.fetched_at,
+            "ads": len(self.prices),
+            "best_price": self.best_price,
+            "depth_quantity": self.depth_quantity,
+            "depth_notional": self.depth_notional,
+            "levels": [[float(p), float(q)] for p, q in zip(self.prices[:levels], self.quantities[:levels])],
+        }
@@ -0,0 +1,239 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared client for every outbound HTTP call (Binance rates, Google Translate, SMS and
+# WhatsApp gateways).
+#
+# One requests.Session holds keep-alive connection pools per host (up to
+# OUTBOUND_POOL_MAXSIZE connections each), so repeated calls to a host skip the TCP and
+# TLS handshakes. Each call:
+#   - names the dependency it belongs to; every dependency has its own CircuitBreaker,
+#     which fails calls immediately (CircuitOpenError) after
+#     OUTBOUND_BREAKER_FAILURE_THRESHOLD consecutive failed calls (a call fails when its
+#     last attempt does), and lets one probe call through after OUTBOUND_BREAKER_RESET_SECONDS;
+#   - has a deadline covering all of its attempts: each attempt's timeout is what is left
+#     of it, and no retry starts once it has passed;
+#   - is retried on connection errors, timeouts and 429/5xx answers, after a full-jitter
+#     backoff (uniform between 0 and OUTBOUND_BACKOFF_BASE_SECONDS * 2**attempt), which
+#     keeps retries from many callers from arriving together. Calls that are not safe to
+#     repeat (idempotent=False, e.g. sending an SMS) are only retried when the connection
+#     could not be opened, i.e. the request never left.
+# Calls block the caller's thread. Async endpoints already run the code that calls out
+# (translation, rate refreshes) on their own bounded executors with deadlines, so there is
+# no separate async entry point.
+
+OUTBOUND_POOL_HOSTS = 16 # Hosts whose connection pools are kept
+OUTBOUND_POOL_MAXSIZE = 32 # Keep-alive connections per host
+OUTBOUND_DEFAULT_DEADLINE_SECONDS = 10.0
+OUTBOUND_CONNECT_TIMEOUT_SECONDS = 3.05
+OUTBOUND_MAX_RETRIES = 2
+OUTBOUND_BACKOFF_BASE_SECONDS = 0.2
+OUTBOUND_BACKOFF_MAX_SECONDS = 2.0
+OUTBOUND_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+OUTBOUND_BREAKER_FAILURE_THRESHOLD = 5 # Consecutive failed calls that open a breaker
+OUTBOUND_BREAKER_RESET_SECONDS = 30.0 # Open time before a probe call is let through
+OUTBOUND_LATENCY_SAMPLES = 1024 # Recent calls per host kept for percentiles
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without calling out while a dependency's breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failed calls -> half-open (one probe) -> closed or open again."""
+
+    def __init__(self, failure_threshold: int = OUTBOUND_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = OUTBOUND_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.counters = {"opened": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def record(self, success: bool):
+        with self._lock:
+            self.probe_in_flight = False
+            if success:
+                self.state = "closed"
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.counters["opened"] += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters, state=self.state, consecutive_failures=self.consecutive_failures)
+
+
+class _HostStats:
+    __slots__ = ("requests", "attempts", "retries", "errors", "latencies")
+
+    def __init__(self):
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.errors = 0 # Calls that ended in an exception or a retryable status, or were rejected
+        self.latencies = deque(maxlen=OUTBOUND_LATENCY_SAMPLES) # Seconds per call, retries included
+
+
+class OutboundHTTPClient:
+    """Pooled requests.Session with deadlines, jittered retries and a breaker per dependency."""
+
+    def __init__(self, pool_hosts: int = OUTBOUND_POOL_HOSTS, pool_maxsize: int = OUTBOUND_POOL_MAXSIZE):
+        """
+        Args:
+            pool_hosts: Hosts whose connection pools are kept (least recently used are closed).
+            pool_maxsize: Keep-alive connections kept per host.
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._hosts: Dict[str, _HostStats] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, dependency: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(dependency)
+            if breaker is None:
+                breaker = self._breakers[dependency] = CircuitBreaker()
+            return breaker
+
+    def _host_stats(self, url: str) -> _HostStats:
+        host = urlsplit(url).netloc
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None:
+                stats = self._hosts[host] = _HostStats()
+            return stats
+
+    def request(self, dependency: str, method: str, url: str,
+                deadline_seconds: float = OUTBOUND_DEFAULT_DEADLINE_SECONDS,
+                max_retries: int = OUTBOUND_MAX_RETRIES, idempotent: bool = True, **kwargs) -> requests.Response:
+        """Sends a request for dependency, retrying within deadline_seconds.
+
+        kwargs go to requests (params, json, headers, ...). Returns the last response, which
+        may still have an error status; raises CircuitOpenError while the breaker is open and
+        the last requests exception when every attempt failed.
+        """
+        breaker = self.breaker(dependency)
+        host = self._host_stats(url)
+        started = time.monotonic()
+        deadline = started + deadline_seconds
+        attempt = 0
+        if not breaker.allow():
+            with self._lock:
+                host.requests += 1
+                host.errors += 1
+            raise CircuitOpenError(f"Circuit open for {dependency}")
+        with self._lock:
+            host.requests += 1
+        succeeded = False
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                with self._lock:
+                    host.attempts += 1
+                try:
+                    response = self.session.request(
+                        method, url, timeout=(min(OUTBOUND_CONNECT_TIMEOUT_SECONDS, remaining), remaining), **kwargs
+                    )
+                except requests.exceptions.RequestException as e:
+                    retryable = isinstance(e, requests.exceptions.ConnectTimeout) or (
+                        idempotent and isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                    )
+                    if not retryable or not self._backoff(attempt, max_retries, deadline):
+                        raise
+                else:
+                    failed = response.status_code in OUTBOUND_RETRY_STATUSES
+                    if not failed or not idempotent or not self._backoff(attempt, max_retries, deadline):
+                        succeeded = not failed
+                        return response
+                    response.close()
+                attempt += 1
+                with self._lock:
+                    host.retries += 1
+        finally:
+            breaker.record(succeeded)
+            with self._lock:
+                if not succeeded:
+                    host.errors += 1
+                host.latencies.append(time.monotonic() - started)
+
+    @staticmethod
+    def _backoff(attempt: int, max_retries: int, deadline: float) -> bool:
+        """Sleeps before retry number attempt + 1; False when no retry is left or it would miss the deadline."""
+        if attempt >= max_retries:
+            return False
+        delay = random.uniform(0, min(OUTBOUND_BACKOFF_MAX_SECONDS, OUTBOUND_BACKOFF_BASE_SECONDS * 2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """Connections opened and idle per host, read from the urllib3 pools."""
+        pools = {}
+        for adapter in set(self.session.adapters.values()):
+            manager = adapter.poolmanager
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is None:
+                    continue
+                host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                pools[host] = {
+                    "connections_opened": pool.num_connections,
+                    "idle_connections": pool.pool.qsize() if pool.pool is not None else 0,
+                }
+        return pools
+
+    def stats(self) -> Dict[str, Any]:
+        pools = self._pool_stats()
+        with self._lock:
+            hosts = {}
+            for host, stats in self._hosts.items():
+                latencies = sorted(stats.latencies)
+                pick = (lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3, 3)) \
+                    if latencies else (lambda q: 0.0)
+                hosts[host] = {
+                    "requests": stats.requests,
+                    "attempts": stats.attempts,
+                    "retries": stats.retries,
+                    "errors": stats.errors,
+                    "p50_ms": pick(0.50),
+                    "p95_ms": pick(0.95),
+                    "p99_ms": pick(0.99),
+                    **pools.get(host, {"connections_opened": 0, "idle_connections": 0}),
+                }
+            breakers = dict(self._breakers)
+        return {"hosts": hosts, "dependencies": {name: breaker.stats() for name, breaker in breakers.items()}}
+
+
+OUTBOUND_HTTP = OutboundHTTPClient()